@@ -3,8 +3,9 @@ import { type ClientSchema, a, defineData } from '@aws-amplify/backend';
 /**
  * WECARE.DIGITAL DynamoDB Schema
  * 
- * 12 Tables with PAY_PER_REQUEST billing mode
- * TTL enabled on: Messages (30d), DLQMessages (7d), AuditLogs (180d), RateLimitTrackers (24h), VoiceCalls (90d)
+ * 17 Tables with PAY_PER_REQUEST billing mode
+ * TTL enabled on: Messages (30d), DLQMessages (7d), AuditLogs (180d), RateLimitTrackers (24h), VoiceCalls (90d),
+ * AIResponseCache (6h), PaymentEvents (7d), SystemEvents (90d)
  */
 const schema = a.schema({
   // Table 1: Contacts - Contact records with opt-in preferences
@@ -72,11 +73,19 @@ const schema = a.schema({
       totalRecipients: a.integer(),
       sentCount: a.integer().default(0),
       failedCount: a.integer().default(0),
+      suppressedCount: a.integer().default(0), // opted-out / invalid recipients dropped at creation
       status: a.enum(['PENDING', 'IN_PROGRESS', 'PAUSED', 'COMPLETED', 'CANCELLED', 'FAILED']),
+      phoneNumberId: a.string(),
+      phoneNumberIds: a.string().array(), // multi-number jobs: sender pool
+      senderCounts: a.json(), // multi-number jobs: recipients per number
       createdAt: a.datetime(),
+      createdMonth: a.string(), // YYYY-MM time index bucket
       updatedAt: a.datetime(),
     })
     .identifier(['jobId'])
+    .secondaryIndexes((index) => [
+      index('createdMonth').sortKeys(['createdAt']).name('createdMonth-createdAt-index'),
+    ])
     .authorization((allow) => [allow.authenticated()]),
 
   // Table 4: BulkRecipients - Individual recipient status per job
@@ -85,7 +94,9 @@ const schema = a.schema({
       jobId: a.string().required(),
       recipientId: a.string().required(),
       contactId: a.string().required(),
-      status: a.enum(['PENDING', 'SENT', 'FAILED']),
+      phoneNumberId: a.string(), // sending number assigned by the sender pool
+      status: a.enum(['PENDING', 'SENT', 'FAILED', 'SUPPRESSED']),
+      suppressionReason: a.string(), // OPTED_OUT | INVALID_ADDRESS
       sentAt: a.datetime(),
       errorDetails: a.string(),
     })
@@ -130,9 +141,14 @@ const schema = a.schema({
       retryCount: a.integer().default(0),
       lastAttemptAt: a.datetime(),
       payload: a.string(),
+      createdAt: a.integer(),
+      createdMonth: a.string(), // YYYY-MM time index bucket
       expiresAt: a.integer(), // TTL: Unix epoch seconds (7 days)
     })
     .identifier(['dlqMessageId'])
+    .secondaryIndexes((index) => [
+      index('createdMonth').sortKeys(['createdAt']).name('createdMonth-createdAt-index'),
+    ])
     .authorization((allow) => [allow.authenticated()]),
 
   // Table 8: AuditLogs - System audit trail (TTL: 180 days)
@@ -169,8 +185,9 @@ const schema = a.schema({
   RateLimitTracker: a
     .model({
       channel: a.string().required(),
-      windowStart: a.string().required(),
+      windowStart: a.string().required(), // '<epoch>' per second, 'm#<epoch>' per minute, 'h#<epoch>' per hour
       messageCount: a.integer().default(0),
+      // Per-second rows also carry lane_transactional / lane_conversational / lane_marketing and overflowCount counts
       lastUpdatedAt: a.integer(), // TTL: Unix epoch seconds (24 hours)
     })
     .identifier(['channel', 'windowStart'])
@@ -201,6 +218,7 @@ const schema = a.schema({
       recordingUrl: a.string(),
       providerCallId: a.string(),
       createdAt: a.datetime(),
+      createdMonth: a.string(), // YYYY-MM time index bucket
       updatedAt: a.datetime(),
       expiresAt: a.integer(), // TTL: Unix epoch seconds (90 days)
     })
@@ -208,8 +226,101 @@ const schema = a.schema({
     .secondaryIndexes((index) => [
       index('contactId'),
       index('phoneNumber'),
+      index('createdMonth').sortKeys(['createdAt']).name('createdMonth-createdAt-index'),
+    ])
+    .authorization((allow) => [allow.authenticated()]),
+
+  // Table 13: AIResponseCache - Cached Bedrock answers (TTL: 6 hours)
+  AIResponseCache: a
+    .model({
+      cacheKey: a.string().required(), // v<version>#<kind>#<kbId>#<lang>#<sha256>
+      response: a.string(),
+      kind: a.string(),
+      kbId: a.string(),
+      language: a.string(),
+      createdAt: a.integer(),
+      expiresAt: a.integer(), // TTL: Unix epoch seconds (6 hours)
+    })
+    .identifier(['cacheKey'])
+    .authorization((allow) => [allow.authenticated()]),
+
+  // Table 14: PaymentEvents - Raw Razorpay webhook events, one per event id (TTL: 7 days)
+  PaymentEvent: a
+    .model({
+      eventId: a.string().required(), // x-razorpay-event-id
+      eventType: a.string(),
+      paymentKey: a.string(), // Razorpay order id, else payment id
+      pendingPaymentKey: a.string(), // Set until processed (sparse index)
+      status: a.enum(['pending', 'processed']),
+      eventCreatedAt: a.integer(),
+      receivedAt: a.float(),
+      processedAt: a.integer(),
+      payload: a.string(),
+      expiresAt: a.integer(), // TTL: Unix epoch seconds (7 days)
+    })
+    .identifier(['eventId'])
+    .secondaryIndexes((index) => [
+      index('pendingPaymentKey').sortKeys(['receivedAt']).name('pendingPaymentKey-receivedAt-index'),
     ])
     .authorization((allow) => [allow.authenticated()]),
+
+  // Table 15: SystemEvents - WhatsApp account event log, newest first per type (TTL: 90 days)
+  SystemEvent: a
+    .model({
+      eventType: a.string().required(), // template_status | phone_quality | account_update
+      eventKey: a.string().required(), // '<epoch ms>#<random>'
+      timestamp: a.integer(),
+      data: a.json(),
+      requestId: a.string(),
+      expiresAt: a.integer(), // TTL: Unix epoch seconds (90 days)
+    })
+    .identifier(['eventType', 'eventKey'])
+    .authorization((allow) => [allow.authenticated()]),
+
+  // Table 16: TemplateCatalog - WhatsApp templates per WABA, synced from the API and status webhooks
+  TemplateCatalog: a
+    .model({
+      wabaId: a.string().required(), // AWS WABA id (waba-...)
+      templateKey: a.string().required(), // '<name>#<language>', '#sync' marks the last full sync
+      templateName: a.string(),
+      templateLanguage: a.string(),
+      metaTemplateId: a.string(),
+      templateStatus: a.string(), // APPROVED | PENDING | REJECTED | PAUSED | DISABLED
+      statusReason: a.string(),
+      templateCategory: a.string(),
+      qualityScore: a.string(),
+      bodyText: a.string(),
+      bodyParamCount: a.integer(),
+      headerFormat: a.string(), // TEXT | IMAGE | VIDEO | DOCUMENT | LOCATION
+      buttonCount: a.integer(),
+      syncedAt: a.integer(),
+      updatedAt: a.integer(),
+    })
+    .identifier(['wabaId', 'templateKey'])
+    .secondaryIndexes((index) => [index('metaTemplateId').name('metaTemplateId-index')])
+    .authorization((allow) => [allow.authenticated()]),
+
+  // Table 17: PhoneNumberRegistry - WhatsApp sending numbers with routing metadata
+  PhoneNumberRegistry: a
+    .model({
+      phoneNumberId: a.string().required(), // AWS phone-number-id-...
+      wabaId: a.string(), // AWS waba-...
+      metaWabaId: a.string(),
+      wabaName: a.string(),
+      metaPhoneNumberId: a.string(),
+      phoneNumber: a.string(),
+      displayPhoneNumber: a.string(),
+      displayDigits: a.string(), // display number digits only, inbound routing key
+      displayName: a.string(),
+      qualityRating: a.string(), // GREEN | YELLOW | RED | UNKNOWN
+      messagingLimitTier: a.string(), // TIER_1K | TIER_10K | TIER_100K | TIER_UNLIMITED
+      throughputMps: a.integer(), // messages per second (default 80)
+      enableSending: a.boolean(),
+      isDefault: a.boolean(), // sending number when a request names none
+      updatedAt: a.integer(),
+    })
+    .identifier(['phoneNumberId'])
+    .authorization((allow) => [allow.authenticated()]),
 });
 
 export type Schema = ClientSchema<typeof schema>;
@@ -24,19 +24,25 @@ Actions:
 import os
 import json
 import logging
-import boto3
 import uuid
 from typing import Dict, Any, Optional
 from decimal import Decimal
 from datetime import datetime
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.stats_counters import (
+    get_stats_counters,
+    COUNTER_CONTACTS,
+    COUNTER_INBOUND_MESSAGES,
+    COUNTER_OUTBOUND_MESSAGES,
+)
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-lambda_client = boto3.client('lambda', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+lambda_client = lazy_client('lambda')
 
 # Environment variables
 CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'base-wecare-digital-ContactsTable')
@@ -375,6 +381,7 @@ def _create_contact(params: Dict, request_id: str) -> Dict:
         }
         
         contacts_table.put_item(Item=contact)
+        get_stats_counters().increment(COUNTER_CONTACTS)
         
         logger.info(json.dumps({
             'event': 'contact_created_via_agent',
@@ -445,11 +452,15 @@ def _delete_contact(params: Dict, request_id: str) -> Dict:
     try:
         contacts_table = dynamodb.Table(CONTACTS_TABLE)
         
-        contacts_table.update_item(
+        response = contacts_table.update_item(
             Key={'id': contact_id},
             UpdateExpression='SET deletedAt = :now',
-            ExpressionAttributeValues={':now': datetime.utcnow().isoformat()}
+            ExpressionAttributeValues={':now': datetime.utcnow().isoformat()},
+            ReturnValues='ALL_OLD'
         )
+        previous = response.get('Attributes') or {}
+        if previous and not previous.get('deletedAt'):
+            get_stats_counters().decrement(COUNTER_CONTACTS)
         
         logger.info(json.dumps({
             'event': 'contact_deleted_via_agent',
@@ -550,21 +561,18 @@ def _delete_message(params: Dict, request_id: str) -> Dict:
         return {'success': False, 'error': 'Message ID is required'}
     
     try:
-        # Try inbound table first
-        inbound_table = dynamodb.Table(MESSAGES_INBOUND_TABLE)
-        try:
-            inbound_table.delete_item(Key={'id': message_id})
-            return {
-                'success': True,
-                'messageId': message_id,
-                'message': f'Message {message_id} deleted successfully'
-            }
-        except Exception:
-            pass
-        
-        # Try outbound table
-        outbound_table = dynamodb.Table(MESSAGES_OUTBOUND_TABLE)
-        outbound_table.delete_item(Key={'id': message_id})
+        # Try inbound table first, then outbound
+        for table_name, counter in ((MESSAGES_INBOUND_TABLE, COUNTER_INBOUND_MESSAGES),
+                                    (MESSAGES_OUTBOUND_TABLE, COUNTER_OUTBOUND_MESSAGES)):
+            response = dynamodb.Table(table_name).delete_item(
+                Key={'id': message_id},
+                ReturnValues='ALL_OLD'
+            )
+            if response.get('Attributes'):
+                get_stats_counters().decrement(counter)
+                break
+        else:
+            return {'success': False, 'error': f'Message {message_id} not found'}
         
         return {
             'success': True,
@@ -661,23 +669,12 @@ def _create_invoice(params: Dict, request_id: str) -> Dict:
 # ============== STATS ACTIONS ==============
 
 def _get_stats(request_id: str) -> Dict:
-    """Get dashboard statistics."""
+    """Get dashboard statistics from the maintained counters (see stats-reconciler)."""
     try:
-        contacts_table = dynamodb.Table(CONTACTS_TABLE)
-        inbound_table = dynamodb.Table(MESSAGES_INBOUND_TABLE)
-        outbound_table = dynamodb.Table(MESSAGES_OUTBOUND_TABLE)
-        
-        # Count contacts
-        contacts_response = contacts_table.scan(
-            FilterExpression='attribute_not_exists(deletedAt) OR deletedAt = :null',
-            ExpressionAttributeValues={':null': None},
-            Select='COUNT'
-        )
-        total_contacts = contacts_response.get('Count', 0)
-        
-        # Count messages
-        inbound_count = inbound_table.scan(Select='COUNT').get('Count', 0)
-        outbound_count = outbound_table.scan(Select='COUNT').get('Count', 0)
+        counters = get_stats_counters().read()
+        total_contacts = max(0, counters.get(COUNTER_CONTACTS, 0))
+        inbound_count = max(0, counters.get(COUNTER_INBOUND_MESSAGES, 0))
+        outbound_count = max(0, counters.get(COUNTER_OUTBOUND_MESSAGES, 0))
         
         return {
             'success': True,
@@ -27,5 +27,6 @@ export const agentActionGroup = defineFunction({
     OUTBOUND_WHATSAPP_FUNCTION: 'wecare-outbound-whatsapp',
     OUTBOUND_SMS_FUNCTION: 'wecare-outbound-sms',
     OUTBOUND_EMAIL_FUNCTION: 'wecare-outbound-email',
+    SYSTEM_CONFIG_TABLE: 'base-wecare-digital-SystemConfigTable',
   },
 });
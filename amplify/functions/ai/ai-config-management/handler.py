@@ -18,17 +18,25 @@ Keys:
 import os
 import json
 import logging
-import boto3
 from typing import Dict, Any, List
 from decimal import Decimal
 import time
+from utils.aws_clients import lazy_resource
+from utils.pagination import paginate, InvalidCursorError
+from utils.ai_cache import get_ai_response_cache
+from utils.stats_counters import (
+    get_stats_counters,
+    COUNTER_AI_INTERACTIONS,
+    COUNTER_AI_APPROVED,
+    AI_LANGUAGE_COUNTER_PREFIX,
+)
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
 
 # Environment variables
 SYSTEM_CONFIG_TABLE = os.environ.get('SYSTEM_CONFIG_TABLE', 'base-wecare-digital-SystemConfigTable')
@@ -86,6 +94,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     - PUT /ai/fallbacks/{lang} - Update fallback for language
     - GET /ai/interactions - Get AI interaction logs
     - GET /ai/stats - Get AI usage statistics
+    - POST /ai/cache/invalidate - Drop cached AI responses (after a KB sync)
     """
     request_id = context.aws_request_id if context else 'local'
     
@@ -163,6 +172,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         elif http_method == 'POST':
             if '/ai/test' in path:
                 return _test_ai_response(body, request_id)
+            elif '/ai/cache/invalidate' in path:
+                return _invalidate_cache(body, request_id)
         
         return _error_response(400, 'Invalid request')
         
@@ -239,6 +250,7 @@ def _update_config(body: Dict, request_id: str) -> Dict[str, Any]:
             'autoReplyEnabled': existing.get('autoReplyEnabled'),
             'requestId': request_id
         }))
+        _invalidate_ai_cache('ai_config updated', request_id)
         
         return {
             'statusCode': 200,
@@ -304,6 +316,7 @@ def _update_prompt(lang: str, body: Dict, request_id: str) -> Dict[str, Any]:
             'configValue': prompt,
             'updatedAt': Decimal(str(int(time.time())))
         })
+        _invalidate_ai_cache(f'ai_prompt_{lang} updated', request_id)
         
         return {
             'statusCode': 200,
@@ -384,8 +397,13 @@ def _get_interactions(query_params: Dict, request_id: str) -> Dict[str, Any]:
         ai_table = dynamodb.Table(AI_INTERACTIONS_TABLE)
         limit = int(query_params.get('limit', 50))
         
-        response = ai_table.scan(Limit=limit)
-        interactions = response.get('Items', [])
+        page = paginate(
+            ai_table.scan,
+            limit=limit,
+            cursor=query_params.get('nextToken'),
+            key_attributes=('interactionId',)
+        )
+        interactions = page.items
         
         # Sort by timestamp descending
         interactions.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
@@ -398,8 +416,14 @@ def _get_interactions(query_params: Dict, request_id: str) -> Dict[str, Any]:
         return {
             'statusCode': 200,
             'headers': CORS_HEADERS,
-            'body': json.dumps({'interactions': interactions, 'count': len(interactions)})
+            'body': json.dumps({
+                'interactions': interactions,
+                'count': len(interactions),
+                'nextToken': page.cursor
+            })
         }
+    except InvalidCursorError:
+        return _error_response(400, 'Invalid nextToken')
     except Exception as e:
         return {
             'statusCode': 200,
@@ -409,22 +433,18 @@ def _get_interactions(query_params: Dict, request_id: str) -> Dict[str, Any]:
 
 
 def _get_stats(request_id: str) -> Dict[str, Any]:
-    """Get AI usage statistics."""
+    """Get AI usage statistics from the maintained counters (see stats-reconciler)."""
     try:
-        ai_table = dynamodb.Table(AI_INTERACTIONS_TABLE)
+        counters = get_stats_counters().read()
         
-        # Scan all interactions for stats
-        response = ai_table.scan()
-        interactions = response.get('Items', [])
+        total = max(0, counters.get(COUNTER_AI_INTERACTIONS, 0))
+        approved = max(0, counters.get(COUNTER_AI_APPROVED, 0))
         
-        total = len(interactions)
-        approved = sum(1 for i in interactions if i.get('approved'))
-        
-        # Calculate by language (if tracked)
-        by_language = {}
-        for item in interactions:
-            lang = item.get('detectedLanguage', 'unknown')
-            by_language[lang] = by_language.get(lang, 0) + 1
+        by_language = {
+            name[len(AI_LANGUAGE_COUNTER_PREFIX):]: count
+            for name, count in counters.items()
+            if name.startswith(AI_LANGUAGE_COUNTER_PREFIX) and count > 0
+        }
         
         return {
             'statusCode': 200,
@@ -478,6 +498,39 @@ def _test_ai_response(body: Dict, request_id: str) -> Dict[str, Any]:
     }
 
 
+def _invalidate_ai_cache(reason: str, request_id: str) -> bool:
+    """Invalidate cached AI responses; a failure must not fail the update."""
+    try:
+        version = get_ai_response_cache().invalidate(reason, updated_by=request_id)
+        logger.info(json.dumps({
+            'event': 'ai_cache_invalidated',
+            'reason': reason,
+            'version': version,
+            'requestId': request_id
+        }))
+        return True
+    except Exception as e:
+        logger.error(json.dumps({
+            'event': 'ai_cache_invalidate_error',
+            'reason': reason,
+            'error': str(e),
+            'requestId': request_id
+        }))
+        return False
+
+
+def _invalidate_cache(body: Dict, request_id: str) -> Dict[str, Any]:
+    """Invalidate cached AI responses (e.g. after a knowledge base sync)."""
+    reason = body.get('reason') or 'manual invalidation'
+    if not _invalidate_ai_cache(reason, request_id):
+        return _error_response(500, 'Failed to invalidate AI cache')
+    return {
+        'statusCode': 200,
+        'headers': CORS_HEADERS,
+        'body': json.dumps({'success': True, 'reason': reason})
+    }
+
+
 def _get_default_prompt(lang: str) -> str:
     """Get default prompt template for language."""
     lang_name = SUPPORTED_LANGUAGES.get(lang, 'English')
@@ -609,6 +662,7 @@ def _update_internal_config(body: Dict, request_id: str) -> Dict[str, Any]:
             'enabled': existing.get('enabled'),
             'requestId': request_id
         }))
+        _invalidate_ai_cache('ai_internal_config updated', request_id)
         
         return {
             'statusCode': 200,
@@ -20,17 +20,26 @@ Architecture:
 import os
 import json
 import logging
-import boto3
 import uuid
-import re
-from typing import Dict, Any, Tuple
+from typing import Dict, Any
+from utils.aws_clients import lazy_client
+from utils.ai_cache import get_ai_response_cache
+from utils.ai_pipeline import AIPipeline, build_prompt, detect_language, get_fallback_response
+from utils.error_handler import (
+    ServiceCircuitBreakers, ServiceRetryPolicies, CircuitBreakerOpenError, set_retry_deadline
+)
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-bedrock_agent_runtime = boto3.client('bedrock-agent-runtime', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+# Single SDK attempt; BEDROCK_RETRY owns retries and stops at the deadline
+bedrock_agent_runtime = lazy_client('bedrock-agent-runtime', max_attempts=1)
+
+# Shared across containers; while open, replies use the language fallback
+BEDROCK_BREAKER = ServiceCircuitBreakers.bedrock()
+BEDROCK_RETRY = ServiceRetryPolicies.bedrock()
 
 # Environment variables
 SEND_MODE = os.environ.get('SEND_MODE', 'LIVE')
@@ -47,8 +56,14 @@ EXTERNAL_KB_ID = os.environ.get('EXTERNAL_KB_ID', 'CTH8DH3RXY')
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    """Generate AI response using Bedrock Agent."""
+    """
+    Generate AI response using Bedrock Agent.
+    
+    With {"pipeline": true} (or a kbContext from ai-query-kb) the reply is
+    produced by utils.ai_pipeline: one KB retrieval, one model call.
+    """
     request_id = context.aws_request_id if context else 'local'
+    set_retry_deadline(context)
     
     # CORS headers
     headers = {
@@ -97,7 +112,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'statusCode': 200,
             'headers': headers,
             'body': json.dumps({
-                'suggestedResponse': _get_fallback_response(),
+                'suggestedResponse': get_fallback_response(),
                 'error': 'AI agents not configured yet'
             })
         }
@@ -117,16 +132,38 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }))
         
         if not message_content:
-            return {'statusCode': 200, 'headers': headers, 'body': json.dumps({'suggestedResponse': _get_fallback_response()})}
+            return {'statusCode': 200, 'headers': headers, 'body': json.dumps({'suggestedResponse': get_fallback_response()})}
+        
+        # Customer-facing answers are cached; the admin agent can take actions
+        use_cache = agent_context != 'internal-admin'
+        
+        # Merged pipeline: retrieve once and generate from that context.
+        # A kbContext from an earlier ai-query-kb call skips retrieval.
+        kb_context = body.get('kbContext')
+        if body.get('pipeline') or isinstance(kb_context, dict):
+            result = AIPipeline(kb_id=kb_id, use_cache=use_cache).run(
+                message_content, request_id,
+                context_text=kb_context.get('context') if isinstance(kb_context, dict) else None
+            )
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': json.dumps({
+                    'suggestedResponse': result.suggestion,
+                    **result.to_dict(),
+                    'messageId': message_id,
+                    'contactId': contact_id
+                })
+            }
         
         # Generate response using Bedrock Agent or KB
         if agent_id and agent_alias:
-            suggestion = _invoke_bedrock_agent(message_content, agent_id, agent_alias, kb_id, request_id)
+            suggestion = _invoke_bedrock_agent(message_content, agent_id, agent_alias, kb_id, request_id, use_cache)
         elif kb_id:
-            detected_lang, lang_name = _detect_language(message_content)
-            suggestion = _query_knowledge_base(message_content, kb_id, detected_lang, lang_name, request_id)
+            detected_lang, lang_name = detect_language(message_content)
+            suggestion = _query_knowledge_base(message_content, kb_id, detected_lang, lang_name, request_id, use_cache)
         else:
-            suggestion = _get_fallback_response()
+            suggestion = get_fallback_response()
         
         logger.info(json.dumps({
             'event': 'ai_generate_complete',
@@ -147,14 +184,27 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
     except Exception as e:
         logger.error(json.dumps({'event': 'ai_generate_error', 'error': str(e), 'requestId': request_id}))
-        return {'statusCode': 200, 'headers': headers, 'body': json.dumps({'suggestedResponse': _get_fallback_response(), 'error': str(e)})}
+        return {'statusCode': 200, 'headers': headers, 'body': json.dumps({'suggestedResponse': get_fallback_response(), 'error': str(e)})}
 
 
-def _invoke_bedrock_agent(user_message: str, agent_id: str, agent_alias: str, kb_id: str, request_id: str) -> str:
+def _invoke_bedrock_agent(user_message: str, agent_id: str, agent_alias: str, kb_id: str,
+                          request_id: str, use_cache: bool = False) -> str:
     """Invoke Bedrock Agent for response generation."""
     try:
         session_id = str(uuid.uuid4())
-        detected_lang, lang_name = _detect_language(user_message)
+        detected_lang, lang_name = detect_language(user_message)
+        
+        cache_kind = f'agent:{agent_id}'
+        if use_cache:
+            cached = get_ai_response_cache().get(cache_kind, user_message, detected_lang, kb_id)
+            if cached:
+                logger.info(json.dumps({
+                    'event': 'ai_cache_hit',
+                    'kind': 'agent',
+                    'detectedLanguage': lang_name,
+                    'requestId': request_id
+                }))
+                return cached
         
         language_instruction = f"[RESPOND IN {lang_name.upper()} ONLY] "
         enhanced_message = language_instruction + user_message
@@ -168,21 +218,11 @@ def _invoke_bedrock_agent(user_message: str, agent_id: str, agent_alias: str, kb
             'requestId': request_id
         }))
         
-        response = bedrock_agent_runtime.invoke_agent(
-            agentId=agent_id,
-            agentAliasId=agent_alias,
-            sessionId=session_id,
-            inputText=enhanced_message,
-            enableTrace=False
+        completion = BEDROCK_RETRY.call(
+            BEDROCK_BREAKER.call,
+            _invoke_agent_completion, agent_id, agent_alias, session_id, enhanced_message
         )
         
-        completion = ""
-        for event in response.get('completion', []):
-            if 'chunk' in event:
-                chunk_data = event['chunk']
-                if 'bytes' in chunk_data:
-                    completion += chunk_data['bytes'].decode('utf-8')
-        
         if completion:
             logger.info(json.dumps({
                 'event': 'bedrock_agent_success',
@@ -190,14 +230,24 @@ def _invoke_bedrock_agent(user_message: str, agent_id: str, agent_alias: str, kb
                 'detectedLanguage': lang_name,
                 'requestId': request_id
             }))
+            if use_cache:
+                get_ai_response_cache().put(cache_kind, user_message, detected_lang, kb_id, completion.strip())
             return completion.strip()
         
         # Fallback to KB if agent returns empty
         if kb_id:
-            return _query_knowledge_base(user_message, kb_id, detected_lang, lang_name, request_id)
+            return _query_knowledge_base(user_message, kb_id, detected_lang, lang_name, request_id, use_cache)
         
-        return _get_fallback_response(lang_name)
+        return get_fallback_response(lang_name)
         
+    except CircuitBreakerOpenError as e:
+        # KB fallback would hit the same provider; answer immediately
+        logger.warning(json.dumps({
+            'event': 'bedrock_circuit_open',
+            'error': str(e),
+            'requestId': request_id
+        }))
+        return get_fallback_response(lang_name)
     except Exception as e:
         logger.error(json.dumps({
             'event': 'bedrock_agent_error',
@@ -205,50 +255,45 @@ def _invoke_bedrock_agent(user_message: str, agent_id: str, agent_alias: str, kb
             'requestId': request_id
         }))
         if kb_id:
-            detected_lang, lang_name = _detect_language(user_message)
-            return _query_knowledge_base(user_message, kb_id, detected_lang, lang_name, request_id)
-        return _get_fallback_response()
+            detected_lang, lang_name = detect_language(user_message)
+            return _query_knowledge_base(user_message, kb_id, detected_lang, lang_name, request_id, use_cache)
+        return get_fallback_response()
 
 
-def _detect_language(text: str) -> Tuple[str, str]:
-    """Detect language from text using character patterns."""
-    if not text:
-        return ('en', 'English')
-    
-    # Hindi/Devanagari
-    if re.search(r'[\u0900-\u097F]', text):
-        marathi_words = ['आहे', 'काय', 'मला', 'तुम्ही', 'आम्ही']
-        if any(word in text for word in marathi_words):
-            return ('mr', 'Marathi')
-        return ('hi', 'Hindi')
-    
-    # Bengali
-    if re.search(r'[\u0980-\u09FF]', text):
-        return ('bn', 'Bengali')
-    
-    # Tamil
-    if re.search(r'[\u0B80-\u0BFF]', text):
-        return ('ta', 'Tamil')
-    
-    # Telugu
-    if re.search(r'[\u0C00-\u0C7F]', text):
-        return ('te', 'Telugu')
+def _invoke_agent_completion(agent_id: str, agent_alias: str, session_id: str, input_text: str) -> str:
+    """Invoke the agent and drain its completion stream (stream errors count as failures)."""
+    response = bedrock_agent_runtime.invoke_agent(
+        agentId=agent_id,
+        agentAliasId=agent_alias,
+        sessionId=session_id,
+        inputText=input_text,
+        enableTrace=False
+    )
     
-    # Gujarati
-    if re.search(r'[\u0A80-\u0AFF]', text):
-        return ('gu', 'Gujarati')
-    
-    # Hinglish
-    hinglish_words = ['kya', 'hai', 'kaise', 'mujhe', 'aap', 'hum', 'tum', 'kab', 'kahan', 'kyun', 'nahi', 'haan', 'theek', 'accha', 'bahut']
-    if sum(1 for word in hinglish_words if word in text.lower()) >= 2:
-        return ('hi-Latn', 'Hinglish')
-    
-    return ('en', 'English')
+    completion = ""
+    for event in response.get('completion', []):
+        if 'chunk' in event:
+            chunk_data = event['chunk']
+            if 'bytes' in chunk_data:
+                completion += chunk_data['bytes'].decode('utf-8')
+    return completion
 
 
-def _query_knowledge_base(user_message: str, kb_id: str, detected_lang: str, lang_name: str, request_id: str) -> str:
+def _query_knowledge_base(user_message: str, kb_id: str, detected_lang: str, lang_name: str,
+                          request_id: str, use_cache: bool = False) -> str:
     """Direct Knowledge Base query with Nova Lite."""
     try:
+        if use_cache:
+            cached = get_ai_response_cache().get('kb', user_message, detected_lang, kb_id)
+            if cached:
+                logger.info(json.dumps({
+                    'event': 'ai_cache_hit',
+                    'kind': 'kb',
+                    'detectedLanguage': lang_name,
+                    'requestId': request_id
+                }))
+                return cached
+        
         logger.info(json.dumps({
             'event': 'kb_query_start',
             'kbId': kb_id,
@@ -257,34 +302,11 @@ def _query_knowledge_base(user_message: str, kb_id: str, detected_lang: str, lan
             'requestId': request_id
         }))
         
-        prompt_template = f"""You are WECARE.DIGITAL's friendly AI assistant.
-
-CRITICAL: You MUST respond ONLY in {lang_name}. Do not mix languages.
-
-INSTRUCTIONS:
-- Respond ONLY in {lang_name} language
-- Keep responses SHORT (2-3 sentences max)
-- Use 1-2 emojis for warmth
-- Always mention the specific brand name
-- End with a clear action (website, phone, or next step)
-
-BRANDS:
-- Travel/Hotels/Visa → BNB Club (bnbclub.in)
-- Documents/Registration/GST → Legal Champ (legalchamp.in)
-- Disputes/Complaints → No Fault (nofault.in)
-- Puja/Rituals → Ritual Guru (ritualguru.in)
-- Self-inquiry/Reflection → Swdhya (swdhya.in)
-
-CONTACT: +91 9330994400 | one@wecare.digital
-
-CONTEXT FROM KNOWLEDGE BASE:
-$search_results$
-
-USER QUESTION ({lang_name}): $query$
-
-Respond helpfully in {lang_name} and end with a specific action."""
+        prompt_template = build_prompt(lang_name, '$search_results$', '$query$')
         
-        response = bedrock_agent_runtime.retrieve_and_generate(
+        response = BEDROCK_RETRY.call(
+            BEDROCK_BREAKER.call,
+            bedrock_agent_runtime.retrieve_and_generate,
             input={'text': user_message},
             retrieveAndGenerateConfiguration={
                 'type': 'KNOWLEDGE_BASE',
@@ -309,9 +331,11 @@ Respond helpfully in {lang_name} and end with a specific action."""
                 'detectedLanguage': lang_name,
                 'requestId': request_id
             }))
+            if use_cache:
+                get_ai_response_cache().put('kb', user_message, detected_lang, kb_id, output.strip())
             return output.strip()
         
-        return _get_fallback_response(lang_name)
+        return get_fallback_response(lang_name)
         
     except Exception as e:
         logger.error(json.dumps({
@@ -319,19 +343,4 @@ Respond helpfully in {lang_name} and end with a specific action."""
             'error': str(e),
             'requestId': request_id
         }))
-        return _get_fallback_response(lang_name)
-
-
-def _get_fallback_response(lang_name: str = 'English') -> str:
-    """Return a friendly fallback response in the detected language."""
-    fallback_responses = {
-        'Hindi': "नमस्ते! 👋 WECARE.DIGITAL से संपर्क करने के लिए धन्यवाद। त्वरित सहायता के लिए +91 9330994400 पर कॉल करें या one@wecare.digital पर ईमेल करें। 😊",
-        'Bengali': "নমস্কার! 👋 WECARE.DIGITAL-এ যোগাযোগ করার জন্য ধন্যবাদ। দ্রুত সাহায্যের জন্য +91 9330994400-এ কল করুন বা one@wecare.digital-এ ইমেল করুন। 😊",
-        'Hinglish': "Hi! 👋 WECARE.DIGITAL se contact karne ke liye thanks. Quick help ke liye +91 9330994400 pe call karein ya one@wecare.digital pe email karein. 😊",
-        'Tamil': "வணக்கம்! 👋 WECARE.DIGITAL-ஐ தொடர்பு கொண்டதற்கு நன்றி। விரைவான உதவிக்கு +91 9330994400 அழைக்கவும் அல்லது one@wecare.digital மின்னஞ்சல் அனுப்பவும். 😊",
-        'Telugu': "నమస్కారం! 👋 WECARE.DIGITAL ని సంప్రదించినందుకు ధన్యవాదాలు। త్వరిత సహాయం కోసం +91 9330994400 కు కాల్ చేయండి లేదా one@wecare.digital కు ఇమెయిల్ చేయండి. 😊",
-        'Gujarati': "નમસ્તે! 👋 WECARE.DIGITAL નો સંપર્ક કરવા બદલ આભાર. ઝડપી મદદ માટે +91 9330994400 પર કૉલ કરો અથવા one@wecare.digital પર ઇમેઇલ કરો. 😊",
-        'Marathi': "नमस्कार! 👋 WECARE.DIGITAL शी संपर्क साधल्याबद्दल धन्यवाद। जलद मदतीसाठी +91 9330994400 वर कॉल करा किंवा one@wecare.digital वर ईमेल करा. 😊",
-    }
-    
-    return fallback_responses.get(lang_name, "Hi! 👋 Thanks for reaching out to WECARE.DIGITAL. For quick help, call us at +91 9330994400 or email one@wecare.digital. We're here to help! 😊")
+        return get_fallback_response(lang_name)
@@ -16,6 +16,8 @@ export const aiGenerateResponse = defineFunction({
     AWS_REGION: 'us-east-1',
     LOG_LEVEL: 'INFO',
     SEND_MODE: 'LIVE',
+    AI_CACHE_TABLE: 'base-wecare-digital-AIResponseCacheTable',
+    SYSTEM_CONFIG_TABLE: 'base-wecare-digital-SystemConfigTable',
     // Internal Agent (FloatingAgent - admin tasks)
     INTERNAL_AGENT_ID: 'TJAZR473IJ',
     INTERNAL_AGENT_ALIAS: 'O4U1HF2MSX',
@@ -12,16 +12,14 @@ KB IDs:
 import os
 import json
 import logging
-import boto3
-from typing import Dict, Any, Optional
+from typing import Dict, Any
+from utils.ai_pipeline import AIPipeline
+from utils.error_handler import set_retry_deadline
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
-# AWS clients
-bedrock_agent_runtime = boto3.client('bedrock-agent-runtime', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-
 # Environment variables
 SEND_MODE = os.environ.get('SEND_MODE', 'LIVE')
 INTERNAL_KB_ID = os.environ.get('INTERNAL_KB_ID', '7IWHVB0ZXQ')
@@ -31,6 +29,7 @@ EXTERNAL_KB_ID = os.environ.get('EXTERNAL_KB_ID', 'CTH8DH3RXY')
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Query Knowledge Base for relevant context."""
     request_id = context.aws_request_id if context else 'local'
+    set_retry_deadline(context)
     
     query = event.get('query', '')
     message_id = event.get('messageId', '')
@@ -55,33 +54,14 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return {'statusCode': 200, 'body': json.dumps({'context': ''})}
     
     try:
-        # Query the knowledge base
-        response = bedrock_agent_runtime.retrieve(
-            knowledgeBaseId=kb_id,
-            retrievalQuery={'text': query},
-            retrievalConfiguration={
-                'vectorSearchConfiguration': {
-                    'numberOfResults': 3
-                }
-            }
-        )
-        
-        # Extract relevant context from results
-        results = response.get('retrievalResults', [])
-        context_parts = []
-        
-        for result in results:
-            content = result.get('content', {}).get('text', '')
-            score = result.get('score', 0)
-            if content and score > 0.5:  # Only include relevant results
-                context_parts.append(content)
-        
-        context_text = '\n\n'.join(context_parts[:3])  # Limit to top 3
+        # Shared with the AI pipeline; cached and routed through the Bedrock
+        # retry policy and circuit breaker
+        context_text, results_count = AIPipeline(kb_id=kb_id).retrieve(query)
         
         logger.info(json.dumps({
             'event': 'kb_query_success',
             'kbId': kb_id,
-            'resultsCount': len(results),
+            'resultsCount': results_count,
             'contextLength': len(context_text),
             'messageId': message_id,
             'requestId': request_id
@@ -91,7 +71,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'statusCode': 200,
             'body': json.dumps({
                 'context': context_text,
-                'resultsCount': len(results),
+                'resultsCount': results_count,
                 'kbId': kb_id
             })
         }
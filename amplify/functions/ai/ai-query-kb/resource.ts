@@ -16,6 +16,8 @@ export const aiQueryKb = defineFunction({
     AWS_REGION: 'us-east-1',
     LOG_LEVEL: 'INFO',
     SEND_MODE: 'LIVE',
+    AI_CACHE_TABLE: 'base-wecare-digital-AIResponseCacheTable',
+    SYSTEM_CONFIG_TABLE: 'base-wecare-digital-SystemConfigTable',
     INTERNAL_KB_ID: '7IWHVB0ZXQ',
     EXTERNAL_KB_ID: 'CTH8DH3RXY',
   },
@@ -10,17 +10,18 @@ import json
 import uuid
 import time
 import logging
-import boto3
 from typing import Dict, Any
 from decimal import Decimal
 import re
+from utils.aws_clients import lazy_resource
+from utils.stats_counters import get_stats_counters, COUNTER_CONTACTS
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # DynamoDB client
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
 CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'Contact')
 
 # CORS headers
@@ -81,6 +82,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Store in DynamoDB
         table = dynamodb.Table(CONTACTS_TABLE)
         table.put_item(Item=_convert_to_dynamodb(contact))
+        get_stats_counters().increment(COUNTER_CONTACTS)
         
         logger.info(json.dumps({
             'event': 'contact_created',
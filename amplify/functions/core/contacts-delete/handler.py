@@ -6,30 +6,67 @@ Requirements: 2.5
 
 Soft delete: Sets deletedAt timestamp (default)
 Hard delete: Removes contact, all messages, and media from S3
+
+Hard delete finds messages through the contactId index, removes media
+with S3 DeleteObjects and rows with BatchWriteItem. Contacts with more
+messages than fit in one API call continue as a background job whose
+progress is kept in SystemConfig (contact_delete#<contactId>).
 """
 
 import os
+import re
 import json
 import time
 import logging
-import boto3
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from decimal import Decimal
+from boto3.dynamodb.conditions import Key, Attr
 from botocore.exceptions import ClientError
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.stats_counters import (
+    get_stats_counters,
+    COUNTER_CONTACTS,
+    COUNTER_INBOUND_MESSAGES,
+    COUNTER_OUTBOUND_MESSAGES,
+)
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-s3_client = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+s3_client = lazy_client('s3')
+lambda_client = lazy_client('lambda')
 
 # Table names
 CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'Contact')
 INBOUND_TABLE = os.environ.get('INBOUND_TABLE', 'base-wecare-digital-WhatsAppInboundTable')
 OUTBOUND_TABLE = os.environ.get('OUTBOUND_TABLE', 'base-wecare-digital-WhatsAppOutboundTable')
 MEDIA_BUCKET = os.environ.get('MEDIA_BUCKET', 'auth.wecare.digital')
+SYSTEM_CONFIG_TABLE = os.environ.get('SYSTEM_CONFIG_TABLE', 'base-wecare-digital-SystemConfigTable')
+CONTACT_ID_INDEX = os.environ.get('CONTACT_ID_INDEX', 'contactId-index')
+CONTACTS_DELETE_FUNCTION = os.environ.get('CONTACTS_DELETE_FUNCTION', 'wecare-contacts-delete')
+
+MESSAGE_TABLES = (
+    (INBOUND_TABLE, COUNTER_INBOUND_MESSAGES),
+    (OUTBOUND_TABLE, COUNTER_OUTBOUND_MESSAGES),
+)
+
+# Hard delete pipeline
+DELETE_JOB_KEY_PREFIX = 'contact_delete#'
+SYNC_DELETE_BUDGET_SECONDS = 20  # API Gateway gives up at 29s
+JOB_TIME_RESERVE_SECONDS = 15
+JOB_STALE_SECONDS = 5 * 60  # no progress for this long: resume on next request
+QUERY_PAGE_SIZE = 500
+BATCH_WRITE_SIZE = 25  # BatchWriteItem limit
+BATCH_WRITE_MAX_ATTEMPTS = 8
+S3_DELETE_BATCH_SIZE = 1000  # DeleteObjects limit
+DELETE_WORKERS = 8
+
+# s3Key still in the form requested from EUM (wecare-digital-{8 chars}.ext)
+_UNRESOLVED_MEDIA_KEY = re.compile(r'wecare-digital-[^/.]{8}\.[A-Za-z0-9]+$')
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -42,6 +79,10 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     request_id = context.aws_request_id if context else 'local'
     
+    # Background continuation of a hard delete (see _continue_delete_job)
+    if event.get('deleteJob'):
+        return _run_delete_job(event['deleteJob'], context, request_id)
+    
     # CORS headers
     headers = {
         'Content-Type': 'application/json',
@@ -63,7 +104,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         is_hard_delete = query_params.get('hard', 'false').lower() == 'true'
         
         if is_hard_delete:
-            return _hard_delete_contact(contact_id, request_id, headers)
+            return _hard_delete_contact(contact_id, request_id, headers, context)
         else:
             return _soft_delete_contact(contact_id, request_id, headers)
         
@@ -117,6 +158,7 @@ def _soft_delete_contact(contact_id: str, request_id: str, headers: Dict) -> Dic
                 ':updatedAt': Decimal(str(deleted_at))
             }
         )
+        get_stats_counters().decrement(COUNTER_CONTACTS)
         
         logger.info(json.dumps({
             'event': 'contact_soft_deleted',
@@ -141,60 +183,48 @@ def _soft_delete_contact(contact_id: str, request_id: str, headers: Dict) -> Dic
         return _error_response(404, 'Contact not found or already deleted')
 
 
-def _hard_delete_contact(contact_id: str, request_id: str, headers: Dict) -> Dict[str, Any]:
+def _hard_delete_contact(contact_id: str, request_id: str, headers: Dict, context: Any) -> Dict[str, Any]:
     """
     Hard delete: Remove contact, all messages, and media from S3.
     This is irreversible!
-    """
-    results = {
-        'contactDeleted': False,
-        'messagesDeleted': 0,
-        'mediaDeleted': 0,
-        's3Keys': []
-    }
     
+    Deletes as much as fits in the API Gateway window. Contacts with more
+    messages continue as a background job (202); repeating the request
+    reports progress, or resumes a job whose worker died.
+    """
     try:
-        # Step 1: Find and delete all messages for this contact
-        messages = _get_contact_messages(contact_id)
-        logger.info(f"Found {len(messages)} messages for contact {contact_id}")
+        job = _load_delete_job(contact_id)
+        if job and time.time() - job.get('updatedAt', 0) < JOB_STALE_SECONDS:
+            return _delete_job_response(job, headers)
         
-        for msg in messages:
-            # Delete media from S3 if exists
-            s3_key = msg.get('s3Key')
-            if s3_key:
-                try:
-                    _delete_s3_file(s3_key)
-                    results['mediaDeleted'] += 1
-                    results['s3Keys'].append(s3_key)
-                except Exception as e:
-                    logger.warning(f"Failed to delete S3 file {s3_key}: {e}")
-            
-            # Delete message from DynamoDB
-            direction = msg.get('direction', 'inbound').upper()
-            table_name = OUTBOUND_TABLE if direction == 'OUTBOUND' else INBOUND_TABLE
-            table = dynamodb.Table(table_name)
-            
-            try:
-                msg_id = msg.get('id') or msg.get('messageId')
-                table.delete_item(Key={'id': msg_id})
-                results['messagesDeleted'] += 1
-            except Exception as e:
-                logger.warning(f"Failed to delete message {msg.get('id')}: {e}")
+        if not job:
+            job = {
+                'jobId': request_id,
+                'contactId': contact_id,
+                'tableIndex': 0,
+                'cursor': None,
+                'messagesDeleted': 0,
+                'mediaDeleted': 0,
+                'startedAt': int(time.time()),
+            }
         
-        # Step 2: Delete the contact
-        contacts_table = dynamodb.Table(CONTACTS_TABLE)
-        try:
-            contacts_table.delete_item(Key={'id': contact_id})
-            results['contactDeleted'] = True
-        except Exception as e:
-            logger.warning(f"Failed to delete contact {contact_id}: {e}")
+        budget = SYNC_DELETE_BUDGET_SECONDS
+        if context:
+            budget = min(budget, context.get_remaining_time_in_millis() / 1000 - JOB_TIME_RESERVE_SECONDS)
         
-        logger.info(json.dumps({
-            'event': 'contact_hard_deleted',
-            'contactId': contact_id,
-            'results': results,
-            'requestId': request_id
-        }))
+        if not _advance_delete_job(job, time.time() + budget, persist=False):
+            _save_delete_job(job)
+            _continue_delete_job(job, context)
+            logger.info(json.dumps({
+                'event': 'contact_hard_delete_backgrounded',
+                'contactId': contact_id,
+                'jobId': job['jobId'],
+                'messagesDeleted': job['messagesDeleted'],
+                'requestId': request_id
+            }))
+            return _delete_job_response(job, headers)
+        
+        contact_deleted = _finish_hard_delete(job, request_id)
         
         return {
             'statusCode': 200,
@@ -203,9 +233,10 @@ def _hard_delete_contact(contact_id: str, request_id: str, headers: Dict) -> Dic
                 'success': True,
                 'contactId': contact_id,
                 'deleteType': 'hard',
-                'messagesDeleted': results['messagesDeleted'],
-                'mediaDeleted': results['mediaDeleted'],
-                'message': f"Hard deleted: contact, {results['messagesDeleted']} messages, {results['mediaDeleted']} media files"
+                'contactDeleted': contact_deleted,
+                'messagesDeleted': job['messagesDeleted'],
+                'mediaDeleted': job['mediaDeleted'],
+                'message': f"Hard deleted: contact, {job['messagesDeleted']} messages, {job['mediaDeleted']} media files"
             }),
         }
         
@@ -214,61 +245,242 @@ def _hard_delete_contact(contact_id: str, request_id: str, headers: Dict) -> Dic
         return _error_response(500, f'Hard delete failed: {str(e)}')
 
 
-def _get_contact_messages(contact_id: str) -> List[Dict]:
-    """Get all messages for a contact from both inbound and outbound tables."""
-    messages = []
+def _run_delete_job(payload: Dict[str, Any], context: Any, request_id: str) -> Dict[str, Any]:
+    """Background invocation: continue a hard delete until done or out of time."""
+    contact_id = payload.get('contactId')
+    job = _load_delete_job(contact_id) if contact_id else None
+    if not job or job.get('jobId') != payload.get('jobId'):
+        logger.info(json.dumps({
+            'event': 'contact_hard_delete_job_skipped',
+            'contactId': contact_id,
+            'jobId': payload.get('jobId'),
+            'requestId': request_id
+        }))
+        return {'status': 'skipped'}
     
-    for table_name, direction in [(INBOUND_TABLE, 'inbound'), (OUTBOUND_TABLE, 'outbound')]:
-        try:
-            table = dynamodb.Table(table_name)
-            response = table.scan(
-                FilterExpression='contactId = :cid',
-                ExpressionAttributeValues={':cid': contact_id}
-            )
-            items = response.get('Items', [])
-            for item in items:
-                item['direction'] = direction
-            messages.extend(items)
-        except Exception as e:
-            logger.warning(f"Error scanning {table_name}: {e}")
+    remaining = context.get_remaining_time_in_millis() / 1000 if context else 60
+    if not _advance_delete_job(job, time.time() + remaining - JOB_TIME_RESERVE_SECONDS, persist=True):
+        _continue_delete_job(job, context)
+        return {'status': 'running', 'messagesDeleted': job['messagesDeleted']}
+    
+    _finish_hard_delete(job, request_id)
+    return {'status': 'completed', 'messagesDeleted': job['messagesDeleted']}
+
+
+def _advance_delete_job(job: Dict[str, Any], deadline: float, persist: bool) -> bool:
+    """
+    Delete message pages until none are left or the deadline passes.
     
-    return messages
+    Returns:
+        True when every message (and its media) is gone
+    """
+    with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as pool:
+        while job['tableIndex'] < len(MESSAGE_TABLES):
+            if time.time() >= deadline:
+                return False
+            
+            table_name, counter = MESSAGE_TABLES[job['tableIndex']]
+            items, next_cursor = _query_contact_messages(table_name, job['contactId'], job['cursor'])
+            if items:
+                job['mediaDeleted'] += _delete_message_page(pool, table_name, items)
+                job['messagesDeleted'] += len(items)
+                get_stats_counters().decrement(counter, len(items))
+            
+            job['cursor'] = next_cursor
+            if not next_cursor:
+                job['tableIndex'] += 1
+            if persist:
+                _save_delete_job(job)
+    return True
 
 
-def _delete_s3_file(stored_key: str) -> bool:
-    """Delete file from S3, handling the AWS EUM suffix issue."""
+def _finish_hard_delete(job: Dict[str, Any], request_id: str) -> bool:
+    """Delete the contact record itself once its messages are gone."""
+    contact_id = job['contactId']
+    contact_deleted = False
     try:
-        # Try exact key first
-        try:
-            s3_client.head_object(Bucket=MEDIA_BUCKET, Key=stored_key)
-            s3_client.delete_object(Bucket=MEDIA_BUCKET, Key=stored_key)
-            return True
-        except ClientError as e:
-            if e.response['Error']['Code'] != '404':
-                raise
-        
-        # Search with prefix
-        if '.' in stored_key:
-            base_prefix = stored_key.rsplit('.', 1)[0]
-        else:
-            base_prefix = stored_key
-        
-        response = s3_client.list_objects_v2(
-            Bucket=MEDIA_BUCKET,
-            Prefix=base_prefix,
-            MaxKeys=5
+        response = dynamodb.Table(CONTACTS_TABLE).delete_item(Key={'id': contact_id}, ReturnValues='ALL_OLD')
+        previous = response.get('Attributes') or {}
+        contact_deleted = bool(previous)
+        # Soft-deleted contacts were already taken off the counter
+        if previous and previous.get('deletedAt') is None:
+            get_stats_counters().decrement(COUNTER_CONTACTS)
+    except Exception as e:
+        logger.warning(f"Failed to delete contact {contact_id}: {e}")
+    
+    _clear_delete_job(contact_id)
+    
+    logger.info(json.dumps({
+        'event': 'contact_hard_deleted',
+        'contactId': contact_id,
+        'jobId': job['jobId'],
+        'contactDeleted': contact_deleted,
+        'messagesDeleted': job['messagesDeleted'],
+        'mediaDeleted': job['mediaDeleted'],
+        'durationSeconds': int(time.time()) - job['startedAt'],
+        'requestId': request_id
+    }))
+    return contact_deleted
+
+
+def _query_contact_messages(table_name: str, contact_id: str, cursor: Optional[Dict]) -> Tuple[List[Dict], Optional[Dict]]:
+    """Get one page of a contact's message keys through the contactId index."""
+    table = dynamodb.Table(table_name)
+    kwargs = {
+        'ProjectionExpression': '#id, s3Key',
+        'ExpressionAttributeNames': {'#id': 'id'},
+        'Limit': QUERY_PAGE_SIZE,
+    }
+    if cursor:
+        kwargs['ExclusiveStartKey'] = cursor
+    
+    try:
+        response = table.query(
+            IndexName=CONTACT_ID_INDEX,
+            KeyConditionExpression=Key('contactId').eq(contact_id),
+            **kwargs
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ValidationException':
+            raise
+        # Table without the contactId index: fall back to a paginated scan
+        logger.warning(f"{table_name} has no {CONTACT_ID_INDEX}, scanning")
+        response = table.scan(FilterExpression=Attr('contactId').eq(contact_id), **kwargs)
+    
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+def _delete_message_page(pool: ThreadPoolExecutor, table_name: str, items: List[Dict]) -> int:
+    """
+    Delete one page of messages: media first, then the rows.
+    
+    Rows are only removed once their media is gone, so a failure leaves
+    records behind to retry rather than orphaned objects in S3.
+    
+    Returns:
+        Number of messages whose media was deleted
+    """
+    stored_keys = [item['s3Key'] for item in items if item.get('s3Key')]
+    if stored_keys:
+        media_keys = set()
+        for keys in pool.map(_resolve_media_keys, stored_keys):
+            media_keys.update(keys)
+        media_keys = sorted(media_keys)
+        list(pool.map(_delete_media_batch, _chunks(media_keys, S3_DELETE_BATCH_SIZE)))
+    
+    row_keys = [{'id': item['id']} for item in items]
+    list(pool.map(
+        lambda keys: _batch_delete_rows(table_name, keys),
+        _chunks(row_keys, BATCH_WRITE_SIZE)
+    ))
+    return len(stored_keys)
+
+
+def _resolve_media_keys(stored_key: str) -> List[str]:
+    """
+    Get the S3 keys to delete for a stored s3Key.
+    
+    AWS EUM Social may append the WhatsApp media ID to the requested
+    filename. Records normally hold the resolved key; only keys still in
+    the requested short form need a prefix listing.
+    """
+    if not _UNRESOLVED_MEDIA_KEY.search(stored_key):
+        return [stored_key]
+    
+    response = s3_client.list_objects_v2(
+        Bucket=MEDIA_BUCKET,
+        Prefix=stored_key.rsplit('.', 1)[0],
+        MaxKeys=5
+    )
+    return [stored_key] + [obj['Key'] for obj in response.get('Contents', [])]
+
+
+def _delete_media_batch(keys: List[str]) -> None:
+    """Delete up to 1,000 S3 objects in one request."""
+    response = s3_client.delete_objects(
+        Bucket=MEDIA_BUCKET,
+        Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True}
+    )
+    errors = response.get('Errors', [])
+    if errors:
+        raise RuntimeError(
+            f"{len(errors)} media deletes failed, first {errors[0].get('Key')}: {errors[0].get('Code')}"
+        )
+
+
+def _batch_delete_rows(table_name: str, keys: List[Dict]) -> None:
+    """Delete up to 25 rows, retrying unprocessed items with backoff."""
+    request = {table_name: [{'DeleteRequest': {'Key': key}} for key in keys]}
+    for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+        response = dynamodb.meta.client.batch_write_item(RequestItems=request)
+        request = response.get('UnprocessedItems') or {}
+        if not request:
+            return
+        time.sleep(min(0.05 * (2 ** attempt), 1.0))
+    raise RuntimeError(f"{len(request.get(table_name, []))} rows left unprocessed in {table_name}")
+
+
+def _chunks(items: List, size: int) -> List[List]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _load_delete_job(contact_id: str) -> Optional[Dict[str, Any]]:
+    """Get the running hard-delete job for a contact, if any."""
+    response = dynamodb.Table(SYSTEM_CONFIG_TABLE).get_item(
+        Key={'configKey': f'{DELETE_JOB_KEY_PREFIX}{contact_id}'}
+    )
+    item = response.get('Item')
+    if not item:
+        return None
+    job = json.loads(item['configValue'])
+    job['updatedAt'] = int(item.get('updatedAt', 0))
+    return job
+
+
+def _save_delete_job(job: Dict[str, Any]) -> None:
+    """Persist job progress so another invocation can resume it."""
+    now = int(time.time())
+    job['updatedAt'] = now
+    dynamodb.Table(SYSTEM_CONFIG_TABLE).put_item(Item={
+        'configKey': f"{DELETE_JOB_KEY_PREFIX}{job['contactId']}",
+        'configValue': json.dumps(job, default=str),
+        'updatedAt': Decimal(str(now)),
+    })
+
+
+def _clear_delete_job(contact_id: str) -> None:
+    try:
+        dynamodb.Table(SYSTEM_CONFIG_TABLE).delete_item(
+            Key={'configKey': f'{DELETE_JOB_KEY_PREFIX}{contact_id}'}
         )
-        
-        for obj in response.get('Contents', []):
-            s3_client.delete_object(Bucket=MEDIA_BUCKET, Key=obj['Key'])
-            logger.info(f"Deleted S3 file: {obj['Key']}")
-            return True
-        
-        return False
-        
     except Exception as e:
-        logger.error(f"S3 delete error: {e}")
-        raise
+        logger.warning(f"Failed to clear delete job for {contact_id}: {e}")
+
+
+def _continue_delete_job(job: Dict[str, Any], context: Any) -> None:
+    """Hand the job to a fresh asynchronous invocation of this function."""
+    lambda_client.invoke(
+        FunctionName=context.function_name if context else CONTACTS_DELETE_FUNCTION,
+        InvocationType='Event',
+        Payload=json.dumps({'deleteJob': {'contactId': job['contactId'], 'jobId': job['jobId']}})
+    )
+
+
+def _delete_job_response(job: Dict[str, Any], headers: Dict) -> Dict[str, Any]:
+    return {
+        'statusCode': 202,
+        'headers': headers,
+        'body': json.dumps({
+            'success': True,
+            'contactId': job['contactId'],
+            'deleteType': 'hard',
+            'status': 'running',
+            'jobId': job['jobId'],
+            'messagesDeleted': job['messagesDeleted'],
+            'mediaDeleted': job['mediaDeleted'],
+            'message': 'Hard delete is continuing in the background; repeat the request to check progress'
+        }),
+    }
 
 
 def _error_response(status_code: int, message: str) -> Dict[str, Any]:
@@ -4,7 +4,7 @@ export const contactsDelete = defineFunction({
   name: 'wecare-contacts-delete',
   entry: './handler.py',
   runtime: 20,
-  timeoutSeconds: 60, // Increased for hard delete operations
+  timeoutSeconds: 300, // Hard delete background jobs run in this function too
   memoryMB: 256,
   environment: { 
     AWS_REGION: 'us-east-1', 
@@ -12,6 +12,9 @@ export const contactsDelete = defineFunction({
     INBOUND_TABLE: 'base-wecare-digital-WhatsAppInboundTable',
     OUTBOUND_TABLE: 'base-wecare-digital-WhatsAppOutboundTable',
     MEDIA_BUCKET: 'auth.wecare.digital',
+    SYSTEM_CONFIG_TABLE: 'base-wecare-digital-SystemConfigTable',
+    CONTACT_ID_INDEX: 'contactId-index',
+    CONTACTS_DELETE_FUNCTION: 'wecare-contacts-delete',
     LOG_LEVEL: 'INFO' 
   },
 });
@@ -0,0 +1,698 @@
+"""
+Contacts Import/Export Lambda Function
+
+Purpose: Server-side bulk contact import and export
+
+Routes:
+- POST /contacts/import/upload-url - Presigned PUT URL for a CSV/VCF file
+- POST /contacts/import - Start importing an uploaded file (202 + jobId)
+- POST /contacts/export - Start an export, format ndjson or csv (202 + jobId)
+- GET /contacts/jobs/{jobId} - Job progress; finished exports include a
+  presigned download URL
+
+Import streams the file from S3 row by row, normalizes phones, dedups
+each batch against the phone index and writes new contacts with
+parallel BatchWriteItem calls. Export runs a parallel segmented scan and
+streams gzip NDJSON or CSV into an S3 multipart upload.
+
+Jobs run in asynchronous invocations of this function. Progress is kept
+in SystemConfig (contact_job#<jobId>); an import that runs out of time
+hands over to a fresh invocation, which skips the rows already read.
+"""
+
+import os
+import re
+import io
+import csv
+import json
+import gzip
+import time
+import uuid
+import codecs
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Iterator
+from decimal import Decimal
+from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.pagination import parallel_scan
+from utils.stats_counters import get_stats_counters, COUNTER_CONTACTS
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# AWS clients
+dynamodb = lazy_resource('dynamodb')
+s3_client = lazy_client('s3')
+lambda_client = lazy_client('lambda')
+
+# Environment variables
+CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'base-wecare-digital-ContactsTable')
+SYSTEM_CONFIG_TABLE = os.environ.get('SYSTEM_CONFIG_TABLE', 'base-wecare-digital-SystemConfigTable')
+PHONE_INDEX = os.environ.get('PHONE_INDEX', 'phone-index')
+MEDIA_BUCKET = os.environ.get('MEDIA_BUCKET', 'auth.wecare.digital')
+IMPORT_PREFIX = os.environ.get('IMPORT_PREFIX', 'stream/imports/')
+EXPORT_PREFIX = os.environ.get('EXPORT_PREFIX', 'stream/exports/')
+DEFAULT_COUNTRY_CODE = os.environ.get('DEFAULT_COUNTRY_CODE', '91')
+CONTACTS_IMPORT_EXPORT_FUNCTION = os.environ.get('CONTACTS_IMPORT_EXPORT_FUNCTION', 'wecare-contacts-import-export')
+
+# Import tuning
+IMPORT_BATCH_SIZE = 500
+BATCH_WRITE_SIZE = 25  # BatchWriteItem limit
+BATCH_WRITE_MAX_ATTEMPTS = 8
+LOOKUP_WORKERS = 16
+MAX_REPORTED_ERRORS = 100
+
+# Export tuning
+EXPORT_SEGMENTS = int(os.environ.get('EXPORT_SEGMENTS', '8'))
+MULTIPART_PART_SIZE = 8 * 1024 * 1024  # S3 minimum is 5 MB
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_CSV_FIELDS = [
+    'contactId', 'name', 'phone', 'email',
+    'optInWhatsApp', 'optInSms', 'optInEmail',
+    'allowlistWhatsApp', 'allowlistSms', 'allowlistEmail',
+    'createdAt', 'updatedAt',
+]
+
+# Jobs
+JOB_KEY_PREFIX = 'contact_job#'
+JOB_TIME_RESERVE_SECONDS = 30
+PRESIGNED_URL_SECONDS = 3600
+
+_PHONE_STRIP_PATTERN = re.compile(r'[^\d+]')
+_EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_FILE_NAME_PATTERN = re.compile(r'[^A-Za-z0-9._-]')
+
+# CORS headers
+CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+}
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Route API requests, or run a job in a background invocation."""
+    request_id = context.aws_request_id if context else 'local'
+
+    if event.get('contactJob'):
+        return _run_job(event['contactJob'], context, request_id)
+
+    request_context = event.get('requestContext', {})
+    if 'http' in request_context:
+        http_method = request_context.get('http', {}).get('method', 'GET')
+        path = request_context.get('http', {}).get('path', '')
+    else:
+        http_method = event.get('httpMethod', 'GET')
+        path = event.get('path', '') or event.get('rawPath', '')
+
+    if http_method == 'OPTIONS':
+        return {'statusCode': 200, 'headers': CORS_HEADERS, 'body': ''}
+
+    try:
+        body = json.loads(event.get('body') or '{}')
+        path_params = event.get('pathParameters') or {}
+
+        if http_method == 'GET' and '/contacts/jobs' in path:
+            return _get_job_status(path_params.get('jobId') or path.rstrip('/').rsplit('/', 1)[-1])
+        if http_method == 'POST' and '/contacts/import/upload-url' in path:
+            return _create_upload_url(body)
+        if http_method == 'POST' and '/contacts/import' in path:
+            return _start_import(body, context, request_id)
+        if http_method == 'POST' and '/contacts/export' in path:
+            return _start_export(body, context, request_id)
+
+        return _error_response(404, f'Route not found: {http_method} {path}')
+
+    except json.JSONDecodeError:
+        return _error_response(400, 'Invalid JSON in request body')
+    except Exception as e:
+        logger.error(json.dumps({
+            'event': 'contacts_import_export_error',
+            'error': str(e),
+            'path': path,
+            'requestId': request_id
+        }))
+        return _error_response(500, f'Internal server error: {str(e)}')
+
+
+# ============================================================================
+# API ROUTES
+# ============================================================================
+
+def _create_upload_url(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Presigned PUT URL so the browser uploads the file straight to S3."""
+    file_name = _FILE_NAME_PATTERN.sub('_', body.get('fileName') or 'contacts.csv')
+    s3_key = f"{IMPORT_PREFIX}{uuid.uuid4()}-{file_name}"
+    upload_url = s3_client.generate_presigned_url(
+        'put_object',
+        Params={'Bucket': MEDIA_BUCKET, 'Key': s3_key},
+        ExpiresIn=PRESIGNED_URL_SECONDS
+    )
+    return _response(200, {'uploadUrl': upload_url, 's3Key': s3_key, 'expiresIn': PRESIGNED_URL_SECONDS})
+
+
+def _start_import(body: Dict[str, Any], context: Any, request_id: str) -> Dict[str, Any]:
+    """Queue an import of a CSV/VCF file already uploaded to S3."""
+    s3_key = body.get('s3Key', '')
+    if not s3_key.startswith(IMPORT_PREFIX):
+        return _error_response(400, f's3Key must be under {IMPORT_PREFIX}')
+
+    file_format = (body.get('format') or _format_from_key(s3_key) or '').lower()
+    if file_format not in ('csv', 'vcf'):
+        return _error_response(400, 'format must be csv or vcf')
+
+    job = {
+        'jobId': str(uuid.uuid4()),
+        'type': 'import',
+        'status': 'queued',
+        's3Key': s3_key,
+        'format': file_format,
+        'rowsRead': 0,
+        'created': 0,
+        'updated': 0,
+        'skipped': 0,
+        'failed': 0,
+        'errors': [],
+        'startedAt': int(time.time()),
+        'requestId': request_id,
+    }
+    _save_job(job)
+    _invoke_job(job, context)
+    return _response(202, _job_summary(job))
+
+
+def _start_export(body: Dict[str, Any], context: Any, request_id: str) -> Dict[str, Any]:
+    """Queue an export of all (non-deleted) contacts."""
+    export_format = (body.get('format') or 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return _error_response(400, f"format must be one of {', '.join(EXPORT_FORMATS)}")
+
+    job_id = str(uuid.uuid4())
+    job = {
+        'jobId': job_id,
+        'type': 'export',
+        'status': 'queued',
+        'format': export_format,
+        'includeDeleted': bool(body.get('includeDeleted')),
+        's3Key': f"{EXPORT_PREFIX}contacts-{job_id}.{export_format}.gz",
+        'exported': 0,
+        'startedAt': int(time.time()),
+        'requestId': request_id,
+    }
+    _save_job(job)
+    _invoke_job(job, context)
+    return _response(202, _job_summary(job))
+
+
+def _get_job_status(job_id: str) -> Dict[str, Any]:
+    job = _load_job(job_id)
+    if not job:
+        return _error_response(404, 'Job not found')
+
+    summary = _job_summary(job)
+    if job['type'] == 'export' and job['status'] == 'completed':
+        summary['downloadUrl'] = s3_client.generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': MEDIA_BUCKET,
+                'Key': job['s3Key'],
+                'ResponseContentDisposition': f"attachment; filename=\"{job['s3Key'].rsplit('/', 1)[-1]}\"",
+            },
+            ExpiresIn=PRESIGNED_URL_SECONDS
+        )
+    return _response(200, summary)
+
+
+# ============================================================================
+# BACKGROUND JOBS
+# ============================================================================
+
+def _run_job(payload: Dict[str, Any], context: Any, request_id: str) -> Dict[str, Any]:
+    """Run (or continue) an import or export job."""
+    job = _load_job(payload.get('jobId', ''))
+    if not job or job['status'] in ('completed', 'failed'):
+        return {'status': 'skipped'}
+
+    remaining = context.get_remaining_time_in_millis() / 1000 if context else 900
+    deadline = time.time() + remaining - JOB_TIME_RESERVE_SECONDS
+    job['status'] = 'running'
+
+    try:
+        if job['type'] == 'import':
+            finished = _run_import(job, deadline)
+        else:
+            finished = _run_export(job)
+    except Exception as e:
+        job['status'] = 'failed'
+        job['error'] = str(e)
+        _save_job(job)
+        logger.error(json.dumps({
+            'event': 'contact_job_failed',
+            'jobId': job['jobId'],
+            'type': job['type'],
+            'error': str(e),
+            'requestId': request_id
+        }))
+        return {'status': 'failed'}
+
+    if not finished:
+        _save_job(job)
+        _invoke_job(job, context)
+        return {'status': 'running'}
+
+    job['status'] = 'completed'
+    job['completedAt'] = int(time.time())
+    _save_job(job)
+    logger.info(json.dumps({
+        'event': 'contact_job_completed',
+        'job': _job_summary(job),
+        'durationSeconds': job['completedAt'] - job['startedAt'],
+        'requestId': request_id
+    }))
+    return {'status': 'completed'}
+
+
+def _load_job(job_id: str) -> Optional[Dict[str, Any]]:
+    if not job_id:
+        return None
+    response = dynamodb.Table(SYSTEM_CONFIG_TABLE).get_item(Key={'configKey': f'{JOB_KEY_PREFIX}{job_id}'})
+    item = response.get('Item')
+    return json.loads(item['configValue']) if item else None
+
+
+def _save_job(job: Dict[str, Any]) -> None:
+    now = int(time.time())
+    job['updatedAt'] = now
+    dynamodb.Table(SYSTEM_CONFIG_TABLE).put_item(Item={
+        'configKey': f"{JOB_KEY_PREFIX}{job['jobId']}",
+        'configValue': json.dumps(job),
+        'updatedAt': Decimal(str(now)),
+    })
+
+
+def _invoke_job(job: Dict[str, Any], context: Any) -> None:
+    lambda_client.invoke(
+        FunctionName=context.function_name if context else CONTACTS_IMPORT_EXPORT_FUNCTION,
+        InvocationType='Event',
+        Payload=json.dumps({'contactJob': {'jobId': job['jobId']}})
+    )
+
+
+def _job_summary(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in job.items() if k != 'requestId'}
+
+
+# ============================================================================
+# IMPORT
+# ============================================================================
+
+def _run_import(job: Dict[str, Any], deadline: float) -> bool:
+    """
+    Import rows in batches until the file ends or the deadline passes.
+
+    Returns:
+        True when the whole file has been imported
+    """
+    rows = _read_import_rows(job['s3Key'], job['format'])
+
+    # Continuation: skip what an earlier invocation already imported
+    for _ in range(job['rowsRead']):
+        if next(rows, None) is None:
+            return True
+
+    with ThreadPoolExecutor(max_workers=LOOKUP_WORKERS) as pool:
+        while True:
+            if time.time() >= deadline:
+                return False
+
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    break
+            if not batch:
+                return True
+
+            _import_batch(pool, job, batch)
+            job['rowsRead'] += len(batch)
+            _save_job(job)
+
+
+def _import_batch(pool: ThreadPoolExecutor, job: Dict[str, Any], rows: List[Dict[str, str]]) -> None:
+    """Normalize, dedup and write one batch of rows."""
+    contacts: Dict[str, Dict[str, str]] = {}
+    for row in rows:
+        phone = normalize_phone(row.get('phone', ''))
+        email = (row.get('email') or '').strip().lower() or None
+        if email and not _EMAIL_PATTERN.match(email):
+            email = None
+        if not phone:
+            job['failed'] += 1
+            _record_error(job, f"Invalid phone: {row.get('phone', '')!r}")
+            continue
+        if phone in contacts:
+            # Later rows win within a file
+            job['skipped'] += 1
+        contacts[phone] = {'name': (row.get('name') or '').strip(), 'phone': phone, 'email': email}
+
+    if not contacts:
+        return
+
+    existing = dict(zip(contacts, pool.map(_find_contact_id, contacts)))
+    now = int(time.time())
+
+    new_items = []
+    updates = []
+    for phone, contact in contacts.items():
+        if existing[phone]:
+            updates.append((existing[phone], contact))
+            continue
+        contact_id = str(uuid.uuid4())
+        new_items.append({k: v for k, v in {
+            'id': contact_id,
+            'contactId': contact_id,
+            'name': contact['name'],
+            'phone': phone,
+            'email': contact['email'],
+            'optInWhatsApp': True,
+            'optInSms': True,
+            'optInEmail': True,
+            'allowlistWhatsApp': True,
+            'allowlistSms': True,
+            'allowlistEmail': True,
+            'createdAt': Decimal(str(now)),
+            'updatedAt': Decimal(str(now)),
+        }.items() if v is not None})
+
+    write_chunks = [new_items[i:i + BATCH_WRITE_SIZE] for i in range(0, len(new_items), BATCH_WRITE_SIZE)]
+    for chunk, error in zip(write_chunks, pool.map(_batch_put_contacts, write_chunks)):
+        if error:
+            job['failed'] += len(chunk)
+            _record_error(job, error)
+        else:
+            job['created'] += len(chunk)
+            get_stats_counters().increment(COUNTER_CONTACTS, len(chunk))
+
+    for error in pool.map(lambda args: _update_contact(*args, now), updates):
+        if error:
+            job['failed'] += 1
+            _record_error(job, error)
+        else:
+            job['updated'] += 1
+
+
+def _find_contact_id(phone: str) -> Optional[str]:
+    """Look up an existing contact by phone through the phone index."""
+    table = dynamodb.Table(CONTACTS_TABLE)
+    try:
+        response = table.query(
+            IndexName=PHONE_INDEX,
+            KeyConditionExpression=Key('phone').eq(phone),
+            ProjectionExpression='id',
+            Limit=1
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ValidationException':
+            raise
+        return _phone_map_fallback().get(phone)
+    items = response.get('Items', [])
+    return items[0]['id'] if items else None
+
+
+_phone_map: Optional[Dict[str, str]] = None
+_phone_map_lock = threading.Lock()
+
+
+def _phone_map_fallback() -> Dict[str, str]:
+    """Phone -> id map from one scan, for tables without the phone index."""
+    global _phone_map
+    with _phone_map_lock:
+        if _phone_map is None:
+            logger.warning(f"{CONTACTS_TABLE} has no {PHONE_INDEX}, scanning for dedup")
+            table = dynamodb.Table(CONTACTS_TABLE)
+            phone_map = {}
+            scan_kwargs = {'ProjectionExpression': 'id, phone'}
+            while True:
+                response = table.scan(**scan_kwargs)
+                for item in response.get('Items', []):
+                    if item.get('phone'):
+                        phone_map[item['phone']] = item['id']
+                if not response.get('LastEvaluatedKey'):
+                    break
+                scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            _phone_map = phone_map
+        return _phone_map
+
+
+def _batch_put_contacts(items: List[Dict[str, Any]]) -> Optional[str]:
+    """Write up to 25 contacts. Returns an error message on failure."""
+    request = {CONTACTS_TABLE: [{'PutRequest': {'Item': item}} for item in items]}
+    try:
+        for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+            response = dynamodb.meta.client.batch_write_item(RequestItems=request)
+            request = response.get('UnprocessedItems') or {}
+            if not request:
+                return None
+            time.sleep(min(0.05 * (2 ** attempt), 1.0))
+        return f"{len(request.get(CONTACTS_TABLE, []))} contacts left unprocessed"
+    except Exception as e:
+        return f"Batch write failed: {str(e)}"
+
+
+def _update_contact(contact_id: str, contact: Dict[str, Any], now: int) -> Optional[str]:
+    """Refresh name/email of an existing contact. Returns an error message on failure."""
+    expressions = ['updatedAt = :now']
+    values = {':now': Decimal(str(now))}
+    if contact['name']:
+        expressions.append('#name = :name')
+        values[':name'] = contact['name']
+    if contact['email']:
+        expressions.append('email = :email')
+        values[':email'] = contact['email']
+    kwargs = {}
+    if contact['name']:
+        kwargs['ExpressionAttributeNames'] = {'#name': 'name'}
+    try:
+        dynamodb.Table(CONTACTS_TABLE).update_item(
+            Key={'id': contact_id},
+            UpdateExpression='SET ' + ', '.join(expressions),
+            ExpressionAttributeValues=values,
+            **kwargs
+        )
+        return None
+    except Exception as e:
+        return f"Update failed for {contact['phone']}: {str(e)}"
+
+
+def _record_error(job: Dict[str, Any], message: str) -> None:
+    if len(job['errors']) < MAX_REPORTED_ERRORS:
+        job['errors'].append(message)
+
+
+def normalize_phone(raw: str) -> Optional[str]:
+    """
+    Normalize a phone number to +<country code><number>.
+
+    Numbers without a country code get DEFAULT_COUNTRY_CODE: 10 digits,
+    or 11 with a leading trunk 0. 00-prefixed numbers are international.
+
+    Returns:
+        Normalized phone, or None if it cannot be a valid number
+    """
+    phone = _PHONE_STRIP_PATTERN.sub('', raw or '')
+    if not phone:
+        return None
+    if phone.startswith('+'):
+        digits = phone[1:].replace('+', '')
+    elif phone.startswith('00'):
+        digits = phone[2:]
+    elif len(phone) == 11 and phone.startswith('0'):
+        digits = DEFAULT_COUNTRY_CODE + phone[1:]
+    elif len(phone) == 10:
+        digits = DEFAULT_COUNTRY_CODE + phone
+    else:
+        digits = phone
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return None
+    return f'+{digits}'
+
+
+def _read_import_rows(s3_key: str, file_format: str) -> Iterator[Dict[str, str]]:
+    """Stream {name, phone, email} rows from the uploaded file."""
+    body = s3_client.get_object(Bucket=MEDIA_BUCKET, Key=s3_key)['Body']
+    stream = gzip.GzipFile(fileobj=body) if s3_key.endswith('.gz') else body
+    lines = codecs.getreader('utf-8-sig')(stream, errors='replace')
+    if file_format == 'vcf':
+        return _parse_vcf(lines)
+    return _parse_csv(lines)
+
+
+def _parse_csv(lines: Iterator[str]) -> Iterator[Dict[str, str]]:
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if not header:
+        return
+    columns = [h.strip().lower().replace(' ', '') for h in header]
+    aliases = {'phone': ('phone', 'phonenumber', 'mobile', 'whatsapp'), 'name': ('name', 'fullname'), 'email': ('email', 'emailaddress')}
+    positions = {
+        field: next((i for i, column in enumerate(columns) if column in names), None)
+        for field, names in aliases.items()
+    }
+    for values in reader:
+        if not any(values):
+            continue
+        yield {
+            field: values[i].strip() if i is not None and i < len(values) else ''
+            for field, i in positions.items()
+        }
+
+
+def _parse_vcf(lines: Iterator[str]) -> Iterator[Dict[str, str]]:
+    """Yield one row per vCard (first TEL and EMAIL), unfolding continuation lines."""
+    card: Optional[Dict[str, str]] = None
+    for raw_line in _unfold_vcf(lines):
+        line = raw_line.strip()
+        upper = line.upper()
+        if upper == 'BEGIN:VCARD':
+            card = {'name': '', 'phone': '', 'email': ''}
+        elif upper == 'END:VCARD':
+            if card and (card['phone'] or card['email']):
+                yield card
+            card = None
+        elif card is not None and ':' in line:
+            prop, value = line.split(':', 1)
+            prop = prop.split(';', 1)[0].upper()
+            if prop == 'FN' and value:
+                card['name'] = value.strip()
+            elif prop == 'TEL' and not card['phone']:
+                card['phone'] = value.strip()
+            elif prop == 'EMAIL' and not card['email']:
+                card['email'] = value.strip()
+
+
+def _unfold_vcf(lines: Iterator[str]) -> Iterator[str]:
+    """Join RFC 6350 folded lines (continuations start with a space or tab)."""
+    pending = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending
+        pending = line
+    if pending is not None:
+        yield pending
+
+
+def _format_from_key(s3_key: str) -> Optional[str]:
+    name = s3_key.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    extension = name.rsplit('.', 1)[-1] if '.' in name else ''
+    return extension if extension in ('csv', 'vcf') else None
+
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+class _MultipartWriter(io.RawIOBase):
+    """Write-only file object that streams into an S3 multipart upload."""
+
+    def __init__(self, bucket: str, key: str):
+        self.bucket = bucket
+        self.key = key
+        # Stored as a .gz download, not Content-Encoding, so browsers keep it compressed
+        self.upload_id = s3_client.create_multipart_upload(
+            Bucket=bucket, Key=key, ContentType='application/gzip'
+        )['UploadId']
+        self.parts: List[Dict[str, Any]] = []
+        self.buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.buffer.extend(data)
+        if len(self.buffer) >= MULTIPART_PART_SIZE:
+            self._upload_part()
+        return len(data)
+
+    def _upload_part(self) -> None:
+        part_number = len(self.parts) + 1
+        response = s3_client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            PartNumber=part_number, Body=bytes(self.buffer)
+        )
+        self.parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+        self.buffer = bytearray()
+
+    def complete(self) -> None:
+        if self.buffer or not self.parts:
+            self._upload_part()
+        s3_client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts}
+        )
+
+    def abort(self) -> None:
+        try:
+            s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        except Exception as e:
+            logger.warning(f"Failed to abort multipart upload {self.key}: {e}")
+
+
+def _run_export(job: Dict[str, Any]) -> bool:
+    """Stream every contact to S3 as gzip NDJSON or CSV."""
+    writer = _MultipartWriter(MEDIA_BUCKET, job['s3Key'])
+    try:
+        with gzip.GzipFile(fileobj=writer, mode='wb') as compressed:
+            text = io.TextIOWrapper(compressed, encoding='utf-8', newline='')
+            csv_writer = None
+            if job['format'] == 'csv':
+                csv_writer = csv.DictWriter(text, fieldnames=EXPORT_CSV_FIELDS, extrasaction='ignore')
+                csv_writer.writeheader()
+
+            scan_kwargs = {}
+            if not job.get('includeDeleted', False):
+                scan_kwargs['FilterExpression'] = Attr('deletedAt').not_exists() | Attr('deletedAt').eq(None)
+            pages = parallel_scan(dynamodb.Table(CONTACTS_TABLE), total_segments=EXPORT_SEGMENTS, **scan_kwargs)
+            for items in pages:
+                for item in items:
+                    contact = _to_export_row(item)
+                    if csv_writer:
+                        csv_writer.writerow(contact)
+                    else:
+                        text.write(json.dumps(contact) + '\n')
+                job['exported'] += len(items)
+            text.flush()
+            text.detach()
+        writer.complete()
+    except Exception:
+        writer.abort()
+        raise
+    return True
+
+
+def _to_export_row(item: Dict[str, Any]) -> Dict[str, Any]:
+    row = {}
+    for key, value in item.items():
+        if isinstance(value, Decimal):
+            value = int(value) if value % 1 == 0 else float(value)
+        row[key] = value
+    row.setdefault('contactId', row.get('id'))
+    return row
+
+
+def _response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
+    return {'statusCode': status_code, 'headers': CORS_HEADERS, 'body': json.dumps(body)}
+
+
+def _error_response(status_code: int, message: str) -> Dict[str, Any]:
+    return _response(status_code, {'error': message})
@@ -0,0 +1,28 @@
+import { defineFunction } from '@aws-amplify/backend';
+
+/**
+ * Contacts Import/Export
+ *
+ * Streams CSV/VCF imports from S3 and gzip NDJSON/CSV exports to S3.
+ * Jobs run in asynchronous invocations of this function.
+ */
+export const contactsImportExport = defineFunction({
+  name: 'wecare-contacts-import-export',
+  entry: './handler.py',
+  runtime: 20,
+  timeoutSeconds: 900,
+  memoryMB: 1024,
+  environment: {
+    AWS_REGION: 'us-east-1',
+    LOG_LEVEL: 'INFO',
+    CONTACTS_TABLE: 'base-wecare-digital-ContactsTable',
+    SYSTEM_CONFIG_TABLE: 'base-wecare-digital-SystemConfigTable',
+    PHONE_INDEX: 'phone-index',
+    MEDIA_BUCKET: 'auth.wecare.digital',
+    IMPORT_PREFIX: 'stream/imports/',
+    EXPORT_PREFIX: 'stream/exports/',
+    DEFAULT_COUNTRY_CODE: '91',
+    EXPORT_SEGMENTS: '8',
+    CONTACTS_IMPORT_EXPORT_FUNCTION: 'wecare-contacts-import-export',
+  },
+});
@@ -10,16 +10,16 @@ Queries DynamoDB by contactId and filters out soft-deleted records.
 import os
 import json
 import logging
-import boto3
 from typing import Dict, Any
 from decimal import Decimal
+from utils.aws_clients import lazy_resource
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # DynamoDB client
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
 CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'Contact')
 
 
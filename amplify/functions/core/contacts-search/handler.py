@@ -11,17 +11,17 @@ Filters out soft-deleted records and supports pagination.
 import os
 import json
 import logging
-import boto3
 from typing import Dict, Any, Optional
 from decimal import Decimal
 from boto3.dynamodb.conditions import Attr
+from utils.aws_clients import lazy_resource
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # DynamoDB client
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
 CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'Contact')
 
 # Pagination defaults
@@ -8,18 +8,18 @@ import os
 import json
 import time
 import logging
-import boto3
 import re
 from typing import Dict, Any, List
 from decimal import Decimal
 from boto3.dynamodb.conditions import Attr
+from utils.aws_clients import lazy_resource
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # DynamoDB client
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
 CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'Contact')
 
 # Allowed update fields
@@ -7,12 +7,13 @@ ONLY deletes messages - does NOT delete contacts
 
 import json
 import os
-import boto3
 from botocore.exceptions import ClientError
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.stats_counters import get_stats_counters, COUNTER_INBOUND_MESSAGES, COUNTER_OUTBOUND_MESSAGES
 
 # Initialize clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-s3_client = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+s3_client = lazy_client('s3')
 
 # Table names - actual tables used by the system
 INBOUND_TABLE = os.environ.get('INBOUND_TABLE', 'base-wecare-digital-WhatsAppInboundTable')
@@ -102,15 +103,21 @@ def handler(event, context):
                 # Continue with DynamoDB deletion even if S3 fails
         
         # Delete the message from DynamoDB
+        delete_response = {}
         try:
-            table.delete_item(Key={'id': message_id})
+            delete_response = table.delete_item(Key={'id': message_id}, ReturnValues='ALL_OLD')
             print(f"Deleted message {message_id} from {table_name}")
         except ClientError as e:
             # Try with 'messageId' key if 'id' fails
             if 'ValidationException' in str(e):
-                table.delete_item(Key={'messageId': message_id})
+                delete_response = table.delete_item(Key={'messageId': message_id}, ReturnValues='ALL_OLD')
                 print(f"Deleted message {message_id} from {table_name} using messageId key")
         
+        if delete_response.get('Attributes'):
+            get_stats_counters().decrement(
+                COUNTER_OUTBOUND_MESSAGES if direction == 'OUTBOUND' else COUNTER_INBOUND_MESSAGES
+            )
+        
         return {
             'statusCode': 200,
             'headers': headers,
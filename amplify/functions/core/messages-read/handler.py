@@ -6,6 +6,10 @@ Returns combined inbound and outbound messages for dashboard/messaging views.
 Supports filtering by contactId, channel, and direction.
 Generates pre-signed URLs for media files.
 
+Media keys on a page are resolved together: keys already resolved on the
+item (actualS3Key) or in the per-container cache need no S3 call, the
+rest are looked up concurrently and written back to their items.
+
 DynamoDB Tables (actual names):
 - base-wecare-digital-WhatsAppInboundTable
 - base-wecare-digital-WhatsAppOutboundTable
@@ -13,18 +17,21 @@ DynamoDB Tables (actual names):
 
 import os
 import json
+import time
 import logging
-import boto3
-from typing import Dict, Any, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from decimal import Decimal
+from utils.aws_clients import lazy_client, lazy_resource
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # DynamoDB client
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-s3_client = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+s3_client = lazy_client('s3')
 
 # DynamoDB table names - actual tables used by the system
 INBOUND_TABLE = os.environ.get('INBOUND_TABLE', 'base-wecare-digital-WhatsAppInboundTable')
@@ -37,6 +44,15 @@ DEFAULT_LIMIT = 50
 MAX_LIMIT = 100
 PRESIGNED_URL_EXPIRY = 3600  # 1 hour
 
+# Media key resolution
+MEDIA_RESOLVE_WORKERS = 50  # one S3 wave for a full page
+MEDIA_KEY_CACHE_TTL_SECONDS = 3600
+MEDIA_KEY_CACHE_MAX_ENTRIES = 2048
+
+# Per-container cache: stored s3Key -> (actual key, cached at)
+_media_key_cache: Dict[str, Tuple[str, float]] = {}
+_media_key_lock = threading.Lock()
+
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -78,8 +94,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Limit results
         messages = messages[:limit]
         
+        # Resolve all media keys of the page in one concurrent wave
+        media_keys = _resolve_media_keys(messages)
+        
         # Convert for JSON serialization
-        messages = [_convert_from_dynamodb(m) for m in messages]
+        messages = [_convert_from_dynamodb(m, media_keys) for m in messages]
         
         logger.info(json.dumps({
             'event': 'messages_read',
@@ -170,8 +189,93 @@ def _scan_messages(filter_parts: List[str], expression_values: Dict, limit: int,
     return all_messages
 
 
-def _convert_from_dynamodb(item: Dict[str, Any]) -> Dict[str, Any]:
-    """Convert DynamoDB types to Python types and generate pre-signed URLs for media."""
+def _resolve_media_keys(items: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+    """
+    Resolve the actual S3 key of every media message on a page.
+    
+    Keys come from the item's stored actualS3Key, then the per-container
+    cache; the rest are looked up in S3 concurrently and written back to
+    their items so later reads skip S3.
+    
+    Returns:
+        Stored s3Key -> actual key (None if the file was not found)
+    """
+    resolved: Dict[str, Optional[str]] = {}
+    unresolved: Dict[str, List[Dict[str, Any]]] = {}
+    now = time.time()
+    
+    for item in items:
+        s3_key = item.get('s3Key')
+        if not s3_key or s3_key in resolved:
+            continue
+        if item.get('actualS3Key'):
+            resolved[s3_key] = item['actualS3Key']
+            continue
+        with _media_key_lock:
+            cached = _media_key_cache.get(s3_key)
+        if cached and now - cached[1] < MEDIA_KEY_CACHE_TTL_SECONDS:
+            resolved[s3_key] = cached[0]
+        # Cache hits are still written back to the item below
+        unresolved.setdefault(s3_key, []).append(item)
+    
+    if not unresolved:
+        return resolved
+    lookups = [key for key in unresolved if key not in resolved]
+    
+    with ThreadPoolExecutor(max_workers=min(MEDIA_RESOLVE_WORKERS, len(unresolved))) as pool:
+        found = dict(zip(lookups, pool.map(
+            lambda key: _find_actual_s3_key(key, unresolved[key][0].get('messageId') or unresolved[key][0].get('id')),
+            lookups
+        )))
+        resolved.update(found)
+        
+        with _media_key_lock:
+            for key, actual_key in found.items():
+                if actual_key:
+                    _media_key_cache[key] = (actual_key, now)
+            while len(_media_key_cache) > MEDIA_KEY_CACHE_MAX_ENTRIES:
+                _media_key_cache.pop(next(iter(_media_key_cache)))
+        
+        write_backs = [
+            (item, resolved[key])
+            for key, key_items in unresolved.items() if resolved.get(key)
+            for item in key_items
+        ]
+        list(pool.map(lambda args: _store_actual_s3_key(*args), write_backs))
+    
+    return resolved
+
+
+def _store_actual_s3_key(item: Dict[str, Any], actual_key: str) -> None:
+    """Remember the resolved media key on the message item."""
+    direction = str(item.get('direction', '')).lower()
+    table_name = OUTBOUND_TABLE if direction == 'outbound' else INBOUND_TABLE
+    key_name = 'id' if item.get('id') else 'messageId'
+    if not item.get(key_name):
+        return
+    try:
+        dynamodb.Table(table_name).update_item(
+            Key={key_name: item[key_name]},
+            UpdateExpression='SET actualS3Key = :key',
+            ConditionExpression=f'attribute_exists({key_name})',
+            ExpressionAttributeValues={':key': actual_key}
+        )
+    except Exception as e:
+        logger.warning(json.dumps({
+            'event': 'actual_s3_key_write_back_failed',
+            'messageId': item[key_name],
+            'error': str(e)
+        }))
+
+
+def _convert_from_dynamodb(item: Dict[str, Any],
+                           media_keys: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, Any]:
+    """
+    Convert DynamoDB types to Python types and generate pre-signed URLs for media.
+    
+    media_keys holds keys already resolved by _resolve_media_keys(); keys
+    missing from it are looked up in S3.
+    """
     result = {}
     for key, value in item.items():
         if isinstance(value, Decimal):
@@ -218,7 +322,10 @@ def _convert_from_dynamodb(item: Dict[str, Any]) -> Dict[str, Any]:
             # AWS EUM Social API may append WhatsApp media ID to the S3 key
             # The stored s3Key might not match the actual file in S3
             # Search S3 with prefix to find the actual file
-            actual_s3_key = _find_actual_s3_key(s3_key, message_id)
+            if media_keys is not None and s3_key in media_keys:
+                actual_s3_key = media_keys[s3_key]
+            else:
+                actual_s3_key = _find_actual_s3_key(s3_key, message_id)
             
             if actual_s3_key:
                 # Use CloudFront CDN URL instead of pre-signed S3 URL
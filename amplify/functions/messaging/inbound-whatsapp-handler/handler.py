@@ -15,20 +15,36 @@ import json
 import uuid
 import time
 import logging
-import boto3
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Set
 from decimal import Decimal
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.error_handler import ServiceCircuitBreakers, set_retry_deadline
+from utils.ai_pipeline import AIPipeline
+from utils.payment_ledger import get_payment_ledger, sanitize_reference_id
+from utils.system_events import get_system_event_log
+from utils.template_catalog import get_template_catalog
+from utils.phone_registry import get_phone_registry
+from utils.stats_counters import (
+    get_stats_counters,
+    ai_language_counter,
+    COUNTER_CONTACTS,
+    COUNTER_INBOUND_MESSAGES,
+    COUNTER_AI_INTERACTIONS,
+)
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-sqs = boto3.client('sqs', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-social_messaging = boto3.client('socialmessaging', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-s3 = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-lambda_client = boto3.client('lambda', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+sqs = lazy_client('sqs')
+social_messaging = lazy_client('socialmessaging')
+s3 = lazy_client('s3')
+lambda_client = lazy_client('lambda')
+
+# Shared with outbound-whatsapp; read receipts are skipped while it is open
+WHATSAPP_BREAKER = ServiceCircuitBreakers.whatsapp()
 
 # Environment variables - use actual table names
 CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'base-wecare-digital-ContactsTable')
@@ -41,24 +57,14 @@ MEDIA_BUCKET = os.environ.get('MEDIA_BUCKET', 'auth.wecare.digital')
 MEDIA_PREFIX = os.environ.get('MEDIA_INBOUND_PREFIX', 'whatsapp-media/whatsapp-media-incoming/')
 SEND_MODE = os.environ.get('SEND_MODE', 'LIVE')
 
-# AI Lambda function names
-AI_QUERY_KB_FUNCTION = os.environ.get('AI_QUERY_KB_FUNCTION', 'wecare-ai-query-kb')
+# AI replies: 'inline' runs the retrieve-once pipeline in this function,
+# 'lambda' makes one call to ai-generate-response in pipeline mode
+AI_PIPELINE_MODE = os.environ.get('AI_PIPELINE_MODE', 'inline')
 AI_GENERATE_RESPONSE_FUNCTION = os.environ.get('AI_GENERATE_RESPONSE_FUNCTION', 'wecare-ai-generate-response')
 
 # Outbound WhatsApp Lambda function name
 OUTBOUND_WHATSAPP_FUNCTION = os.environ.get('OUTBOUND_WHATSAPP_FUNCTION', 'wecare-outbound-whatsapp')
 
-# WhatsApp Phone Number IDs - Map Meta phone number IDs to AWS phone number IDs
-# Format: Meta phone number ID -> AWS EUM phone-number-id
-PHONE_NUMBER_ID_1 = os.environ.get('WHATSAPP_PHONE_NUMBER_ID_1', 'phone-number-id-baa217c3f11b4ffd956f6f3afb44ce54')
-PHONE_NUMBER_ID_2 = os.environ.get('WHATSAPP_PHONE_NUMBER_ID_2', 'phone-number-id-1447bc72d1b040f4bf2341c9e04b2e06')
-
-# Map display phone numbers to AWS phone number IDs for reference
-PHONE_NUMBER_MAP = {
-    '919330994400': PHONE_NUMBER_ID_1,  # +91 93309 94400
-    '919903300044': PHONE_NUMBER_ID_2,  # +91 99033 00044
-}
-
 # TTL: 30 days in seconds
 MESSAGE_TTL_SECONDS = 30 * 24 * 60 * 60
 
@@ -77,6 +83,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     }
     """
     request_id = context.aws_request_id if context else 'local'
+    set_retry_deadline(context)
     processed_count = 0
     error_count = 0
     
@@ -151,9 +158,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         error_count += 1
                 
                 # Process status updates
-                for status in value.get('statuses', []):
+                statuses = value.get('statuses', [])
+                superseded = _superseded_payment_statuses(statuses)
+                for index, status in enumerate(statuses):
                     try:
-                        _process_status(status, request_id)
+                        _process_status(status, request_id, notify=index not in superseded)
                     except Exception as e:
                         logger.error(json.dumps({
                             'event': 'status_processing_error',
@@ -225,22 +234,22 @@ def _get_aws_phone_number_id(display_phone: str, meta_phone_id: str) -> str:
     """
     Map display phone number or Meta phone ID to AWS EUM phone number ID.
     Returns the appropriate AWS phone number ID for sending reactions.
+    Resolved from the in-memory phone number registry (utils/phone_registry.py).
     """
-    # Clean display phone number (remove + and spaces)
-    clean_phone = display_phone.replace('+', '').replace(' ', '').replace('-', '')
+    registry = get_phone_registry()
+    number = registry.resolve_inbound(display_phone, meta_phone_id)
+    if number:
+        return number['phoneNumberId']
     
-    # Check if we have a mapping for this phone number
-    if clean_phone in PHONE_NUMBER_MAP:
-        return PHONE_NUMBER_MAP[clean_phone]
-    
-    # Default to first phone number ID if no mapping found
+    # Default sending number if the receiving number is not registered
+    default_id = registry.default_phone_number_id()
     logger.warning(json.dumps({
         'event': 'phone_number_mapping_not_found',
         'displayPhone': display_phone,
         'metaPhoneId': meta_phone_id,
-        'usingDefault': PHONE_NUMBER_ID_1
+        'usingDefault': default_id
     }))
-    return PHONE_NUMBER_ID_1
+    return default_id
 
 
 def _process_message(
@@ -336,6 +345,7 @@ def _process_message(
     
     messages_table = dynamodb.Table(MESSAGES_TABLE)
     messages_table.put_item(Item={k: v for k, v in message_record.items() if v is not None})
+    get_stats_counters().increment(COUNTER_INBOUND_MESSAGES)
     
     # Update Contact.lastInboundMessageAt for 24-hour window
     _update_contact_timestamp(contact_id, now)
@@ -593,6 +603,7 @@ def _get_or_create_contact(phone: str, sender_name: str = '') -> Dict[str, Any]:
     }
     
     contacts_table.put_item(Item=contact)
+    get_stats_counters().increment(COUNTER_CONTACTS)
     
     logger.info(json.dumps({
         'event': 'contact_auto_created',
@@ -798,7 +809,7 @@ def _store_media_record(message_id: str, s3_key: str, media_data: Dict, whatsapp
         return None
 
 
-def _process_status(status: Dict, request_id: str) -> None:
+def _process_status(status: Dict, request_id: str, notify: bool = True) -> None:
     """
     Process message status update (sent|delivered|read|failed|payment).
     Per AWS docs: Can also send status updates back to WhatsApp to mark as read.
@@ -829,7 +840,7 @@ def _process_status(status: Dict, request_id: str) -> None:
     
     # Handle payment status webhooks FIRST (before other checks)
     if status_type == 'payment' or 'payment' in status:
-        _process_payment_status(status, request_id)
+        _process_payment_status(status, request_id, notify)
         return
     
     if not whatsapp_message_id or not status_value:
@@ -874,42 +885,23 @@ def _process_status(status: Dict, request_id: str) -> None:
         }))
 
 
-def _sanitize_reference_id(reference_id: str) -> str:
-    """
-    Sanitize reference_id - remove duplicate WDSR prefix and underscores.
-    
-    WhatsApp/Razorpay may return reference_id with extra prefixes or underscores.
-    This ensures clean WDSR<ID> format for display.
-    
-    Examples:
-    - "WDSR_WDSR41BA3534" -> "WDSR41BA3534" (remove duplicate prefix)
-    - "WDSR_41BA3534" -> "WDSR41BA3534" (remove underscore)
-    - "WDSR41BA3534" -> "WDSR41BA3534" (keep as-is)
-    - "WDSR+41BA3534" -> "WDSR41BA3534" (remove plus sign)
-    """
-    import re
-    
-    if not reference_id:
-        return reference_id
-    
-    # Remove all underscores and non-alphanumeric characters
-    cleaned = re.sub(r'[^A-Za-z0-9]', '', reference_id).upper()
-    
-    # Remove ALL duplicate WDSR prefixes (handle WDSRWDSRWDSR... cases)
-    while 'WDSRWDSR' in cleaned:
-        cleaned = cleaned.replace('WDSRWDSR', 'WDSR')
-    
-    # Ensure single WDSR prefix
-    if not cleaned.startswith('WDSR'):
-        cleaned = f'WDSR{cleaned}'
-    
-    return cleaned
+def _superseded_payment_statuses(statuses: List[Dict]) -> Set[int]:
+    """Positions of payment statuses followed by another one for the same reference."""
+    references = {}
+    for index, status in enumerate(statuses):
+        if status.get('type') == 'payment' or 'payment' in status:
+            references[index] = sanitize_reference_id(status.get('payment', {}).get('reference_id', ''))
+    last_position = {reference_id: index for index, reference_id in references.items()}
+    return {index for index, reference_id in references.items() if last_position[reference_id] != index}
 
 
-def _process_payment_status(status: Dict, request_id: str) -> None:
+def _process_payment_status(status: Dict, request_id: str, notify: bool = True) -> None:
     """
     Process payment status webhook from WhatsApp.
     
+    notify=False records the status without messaging the customer (a
+    later status for the same payment in the same webhook supersedes it).
+    
     Payment webhook format:
     {
         "id": "wamid.xxx",
@@ -939,7 +931,7 @@ def _process_payment_status(status: Dict, request_id: str) -> None:
     payment_data = status.get('payment', {})
     raw_reference_id = payment_data.get('reference_id', '')
     # Sanitize reference_id - remove duplicate WDSR prefix and underscores
-    reference_id = _sanitize_reference_id(raw_reference_id)
+    reference_id = sanitize_reference_id(raw_reference_id)
     payment_status = status.get('status', '')
     recipient_id = status.get('recipient_id', '')
     timestamp = int(status.get('timestamp', time.time()))
@@ -1011,7 +1003,19 @@ def _process_payment_status(status: Dict, request_id: str) -> None:
         request_id=request_id
     )
     
-    # Send order_status message based on payment status
+    # Send order_status message based on payment status, once per status
+    # and only for the last payment status of this reference in the batch
+    if payment_status not in ('captured', 'failed') or not notify:
+        return
+    if not get_payment_ledger().claim_notification(reference_id, payment_status):
+        logger.info(json.dumps({
+            'event': 'order_status_notification_deduplicated',
+            'referenceId': reference_id,
+            'paymentStatus': payment_status,
+            'requestId': request_id
+        }))
+        return
+    
     if payment_status == 'captured':
         _send_order_status_message(
             recipient_id=recipient_id,
@@ -1074,6 +1078,22 @@ def _store_payment_record(reference_id: str, recipient_id: str, payment_status:
         
         messages_table = dynamodb.Table(MESSAGES_TABLE)
         messages_table.put_item(Item={k: v for k, v in payment_record.items() if v is not None and v != ''})
+        get_stats_counters().increment(COUNTER_INBOUND_MESSAGES)
+        
+        # Same payment as the request outbound-whatsapp recorded and the Razorpay webhook
+        amount_paise = int(round(actual_amount * 100))
+        get_payment_ledger().upsert(
+            reference_id,
+            status=payment_status,
+            amount=amount_paise or None,
+            amountInRupees=actual_amount or None,
+            currency=currency,
+            contact=recipient_id,
+            contactId=contact_id,
+            transactionId=transaction_id,
+            transactionType=transaction_type,
+            source='whatsapp'
+        )
         
         logger.info(json.dumps({
             'event': 'payment_record_stored',
@@ -1146,82 +1166,28 @@ def _get_contact_by_phone(phone: str) -> Optional[Dict]:
 
 def _lookup_payment_amount(reference_id: str, request_id: str) -> float:
     """
-    Look up payment amount from original payment request in Messages table.
-    This is a fallback when WhatsApp webhook doesn't include the amount.
-    
-    The original payment request message stores the amount in the content field
-    or in a dedicated paymentAmount field.
+    Look up payment amount from the payment ledger.
+    This is a fallback when WhatsApp webhook doesn't include the amount;
+    outbound-whatsapp records the amount when it sends the payment request.
     """
     try:
-        messages_table = dynamodb.Table(MESSAGES_TABLE)
+        payment = get_payment_ledger().get(sanitize_reference_id(reference_id))
         
-        # Sanitize reference_id for lookup
-        sanitized_ref = _sanitize_reference_id(reference_id)
-        
-        # Extract just the ID part (without WDSR prefix) for broader search
-        id_part = sanitized_ref.replace('WDSR', '') if sanitized_ref.startswith('WDSR') else sanitized_ref
-        
-        # Look for the original payment request message by reference_id
-        # Search with multiple variations to handle format differences
-        response = messages_table.scan(
-            FilterExpression='paymentReferenceId = :ref1 OR paymentReferenceId = :ref2 OR contains(content, :id_part)',
-            ExpressionAttributeValues={
-                ':ref1': sanitized_ref,
-                ':ref2': reference_id,  # Also try original format
-                ':id_part': id_part
-            },
-            Limit=10
-        )
-        
-        items = response.get('Items', [])
+        amount = 0.0
+        if payment:
+            if payment.get('amountInRupees') is not None:
+                amount = float(payment['amountInRupees'])
+            elif payment.get('amount') is not None:
+                amount = float(payment['amount']) / 100
         
         logger.info(json.dumps({
             'event': 'payment_amount_lookup_result',
             'referenceId': reference_id,
-            'sanitizedRef': sanitized_ref,
-            'idPart': id_part,
-            'foundCount': len(items),
-            'requestId': request_id
-        }))
-        
-        # Look for amount in the found records
-        for item in items:
-            # Check for paymentAmount field (stored in paise)
-            payment_amount = item.get('paymentAmount')
-            if payment_amount:
-                offset = item.get('paymentOffset', 100)
-                amount = float(payment_amount) / float(offset)
-                logger.info(json.dumps({
-                    'event': 'payment_amount_found_in_record',
-                    'referenceId': reference_id,
-                    'amount': amount,
-                    'requestId': request_id
-                }))
-                return amount
-            
-            # Try to extract from content (e.g., "Payment request: ₹500.00")
-            content = item.get('content', '')
-            if '₹' in content:
-                import re
-                match = re.search(r'₹([\d,]+\.?\d*)', content)
-                if match:
-                    amount_str = match.group(1).replace(',', '')
-                    amount = float(amount_str)
-                    logger.info(json.dumps({
-                        'event': 'payment_amount_extracted_from_content',
-                        'referenceId': reference_id,
-                        'amount': amount,
-                        'content': content[:100],
-                        'requestId': request_id
-                    }))
-                    return amount
-        
-        logger.warning(json.dumps({
-            'event': 'payment_amount_not_found',
-            'referenceId': reference_id,
+            'found': payment is not None,
+            'amount': amount,
             'requestId': request_id
         }))
-        return 0.0
+        return amount
         
     except Exception as e:
         logger.error(json.dumps({
@@ -1283,7 +1249,7 @@ def _send_order_status_message(recipient_id: str, reference_id: str,
             'body': json.dumps({
                 'contactId': contact_id if contact_id else None,
                 'recipientPhone': contact_phone,  # Fallback to phone if no contactId
-                'phoneNumberId': PHONE_NUMBER_ID_1,
+                'phoneNumberId': get_phone_registry().default_phone_number_id(),
                 'isOrderStatus': True,
                 'orderStatusDetails': {
                     'reference_id': reference_id,
@@ -1463,7 +1429,8 @@ def _send_read_receipt(whatsapp_message_id: str, phone_number_id: str, request_i
         }))
         
         # Call SendWhatsAppMessage API with read status
-        response = social_messaging.send_whatsapp_message(
+        response = WHATSAPP_BREAKER.call(
+            social_messaging.send_whatsapp_message,
             originationPhoneNumberId=phone_number_id,
             message=json.dumps(read_receipt_payload).encode('utf-8'),
             metaApiVersion='v20.0'
@@ -1582,21 +1549,18 @@ def _process_ai_automation(message_id: str, contact_id: str, content: str, messa
     
     try:
         logger.info(json.dumps({
-            'event': 'ai_query_kb_start',
+            'event': 'ai_pipeline_start',
+            'mode': AI_PIPELINE_MODE,
             'messageId': message_id,
             'messageType': message_type,
             'query': content[:100] if content else '',
             'requestId': request_id
         }))
-        kb_result = _invoke_ai_query_kb(content, message_id, request_id)
-        logger.info(json.dumps({
-            'event': 'ai_query_kb_result',
-            'messageId': message_id,
-            'hasResult': kb_result is not None,
-            'requestId': request_id
-        }))
         
-        ai_response = _invoke_ai_generate_response(content, kb_result, message_id, contact_id, request_id)
+        if AI_PIPELINE_MODE == 'lambda':
+            ai_response = _invoke_ai_generate_response(content, message_id, contact_id, request_id)
+        else:
+            ai_response = _run_ai_pipeline(content, ai_config, message_id, request_id)
         
         # Send auto-reply if we got a valid AI response
         if ai_response and ai_response.get('suggestion'):
@@ -1631,51 +1595,35 @@ def _process_ai_automation(message_id: str, contact_id: str, content: str, messa
         return None
 
 
-def _invoke_ai_query_kb(query: str, message_id: str, request_id: str) -> Optional[Dict]:
-    """Invoke ai-query-kb Lambda function."""
-    try:
-        logger.info(json.dumps({
-            'event': 'invoking_ai_query_kb',
-            'functionName': AI_QUERY_KB_FUNCTION,
-            'messageId': message_id,
-            'requestId': request_id
-        }))
-        response = lambda_client.invoke(
-            FunctionName=AI_QUERY_KB_FUNCTION,
-            InvocationType='RequestResponse',
-            Payload=json.dumps({'query': query, 'messageId': message_id, 'requestId': request_id})
-        )
-        status_code = response.get('StatusCode')
-        logger.info(json.dumps({
-            'event': 'ai_query_kb_response',
-            'statusCode': status_code,
-            'messageId': message_id,
-            'requestId': request_id
-        }))
-        if status_code == 200:
-            payload = response['Payload'].read().decode('utf-8')
-            return json.loads(json.loads(payload).get('body', '{}'))
-        return None
-    except Exception as e:
-        logger.error(json.dumps({
-            'event': 'ai_query_kb_error',
-            'error': str(e),
-            'messageId': message_id,
-            'requestId': request_id
-        }))
-        return None
+def _run_ai_pipeline(content: str, ai_config: Dict[str, Any], message_id: str, request_id: str) -> Optional[Dict]:
+    """Generate the reply in process: one KB retrieval, one model call."""
+    result = AIPipeline(
+        kb_id=ai_config.get('knowledgeBaseId'),
+        model_id=ai_config.get('modelId')
+    ).run(content, request_id)
+    
+    logger.info(json.dumps({
+        'event': 'ai_pipeline_result',
+        'messageId': message_id,
+        'source': result.source,
+        'resultsCount': result.results_count,
+        'detectedLanguage': result.language_name,
+        'requestId': request_id
+    }))
+    
+    _store_ai_interaction(message_id, content, result.suggestion, request_id, result.language)
+    return result.to_dict()
 
 
-def _invoke_ai_generate_response(content: str, kb_context: Optional[Dict], 
-                                  message_id: str, contact_id: str, request_id: str) -> Optional[Dict]:
-    """Invoke ai-generate-response Lambda function."""
+def _invoke_ai_generate_response(content: str, message_id: str, contact_id: str, request_id: str) -> Optional[Dict]:
+    """Invoke ai-generate-response Lambda function in pipeline mode."""
     try:
         response = lambda_client.invoke(
             FunctionName=AI_GENERATE_RESPONSE_FUNCTION,
             InvocationType='RequestResponse',
             Payload=json.dumps({
                 'messageContent': content,
-                'kbContext': kb_context,
+                'pipeline': True,
                 'messageId': message_id,
                 'contactId': contact_id,
                 'requestId': request_id
@@ -1683,14 +1631,23 @@ def _invoke_ai_generate_response(content: str, kb_context: Optional[Dict],
         )
         if response.get('StatusCode') == 200:
             body = json.loads(json.loads(response['Payload'].read().decode('utf-8')).get('body', '{}'))
-            _store_ai_interaction(message_id, content, body.get('suggestion', ''), request_id)
+            suggestion = body.get('suggestion') or body.get('suggestedResponse', '')
+            body['suggestion'] = suggestion
+            _store_ai_interaction(message_id, content, suggestion, request_id, body.get('language'))
             return body
         return None
-    except Exception:
+    except Exception as e:
+        logger.error(json.dumps({
+            'event': 'ai_generate_response_error',
+            'error': str(e),
+            'messageId': message_id,
+            'requestId': request_id
+        }))
         return None
 
 
-def _store_ai_interaction(message_id: str, query: str, response: str, request_id: str) -> None:
+def _store_ai_interaction(message_id: str, query: str, response: str, request_id: str,
+                          language: Optional[str] = None) -> None:
     """Store AI interaction record."""
     try:
         ai_table = dynamodb.Table(AI_INTERACTIONS_TABLE)
@@ -1700,8 +1657,13 @@ def _store_ai_interaction(message_id: str, query: str, response: str, request_id
             'query': query,
             'response': response,
             'approved': False,
+            'detectedLanguage': language or 'unknown',
             'timestamp': Decimal(str(int(time.time()))),
         })
+        get_stats_counters().increment({
+            COUNTER_AI_INTERACTIONS: 1,
+            ai_language_counter(language): 1,
+        })
     except Exception as e:
         logger.error(f"Failed to store AI interaction: {str(e)}")
 
@@ -1748,7 +1710,7 @@ def _process_template_status(value: Dict, request_id: str) -> None:
         'requestId': request_id
     }))
     
-    # Store template status in SystemConfig table for dashboard display
+    # Record template status in the SystemEvents log for dashboard display
     _store_system_event(
         event_type='template_status',
         event_data={
@@ -1761,6 +1723,17 @@ def _process_template_status(value: Dict, request_id: str) -> None:
         request_id=request_id
     )
     
+    # Keep the template catalog current so sends stop using paused/rejected templates
+    try:
+        get_template_catalog().apply_status(str(template_id), event, reason)
+    except Exception as e:
+        logger.warning(json.dumps({
+            'event': 'template_catalog_update_error',
+            'templateName': template_name,
+            'error': str(e),
+            'requestId': request_id
+        }))
+    
     # Log warning for rejected/paused templates
     if event in ['REJECTED', 'PAUSED', 'DISABLED', 'FLAGGED']:
         logger.warning(json.dumps({
@@ -1808,7 +1781,7 @@ def _process_phone_quality_update(value: Dict, request_id: str) -> None:
         'requestId': request_id
     }))
     
-    # Store phone quality in SystemConfig table
+    # Record phone quality in the SystemEvents log
     _store_system_event(
         event_type='phone_quality',
         event_data={
@@ -1820,6 +1793,12 @@ def _process_phone_quality_update(value: Dict, request_id: str) -> None:
         request_id=request_id
     )
     
+    # Routing and throughput decisions read quality and tier from the registry
+    _update_phone_registry(
+        lambda registry: registry.apply_quality_update(display_phone, quality_score, current_limit),
+        display_phone, request_id
+    )
+    
     # Log warning for quality issues
     if quality_score in ['YELLOW', 'RED'] or event == 'FLAGGED':
         logger.warning(json.dumps({
@@ -1871,7 +1850,7 @@ def _process_account_update(value: Dict, request_id: str) -> None:
         'requestId': request_id
     }))
     
-    # Store account update in SystemConfig table
+    # Record account update in the SystemEvents log
     _store_system_event(
         event_type='account_update',
         event_data={
@@ -1886,6 +1865,10 @@ def _process_account_update(value: Dict, request_id: str) -> None:
     
     # Log messaging limit changes
     if event == 'PHONE_NUMBER_MESSAGING_LIMIT_CHANGED':
+        _update_phone_registry(
+            lambda registry: registry.apply_limit_update(phone_number, current_limit),
+            phone_number, request_id
+        )
         logger.info(json.dumps({
             'event': 'messaging_limit_changed',
             'phoneNumber': phone_number,
@@ -1912,58 +1895,38 @@ def _process_account_update(value: Dict, request_id: str) -> None:
         }))
 
 
+def _update_phone_registry(update, display_phone: str, request_id: str) -> None:
+    """Apply a webhook to the phone number registry; failures are logged only."""
+    try:
+        if not update(get_phone_registry()):
+            logger.info(json.dumps({
+                'event': 'phone_registry_number_not_registered',
+                'displayPhone': display_phone,
+                'requestId': request_id
+            }))
+    except Exception as e:
+        logger.warning(json.dumps({
+            'event': 'phone_registry_update_error',
+            'displayPhone': display_phone,
+            'error': str(e),
+            'requestId': request_id
+        }))
+
+
 def _store_system_event(event_type: str, event_data: Dict, request_id: str) -> None:
     """
-    Store system event in SystemConfig table for dashboard display.
-    Uses a composite key: whatsapp_events_{event_type}
-    Stores last 10 events of each type.
+    Append a system event to the SystemEvents log for dashboard display.
+    One PutItem per event, partitioned by event type (see utils/system_events.py).
     """
     try:
-        config_table = dynamodb.Table(SYSTEM_CONFIG_TABLE)
-        config_key = f'whatsapp_events_{event_type}'
-        now = int(time.time())
-        
-        # Get existing events
-        try:
-            response = config_table.get_item(Key={'configKey': config_key})
-            existing = response.get('Item', {})
-            events_list = json.loads(existing.get('configValue', '[]'))
-        except Exception:
-            events_list = []
-        
-        # Add new event with timestamp
-        new_event = {
-            'timestamp': now,
-            'data': event_data
-        }
-        events_list.insert(0, new_event)
-        
-        # Keep only last 10 events
-        events_list = events_list[:10]
-        
-        # Store updated events
-        config_table.put_item(Item={
-            'configKey': config_key,
-            'configValue': json.dumps(events_list),
-            'updatedAt': Decimal(str(now))
-        })
+        get_system_event_log().record(event_type, event_data, request_id)
         
         logger.info(json.dumps({
             'event': 'system_event_stored',
             'eventType': event_type,
-            'configKey': config_key,
-            'eventsCount': len(events_list),
             'requestId': request_id
         }))
         
-    except dynamodb.meta.client.exceptions.ResourceNotFoundException:
-        # SystemConfig table doesn't exist - skip silently
-        logger.warning(json.dumps({
-            'event': 'system_event_store_skipped',
-            'eventType': event_type,
-            'reason': 'SystemConfig table not found',
-            'requestId': request_id
-        }))
     except Exception as e:
         logger.error(json.dumps({
             'event': 'system_event_store_error',
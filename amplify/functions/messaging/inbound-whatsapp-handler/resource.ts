@@ -16,6 +16,11 @@ export const inboundWhatsappHandler = defineFunction({
     MEDIA_INBOUND_PREFIX: 'whatsapp-media/whatsapp-media-incoming/',
     SNS_TOPIC_ARN: 'arn:aws:sns:us-east-1:809904170947:base-wecare-digital',
     OUTBOUND_WHATSAPP_FUNCTION: 'wecare-outbound-whatsapp',
+    AI_PIPELINE_MODE: 'inline',
+    AI_CACHE_TABLE: 'base-wecare-digital-AIResponseCacheTable',
+    SYSTEM_EVENTS_TABLE: 'base-wecare-digital-SystemEventsTable',
+    TEMPLATE_CATALOG_TABLE: 'base-wecare-digital-TemplateCatalogTable',
+    PHONE_REGISTRY_TABLE: 'base-wecare-digital-PhoneNumberRegistryTable',
     WHATSAPP_PHONE_NUMBER_ID_1: 'phone-number-id-baa217c3f11b4ffd956f6f3afb44ce54',
   },
 });
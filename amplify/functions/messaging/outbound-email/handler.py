@@ -2,24 +2,36 @@
 Outbound Email Lambda Function
 
 Purpose: Send emails via Amazon SES
+
+Bulk job chunks (invoked with {"bulkEmail": chunk}, or as SQS records
+carrying the bulk queue chunk message) go out through SES templated bulk
+sending, 50 destinations per call, paced against the account send rate.
+Contacts are read and message records written in batches.
 """
 
 import os
+import re
 import json
 import uuid
 import time
+import hashlib
 import logging
-import boto3
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from decimal import Decimal
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.error_handler import ServiceRetryPolicies, set_retry_deadline
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-ses = boto3.client('ses', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+# Single SDK attempt; SES_RETRY owns retries
+ses = lazy_client('ses', max_attempts=1)
+
+# Retries only throttling/connect failures, within the invocation deadline
+SES_RETRY = ServiceRetryPolicies.email()
 
 # Environment variables
 CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'base-wecare-digital-ContactsTable')
@@ -28,10 +40,37 @@ FROM_EMAIL = os.environ.get('FROM_EMAIL', 'noreply@wecare.digital')
 REPLY_TO_EMAIL = os.environ.get('REPLY_TO_EMAIL', 'support@wecare.digital')
 MESSAGE_TTL_SECONDS = 30 * 24 * 60 * 60  # 30 days
 
+# Bulk sending
+BULK_JOBS_TABLE = os.environ.get('BULK_JOBS_TABLE', 'base-wecare-digital-BulkJobsTable')
+BULK_TEMPLATE_PREFIX = 'wecare-bulk-'
+SES_MAX_BULK_DESTINATIONS = 50
+BATCH_GET_SIZE = 100  # BatchGetItem limit
+BATCH_GET_MAX_ATTEMPTS = 8
+
+# Share of the account send rate one invocation may use, for when
+# several bulk chunks are sent concurrently
+SES_SEND_RATE_SHARE = float(os.environ.get('SES_SEND_RATE_SHARE', '1.0'))
+SEND_QUOTA_REFRESH_SECONDS = 300
+
+# Per-recipient template variables ({{name}}, {{email}})
+_TEMPLATE_VARIABLE_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+# Per-container send pacing and quota
+_send_rate: Optional[float] = None
+_send_rate_checked_at = 0.0
+_next_send_at = 0.0
+_known_templates = set()
+
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Send email message."""
     request_id = context.aws_request_id if context else 'local'
+    set_retry_deadline(context)
+    
+    if event.get('bulkEmail'):
+        return _send_bulk_email(event['bulkEmail'], request_id)
+    if event.get('Records'):
+        return _handle_bulk_records(event['Records'], request_id)
     
     logger.info(json.dumps({
         'event': 'outbound_email_start',
@@ -137,7 +176,8 @@ def _send_email(to_email: str, subject: str, text_content: str,
             body['Html'] = {'Data': html_content, 'Charset': 'UTF-8'}
         
         # Send email
-        response = ses.send_email(
+        response = SES_RETRY.call(
+            ses.send_email,
             Source=FROM_EMAIL,
             Destination=destination,
             Message={
@@ -164,33 +204,316 @@ def _store_message(message_id: str, contact_id: str, subject: str, content: str,
                    status: str, error: str = None, ses_message_id: str = None) -> None:
     """Store message record in DynamoDB."""
     try:
-        now = int(time.time())
         table = dynamodb.Table(MESSAGES_TABLE)
-        
-        item = {
-            'messageId': message_id,
-            'contactId': contact_id,
-            'channel': 'EMAIL',
-            'direction': 'OUTBOUND',
-            'subject': subject,
-            'content': content,
-            'status': status,
-            'timestamp': Decimal(str(now)),
-            'createdAt': Decimal(str(now)),
-            'ttl': Decimal(str(now + MESSAGE_TTL_SECONDS)),
-        }
-        
-        if error:
-            item['errorDetails'] = error
-        if ses_message_id:
-            item['sesMessageId'] = ses_message_id
-        
-        table.put_item(Item=item)
-        
+        table.put_item(Item=_message_item(message_id, contact_id, subject, content,
+                                          status, error, ses_message_id))
     except Exception as e:
         logger.error(f"Store message error: {str(e)}")
 
 
+def _message_item(message_id: str, contact_id: str, subject: str, content: str,
+                  status: str, error: str = None, ses_message_id: str = None) -> Dict[str, Any]:
+    """Build a Messages record."""
+    now = int(time.time())
+    item = {
+        'messageId': message_id,
+        'contactId': contact_id,
+        'channel': 'EMAIL',
+        'direction': 'OUTBOUND',
+        'subject': subject,
+        'content': content,
+        'status': status,
+        'timestamp': Decimal(str(now)),
+        'createdAt': Decimal(str(now)),
+        'ttl': Decimal(str(now + MESSAGE_TTL_SECONDS)),
+    }
+    
+    if error:
+        item['errorDetails'] = error
+    if ses_message_id:
+        item['sesMessageId'] = ses_message_id
+    
+    return item
+
+
+# ============================================================================
+# BULK SENDING
+# ============================================================================
+
+def _handle_bulk_records(records: List[Dict[str, Any]], request_id: str) -> Dict[str, Any]:
+    """SQS entry point; failed chunks are reported for redelivery."""
+    failures = []
+    for record in records:
+        try:
+            _send_bulk_email(json.loads(record.get('body') or '{}'), request_id)
+        except Exception as e:
+            logger.error(json.dumps({
+                'event': 'bulk_email_chunk_error',
+                'error': str(e),
+                'messageId': record.get('messageId'),
+                'requestId': request_id
+            }))
+            failures.append({'itemIdentifier': record.get('messageId')})
+    return {'batchItemFailures': failures}
+
+
+def _send_bulk_email(chunk: Dict[str, Any], request_id: str) -> Dict[str, Any]:
+    """
+    Send one bulk job chunk.
+    
+    Uses SES templated bulk sending: the job's SES template (templateName),
+    or one registered from subject/content/htmlContent. Falls back to one
+    SendEmail per recipient when no template can be used.
+    """
+    job_id = chunk.get('jobId', '')
+    subject = chunk.get('subject', '')
+    content = chunk.get('content', '')
+    html_content = chunk.get('htmlContent')
+    
+    targets, failed = _resolve_bulk_recipients(chunk.get('recipients') or [])
+    # contactId is an index key, so recipients without one get no record
+    items = [_bulk_message_item(job_id, r['contactId'], subject, content, 'FAILED', error)
+             for r, error in failed if r.get('contactId')]
+    sent = 0
+    unrecorded = len(failed) - len(items)
+    
+    template_name = chunk.get('templateName')
+    if not template_name and subject and (content or html_content):
+        template_name = _ensure_bulk_template(subject, content, html_content)
+    
+    if not template_name and not (subject and (content or html_content)):
+        items += [_bulk_message_item(job_id, t['contactId'], subject, content, 'FAILED',
+                                     'subject and content or templateName are required') for t in targets]
+        targets = []
+    
+    for start in range(0, len(targets), SES_MAX_BULK_DESTINATIONS):
+        batch = targets[start:start + SES_MAX_BULK_DESTINATIONS]
+        results = _send_templated_batch(template_name, batch, request_id) if template_name else None
+        if results is None:
+            results = _send_individually(batch, subject, content, html_content, request_id)
+        
+        for target, ses_message_id, error in results:
+            status = 'SENT' if ses_message_id else 'FAILED'
+            sent += 1 if ses_message_id else 0
+            items.append(_bulk_message_item(job_id, target['contactId'], subject, content,
+                                            status, error, ses_message_id))
+    
+    failed_count = len(items) - sent + unrecorded
+    _store_messages(items)
+    _update_job_counts(job_id, sent, failed_count)
+    
+    logger.info(json.dumps({
+        'event': 'bulk_email_chunk_sent',
+        'jobId': job_id,
+        'chunkIndex': chunk.get('chunkIndex'),
+        'sent': sent,
+        'failed': failed_count,
+        'templated': bool(template_name),
+        'requestId': request_id
+    }))
+    
+    return {'jobId': job_id, 'sent': sent, 'failed': failed_count}
+
+
+def _resolve_bulk_recipients(recipients: List[Dict[str, Any]]) -> Tuple[List[Dict[str, str]], List[Tuple[Dict, str]]]:
+    """
+    Look up recipients' contacts in batches and apply the opt-in rules.
+    
+    Returns:
+        (sendable targets with contactId/email/name, [(recipient, reason)])
+    
+    Raises:
+        RuntimeError: If contacts are still unprocessed after the retries
+            (the chunk is redelivered)
+    """
+    contact_ids = list(dict.fromkeys(r['contactId'] for r in recipients if r.get('contactId')))
+    contacts = {}
+    for start in range(0, len(contact_ids), BATCH_GET_SIZE):
+        request = {CONTACTS_TABLE: {'Keys': [{'contactId': cid} for cid in contact_ids[start:start + BATCH_GET_SIZE]]}}
+        for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for contact in response.get('Responses', {}).get(CONTACTS_TABLE, []):
+                contacts[contact['contactId']] = contact
+            request = response.get('UnprocessedKeys') or {}
+            if not request:
+                break
+            time.sleep(min(0.05 * (2 ** attempt), 1.0))
+        else:
+            raise RuntimeError(f"{len(request[CONTACTS_TABLE]['Keys'])} contacts left unprocessed in {CONTACTS_TABLE}")
+    
+    targets, failed = [], []
+    for recipient in recipients:
+        contact = contacts.get(recipient.get('contactId', ''))
+        if not contact:
+            failed.append((recipient, 'Contact not found'))
+        elif not contact.get('email'):
+            failed.append((recipient, 'Contact has no email address'))
+        elif not contact.get('optInEmail', False) and not contact.get('allowlistEmail', False):
+            failed.append((recipient, 'Contact has not opted in for email'))
+        else:
+            targets.append({
+                'contactId': contact['contactId'],
+                'email': contact['email'],
+                'name': contact.get('name') or recipient.get('name') or '',
+            })
+    return targets, failed
+
+
+def _ensure_bulk_template(subject: str, content: str, html_content: Optional[str]) -> Optional[str]:
+    """
+    Register the content as an SES template, named by its hash.
+    
+    The stats reconciler deletes these templates once they are a few
+    days old; a later job with the same content registers it again.
+    """
+    digest = hashlib.sha256(json.dumps([subject, content, html_content]).encode('utf-8')).hexdigest()[:24]
+    template_name = f"{BULK_TEMPLATE_PREFIX}{digest}"
+    if template_name in _known_templates:
+        return template_name
+    
+    template = {'TemplateName': template_name, 'SubjectPart': subject}
+    if content:
+        template['TextPart'] = content
+    if html_content:
+        template['HtmlPart'] = html_content
+    try:
+        ses.create_template(Template=template)
+    except ses.exceptions.AlreadyExistsException:
+        pass
+    except Exception as e:
+        logger.warning(f"SES template create failed, sending individually: {str(e)}")
+        return None
+    _known_templates.add(template_name)
+    return template_name
+
+
+def _send_templated_batch(template_name: str, batch: List[Dict[str, str]],
+                          request_id: str) -> Optional[List[Tuple[Dict, Optional[str], Optional[str]]]]:
+    """
+    One SendBulkTemplatedEmail call for up to 50 recipients.
+    
+    Returns:
+        [(target, sesMessageId or None, error or None)], or None if the
+        call itself failed and the batch should be sent individually
+    """
+    _pace(len(batch))
+    try:
+        response = SES_RETRY.call(
+            ses.send_bulk_templated_email,
+            Source=FROM_EMAIL,
+            ReplyToAddresses=[REPLY_TO_EMAIL],
+            Template=template_name,
+            DefaultTemplateData=json.dumps({'name': 'Customer', 'email': ''}),
+            Destinations=[{
+                'Destination': {'ToAddresses': [target['email']]},
+                'ReplacementTemplateData': json.dumps({'name': target['name'] or 'Customer',
+                                                       'email': target['email']}),
+            } for target in batch],
+        )
+    except Exception as e:
+        if 'TemplateDoesNotExist' in str(e):
+            # Expired since this container registered it; the next chunk registers it again
+            _known_templates.discard(template_name)
+        logger.warning(json.dumps({
+            'event': 'bulk_templated_send_failed',
+            'template': template_name,
+            'error': str(e),
+            'requestId': request_id
+        }))
+        return None
+    
+    results = []
+    for target, status in zip(batch, response.get('Status', [])):
+        if status.get('Status') == 'Success':
+            results.append((target, status.get('MessageId'), None))
+        else:
+            results.append((target, None, status.get('Error') or status.get('Status')))
+    return results
+
+
+def _send_individually(batch: List[Dict[str, str]], subject: str, content: str,
+                       html_content: Optional[str], request_id: str) -> List[Tuple[Dict, Optional[str], Optional[str]]]:
+    results = []
+    for target in batch:
+        _pace(1)
+        result = _send_email(
+            target['email'],
+            _render_variables(subject, target),
+            _render_variables(content, target),
+            _render_variables(html_content, target) if html_content else None,
+            target['name'],
+            request_id
+        )
+        results.append((target, result.get('sesMessageId'), result.get('error')))
+    return results
+
+
+def _render_variables(text: str, target: Dict[str, str]) -> str:
+    """Fill {{name}}/{{email}} the way the SES template would."""
+    return _TEMPLATE_VARIABLE_PATTERN.sub(lambda m: target.get(m.group(1), '') or '', text or '')
+
+
+def _pace(messages: int) -> None:
+    """Block until `messages` more sends fit in the SES send rate."""
+    global _next_send_at
+    rate = _max_send_rate()
+    now = time.monotonic()
+    if _next_send_at > now:
+        time.sleep(_next_send_at - now)
+    _next_send_at = max(_next_send_at, now) + messages / rate
+
+
+def _max_send_rate() -> float:
+    """Account MaxSendRate (messages/second) times SES_SEND_RATE_SHARE, cached."""
+    global _send_rate, _send_rate_checked_at
+    now = time.monotonic()
+    if _send_rate is None or now - _send_rate_checked_at > SEND_QUOTA_REFRESH_SECONDS:
+        try:
+            _send_rate = max(float(ses.get_send_quota().get('MaxSendRate', 1)) * SES_SEND_RATE_SHARE, 0.1)
+        except Exception as e:
+            logger.warning(f"SES send quota unavailable: {str(e)}")
+            _send_rate = _send_rate or 1.0
+        _send_rate_checked_at = now
+    return _send_rate
+
+
+def _bulk_message_item(job_id: str, contact_id: str, subject: str, content: str, status: str,
+                       error: str = None, ses_message_id: str = None) -> Dict[str, Any]:
+    item = _message_item(str(uuid.uuid4()), contact_id, subject, content, status, error, ses_message_id)
+    if job_id:
+        item['jobId'] = job_id
+    return item
+
+
+def _store_messages(items: List[Dict[str, Any]]) -> None:
+    """Batch write message records."""
+    if not items:
+        return
+    try:
+        with dynamodb.Table(MESSAGES_TABLE).batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+    except Exception as e:
+        logger.error(f"Store messages error: {str(e)}")
+
+
+def _update_job_counts(job_id: str, sent: int, failed: int) -> None:
+    if not job_id:
+        return
+    try:
+        dynamodb.Table(BULK_JOBS_TABLE).update_item(
+            Key={'jobId': job_id},
+            UpdateExpression='ADD sentCount :sent, failedCount :failed SET updatedAt = :now',
+            ExpressionAttributeValues={
+                ':sent': sent,
+                ':failed': failed,
+                ':now': Decimal(str(int(time.time())))
+            }
+        )
+    except Exception as e:
+        logger.error(f"Update job counts error: {str(e)}")
+
+
 def _response(status_code: int, body: Dict) -> Dict[str, Any]:
     """Return HTTP response with CORS headers."""
     return {
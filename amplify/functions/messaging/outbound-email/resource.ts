@@ -4,14 +4,16 @@ export const outboundEmail = defineFunction({
   name: 'wecare-outbound-email',
   entry: './handler.py',
   runtime: 20, // Python 3.12
-  timeoutSeconds: 30,
+  timeoutSeconds: 300, // bulk chunks are paced to the SES send rate
   memoryMB: 256,
   environment: {
     AWS_REGION: 'us-east-1',
     LOG_LEVEL: 'INFO',
     CONTACTS_TABLE: 'base-wecare-digital-ContactsTable',
     MESSAGES_TABLE: 'base-wecare-digital-MessagesTable',
+    BULK_JOBS_TABLE: 'base-wecare-digital-BulkJobsTable',
     FROM_EMAIL: 'noreply@wecare.digital',
     REPLY_TO_EMAIL: 'support@wecare.digital',
+    SES_SEND_RATE_SHARE: '1.0',
   },
 });
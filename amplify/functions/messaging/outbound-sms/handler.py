@@ -10,18 +10,29 @@ import json
 import uuid
 import time
 import logging
-import boto3
 from typing import Dict, Any
 from decimal import Decimal
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.error_handler import (
+    ServiceCircuitBreakers, ServiceRetryPolicies, CircuitBreakerOpenError,
+    queue_for_retry, set_retry_deadline
+)
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-sns = boto3.client('sns', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-pinpoint = boto3.client('pinpoint', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+# Send clients make a single SDK attempt; SMS_RETRY owns retries
+sns = lazy_client('sns', max_attempts=1)
+pinpoint = lazy_client('pinpoint', max_attempts=1)
+sqs = lazy_client('sqs')
+
+# Shared across containers; fails fast while Pinpoint/SNS is down
+SMS_BREAKER = ServiceCircuitBreakers.sms()
+# Retries only throttling/connect failures, within the invocation deadline
+SMS_RETRY = ServiceRetryPolicies.sms()
 
 # Environment variables
 CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'base-wecare-digital-ContactsTable')
@@ -35,6 +46,7 @@ MESSAGE_TTL_SECONDS = 30 * 24 * 60 * 60  # 30 days
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Send SMS message."""
     request_id = context.aws_request_id if context else 'local'
+    set_retry_deadline(context)
     
     logger.info(json.dumps({
         'event': 'outbound_sms_start',
@@ -76,6 +88,17 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         else:
             result = _send_aws_sms(phone, content, request_id)
         
+        if result.get('circuitOpen'):
+            # Provider is down: park the request instead of burning a timeout
+            queued = queue_for_retry(event, result.get('error', ''), SMS_BREAKER, sqs_client=sqs)
+            _store_message(message_id, contact_id, content, 'QUEUED' if queued else 'FAILED', result.get('error'))
+            return _response(503, {
+                'error': 'SMS provider unavailable',
+                'status': 'queued' if queued else 'failed',
+                'messageId': message_id,
+                'retryAfterSeconds': SMS_BREAKER.retry_after_seconds()
+            })
+        
         if not result.get('success'):
             # Store failed message
             _store_message(message_id, contact_id, content, 'FAILED', result.get('error'))
@@ -128,7 +151,9 @@ def _send_aws_sms(phone: str, content: str, request_id: str) -> Dict[str, Any]:
     try:
         # Use Pinpoint if configured
         if PINPOINT_APP_ID:
-            response = pinpoint.send_messages(
+            response = SMS_RETRY.call(
+                SMS_BREAKER.call,
+                pinpoint.send_messages,
                 ApplicationId=PINPOINT_APP_ID,
                 MessageRequest={
                     'Addresses': {
@@ -150,7 +175,9 @@ def _send_aws_sms(phone: str, content: str, request_id: str) -> Dict[str, Any]:
             return {'success': False, 'error': result.get('StatusMessage', 'Pinpoint error')}
         
         # Fallback to SNS
-        response = sns.publish(
+        response = SMS_RETRY.call(
+            SMS_BREAKER.call,
+            sns.publish,
             PhoneNumber=phone,
             Message=content,
             MessageAttributes={
@@ -166,6 +193,9 @@ def _send_aws_sms(phone: str, content: str, request_id: str) -> Dict[str, Any]:
         )
         return {'success': True, 'providerMessageId': response.get('MessageId')}
         
+    except CircuitBreakerOpenError as e:
+        logger.warning(f"AWS SMS circuit open: {str(e)}")
+        return {'success': False, 'circuitOpen': True, 'error': str(e)}
     except Exception as e:
         logger.error(f"AWS SMS error: {str(e)}")
         return {'success': False, 'error': str(e)}
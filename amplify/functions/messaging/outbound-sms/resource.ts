@@ -14,5 +14,7 @@ export const outboundSms = defineFunction({
     PINPOINT_APP_ID: '',
     ORIGINATION_NUMBER: '',
     SENDER_ID: 'WECARE',
+    OUTBOUND_DLQ_URL: 'https://sqs.us-east-1.amazonaws.com/809904170947/base-wecare-digital-outbound-dlq',
+    SYSTEM_CONFIG_TABLE: 'base-wecare-digital-SystemConfigTable',
   },
 });
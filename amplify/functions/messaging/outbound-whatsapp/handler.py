@@ -10,23 +10,42 @@ Emits CloudWatch metrics for delivery success/failure.
 """
 
 import os
+import re
 import json
 import uuid
 import time
+import base64
 import logging
-import boto3
+from datetime import datetime
 from typing import Dict, Any, Optional, Tuple
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.error_handler import (
+    ServiceCircuitBreakers, ServiceRetryPolicies, queue_for_retry, set_retry_deadline
+)
+from utils.payment_ledger import get_payment_ledger, sanitize_reference_id
+from utils.stats_counters import get_stats_counters, COUNTER_OUTBOUND_MESSAGES
+from utils.phone_registry import get_phone_registry
+from utils.rate_limiter import RateLimiter
+from utils.send_lanes import LaneScheduler, classify_send
+from utils.template_catalog import get_template_catalog, split_template_language, waba_for_phone_number
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-social_messaging = boto3.client('socialmessaging', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-s3 = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-cloudwatch = boto3.client('cloudwatch', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+# Single SDK attempt; WHATSAPP_RETRY owns retries (sends are not idempotent)
+social_messaging = lazy_client('socialmessaging', max_attempts=1)
+s3 = lazy_client('s3')
+cloudwatch = lazy_client('cloudwatch')
+sqs = lazy_client('sqs')
+
+# Shared across containers; fails fast while the WhatsApp API is down
+WHATSAPP_BREAKER = ServiceCircuitBreakers.whatsapp()
+# Retries only throttling/connect failures, within the invocation deadline
+WHATSAPP_RETRY = ServiceRetryPolicies.whatsapp()
 
 # Environment variables
 SEND_MODE = os.environ.get('SEND_MODE', 'LIVE')
@@ -37,19 +56,24 @@ RATE_LIMIT_TABLE = os.environ.get('RATE_LIMIT_TABLE', 'RateLimitTracker')
 MEDIA_BUCKET = os.environ.get('MEDIA_BUCKET', 'auth.wecare.digital')
 MEDIA_PREFIX = os.environ.get('MEDIA_OUTBOUND_PREFIX', 'whatsapp-media/whatsapp-media-outgoing/')
 
-# WhatsApp Phone Number IDs (Allowlist) - Requirement 3.2
-PHONE_NUMBER_ID_1 = os.environ.get('WHATSAPP_PHONE_NUMBER_ID_1', 'phone-number-id-baa217c3f11b4ffd956f6f3afb44ce54')
-PHONE_NUMBER_ID_2 = os.environ.get('WHATSAPP_PHONE_NUMBER_ID_2', 'phone-number-id-1447bc72d1b040f4bf2341c9e04b2e06')
-ALLOWLIST = {PHONE_NUMBER_ID_1, PHONE_NUMBER_ID_2}
+# WhatsApp sending numbers (Allowlist, Requirement 3.2) come from utils/phone_registry.py
+
+# Per-number 24h usage (tier capacity) read by multi-number bulk jobs
+rate_limiter = RateLimiter(lazy_client('dynamodb'), RATE_LIMIT_TABLE)
+# Per-second budget split into transactional / conversational / marketing lanes
+lane_scheduler = LaneScheduler(rate_limiter)
 
 # Constants
 META_API_VERSION = 'v20.0'  # Requirement 5.8
 MAX_TEXT_LENGTH = 4096  # Requirement 5.4
 MESSAGE_TTL_SECONDS = 30 * 24 * 60 * 60  # 30 days
 CUSTOMER_SERVICE_WINDOW_HOURS = 24  # Requirement 16.2
-RATE_LIMIT_PER_SECOND = 80  # Requirement 5.9
 METRICS_NAMESPACE = 'WECARE.DIGITAL'
 
+# Precompiled patterns (hit on every media/payment send)
+FILENAME_INVALID_PATTERN = re.compile(r'[^\w\s.\-()]+', re.UNICODE)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -58,6 +82,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Supports: text, media, template, and reaction messages
     """
     request_id = context.aws_request_id if context else 'local'
+    set_retry_deadline(context)
     
     logger.info(json.dumps({
         'event': 'outbound_whatsapp_start',
@@ -70,7 +95,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         body = json.loads(event.get('body', '{}'))
         contact_id = body.get('contactId')
         content = body.get('content', '')
-        phone_number_id = body.get('phoneNumberId', PHONE_NUMBER_ID_1)
+        phone_number_id = body.get('phoneNumberId') or get_phone_registry().default_phone_number_id()
         media_file = body.get('mediaFile')  # S3 key or base64
         media_type = body.get('mediaType')  # image, video, audio, document
         media_filename = body.get('mediaFileName')  # Original filename for documents
@@ -118,6 +143,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 return _error_response(404, 'Contact not found')
             recipient_phone = contact.get('phone')
         
+        # Requirement 3.2: only registered sending numbers
+        if not get_phone_registry().get(phone_number_id):
+            _log_validation_failure(contact_id, 'WHATSAPP', 'ALLOWLIST_VIOLATION', request_id)
+            return _error_response(400, f'Unknown phoneNumberId: {phone_number_id}')
+        
         # Validate reaction request
         if is_reaction and not reaction_message_id:
             return _error_response(400, 'reactionMessageId is required for reactions')
@@ -130,9 +160,18 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if not is_reaction and content and len(content) > MAX_TEXT_LENGTH:
             return _error_response(400, f'Content exceeds {MAX_TEXT_LENGTH} characters')
         
-        # Requirement 5.9: Check rate limit
-        if not _check_rate_limit(phone_number_id):
-            return _error_response(429, 'Rate limit exceeded. Try again later.')
+        # Reject templates the catalog knows are unapproved or mis-parameterized
+        if is_template and template_name and not is_reaction:
+            template_error = _validate_template(phone_number_id, template_name, template_params)
+            if template_error:
+                _log_validation_failure(contact_id, 'WHATSAPP', template_error, request_id)
+                return _error_response(400, template_error)
+        
+        # Requirement 5.9: Check rate limit (reserved capacity per lane)
+        lane = classify_send(body)
+        rate_result = _check_rate_limit(phone_number_id, lane, request_id, count_usage=is_template)
+        if not rate_result.allowed:
+            return _error_response(429, 'Rate limit exceeded. Try again later.', f'{lane} lane budget used up')
         
         # Generate message ID
         message_id = str(uuid.uuid4())
@@ -143,6 +182,10 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 return _handle_dry_run_reaction(message_id, contact_id, recipient_phone, reaction_message_id, reaction_emoji, request_id)
             return _handle_dry_run(message_id, contact_id, recipient_phone, content, is_template, request_id)
         
+        # Fail fast into the retry queue while the WhatsApp API is down
+        if not WHATSAPP_BREAKER.allow_request():
+            return _queue_while_circuit_open(event, message_id, contact_id, request_id)
+        
         # Handle reaction messages
         if is_reaction:
             return _handle_reaction_send(
@@ -183,6 +226,44 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return _error_response(500, 'Internal server error')
 
 
+def _send_whatsapp_api(**kwargs) -> Dict[str, Any]:
+    """Call SendWhatsAppMessage through the WhatsApp retry policy and circuit breaker."""
+    return WHATSAPP_RETRY.call(WHATSAPP_BREAKER.call, social_messaging.send_whatsapp_message, **kwargs)
+
+
+def _queue_while_circuit_open(event: Dict[str, Any], message_id: str,
+                              contact_id: str, request_id: str) -> Dict[str, Any]:
+    """Park a send in the retry queue instead of waiting on a failing provider."""
+    retry_after = WHATSAPP_BREAKER.retry_after_seconds()
+    queued = queue_for_retry(event, 'WhatsApp circuit breaker open', WHATSAPP_BREAKER, sqs_client=sqs)
+    
+    logger.warning(json.dumps({
+        'event': 'whatsapp_circuit_open',
+        'messageId': message_id,
+        'contactId': contact_id,
+        'queued': queued,
+        'retryAfterSeconds': retry_after,
+        'requestId': request_id
+    }))
+    
+    return {
+        'statusCode': 503,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+            'Retry-After': str(retry_after)
+        },
+        'body': json.dumps({
+            'error': 'WhatsApp API unavailable',
+            'messageId': message_id,
+            'status': 'queued' if queued else 'failed',
+            'retryAfterSeconds': retry_after
+        })
+    }
+
+
 def _handle_dry_run(message_id: str, contact_id: str, recipient_phone: str, 
                     content: str, is_template: bool, request_id: str) -> Dict[str, Any]:
     """Handle DRY_RUN mode - log without actual API call."""
@@ -295,7 +376,7 @@ def _handle_reaction_send(message_id: str, contact_id: str, recipient_phone: str
         }))
         
         # Call SendWhatsAppMessage API
-        response = social_messaging.send_whatsapp_message(
+        response = _send_whatsapp_api(
             originationPhoneNumberId=phone_number_id,
             message=json.dumps(reaction_payload).encode('utf-8'),
             metaApiVersion=META_API_VERSION
@@ -365,7 +446,7 @@ def _handle_order_status_send(message_id: str, contact_id: str, recipient_phone:
     try:
         raw_reference_id = order_status_details.get('reference_id', '')
         # Sanitize reference_id to remove duplicate WDSR prefixes
-        reference_id = _sanitize_reference_id(raw_reference_id)
+        reference_id = sanitize_reference_id(raw_reference_id, generate_if_empty=True)
         order_status = order_status_details.get('order_status', 'completed')
         amount = order_status_details.get('amount', 0)  # Amount in rupees
         
@@ -441,7 +522,7 @@ def _handle_order_status_send(message_id: str, contact_id: str, recipient_phone:
         }))
         
         # Call SendWhatsAppMessage API
-        response = social_messaging.send_whatsapp_message(
+        response = _send_whatsapp_api(
             originationPhoneNumberId=phone_number_id,
             message=json.dumps(order_status_payload),
             metaApiVersion=META_API_VERSION
@@ -750,7 +831,7 @@ def _handle_interactive_send(message_id: str, contact_id: str, recipient_phone:
         }))
         
         # Call SendWhatsAppMessage API
-        response = social_messaging.send_whatsapp_message(
+        response = _send_whatsapp_api(
             originationPhoneNumberId=phone_number_id,
             message=json.dumps(payload),
             metaApiVersion=META_API_VERSION
@@ -870,7 +951,7 @@ def _handle_live_send(message_id: str, contact_id: str, recipient_phone: str,
             'requestId': request_id
         }))
         
-        response = social_messaging.send_whatsapp_message(
+        response = _send_whatsapp_api(
             originationPhoneNumberId=phone_number_id,
             message=message_json,
             metaApiVersion=META_API_VERSION
@@ -882,11 +963,25 @@ def _handle_live_send(message_id: str, contact_id: str, recipient_phone: str,
         payment_ref_id = None
         payment_amount = None
         if is_interactive_payment and order_details:
-            payment_ref_id = _sanitize_reference_id(order_details.get('reference_id', ''))
-            # Calculate total amount in rupees from order_details
-            total_amount = order_details.get('order', {}).get('total_amount', {})
+            # Reference id and total as sent (the builder adds fees and may generate the id)
+            payment_parameters = message_payload.get('interactive', {}).get('action', {}).get('parameters', {})
+            payment_ref_id = payment_parameters.get('reference_id')
+            total_amount = payment_parameters.get('total_amount', {})
             if total_amount:
                 payment_amount = total_amount.get('value', 0) / total_amount.get('offset', 100)
+            
+            # Ledger entry the payment status webhooks complete
+            get_payment_ledger().upsert(
+                payment_ref_id,
+                status='requested',
+                amount=total_amount.get('value') if total_amount else None,
+                amountInRupees=payment_amount,
+                currency=payment_parameters.get('currency'),
+                contact=message_payload.get('to'),
+                contactId=contact_id,
+                whatsappMessageId=whatsapp_message_id,
+                source='whatsapp'
+            )
         
         # Requirement 5.11: Store message record
         _store_message_record(
@@ -982,8 +1077,6 @@ def _upload_media(media_file: str, media_type: str, message_id: str, phone_numbe
     
     Returns: (s3_key, whatsapp_media_id, display_filename)
     """
-    import base64
-    
     try:
         # Generate S3 key with proper extension
         extension = _get_media_extension(media_type)
@@ -1083,7 +1176,8 @@ def _upload_media(media_file: str, media_type: str, message_id: str, phone_numbe
         # Requirement 5.6: Call PostWhatsAppMessageMedia to get mediaId
         # Use boto3 with correct parameter format
         try:
-            response = social_messaging.post_whatsapp_message_media(
+            response = WHATSAPP_RETRY.call(
+                social_messaging.post_whatsapp_message_media,
                 originationPhoneNumberId=phone_number_id,
                 sourceS3File={
                     'bucketName': MEDIA_BUCKET,
@@ -1173,11 +1267,10 @@ def _sanitize_filename(filename: str, max_length: int = 240) -> str:
     
     # Remove only truly invalid characters for WhatsApp
     # Keep: alphanumeric, dots, hyphens, underscores, spaces, parentheses
-    import re
-    sanitized = re.sub(r'[^\w\s.\-()]+', '', filename, flags=re.UNICODE)
+    sanitized = FILENAME_INVALID_PATTERN.sub('', filename)
     
     # Replace multiple spaces with single space
-    sanitized = re.sub(r'\s+', ' ', sanitized)
+    sanitized = WHITESPACE_PATTERN.sub(' ', sanitized)
     
     # Strip leading/trailing spaces
     sanitized = sanitized.strip()
@@ -1257,56 +1350,6 @@ def _normalize_phone_number(phone: str) -> str:
     return digits_only
 
 
-def _sanitize_reference_id(reference_id: str) -> str:
-    """
-    Sanitize reference_id for UPI compatibility.
-    UPI requires: only A-Z, a-z, 0-9, _, - (max 35 chars)
-    Must be unique for each transaction.
-    
-    Format: WDSR<ID> (no underscore for cleaner display)
-    
-    Examples:
-    - "WDSR_ABC12345" -> "WDSRABC12345" (remove underscore)
-    - "WDSRABC12345" -> "WDSRABC12345" (keep as-is)
-    - "WDSRWDSR41BA3534" -> "WDSR41BA3534" (remove duplicate prefix)
-    - "" -> "WDSRXXXXXXXX" (auto-generated)
-    """
-    import re
-    
-    if not reference_id or not reference_id.strip():
-        # Generate unique reference if empty
-        unique_id = str(uuid.uuid4()).replace('-', '')[:8].upper()
-        return f"WDSR{unique_id}"
-    
-    # Remove all non-alphanumeric characters (including underscores and plus signs)
-    sanitized = re.sub(r'[^A-Za-z0-9]', '', reference_id)
-    
-    # Convert to uppercase for consistency
-    sanitized = sanitized.upper()
-    
-    # If empty after sanitization, generate new
-    if not sanitized:
-        unique_id = str(uuid.uuid4()).replace('-', '')[:8].upper()
-        return f"WDSR{unique_id}"
-    
-    # Remove ALL duplicate WDSR prefixes (handle WDSRWDSRWDSR... cases)
-    while 'WDSRWDSR' in sanitized:
-        sanitized = sanitized.replace('WDSRWDSR', 'WDSR')
-    
-    # Keep as-is if already has WDSR prefix (without underscore)
-    if sanitized.startswith('WDSR'):
-        result = sanitized
-    else:
-        # Add WDSR prefix (no underscore)
-        result = f"WDSR{sanitized}"
-    
-    # Truncate to max 35 chars (UPI limit)
-    if len(result) > 35:
-        result = result[:35]
-    
-    return result
-
-
 def _build_message_payload(recipient_phone: str, content: str, media_type: Optional[str],
                            media_id: Optional[str], is_template: bool, template_name: Optional[str],
                            template_params: list, filename: Optional[str] = None,
@@ -1340,8 +1383,6 @@ def _build_message_payload(recipient_phone: str, content: str, media_type: Optio
     # BREAKDOWN: Subtotal, Discount, Shipping, Tax (with GSTIN)
     # TOTAL: auto-calculated
     if is_interactive_payment and order_details:
-        from decimal import Decimal, ROUND_HALF_UP
-        
         def round_paise(x: Decimal) -> int:
             """Round to nearest paise"""
             return int(x.quantize(Decimal("1"), rounding=ROUND_HALF_UP))
@@ -1390,7 +1431,7 @@ def _build_message_payload(recipient_phone: str, content: str, media_type: Optio
         conv_total = conv_base + conv_gst
         
         # Build reference ID
-        ref_id = _sanitize_reference_id(order_details.get('reference_id', ''))
+        ref_id = sanitize_reference_id(order_details.get('reference_id', ''), generate_if_empty=True)
         
         # CART ITEMS: Main item + Convenience Fee
         # WhatsApp calculates: subtotal = sum(item.amount * item.quantity)
@@ -1503,16 +1544,7 @@ def _build_message_payload(recipient_phone: str, content: str, media_type: Optio
     if is_template and template_name:
         # Template message
         # Get language from template_params if provided, otherwise default to 'en'
-        template_language = 'en'
-        actual_params = list(template_params) if template_params else []
-        
-        if actual_params and len(actual_params) > 0:
-            # Check if first param is a language code (2-5 chars like 'en', 'en_US')
-            first_param = actual_params[0] if actual_params else ''
-            if isinstance(first_param, str) and (len(first_param) == 2 or (2 <= len(first_param) <= 5 and '_' in first_param)):
-                # Looks like a language code, use it
-                template_language = first_param
-                actual_params = actual_params[1:]  # Remove language from params
+        template_language, actual_params = split_template_language(template_params)
         
         payload['type'] = 'template'
         payload['template'] = {
@@ -1657,41 +1689,35 @@ def _is_within_service_window(contact: Dict[str, Any]) -> bool:
         last_inbound = int(last_inbound)
     elif isinstance(last_inbound, str):
         # Handle ISO format
-        from datetime import datetime
         last_inbound = int(datetime.fromisoformat(last_inbound.replace('Z', '+00:00')).timestamp())
     
     window_end = last_inbound + (CUSTOMER_SERVICE_WINDOW_HOURS * 60 * 60)
     return int(time.time()) < window_end
 
 
-def _check_rate_limit(phone_number_id: str) -> bool:
+def _check_rate_limit(phone_number_id: str, lane: str, request_id: str, count_usage: bool = False):
     """
     Check rate limit for phone number.
-    Requirement 5.9: 80 messages per second per phone number
+    Requirement 5.9: the number's throughput from the registry (80 messages per second by default),
+    shared between send lanes so campaigns cannot use the transactional reservation.
+    Transactional and conversational sends wait briefly for the next second.
+    Business-initiated (template) sends count against the number's messaging tier.
     """
-    try:
-        rate_table = dynamodb.Table(RATE_LIMIT_TABLE)
-        now = int(time.time())
-        window_key = f"whatsapp:{phone_number_id}"
-        
-        # Atomic increment
-        response = rate_table.update_item(
-            Key={'channel': window_key, 'windowStart': now},
-            UpdateExpression='SET messageCount = if_not_exists(messageCount, :zero) + :inc, lastUpdatedAt = :now',
-            ExpressionAttributeValues={
-                ':zero': Decimal('0'),
-                ':inc': Decimal('1'),
-                ':now': Decimal(str(now + 86400))  # TTL: 24 hours
-            },
-            ReturnValues='UPDATED_NEW'
-        )
-        
-        count = int(response.get('Attributes', {}).get('messageCount', 0))
-        return count <= RATE_LIMIT_PER_SECOND
-        
-    except Exception:
-        # Allow on error (fail open for rate limiting)
-        return True
+    result, waited_ms = lane_scheduler.acquire(
+        phone_number_id, lane, get_phone_registry().throughput(phone_number_id),
+        count_usage=count_usage
+    )
+    if not result.allowed or waited_ms:
+        logger.info(json.dumps({
+            'event': 'send_lane_admission',
+            'phoneNumberId': phone_number_id,
+            'lane': lane,
+            'allowed': result.allowed,
+            'waitedMs': waited_ms,
+            'requestId': request_id
+        }))
+    _emit_lane_metric(lane, result.allowed, waited_ms)
+    return result
 
 
 def _store_message_record(message_id: str, contact_id: str, content: str, status: str,
@@ -1730,10 +1756,25 @@ def _store_message_record(message_id: str, contact_id: str, content: str, status
     try:
         messages_table = dynamodb.Table(MESSAGES_TABLE)
         messages_table.put_item(Item={k: v for k, v in record.items() if v is not None})
+        get_stats_counters().increment(COUNTER_OUTBOUND_MESSAGES)
     except Exception as e:
         logger.error(f"Failed to store message record: {str(e)}")
 
 
+def _validate_template(phone_number_id: str, template_name: str, template_params: list) -> Optional[str]:
+    """
+    Check a template send against the template catalog (status and body
+    parameter count) before paying for an API call.
+    
+    Returns:
+        Rejection reason, or None if the send may go out
+    """
+    language, params = split_template_language(template_params)
+    return get_template_catalog().validate(
+        waba_for_phone_number(phone_number_id), template_name, language, params
+    )
+
+
 def _log_validation_failure(contact_id: str, channel: str, reason: str, request_id: str) -> None:
     """Log validation failure - Requirement 3.6"""
     logger.warning(json.dumps({
@@ -1886,6 +1927,34 @@ def _error_response(status_code: int, error: str, message: str = None) -> Dict[s
     }
 
 
+def _emit_lane_metric(lane: str, allowed: bool, waited_ms: int) -> None:
+    """Emit per-lane admission metrics (throttles and time spent waiting for budget)."""
+    dimensions = [
+        {'Name': 'Channel', 'Value': 'WHATSAPP'},
+        {'Name': 'Lane', 'Value': lane.upper()}
+    ]
+    try:
+        cloudwatch.put_metric_data(
+            Namespace=METRICS_NAMESPACE,
+            MetricData=[
+                {
+                    'MetricName': 'LaneAdmitted' if allowed else 'LaneThrottled',
+                    'Value': 1,
+                    'Unit': 'Count',
+                    'Dimensions': dimensions
+                },
+                {
+                    'MetricName': 'LaneWaitTime',
+                    'Value': waited_ms,
+                    'Unit': 'Milliseconds',
+                    'Dimensions': dimensions
+                }
+            ]
+        )
+    except Exception as e:
+        logger.warning(f"Failed to emit lane metric: {str(e)}")
+
+
 def _emit_delivery_metric(status: str, is_template: bool = False) -> None:
     """
     Emit message delivery metric to CloudWatch.
@@ -14,7 +14,13 @@ export const outboundWhatsapp = defineFunction({
     MESSAGES_TABLE: 'base-wecare-digital-WhatsAppOutboundTable',
     WHATSAPP_PHONE_NUMBER_ID_1: 'phone-number-id-baa217c3f11b4ffd956f6f3afb44ce54',
     WHATSAPP_PHONE_NUMBER_ID_2: 'phone-number-id-1447bc72d1b040f4bf2341c9e04b2e06',
+    WABA_ID_1: 'waba-0aae9cf04cf24c66960f291c793359b4',
+    WABA_ID_2: 'waba-9bbe054d8404487397c38a9d197bc44a',
+    TEMPLATE_CATALOG_TABLE: 'base-wecare-digital-TemplateCatalogTable',
+    PHONE_REGISTRY_TABLE: 'base-wecare-digital-PhoneNumberRegistryTable',
     MEDIA_BUCKET: 'auth.wecare.digital',
     MEDIA_OUTBOUND_PREFIX: 'whatsapp-media/whatsapp-media-outgoing/',
+    OUTBOUND_DLQ_URL: 'https://sqs.us-east-1.amazonaws.com/809904170947/base-wecare-digital-outbound-dlq',
+    SYSTEM_CONFIG_TABLE: 'base-wecare-digital-SystemConfigTable',
   },
 });
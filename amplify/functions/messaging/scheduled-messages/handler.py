@@ -15,16 +15,17 @@ import os
 import json
 import logging
 import uuid
-import boto3
 from datetime import datetime, timezone
 from decimal import Decimal
 from typing import Dict, Any, List, Optional
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.pagination import paginate, InvalidCursorError
 
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-lambda_client = boto3.client('lambda', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+lambda_client = lazy_client('lambda')
 
 SCHEDULED_TABLE = os.environ.get('SCHEDULED_TABLE', 'base-wecare-digital-ScheduledMessagesTable')
 CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'base-wecare-digital-ContactsTable')
@@ -90,11 +91,17 @@ def _list_scheduled(query_params: Dict[str, str], request_id: str) -> Dict[str,
     """List scheduled messages, optionally filtered by status."""
     table = dynamodb.Table(SCHEDULED_TABLE)
     status_filter = query_params.get('status', 'PENDING')
+    limit = int(query_params.get('limit', 100))
+    cursor = query_params.get('nextToken')
     
     try:
         if status_filter:
             # Query by status using GSI
-            response = table.query(
+            page = paginate(
+                table.query,
+                limit=limit,
+                cursor=cursor,
+                key_attributes=('scheduledId', 'status', 'scheduledAt'),
                 IndexName='status-scheduledAt-index',
                 KeyConditionExpression='#status = :status',
                 ExpressionAttributeNames={'#status': 'status'},
@@ -103,9 +110,9 @@ def _list_scheduled(query_params: Dict[str, str], request_id: str) -> Dict[str,
             )
         else:
             # Scan all
-            response = table.scan()
+            page = paginate(table.scan, limit=limit, cursor=cursor, key_attributes=('scheduledId',))
         
-        items = response.get('Items', [])
+        items = page.items
         
         # Convert Decimal to int/float for JSON serialization
         scheduled_messages = []
@@ -117,9 +124,12 @@ def _list_scheduled(query_params: Dict[str, str], request_id: str) -> Dict[str,
             'headers': CORS_HEADERS,
             'body': json.dumps({
                 'scheduledMessages': scheduled_messages,
-                'count': len(scheduled_messages)
+                'count': len(scheduled_messages),
+                'nextToken': page.cursor
             })
         }
+    except InvalidCursorError:
+        return _error_response(400, 'Invalid nextToken')
     except Exception as e:
         logger.error(f'List scheduled error: {str(e)}')
         return _error_response(500, f'Failed to list scheduled messages: {str(e)}')
@@ -335,7 +345,8 @@ def _process_due_messages(request_id: str) -> Dict[str, Any]:
                         'isTemplate': True,
                         'templateName': item['templateName'],
                         'templateParams': item.get('templateParams', []),
-                        'phoneNumberId': item.get('phoneNumberId', '')
+                        'phoneNumberId': item.get('phoneNumberId', ''),
+                        'lane': 'marketing'
                     })
                 }
                 
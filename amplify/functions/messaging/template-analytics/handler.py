@@ -10,16 +10,16 @@ Routes:
 import os
 import json
 import logging
-import boto3
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 from typing import Dict, Any, List
 from collections import defaultdict
+from utils.aws_clients import lazy_resource
 
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
 
 OUTBOUND_TABLE = os.environ.get('OUTBOUND_TABLE', 'base-wecare-digital-WhatsAppOutboundTable')
 
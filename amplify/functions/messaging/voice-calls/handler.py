@@ -3,6 +3,24 @@ Voice Calls Lambda Function
 
 Purpose: Make and manage voice calls via AWS Connect or Airtel IQ
 Supports: TTS, Audio playback, IVR, Click-to-call
+
+TTS scripts are rendered once with Polly and played as cached audio
+(utils/tts_cache.py); POST /voice/tts/prerender renders a campaign's
+scripts ahead of dialing.
+
+Campaigns (POST /voice/campaigns) dial a recipient list in asynchronous
+invocations of this function, within a concurrent-call limit and a
+calls-per-second pace per provider. Unanswered calls are retried with
+exponential backoff. Progress is kept in SystemConfig
+(voice_campaign#<campaignId>), the recipient list in S3 under
+stream/voice-campaigns/, and call records are upserted into VoiceCalls
+in batches.
+
+One invocation at a time runs a campaign: it takes a lease on the
+campaign item (owner and expiry) and only saves progress while it still
+holds it. Each call attempt is recorded on the call's VoiceCalls item
+with a conditional write before dialing, so an invocation that re-runs
+from older saved progress skips recipients already dialed.
 """
 
 import os
@@ -10,33 +28,90 @@ import json
 import uuid
 import time
 import logging
-import boto3
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 from decimal import Decimal
+from botocore.exceptions import ClientError
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.pagination import InvalidCursorError
+from utils.time_index import list_newest_first, parse_time_param, time_bucket, DEFAULT_TIME_INDEX
+from utils.tts_cache import get_tts_cache, MAX_TTS_TEXT_LENGTH
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-connect = boto3.client('connect', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-polly = boto3.client('polly', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+connect = lazy_client('connect')
+s3_client = lazy_client('s3')
+lambda_client = lazy_client('lambda')
 
 # Environment variables
 CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'base-wecare-digital-ContactsTable')
+SYSTEM_CONFIG_TABLE = os.environ.get('SYSTEM_CONFIG_TABLE', 'base-wecare-digital-SystemConfigTable')
 VOICE_CALLS_TABLE = os.environ.get('VOICE_CALLS_TABLE', 'base-wecare-digital-VoiceCalls')
+VOICE_CALLS_TIME_INDEX = os.environ.get('VOICE_CALLS_TIME_INDEX', DEFAULT_TIME_INDEX)
 CONNECT_INSTANCE_ID = os.environ.get('CONNECT_INSTANCE_ID', '')
 CONNECT_CONTACT_FLOW_ID = os.environ.get('CONNECT_CONTACT_FLOW_ID', '')
 CONNECT_QUEUE_ID = os.environ.get('CONNECT_QUEUE_ID', '')
 SOURCE_PHONE_NUMBER = os.environ.get('SOURCE_PHONE_NUMBER', '')
+TTS_ENGINE = os.environ.get('TTS_ENGINE', 'standard')
+TTS_CACHE_ENABLED = os.environ.get('TTS_CACHE_ENABLED', 'true').lower() == 'true'
+DEFAULT_VOICE_ID = 'Aditi'  # Indian English voice
+MAX_PRERENDER_SCRIPTS = 50
+
+# Campaigns
+MEDIA_BUCKET = os.environ.get('MEDIA_BUCKET', 'auth.wecare.digital')
+CAMPAIGN_PREFIX = os.environ.get('CAMPAIGN_PREFIX', 'stream/voice-campaigns/')
+VOICE_CALLS_FUNCTION = os.environ.get('VOICE_CALLS_FUNCTION', 'wecare-voice-calls')
+CAMPAIGN_KEY_PREFIX = 'voice_campaign#'
+MAX_CAMPAIGN_RECIPIENTS = 10000
+CAMPAIGN_TIME_RESERVE_SECONDS = 30
+
+# Per-provider ceilings; a campaign may ask for less
+PROVIDER_MAX_CONCURRENT_CALLS = {
+    'aws': int(os.environ.get('CONNECT_MAX_CONCURRENT_CALLS', '10')),
+    'airtel': int(os.environ.get('AIRTEL_MAX_CONCURRENT_CALLS', '10')),
+}
+PROVIDER_MAX_CALLS_PER_SECOND = {
+    'aws': float(os.environ.get('CONNECT_MAX_CALLS_PER_SECOND', '2')),
+    'airtel': float(os.environ.get('AIRTEL_MAX_CALLS_PER_SECOND', '2')),
+}
+
+# Retries of unanswered calls; the backoff doubles per attempt
+CAMPAIGN_MAX_ATTEMPTS = 3
+CAMPAIGN_RETRY_BACKOFF_SECONDS = 120
+
+# A started call holds its slot this long before its outcome is checked,
+# then is re-checked every CALL_POLL_SECONDS up to MAX_CALL_SECONDS
+CALL_SLOT_SECONDS = 45
+CALL_POLL_SECONDS = 15
+MAX_CALL_SECONDS = 600
+
+CALL_WRITE_BATCH = 25
+
+# Provider errors worth another attempt
+RETRYABLE_CALL_ERRORS = ('LimitExceeded', 'Throttl', 'TooManyRequests', '429')
+
+# Connect disconnect reasons of a call that was never answered
+NO_ANSWER_REASONS = ('OUTBOUND_ATTEMPT_FAILED', 'EXPIRED')
 CALL_TTL_SECONDS = 90 * 24 * 60 * 60  # 90 days
 
 
+class CampaignLeaseLostError(Exception):
+    """Another invocation took over the campaign."""
+
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Handle voice call operations."""
     request_id = context.aws_request_id if context else 'local'
+    
+    if event.get('voiceCampaign'):
+        return _run_campaign(event['voiceCampaign'], context, request_id)
+    
     http_method = event.get('requestContext', {}).get('http', {}).get('method', 'POST')
+    path = event.get('requestContext', {}).get('http', {}).get('path', '') or event.get('rawPath', '')
     path_params = event.get('pathParameters') or {}
     query_params = event.get('queryStringParameters') or {}
     
@@ -47,6 +122,15 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     }))
     
     try:
+        # GET /voice/campaigns/{campaignId} - Campaign progress
+        if http_method == 'GET' and '/voice/campaigns' in path:
+            return _get_campaign(path_params.get('campaignId') or path.rstrip('/').rsplit('/', 1)[-1])
+        
+        # POST /voice/campaigns - Start a campaign
+        if http_method == 'POST' and '/voice/campaigns' in path:
+            body = json.loads(event.get('body', '{}'))
+            return _start_campaign(body, context, request_id)
+        
         # GET /voice/calls - List calls
         if http_method == 'GET' and not path_params.get('callId'):
             return _list_calls(query_params, request_id)
@@ -55,6 +139,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if http_method == 'GET' and path_params.get('callId'):
             return _get_call(path_params['callId'], request_id)
         
+        # POST /voice/tts/prerender - Render campaign scripts to cached audio
+        if http_method == 'POST' and path.endswith('/tts/prerender'):
+            body = json.loads(event.get('body', '{}'))
+            return _prerender_tts(body, request_id)
+        
         # POST /voice/call - Make a call
         if http_method == 'POST':
             body = json.loads(event.get('body', '{}'))
@@ -78,7 +167,13 @@ def _list_calls(params: Dict, request_id: str) -> Dict[str, Any]:
     try:
         table = dynamodb.Table(VOICE_CALLS_TABLE)
         
-        scan_kwargs = {'Limit': int(params.get('limit', 100))}
+        try:
+            start = parse_time_param(params.get('from'))
+            end = parse_time_param(params.get('to'), end_of_day=True)
+        except ValueError:
+            return _response(400, {'error': 'from/to must be epoch seconds or ISO 8601'})
+        
+        filter_kwargs = {}
         filter_expressions = []
         
         from boto3.dynamodb.conditions import Attr
@@ -94,19 +189,29 @@ def _list_calls(params: Dict, request_id: str) -> Dict[str, Any]:
             combined = filter_expressions[0]
             for expr in filter_expressions[1:]:
                 combined = combined & expr
-            scan_kwargs['FilterExpression'] = combined
+            filter_kwargs['FilterExpression'] = combined
         
-        result = table.scan(**scan_kwargs)
-        calls = result.get('Items', [])
-        
-        # Sort by createdAt descending
-        calls.sort(key=lambda x: float(x.get('createdAt', 0)), reverse=True)
+        page = list_newest_first(
+            table,
+            VOICE_CALLS_TIME_INDEX,
+            limit=int(params.get('limit', 100)),
+            start=start,
+            end=end,
+            cursor=params.get('nextToken'),
+            key_attributes=('id',),
+            lookback_days=CALL_TTL_SECONDS // 86400,
+            **filter_kwargs
+        )
+        calls = page.items
         
         return _response(200, {
             'calls': [_normalize_call(c) for c in calls],
-            'count': len(calls)
+            'count': len(calls),
+            'nextToken': page.cursor
         })
         
+    except InvalidCursorError:
+        return _response(400, {'error': 'Invalid nextToken'})
     except Exception as e:
         logger.error(f"List calls error: {str(e)}")
         return _response(500, {'error': str(e)})
@@ -135,7 +240,8 @@ def _make_call(body: Dict, request_id: str) -> Dict[str, Any]:
     provider = body.get('provider', 'aws')
     call_type = body.get('callType', 'tts')
     message_text = body.get('messageText', '')
-    voice_id = body.get('voiceId', 'Aditi')  # Indian English voice
+    voice_id = body.get('voiceId', DEFAULT_VOICE_ID)
+    engine = body.get('engine', TTS_ENGINE)
     audio_url = body.get('audioUrl')
     
     if not phone_number:
@@ -151,11 +257,18 @@ def _make_call(body: Dict, request_id: str) -> Dict[str, Any]:
     call_id = str(uuid.uuid4())
     now = int(time.time())
     
+    # Play TTS as cached audio when it can be rendered; else providers synthesize
+    play_type = call_type
+    if call_type == 'tts' and message_text and not audio_url:
+        audio_url = _cached_tts_url(message_text, voice_id, engine, request_id)
+        if audio_url:
+            play_type = 'audio'
+    
     # Make call based on provider
     if provider == 'airtel':
-        result = _make_airtel_call(phone_number, call_type, message_text, audio_url, request_id)
+        result = _make_airtel_call(phone_number, play_type, message_text, audio_url, request_id)
     else:
-        result = _make_aws_call(phone_number, call_type, message_text, voice_id, audio_url, request_id)
+        result = _make_aws_call(phone_number, play_type, message_text, voice_id, audio_url, request_id)
     
     # Store call record
     _store_call(call_id, contact_id, phone_number, provider, call_type, 
@@ -173,6 +286,7 @@ def _make_call(body: Dict, request_id: str) -> Dict[str, Any]:
         'phoneNumber': phone_number,
         'provider': provider,
         'callType': call_type,
+        'cachedAudio': play_type != call_type,
         'requestId': request_id
     }))
     
@@ -183,6 +297,53 @@ def _make_call(body: Dict, request_id: str) -> Dict[str, Any]:
     })
 
 
+def _cached_tts_url(text: str, voice_id: str, engine: str, request_id: str) -> Optional[str]:
+    """Presigned URL of the cached rendering of a TTS script, or None."""
+    if not TTS_CACHE_ENABLED:
+        return None
+    try:
+        return get_tts_cache().get_audio_url(text, voice_id, engine)
+    except Exception as e:
+        logger.warning(json.dumps({
+            'event': 'tts_cache_failed',
+            'error': str(e),
+            'requestId': request_id
+        }))
+        return None
+
+
+def _prerender_tts(body: Dict, request_id: str) -> Dict[str, Any]:
+    """Render campaign scripts to cached audio before dialing."""
+    texts = body.get('texts') or ([body['messageText']] if body.get('messageText') else [])
+    voice_id = body.get('voiceId', DEFAULT_VOICE_ID)
+    engine = body.get('engine', TTS_ENGINE)
+    
+    if not isinstance(texts, list) or not texts:
+        return _response(400, {'error': 'texts is required'})
+    if len(texts) > MAX_PRERENDER_SCRIPTS:
+        return _response(400, {'error': f'At most {MAX_PRERENDER_SCRIPTS} scripts per request'})
+    if any(not isinstance(t, str) or len(t) > MAX_TTS_TEXT_LENGTH for t in texts):
+        return _response(400, {'error': f'Each script must be text up to {MAX_TTS_TEXT_LENGTH} characters'})
+    
+    urls = get_tts_cache().prerender(texts, voice_id, engine)
+    items = [{'text': text, 'audioUrl': url, 'rendered': url is not None} for text, url in urls.items()]
+    failed = sum(1 for item in items if not item['rendered'])
+    
+    logger.info(json.dumps({
+        'event': 'tts_prerendered',
+        'scripts': len(items),
+        'failed': failed,
+        'voiceId': voice_id,
+        'requestId': request_id
+    }))
+    
+    return _response(200, {
+        'items': items,
+        'rendered': len(items) - failed,
+        'failed': failed
+    })
+
+
 def _make_aws_call(phone: str, call_type: str, message: str, 
                    voice_id: str, audio_url: str, request_id: str) -> Dict[str, Any]:
     """Make call via AWS Connect."""
@@ -268,6 +429,512 @@ def _make_airtel_call(phone: str, call_type: str, message: str,
         return {'success': False, 'error': str(e)}
 
 
+# ============================================================================
+# CAMPAIGNS
+# ============================================================================
+
+def _start_campaign(body: Dict, context: Any, request_id: str) -> Dict[str, Any]:
+    """Queue a voice campaign over a recipient list."""
+    recipients = body.get('recipients') or []
+    provider = body.get('provider', 'aws')
+    call_type = body.get('callType', 'tts')
+    message_text = body.get('messageText', '')
+    audio_url = body.get('audioUrl')
+    
+    if provider not in PROVIDER_MAX_CONCURRENT_CALLS:
+        return _response(400, {'error': 'provider must be aws or airtel'})
+    if not isinstance(recipients, list) or not recipients:
+        return _response(400, {'error': 'recipients array is required'})
+    if len(recipients) > MAX_CAMPAIGN_RECIPIENTS:
+        return _response(400, {'error': f'At most {MAX_CAMPAIGN_RECIPIENTS} recipients per campaign'})
+    if any(not (r.get('phoneNumber') or r.get('phone') or r.get('contactId')) for r in recipients):
+        return _response(400, {'error': 'Each recipient needs phoneNumber or contactId'})
+    if call_type == 'tts' and not message_text:
+        return _response(400, {'error': 'messageText is required for tts campaigns'})
+    if call_type == 'audio' and not audio_url:
+        return _response(400, {'error': 'audioUrl is required for audio campaigns'})
+    
+    try:
+        max_concurrent = min(int(body.get('maxConcurrent') or PROVIDER_MAX_CONCURRENT_CALLS[provider]),
+                             PROVIDER_MAX_CONCURRENT_CALLS[provider])
+        calls_per_second = min(float(body.get('callsPerSecond') or PROVIDER_MAX_CALLS_PER_SECOND[provider]),
+                               PROVIDER_MAX_CALLS_PER_SECOND[provider])
+        max_attempts = min(int(body.get('maxAttempts') or CAMPAIGN_MAX_ATTEMPTS), 5)
+    except (TypeError, ValueError):
+        return _response(400, {'error': 'maxConcurrent, callsPerSecond and maxAttempts must be numbers'})
+    if max_concurrent < 1 or calls_per_second <= 0 or max_attempts < 1:
+        return _response(400, {'error': 'maxConcurrent, callsPerSecond and maxAttempts must be positive'})
+    
+    campaign_id = str(uuid.uuid4())
+    campaign = {
+        'campaignId': campaign_id,
+        'name': body.get('name', ''),
+        'status': 'queued',
+        'provider': provider,
+        'callType': call_type,
+        'messageText': message_text,
+        'voiceId': body.get('voiceId', DEFAULT_VOICE_ID),
+        'engine': body.get('engine', TTS_ENGINE),
+        'audioUrl': audio_url,
+        'maxConcurrent': max_concurrent,
+        'callsPerSecond': calls_per_second,
+        'maxAttempts': max_attempts,
+        'total': len(recipients),
+        'position': 0,
+        'active': [],
+        'retries': [],
+        'counts': {'attempts': 0, 'completed': 0, 'noAnswer': 0, 'failed': 0},
+        'startedAt': int(time.time()),
+        'requestId': request_id,
+    }
+    
+    s3_client.put_object(
+        Bucket=MEDIA_BUCKET,
+        Key=f"{CAMPAIGN_PREFIX}{campaign_id}.json",
+        Body=json.dumps(recipients, default=str).encode('utf-8'),
+        ContentType='application/json'
+    )
+    
+    # Render the script once up front so no call waits on Polly
+    if call_type == 'tts':
+        _cached_tts_url(message_text, campaign['voiceId'], campaign['engine'], request_id)
+    
+    _save_campaign(campaign)
+    _invoke_campaign(campaign, context)
+    
+    logger.info(json.dumps({
+        'event': 'voice_campaign_created',
+        'campaignId': campaign_id,
+        'provider': provider,
+        'totalRecipients': len(recipients),
+        'requestId': request_id
+    }))
+    
+    return _response(202, _campaign_summary(campaign))
+
+
+def _get_campaign(campaign_id: str) -> Dict[str, Any]:
+    campaign = _load_campaign(campaign_id)
+    if not campaign:
+        return _response(404, {'error': 'Campaign not found'})
+    return _response(200, {'campaign': _campaign_summary(campaign)})
+
+
+def _run_campaign(payload: Dict[str, Any], context: Any, request_id: str) -> Dict[str, Any]:
+    """Dial (or keep dialing) a campaign until it finishes or time runs out."""
+    remaining = context.get_remaining_time_in_millis() / 1000 if context else 900
+    lease_until = time.time() + remaining
+    campaign = _claim_campaign(payload.get('campaignId', ''), request_id, lease_until)
+    if not campaign or campaign['status'] in ('completed', 'failed'):
+        return {'status': 'skipped'}
+    
+    deadline = lease_until - CAMPAIGN_TIME_RESERVE_SECONDS
+    campaign['status'] = 'running'
+    
+    try:
+        finished = _dial_campaign(campaign, deadline, request_id)
+    except CampaignLeaseLostError:
+        logger.warning(json.dumps({
+            'event': 'voice_campaign_lease_lost',
+            'campaignId': campaign['campaignId'],
+            'requestId': request_id
+        }))
+        return {'status': 'superseded'}
+    except Exception as e:
+        campaign['status'] = 'failed'
+        campaign['error'] = str(e)
+        _save_campaign(campaign, owner=request_id)
+        logger.error(json.dumps({
+            'event': 'voice_campaign_failed',
+            'campaignId': campaign['campaignId'],
+            'error': str(e),
+            'requestId': request_id
+        }))
+        return {'status': 'failed'}
+    
+    if not finished:
+        # Saving without the lease releases it for the next invocation
+        _save_campaign(campaign, owner=request_id)
+        _invoke_campaign(campaign, context)
+        return {'status': 'running'}
+    
+    campaign['status'] = 'completed'
+    campaign['completedAt'] = int(time.time())
+    _save_campaign(campaign, owner=request_id)
+    logger.info(json.dumps({
+        'event': 'voice_campaign_completed',
+        'campaign': _campaign_summary(campaign),
+        'durationSeconds': campaign['completedAt'] - campaign['startedAt'],
+        'requestId': request_id
+    }))
+    return {'status': 'completed'}
+
+
+def _dial_campaign(campaign: Dict[str, Any], deadline: float, request_id: str) -> bool:
+    """
+    Place campaign calls until every recipient has an outcome or the deadline.
+    
+    Call starts run on a pool sized to the concurrency limit. A started
+    call keeps its slot until its outcome is known, and starts are spaced
+    1/callsPerSecond apart. Returns True once the campaign is done.
+    
+    Raises:
+        CampaignLeaseLostError: If another invocation took the campaign over
+    """
+    recipients = _load_recipients(campaign['campaignId'])
+    
+    # Presigned URLs expire, so each invocation signs a fresh one
+    play_type = campaign['callType']
+    audio_url = campaign.get('audioUrl')
+    if play_type == 'tts' and not audio_url:
+        audio_url = _cached_tts_url(campaign['messageText'], campaign['voiceId'], campaign['engine'], request_id)
+        if audio_url:
+            play_type = 'audio'
+    
+    lease_until = deadline + CAMPAIGN_TIME_RESERVE_SECONDS
+    interval = 1.0 / float(campaign['callsPerSecond'])
+    next_start = time.time()
+    pending_writes: List[Dict[str, Any]] = []
+    starting = {}
+    
+    with ThreadPoolExecutor(max_workers=int(campaign['maxConcurrent'])) as pool:
+        while time.time() < deadline:
+            now = time.time()
+            
+            for future in [f for f in starting if f.done()]:
+                item = _record_call_start(campaign, starting.pop(future), future.result(), now)
+                if item:
+                    pending_writes.append(item)
+            
+            for slot in [s for s in campaign['active'] if s['releaseAt'] <= now]:
+                item = _record_call_outcome(campaign, slot, now)
+                if item:
+                    pending_writes.append(item)
+            
+            if len(pending_writes) >= CALL_WRITE_BATCH:
+                _write_calls(pending_writes)
+                pending_writes = []
+                _save_campaign(campaign, owner=request_id, lease_until=lease_until)
+            
+            busy = len(campaign['active']) + len(starting)
+            if busy < int(campaign['maxConcurrent']) and now >= next_start:
+                slot = _next_campaign_slot(campaign, now)
+                if slot:
+                    recipient = recipients[slot['index']]
+                    starting[pool.submit(_place_campaign_call, campaign, slot, recipient,
+                                         play_type, audio_url, request_id)] = slot
+                    next_start = max(next_start, now) + interval
+                    continue
+            
+            if not starting and not campaign['active'] and not campaign['retries'] \
+                    and campaign['position'] >= campaign['total']:
+                break
+            time.sleep(min(interval, 0.5))
+        
+        for future, slot in starting.items():
+            item = _record_call_start(campaign, slot, future.result(), time.time())
+            if item:
+                pending_writes.append(item)
+    
+    _write_calls(pending_writes)
+    return not campaign['active'] and not campaign['retries'] and campaign['position'] >= campaign['total']
+
+
+def _next_campaign_slot(campaign: Dict[str, Any], now: float) -> Optional[Dict[str, Any]]:
+    """Next recipient to dial: a due retry first, then the next new one."""
+    for retry in campaign['retries']:
+        if retry['dueAt'] <= now:
+            campaign['retries'].remove(retry)
+            return retry
+    if campaign['position'] < campaign['total']:
+        slot = {'index': campaign['position'], 'attempts': 0}
+        campaign['position'] += 1
+        return slot
+    return None
+
+
+def _place_campaign_call(campaign: Dict[str, Any], slot: Dict[str, Any], recipient: Dict[str, Any],
+                         play_type: str, audio_url: Optional[str], request_id: str) -> Dict[str, Any]:
+    try:
+        if not _claim_call_attempt(campaign, slot):
+            return {'success': False, 'alreadyDialed': True}
+    except Exception as e:
+        return {'success': False, 'error': f'Attempt not recorded: {str(e)}'}
+    
+    phone = recipient.get('phoneNumber') or recipient.get('phone')
+    if not phone and recipient.get('contactId'):
+        phone = _get_contact(recipient['contactId']).get('phone')
+    if not phone:
+        return {'success': False, 'error': 'No phone number'}
+    
+    if campaign['provider'] == 'airtel':
+        result = _make_airtel_call(phone, play_type, campaign['messageText'], audio_url, request_id)
+    else:
+        result = _make_aws_call(phone, play_type, campaign['messageText'], campaign['voiceId'],
+                                audio_url, request_id)
+    result['phoneNumber'] = phone
+    return result
+
+
+def _claim_call_attempt(campaign: Dict[str, Any], slot: Dict[str, Any]) -> bool:
+    """
+    Record the next attempt on the call's VoiceCalls item before dialing.
+    
+    Returns:
+        False if that attempt was already dialed (by an invocation whose
+        progress was not saved)
+    """
+    attempt = slot['attempts'] + 1
+    now = int(time.time())
+    try:
+        dynamodb.Table(VOICE_CALLS_TABLE).update_item(
+            Key={'id': f"{campaign['campaignId']}-{slot['index']}"},
+            UpdateExpression='SET dialedAttempts = :attempt, campaignId = :campaignId, '
+                             'createdAt = if_not_exists(createdAt, :now), '
+                             'createdMonth = if_not_exists(createdMonth, :month), updatedAt = :now',
+            ConditionExpression='attribute_not_exists(dialedAttempts) OR dialedAttempts < :attempt',
+            ExpressionAttributeValues={
+                ':attempt': attempt,
+                ':campaignId': campaign['campaignId'],
+                ':now': Decimal(str(now)),
+                ':month': time_bucket(now),
+            }
+        )
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        return False
+
+
+def _record_call_start(campaign: Dict[str, Any], slot: Dict[str, Any],
+                       result: Dict[str, Any], now: float) -> Optional[Dict[str, Any]]:
+    """Account for a call start; returns the VoiceCalls record to write."""
+    if result.get('alreadyDialed'):
+        # Its record is already there; the campaign moves on without it
+        counts = campaign['counts']
+        counts['alreadyDialed'] = counts.get('alreadyDialed', 0) + 1
+        return None
+    
+    slot['attempts'] += 1
+    slot['phoneNumber'] = result.get('phoneNumber', '')
+    campaign['counts']['attempts'] += 1
+    
+    if result.get('success'):
+        slot['providerCallId'] = result.get('providerCallId')
+        slot['startedAt'] = int(now)
+        slot['releaseAt'] = now + CALL_SLOT_SECONDS
+        campaign['active'].append(slot)
+        return _campaign_call_item(campaign, slot, 'initiated')
+    
+    error = result.get('error', '')
+    if any(marker in error for marker in RETRYABLE_CALL_ERRORS) and slot['attempts'] < campaign['maxAttempts']:
+        _schedule_retry(campaign, slot, now)
+        return _campaign_call_item(campaign, slot, 'retrying')
+    
+    campaign['counts']['failed'] += 1
+    return _campaign_call_item(campaign, slot, 'failed')
+
+
+def _record_call_outcome(campaign: Dict[str, Any], slot: Dict[str, Any], now: float) -> Optional[Dict[str, Any]]:
+    """Release a call slot once its outcome is known; returns the record to write."""
+    outcome = _call_outcome(campaign['provider'], slot.get('providerCallId'))
+    if outcome is None and now - slot['startedAt'] < MAX_CALL_SECONDS:
+        slot['releaseAt'] = now + CALL_POLL_SECONDS
+        return None
+    
+    campaign['active'].remove(slot)
+    if outcome == 'no_answer':
+        if slot['attempts'] < campaign['maxAttempts']:
+            _schedule_retry(campaign, slot, now)
+            return _campaign_call_item(campaign, slot, 'retrying')
+        campaign['counts']['noAnswer'] += 1
+        return _campaign_call_item(campaign, slot, 'no_answer')
+    
+    campaign['counts']['completed'] += 1
+    return _campaign_call_item(campaign, slot, 'completed')
+
+
+def _schedule_retry(campaign: Dict[str, Any], slot: Dict[str, Any], now: float) -> None:
+    backoff = CAMPAIGN_RETRY_BACKOFF_SECONDS * (2 ** (slot['attempts'] - 1))
+    campaign['retries'].append({
+        'index': slot['index'],
+        'attempts': slot['attempts'],
+        'dueAt': int(now + backoff),
+    })
+
+
+def _call_outcome(provider: str, provider_call_id: Optional[str]) -> Optional[str]:
+    """
+    'answered', 'no_answer', or None while the call is still up.
+    
+    Only Connect reports call outcomes; Airtel calls count as completed
+    once their slot time has passed.
+    """
+    if provider != 'aws' or not provider_call_id:
+        return 'answered'
+    try:
+        contact = connect.describe_contact(
+            InstanceId=CONNECT_INSTANCE_ID,
+            ContactId=provider_call_id
+        ).get('Contact', {})
+    except Exception as e:
+        logger.warning(f"Describe contact {provider_call_id} failed: {str(e)}")
+        return 'answered'
+    
+    if not contact.get('DisconnectTimestamp'):
+        return None
+    if contact.get('DisconnectReason') in NO_ANSWER_REASONS:
+        return 'no_answer'
+    return 'answered'
+
+
+def _campaign_call_item(campaign: Dict[str, Any], slot: Dict[str, Any], status: str) -> Dict[str, Any]:
+    item = _call_item(
+        f"{campaign['campaignId']}-{slot['index']}",
+        '',
+        slot.get('phoneNumber', ''),
+        campaign['provider'],
+        campaign['callType'],
+        status,
+        slot.get('providerCallId')
+    )
+    item['campaignId'] = campaign['campaignId']
+    item['attempts'] = slot['attempts']
+    return item
+
+
+def _write_calls(items: List[Dict[str, Any]]) -> None:
+    """
+    Upsert call records (the last write per call wins).
+    
+    Updates rather than puts, so the attempt claim (dialedAttempts) stays
+    on the item and createdAt keeps its first value.
+    """
+    if not items:
+        return
+    latest = {item['id']: item for item in items}
+    table = dynamodb.Table(VOICE_CALLS_TABLE)
+    for item in latest.values():
+        names, values, clauses = {}, {}, []
+        for i, (name, value) in enumerate(v for v in item.items() if v[0] != 'id'):
+            names[f'#f{i}'] = name
+            values[f':f{i}'] = value
+            if name in ('createdAt', 'createdMonth'):
+                clauses.append(f'#f{i} = if_not_exists(#f{i}, :f{i})')
+            else:
+                clauses.append(f'#f{i} = :f{i}')
+        try:
+            table.update_item(
+                Key={'id': item['id']},
+                UpdateExpression='SET ' + ', '.join(clauses),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values
+            )
+        except Exception as e:
+            logger.error(f"Write campaign call {item['id']} error: {str(e)}")
+
+
+def _load_recipients(campaign_id: str) -> List[Dict[str, Any]]:
+    response = s3_client.get_object(Bucket=MEDIA_BUCKET, Key=f"{CAMPAIGN_PREFIX}{campaign_id}.json")
+    return json.loads(response['Body'].read())
+
+
+def _load_campaign(campaign_id: str) -> Optional[Dict[str, Any]]:
+    if not campaign_id:
+        return None
+    response = dynamodb.Table(SYSTEM_CONFIG_TABLE).get_item(Key={'configKey': f'{CAMPAIGN_KEY_PREFIX}{campaign_id}'})
+    item = response.get('Item')
+    return json.loads(item['configValue']) if item else None
+
+
+def _claim_campaign(campaign_id: str, owner: str, lease_until: float) -> Optional[Dict[str, Any]]:
+    """
+    Take the run lease of a campaign.
+    
+    Returns:
+        The campaign, or None if it does not exist or another invocation
+        holds an unexpired lease
+    """
+    if not campaign_id:
+        return None
+    try:
+        response = dynamodb.Table(SYSTEM_CONFIG_TABLE).update_item(
+            Key={'configKey': f'{CAMPAIGN_KEY_PREFIX}{campaign_id}'},
+            UpdateExpression='SET leaseOwner = :owner, leaseExpiresAt = :until',
+            ConditionExpression='attribute_exists(configKey) AND (attribute_not_exists(leaseExpiresAt) '
+                                'OR leaseExpiresAt < :now OR leaseOwner = :owner)',
+            ExpressionAttributeValues={
+                ':owner': owner,
+                ':until': Decimal(str(int(lease_until))),
+                ':now': Decimal(str(int(time.time()))),
+            },
+            ReturnValues='ALL_NEW'
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        logger.info(f"Voice campaign {campaign_id} is not available (missing or leased)")
+        return None
+    return json.loads(response['Attributes']['configValue'])
+
+
+def _save_campaign(campaign: Dict[str, Any], owner: Optional[str] = None,
+                   lease_until: Optional[float] = None) -> None:
+    """
+    Save campaign progress.
+    
+    Args:
+        owner: Lease owner; the save only succeeds while it holds the lease
+        lease_until: Keep the lease until then (default: release it)
+    
+    Raises:
+        CampaignLeaseLostError: If owner no longer holds the lease
+    """
+    now = int(time.time())
+    campaign['updatedAt'] = now
+    item = {
+        'configKey': f"{CAMPAIGN_KEY_PREFIX}{campaign['campaignId']}",
+        'configValue': json.dumps(campaign),
+        'updatedAt': Decimal(str(now)),
+    }
+    if not owner:
+        dynamodb.Table(SYSTEM_CONFIG_TABLE).put_item(Item=item)
+        return
+    
+    if lease_until:
+        item['leaseOwner'] = owner
+        item['leaseExpiresAt'] = Decimal(str(int(lease_until)))
+    try:
+        dynamodb.Table(SYSTEM_CONFIG_TABLE).put_item(
+            Item=item,
+            ConditionExpression='leaseOwner = :owner',
+            ExpressionAttributeValues={':owner': owner}
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        raise CampaignLeaseLostError(campaign['campaignId'])
+
+
+def _invoke_campaign(campaign: Dict[str, Any], context: Any) -> None:
+    lambda_client.invoke(
+        FunctionName=context.function_name if context else VOICE_CALLS_FUNCTION,
+        InvocationType='Event',
+        Payload=json.dumps({'voiceCampaign': {'campaignId': campaign['campaignId']}})
+    )
+
+
+def _campaign_summary(campaign: Dict[str, Any]) -> Dict[str, Any]:
+    counts = campaign['counts']
+    done = counts['completed'] + counts['noAnswer'] + counts['failed'] + counts.get('alreadyDialed', 0)
+    summary = {k: v for k, v in campaign.items() if k not in ('requestId', 'active', 'retries')}
+    summary['inProgress'] = len(campaign['active'])
+    summary['pendingRetries'] = len(campaign['retries'])
+    summary['progress'] = round(done / campaign['total'], 4) if campaign['total'] else 1
+    return summary
+
+
 def _get_contact(contact_id: str) -> Dict[str, Any]:
     """Get contact from DynamoDB."""
     try:
@@ -282,33 +949,39 @@ def _store_call(call_id: str, contact_id: str, phone: str, provider: str,
                 call_type: str, status: str, provider_call_id: str = None) -> None:
     """Store call record in DynamoDB."""
     try:
-        now = int(time.time())
         table = dynamodb.Table(VOICE_CALLS_TABLE)
-        
-        item = {
-            'id': call_id,
-            'callId': call_id,
-            'contactId': contact_id or '',
-            'phoneNumber': phone,
-            'provider': provider,
-            'callType': call_type,
-            'status': status,
-            'direction': 'OUTBOUND',
-            'duration': 0,
-            'createdAt': Decimal(str(now)),
-            'updatedAt': Decimal(str(now)),
-            'ttl': Decimal(str(now + CALL_TTL_SECONDS)),
-        }
-        
-        if provider_call_id:
-            item['providerCallId'] = provider_call_id
-        
-        table.put_item(Item=item)
-        
+        table.put_item(Item=_call_item(call_id, contact_id, phone, provider, call_type,
+                                       status, provider_call_id))
     except Exception as e:
         logger.error(f"Store call error: {str(e)}")
 
 
+def _call_item(call_id: str, contact_id: str, phone: str, provider: str,
+               call_type: str, status: str, provider_call_id: str = None) -> Dict[str, Any]:
+    """Build a VoiceCalls record."""
+    now = int(time.time())
+    item = {
+        'id': call_id,
+        'callId': call_id,
+        'contactId': contact_id or '',
+        'phoneNumber': phone,
+        'provider': provider,
+        'callType': call_type,
+        'status': status,
+        'direction': 'OUTBOUND',
+        'duration': 0,
+        'createdAt': Decimal(str(now)),
+        'createdMonth': time_bucket(now),
+        'updatedAt': Decimal(str(now)),
+        'ttl': Decimal(str(now + CALL_TTL_SECONDS)),
+    }
+    
+    if provider_call_id:
+        item['providerCallId'] = provider_call_id
+    
+    return item
+
+
 def _normalize_call(item: Dict) -> Dict:
     """Normalize call record for API response."""
     return {
@@ -322,6 +995,8 @@ def _normalize_call(item: Dict) -> Dict:
         'direction': item.get('direction', 'OUTBOUND'),
         'duration': int(item.get('duration', 0)),
         'recordingUrl': item.get('recordingUrl', ''),
+        'campaignId': item.get('campaignId', ''),
+        'attempts': int(item.get('attempts', 1)),
         'createdAt': int(float(item.get('createdAt', 0))),
         'updatedAt': int(float(item.get('updatedAt', 0))),
     }
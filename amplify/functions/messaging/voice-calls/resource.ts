@@ -1,19 +1,32 @@
 import { defineFunction } from '@aws-amplify/backend';
 
+/**
+ * Voice Calls
+ *
+ * Single calls via AWS Connect or Airtel IQ, cached TTS audio and voice
+ * campaigns. Campaigns run in asynchronous invocations of this function.
+ */
 export const voiceCalls = defineFunction({
   name: 'wecare-voice-calls',
   entry: './handler.py',
   runtime: 20, // Python 3.12
-  timeoutSeconds: 30,
+  timeoutSeconds: 900,
   memoryMB: 256,
   environment: {
     AWS_REGION: 'us-east-1',
     LOG_LEVEL: 'INFO',
     CONTACTS_TABLE: 'base-wecare-digital-ContactsTable',
     VOICE_CALLS_TABLE: 'base-wecare-digital-VoiceCalls',
+    SYSTEM_CONFIG_TABLE: 'base-wecare-digital-SystemConfigTable',
     CONNECT_INSTANCE_ID: '',
     CONNECT_CONTACT_FLOW_ID: '',
     CONNECT_QUEUE_ID: '',
     SOURCE_PHONE_NUMBER: '',
+    MEDIA_BUCKET: 'auth.wecare.digital',
+    TTS_ENGINE: 'standard',
+    CAMPAIGN_PREFIX: 'stream/voice-campaigns/',
+    VOICE_CALLS_FUNCTION: 'wecare-voice-calls',
+    CONNECT_MAX_CONCURRENT_CALLS: '10',
+    AIRTEL_MAX_CONCURRENT_CALLS: '10',
   },
 });
@@ -21,24 +21,32 @@ https://docs.aws.amazon.com/social-messaging/latest/APIReference/Welcome.html
 import os
 import json
 import logging
-import boto3
 from typing import Dict, Any, List, Optional
 from decimal import Decimal
 from datetime import datetime
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.system_events import get_system_event_log, DEFAULT_EVENT_LIMIT
+from utils.phone_registry import get_phone_registry
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-social_messaging = boto3.client('socialmessaging', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-s3 = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+social_messaging = lazy_client('socialmessaging')
+dynamodb = lazy_resource('dynamodb')
+s3 = lazy_client('s3')
 
 # Environment variables
-SYSTEM_CONFIG_TABLE = os.environ.get('SYSTEM_CONFIG_TABLE', 'base-wecare-digital-SystemConfigTable')
 MEDIA_BUCKET = os.environ.get('MEDIA_BUCKET', 'auth.wecare.digital')
 
+# Response key -> SystemEvents event type
+SYSTEM_EVENT_TYPES = {
+    'templateStatus': 'template_status',
+    'phoneQuality': 'phone_quality',
+    'accountUpdates': 'account_update',
+}
+
 # CORS headers
 CORS_HEADERS = {
     'Content-Type': 'application/json',
@@ -77,7 +85,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Routes:
     - GET /waba - List all linked WABAs
     - GET /waba/{wabaId} - Get WABA details
-    - GET /waba/phone/{phoneNumberId} - Get phone number details
+    - GET /waba/phone/{phoneNumberId} - Get phone number details (registry; ?live=true for the API)
+    - GET /waba/registry - List registered phone numbers (routing metadata)
+    - POST /waba/registry/refresh - Refresh the phone number registry from the API
     - GET /waba/events - Get system events (template status, phone quality, account updates)
     - GET /waba/media/{mediaId} - Download media from WhatsApp
     - POST /waba/media - Upload media to WhatsApp for sending
@@ -130,13 +140,15 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if http_method == 'GET':
             if '/waba/events' in path:
                 return _get_system_events(query_params, request_id)
+            elif '/waba/registry' in path:
+                return _list_registry(query_params, request_id)
             elif '/waba/media/' in path:
                 media_id = path_params.get('mediaId') or path.split('/media/')[-1]
                 phone_id = query_params.get('phoneNumberId', '')
                 return _get_media(media_id, phone_id, query_params, request_id)
             elif '/waba/phone/' in path:
                 phone_id = path_params.get('phoneNumberId') or path.split('/phone/')[-1]
-                return _get_phone_number_details(phone_id, request_id)
+                return _get_phone_number_details(phone_id, request_id, live=query_params.get('live') == 'true')
             elif '/tags' in path:
                 resource_arn = query_params.get('resourceArn', '')
                 return _list_tags(resource_arn, request_id)
@@ -148,7 +160,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             return _list_wabas(request_id)
         
         elif http_method == 'POST':
-            if '/waba/media' in path:
+            if '/waba/registry/refresh' in path:
+                return _refresh_registry(request_id)
+            elif '/waba/media' in path:
                 return _post_media(body, request_id)
             elif '/tags' in path:
                 return _tag_resource(body, request_id)
@@ -309,10 +323,11 @@ def _get_waba_details(waba_id: str, request_id: str) -> Dict[str, Any]:
         return _error_response(500, f'Failed to get WABA details: {str(e)}')
 
 
-def _get_phone_number_details(phone_id: str, request_id: str) -> Dict[str, Any]:
+def _get_phone_number_details(phone_id: str, request_id: str, live: bool = False) -> Dict[str, Any]:
     """
     Get details of a specific phone number including quality rating.
-    API: GetLinkedWhatsAppBusinessAccountPhoneNumber
+    Served from the phone number registry when the number is registered;
+    API: GetLinkedWhatsAppBusinessAccountPhoneNumber otherwise (or with live=True)
     
     Returns:
     - Phone number info
@@ -325,6 +340,14 @@ def _get_phone_number_details(phone_id: str, request_id: str) -> Dict[str, Any]:
         if not phone_id.startswith('phone-number-id-'):
             phone_id = f'phone-number-id-{phone_id}'
         
+        registered = None if live else get_phone_registry().get(phone_id)
+        if registered and not registered.get('builtIn'):
+            return {
+                'statusCode': 200,
+                'headers': CORS_HEADERS,
+                'body': json.dumps(_registry_entry(registered), default=_serialize_value)
+            }
+        
         response = social_messaging.get_linked_whatsapp_business_account_phone_number(id=phone_id)
         
         phone = response.get('phoneNumber', {})
@@ -367,81 +390,110 @@ def _get_phone_number_details(phone_id: str, request_id: str) -> Dict[str, Any]:
         return _error_response(500, f'Failed to get phone details: {str(e)}')
 
 
-def _get_system_events(query_params: Dict, request_id: str) -> Dict[str, Any]:
+def _registry_entry(number: Dict[str, Any]) -> Dict[str, Any]:
+    """Phone number registry item in the shape of the phone details response."""
+    return {
+        'phoneNumberId': number.get('phoneNumberId', ''),
+        'phoneNumber': number.get('phoneNumber', ''),
+        'displayPhoneNumber': number.get('displayPhoneNumber', ''),
+        'displayPhoneNumberName': number.get('displayName', ''),
+        'qualityRating': number.get('qualityRating', 'UNKNOWN'),
+        'metaPhoneNumberId': number.get('metaPhoneNumberId', ''),
+        'linkedWabaId': number.get('wabaId', ''),
+        'wabaName': number.get('wabaName', ''),
+        'messagingLimitTier': number.get('messagingLimitTier', ''),
+        'throughputMps': get_phone_registry().throughput(number.get('phoneNumberId')),
+        'isDefault': number.get('phoneNumberId') == get_phone_registry().default_phone_number_id(),
+        'updatedAt': number.get('updatedAt'),
+    }
+
+
+def _list_registry(query_params: Dict, request_id: str) -> Dict[str, Any]:
     """
-    Get system events from SystemConfig table.
-    Events stored by inbound webhook handler:
-    - template_status: Template approval/rejection events
-    - phone_quality: Phone quality rating changes
-    - account_update: Messaging limit changes, restrictions
+    List the phone number registry used for routing.
+    Optional ?wabaId= filter.
+    """
+    waba_id = query_params.get('wabaId')
+    if waba_id and not waba_id.startswith('waba-'):
+        waba_id = f'waba-{waba_id}'
+    
+    numbers = [_registry_entry(n) for n in get_phone_registry().numbers(waba_id)]
+    numbers.sort(key=lambda n: n['phoneNumberId'])
+    
+    return {
+        'statusCode': 200,
+        'headers': CORS_HEADERS,
+        'body': json.dumps({'phoneNumbers': numbers, 'count': len(numbers)}, default=_serialize_value)
+    }
+
+
+def _refresh_registry(request_id: str) -> Dict[str, Any]:
+    """
+    Refresh the phone number registry from the linked WABAs.
+    APIs: ListLinkedWhatsAppBusinessAccounts, GetLinkedWhatsAppBusinessAccount
     """
     try:
-        event_type = query_params.get('type', 'all')
-        config_table = dynamodb.Table(SYSTEM_CONFIG_TABLE)
-        
-        events = {
-            'templateStatus': [],
-            'phoneQuality': [],
-            'accountUpdates': []
-        }
-        
-        # Fetch template status events
-        if event_type in ['all', 'template_status']:
-            try:
-                response = config_table.get_item(Key={'configKey': 'whatsapp_events_template_status'})
-                if 'Item' in response:
-                    events['templateStatus'] = json.loads(response['Item'].get('configValue', '[]'))
-            except Exception as e:
-                logger.warning(f'Failed to fetch template status events: {str(e)}')
-        
-        # Fetch phone quality events
-        if event_type in ['all', 'phone_quality']:
-            try:
-                response = config_table.get_item(Key={'configKey': 'whatsapp_events_phone_quality'})
-                if 'Item' in response:
-                    events['phoneQuality'] = json.loads(response['Item'].get('configValue', '[]'))
-            except Exception as e:
-                logger.warning(f'Failed to fetch phone quality events: {str(e)}')
-        
-        # Fetch account update events
-        if event_type in ['all', 'account_update']:
-            try:
-                response = config_table.get_item(Key={'configKey': 'whatsapp_events_account_update'})
-                if 'Item' in response:
-                    events['accountUpdates'] = json.loads(response['Item'].get('configValue', '[]'))
-            except Exception as e:
-                logger.warning(f'Failed to fetch account update events: {str(e)}')
+        registry = get_phone_registry()
+        written = registry.refresh(social_messaging)
         
         logger.info(json.dumps({
-            'event': 'system_events_fetched',
-            'templateStatusCount': len(events['templateStatus']),
-            'phoneQualityCount': len(events['phoneQuality']),
-            'accountUpdatesCount': len(events['accountUpdates']),
+            'event': 'phone_registry_refreshed',
+            'count': written,
             'requestId': request_id
         }))
         
-        return {
-            'statusCode': 200,
-            'headers': CORS_HEADERS,
-            'body': json.dumps(events)
-        }
+        return _list_registry({}, request_id)
         
     except Exception as e:
         logger.error(json.dumps({
-            'event': 'get_system_events_error',
+            'event': 'phone_registry_refresh_error',
             'error': str(e),
             'requestId': request_id
         }))
-        # Return empty events on error (table may not exist)
-        return {
-            'statusCode': 200,
-            'headers': CORS_HEADERS,
-            'body': json.dumps({
-                'templateStatus': [],
-                'phoneQuality': [],
-                'accountUpdates': []
-            })
-        }
+        return _error_response(500, f'Failed to refresh phone registry: {str(e)}')
+
+
+def _get_system_events(query_params: Dict, request_id: str) -> Dict[str, Any]:
+    """
+    Get the latest system events from the SystemEvents log.
+    Events recorded by inbound webhook handler:
+    - template_status: Template approval/rejection events
+    - phone_quality: Phone quality rating changes
+    - account_update: Messaging limit changes, restrictions
+    
+    Query params: type (default all), limit per type (default 10)
+    """
+    event_type = query_params.get('type', 'all')
+    try:
+        limit = int(query_params.get('limit', DEFAULT_EVENT_LIMIT))
+    except ValueError:
+        return _error_response(400, 'limit must be a number')
+    
+    event_log = get_system_event_log()
+    events = {}
+    for response_key, stored_type in SYSTEM_EVENT_TYPES.items():
+        events[response_key] = []
+        if event_type not in ['all', stored_type]:
+            continue
+        try:
+            events[response_key] = event_log.latest(stored_type, limit)
+        except Exception as e:
+            # Return empty events on error (table may not exist)
+            logger.warning(f'Failed to fetch {stored_type} events: {str(e)}')
+    
+    logger.info(json.dumps({
+        'event': 'system_events_fetched',
+        'templateStatusCount': len(events['templateStatus']),
+        'phoneQualityCount': len(events['phoneQuality']),
+        'accountUpdatesCount': len(events['accountUpdates']),
+        'requestId': request_id
+    }))
+    
+    return {
+        'statusCode': 200,
+        'headers': CORS_HEADERS,
+        'body': json.dumps(events, default=_serialize_value)
+    }
 
 
 def _delete_media(media_id: str, phone_number_id: str, request_id: str) -> Dict[str, Any]:
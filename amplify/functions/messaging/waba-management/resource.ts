@@ -6,6 +6,7 @@
  * - GetLinkedWhatsAppBusinessAccountPhoneNumber - Get phone details
  * - ListLinkedWhatsAppBusinessAccounts - List all WABAs
  * - DeleteWhatsAppMessageMedia - Delete uploaded media
+ * - Phone number registry (routing metadata) listing and refresh
  */
 
 import { defineFunction } from '@aws-amplify/backend';
@@ -18,6 +19,7 @@ export const wabaManagement = defineFunction({
   memoryMB: 256,
   environment: {
     LOG_LEVEL: 'INFO',
-    SYSTEM_CONFIG_TABLE: 'base-wecare-digital-SystemConfigTable',
+    SYSTEM_EVENTS_TABLE: 'base-wecare-digital-SystemEventsTable',
+    PHONE_REGISTRY_TABLE: 'base-wecare-digital-PhoneNumberRegistryTable',
   },
 });
@@ -2,17 +2,24 @@
 import json
 import logging
 import base64
-import boto3
+import time
 from typing import Dict, Any
+from botocore.exceptions import ClientError
+from utils.aws_clients import lazy_client
+from utils.template_catalog import get_template_catalog
 
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
-social_messaging = boto3.client('socialmessaging', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-s3 = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+social_messaging = lazy_client('socialmessaging')
+s3 = lazy_client('s3')
 
 MEDIA_BUCKET = os.environ.get('MEDIA_BUCKET', 'auth.wecare.digital')
 DEFAULT_WABA_ID = 'waba-0aae9cf04cf24c66960f291c793359b4'
+# Resync the catalog from the API when the last sync is older than this
+TEMPLATE_CATALOG_MAX_AGE_SECONDS = int(os.environ.get('TEMPLATE_CATALOG_MAX_AGE_SECONDS', '21600'))
+# Catalog table or index not created yet (scripts/create-template-catalog-table.py)
+CATALOG_UNAVAILABLE_ERRORS = ('ResourceNotFoundException', 'ValidationException')
 
 CORS_HEADERS = {
     'Content-Type': 'application/json',
@@ -47,6 +54,8 @@ def handler(event, context):
                 return _list_template_library(waba_id, query_params)
             return _list_templates(waba_id, query_params)
         elif http_method == 'POST':
+            if '/templates/sync' in path:
+                return _sync_templates(waba_id)
             if '/templates/from-library' in path:
                 return _create_from_library(waba_id, body)
             return _create_template(waba_id, body)
@@ -57,11 +66,49 @@ def handler(event, context):
         return _error_response(500, str(e))
 
 def _list_templates(waba_id, query_params):
+    """
+    Templates from the catalog; synced from the API when never synced or stale.
+    Listed from the API directly while the catalog table does not exist.
+    """
     try:
-        response = social_messaging.list_whatsapp_message_templates(id=waba_id, maxResults=100)
+        try:
+            catalog = get_template_catalog()
+            templates, synced_at = catalog.list(waba_id, refresh=query_params.get('refresh') == 'true')
+            if not synced_at or time.time() - synced_at > TEMPLATE_CATALOG_MAX_AGE_SECONDS:
+                catalog.sync(waba_id, social_messaging)
+                templates, synced_at = catalog.list(waba_id)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') not in CATALOG_UNAVAILABLE_ERRORS:
+                raise
+            logger.warning(f"Template catalog unavailable, listing from the API: {str(e)}")
+            templates, synced_at = _list_api_templates(waba_id), None
+        status = (query_params.get('status') or '').upper()
+        if status:
+            templates = [t for t in templates if t.get('templateStatus') == status]
         templates = [{'metaTemplateId': t.get('metaTemplateId'), 'templateName': t.get('templateName'),
-                      'templateStatus': t.get('templateStatus')} for t in response.get('templates', [])]
-        return {'statusCode': 200, 'headers': CORS_HEADERS, 'body': json.dumps({'templates': templates})}
+                      'templateLanguage': t.get('templateLanguage'), 'templateStatus': t.get('templateStatus'),
+                      'templateCategory': t.get('templateCategory'), 'bodyText': t.get('bodyText', ''),
+                      'bodyParamCount': t.get('bodyParamCount'), 'headerFormat': t.get('headerFormat', '')}
+                     for t in templates]
+        return {'statusCode': 200, 'headers': CORS_HEADERS,
+                'body': json.dumps({'templates': templates, 'syncedAt': synced_at})}
+    except Exception as e:
+        return _error_response(500, str(e))
+
+def _list_api_templates(waba_id):
+    templates = []
+    kwargs = {'id': waba_id, 'maxResults': 100}
+    while True:
+        response = social_messaging.list_whatsapp_message_templates(**kwargs)
+        templates.extend(response.get('templates', []))
+        if not response.get('nextToken'):
+            return templates
+        kwargs['nextToken'] = response['nextToken']
+
+def _sync_templates(waba_id):
+    try:
+        result = get_template_catalog().sync(waba_id, social_messaging)
+        return {'statusCode': 200, 'headers': CORS_HEADERS, 'body': json.dumps(result)}
     except Exception as e:
         return _error_response(500, str(e))
 
@@ -81,6 +128,7 @@ def _create_template(waba_id, body):
             return _error_response(400, 'templateDefinition required')
         template_blob = json.dumps(template_def).encode('utf-8')
         response = social_messaging.create_whatsapp_message_template(id=waba_id, templateDefinition=template_blob)
+        _catalog_put_pending(waba_id, response.get('metaTemplateId'), template_def)
         return {'statusCode': 201, 'headers': CORS_HEADERS, 'body': json.dumps({'metaTemplateId': response.get('metaTemplateId')})}
     except Exception as e:
         return _error_response(500, str(e))
@@ -100,9 +148,19 @@ def _delete_template(waba_id, template_name, query_params):
         if not template_name:
             return _error_response(400, 'templateName required')
         social_messaging.delete_whatsapp_message_template(id=waba_id, templateName=template_name)
+        try:
+            get_template_catalog().remove(waba_id, template_name)
+        except Exception as e:
+            logger.warning(f"Template catalog remove failed for {template_name}: {str(e)}")
         return {'statusCode': 200, 'headers': CORS_HEADERS, 'body': json.dumps({'success': True})}
     except Exception as e:
         return _error_response(500, str(e))
 
+def _catalog_put_pending(waba_id, meta_template_id, template_def):
+    try:
+        get_template_catalog().put_pending(waba_id, meta_template_id, template_def)
+    except Exception as e:
+        logger.warning(f"Template catalog update failed for {template_def.get('name')}: {str(e)}")
+
 def _error_response(status_code, message):
     return {'statusCode': status_code, 'headers': CORS_HEADERS, 'body': json.dumps({'error': message})}
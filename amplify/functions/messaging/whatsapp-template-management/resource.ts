@@ -22,5 +22,6 @@ export const whatsappTemplateManagement = defineFunction({
     LOG_LEVEL: 'INFO',
     MEDIA_BUCKET: 'auth.wecare.digital',
     TEMPLATE_MEDIA_PREFIX: 'whatsapp-media/template-headers/',
+    TEMPLATE_CATALOG_TABLE: 'base-wecare-digital-TemplateCatalogTable',
   },
 });
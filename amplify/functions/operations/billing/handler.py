@@ -8,14 +8,14 @@ Route: GET /billing
 import os
 import json
 import logging
-import boto3
 from datetime import datetime, timedelta
 from typing import Dict, Any
+from utils.aws_clients import lazy_client
 
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
-ce = boto3.client('ce', region_name='us-east-1')  # Cost Explorer only in us-east-1
+ce = lazy_client('ce', region_name='us-east-1')  # Cost Explorer only in us-east-1
 
 CORS_HEADERS = {
     'Content-Type': 'application/json',
@@ -11,18 +11,19 @@ import os
 import json
 import time
 import logging
-import boto3
 from typing import Dict, Any
 from decimal import Decimal
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.suppression import get_suppression_list
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-sqs = boto3.client('sqs', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-s3 = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+sqs = lazy_client('sqs')
+s3 = lazy_client('s3')
 
 # Environment variables
 BULK_JOBS_TABLE = os.environ.get('BULK_JOBS_TABLE', 'BulkJobs')
@@ -219,15 +220,24 @@ def _resume_job(job_id: str, job: Dict, request_id: str) -> Dict[str, Any]:
             }
         )
         
-        # Re-enqueue unprocessed recipients
+        # Re-enqueue unprocessed recipients, minus those who opted out since the job was created
         pending_recipients = _get_pending_recipients(job_id)
+        pending_recipients, suppressed = get_suppression_list().filter(job.get('channel') or 'WHATSAPP', pending_recipients)
+        _mark_suppressed(job_id, suppressed)
         
         if pending_recipients and BULK_QUEUE_URL:
-            # Chunk and re-enqueue
+            # Chunk and re-enqueue, keeping each recipient on its assigned sending number
             chunk_size = 100
-            chunks = [pending_recipients[i:i+chunk_size] for i in range(0, len(pending_recipients), chunk_size)]
+            by_sender = {}
+            for recipient in pending_recipients:
+                by_sender.setdefault(recipient.get('phoneNumberId') or job.get('phoneNumberId'), []).append(recipient)
+            chunks = [
+                (sender, shard[i:i+chunk_size])
+                for sender, shard in by_sender.items()
+                for i in range(0, len(shard), chunk_size)
+            ]
             
-            for chunk_index, chunk in enumerate(chunks):
+            for chunk_index, (sender, chunk) in enumerate(chunks):
                 message = {
                     'jobId': job_id,
                     'chunkIndex': f"resume-{chunk_index}",
@@ -236,7 +246,12 @@ def _resume_job(job_id: str, job: Dict, request_id: str) -> Dict[str, Any]:
                     'content': job.get('content', ''),
                     'templateName': job.get('templateName'),
                     'templateParams': job.get('templateParams', []),
+                    'phoneNumberId': sender,
+                    'lane': 'marketing',
                 }
+                if job.get('channel') == 'EMAIL':
+                    message['subject'] = job.get('subject', '')
+                    message['htmlContent'] = job.get('htmlContent')
                 
                 sqs.send_message(
                     QueueUrl=BULK_QUEUE_URL,
@@ -245,7 +260,8 @@ def _resume_job(job_id: str, job: Dict, request_id: str) -> Dict[str, Any]:
         
         return {
             'status': 'pending',
-            'message': f'Job resumed with {len(pending_recipients)} pending recipients'
+            'message': f'Job resumed with {len(pending_recipients)} pending recipients',
+            'suppressedCount': len(suppressed)
         }
         
     except Exception as e:
@@ -298,13 +314,37 @@ def _get_pending_recipients(job_id: str) -> list:
         )
         
         return [
-            {'contactId': r.get('contactId'), 'recipientId': r.get('recipientId')}
+            {'contactId': r.get('contactId'), 'recipientId': r.get('recipientId'),
+             'phone': r.get('phone', ''), 'email': r.get('email', ''),
+             'phoneNumberId': r.get('phoneNumberId') or None}
             for r in response.get('Items', [])
         ]
     except Exception:
         return []
 
 
+def _mark_suppressed(job_id: str, recipients: list) -> None:
+    """Mark recipients dropped by the suppression list so they are not resumed again."""
+    if not recipients:
+        return
+    recipients_table = dynamodb.Table(BULK_RECIPIENTS_TABLE)
+    now = Decimal(str(int(time.time())))
+    for recipient in recipients:
+        try:
+            recipients_table.update_item(
+                Key={'jobId': job_id, 'recipientId': recipient['recipientId']},
+                UpdateExpression='SET #status = :status, suppressionReason = :reason, updatedAt = :now',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={
+                    ':status': 'suppressed',
+                    ':reason': recipient.get('suppressionReason', ''),
+                    ':now': now
+                }
+            )
+        except Exception as e:
+            logger.warning(f"Failed to mark recipient suppressed: {str(e)}")
+
+
 def _cancel_pending_recipients(job_id: str) -> None:
     """Update all pending recipients to cancelled status."""
     try:
@@ -10,24 +10,37 @@ import json
 import uuid
 import time
 import logging
-import boto3
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from decimal import Decimal
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.pagination import InvalidCursorError
+from utils.phone_registry import get_phone_registry
+from utils.rate_limiter import RateLimiter
+from utils.sender_pool import SenderPool
+from utils.suppression import get_suppression_list
+from utils.template_catalog import get_template_catalog, split_template_language, waba_for_phone_number
+from utils.time_index import list_newest_first, parse_time_param, time_bucket, DEFAULT_TIME_INDEX
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-sqs = boto3.client('sqs', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+sqs = lazy_client('sqs')
 
 # Environment variables
 BULK_JOBS_TABLE = os.environ.get('BULK_JOBS_TABLE', 'base-wecare-digital-BulkJobsTable')
+BULK_JOBS_TIME_INDEX = os.environ.get('BULK_JOBS_TIME_INDEX', DEFAULT_TIME_INDEX)
+BULK_JOBS_LOOKBACK_DAYS = int(os.environ.get('BULK_JOBS_LOOKBACK_DAYS', '365'))
 BULK_RECIPIENTS_TABLE = os.environ.get('BULK_RECIPIENTS_TABLE', 'base-wecare-digital-BulkRecipientsTable')
 BULK_QUEUE_URL = os.environ.get('BULK_QUEUE_URL', '')
+RATE_LIMIT_TABLE = os.environ.get('RATE_LIMIT_TABLE', 'RateLimitTracker')
 CHUNK_SIZE = 100  # Recipients per SQS message
 
+# Per-number usage (WHATSAPP:<phone id>) weights multi-number jobs by remaining tier capacity
+rate_limiter = RateLimiter(lazy_client('dynamodb'), RATE_LIMIT_TABLE)
+
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Handle bulk job creation and listing."""
@@ -81,7 +94,13 @@ def _list_jobs(params: Dict, request_id: str) -> Dict[str, Any]:
     try:
         table = dynamodb.Table(BULK_JOBS_TABLE)
         
-        scan_kwargs = {'Limit': int(params.get('limit', 100))}
+        try:
+            start = parse_time_param(params.get('from'))
+            end = parse_time_param(params.get('to'), end_of_day=True)
+        except ValueError:
+            return _response(400, {'error': 'from/to must be epoch seconds or ISO 8601'})
+        
+        filter_kwargs = {}
         filter_expressions = []
         
         from boto3.dynamodb.conditions import Attr
@@ -97,19 +116,29 @@ def _list_jobs(params: Dict, request_id: str) -> Dict[str, Any]:
             combined = filter_expressions[0]
             for expr in filter_expressions[1:]:
                 combined = combined & expr
-            scan_kwargs['FilterExpression'] = combined
-        
-        result = table.scan(**scan_kwargs)
-        jobs = result.get('Items', [])
+            filter_kwargs['FilterExpression'] = combined
         
-        # Sort by createdAt descending
-        jobs.sort(key=lambda x: float(x.get('createdAt', 0)), reverse=True)
+        page = list_newest_first(
+            table,
+            BULK_JOBS_TIME_INDEX,
+            limit=int(params.get('limit', 100)),
+            start=start,
+            end=end,
+            cursor=params.get('nextToken'),
+            key_attributes=('jobId',),
+            lookback_days=BULK_JOBS_LOOKBACK_DAYS,
+            **filter_kwargs
+        )
+        jobs = page.items
         
         return _response(200, {
             'jobs': [_normalize_job(j) for j in jobs],
-            'count': len(jobs)
+            'count': len(jobs),
+            'nextToken': page.cursor
         })
         
+    except InvalidCursorError:
+        return _response(400, {'error': 'Invalid nextToken'})
     except Exception as e:
         logger.error(f"List jobs error: {str(e)}")
         return _response(500, {'error': str(e)})
@@ -141,11 +170,16 @@ def _create_job(body: Dict, request_id: str) -> Dict[str, Any]:
     channel = body.get('channel', 'WHATSAPP').upper()
     recipients = body.get('recipients', [])
     content = body.get('content', '')
+    subject = body.get('subject', '')
+    html_content = body.get('htmlContent')
     template_name = body.get('templateName')
     template_params = body.get('templateParams', [])
     created_by = body.get('createdBy', 'admin')
     scheduled_at = body.get('scheduledAt')
-    phone_number_id = body.get('phoneNumberId')
+    # Multi-number sending: phoneNumberIds, or shardSenders for every number of the WABA
+    phone_number_ids = body.get('phoneNumberIds') or []
+    shard_senders = bool(body.get('shardSenders', False))
+    phone_number_id = body.get('phoneNumberId') or (phone_number_ids[0] if phone_number_ids else None)
     
     if not recipients:
         return _response(400, {'error': 'recipients array is required'})
@@ -153,9 +187,35 @@ def _create_job(body: Dict, request_id: str) -> Dict[str, Any]:
     if channel not in ['WHATSAPP', 'SMS', 'EMAIL']:
         return _response(400, {'error': 'Invalid channel. Must be WHATSAPP, SMS, or EMAIL'})
     
-    if not content and not template_name:
+    if not content and not template_name and not html_content:
         return _response(400, {'error': 'content or templateName is required'})
     
+    if channel == 'EMAIL' and not subject and not template_name:
+        return _response(400, {'error': 'subject is required for email jobs'})
+    
+    # Drop opted-out and invalid addresses before anything is stored or sharded
+    sendable, suppressed = get_suppression_list().filter(channel, recipients)
+    if not sendable:
+        return _response(400, {'error': 'All recipients are suppressed (opted out or invalid)',
+                               'suppressedCount': len(suppressed)})
+    
+    # Fail the whole job up front instead of every recipient at send time
+    if channel == 'WHATSAPP' and template_name:
+        language, params = split_template_language(template_params)
+        template_error = get_template_catalog().validate(
+            waba_for_phone_number(phone_number_id), template_name, language, params
+        )
+        if template_error:
+            return _response(400, {'error': template_error})
+    
+    sender_counts = None
+    if channel == 'WHATSAPP' and (len(phone_number_ids) > 1 or shard_senders):
+        shards, shard_error = _shard_recipients(phone_number_id, phone_number_ids, sendable)
+        if shard_error:
+            return _response(400, {'error': shard_error})
+        sender_counts = {sender: len(shard) for sender, shard in shards.items()}
+        phone_number_id = phone_number_id or next(iter(shards))
+    
     # Generate job ID
     job_id = str(uuid.uuid4())
     now = int(time.time())
@@ -165,6 +225,7 @@ def _create_job(body: Dict, request_id: str) -> Dict[str, Any]:
         'jobId': job_id,
         'channel': channel,
         'totalRecipients': len(recipients),
+        'suppressedCount': len(suppressed),
         'sentCount': 0,
         'failedCount': 0,
         'status': 'pending',
@@ -172,11 +233,18 @@ def _create_job(body: Dict, request_id: str) -> Dict[str, Any]:
         'templateName': template_name,
         'templateParams': template_params,
         'phoneNumberId': phone_number_id,
+        'subject': subject,
+        'htmlContent': html_content,
         'createdBy': created_by,
         'createdAt': Decimal(str(now)),
+        'createdMonth': time_bucket(now),
         'updatedAt': Decimal(str(now)),
     }
     
+    if sender_counts:
+        job['phoneNumberIds'] = list(sender_counts)
+        job['senderCounts'] = {k: Decimal(v) for k, v in sender_counts.items()}
+    
     if scheduled_at:
         job['scheduledAt'] = Decimal(str(scheduled_at))
         job['status'] = 'scheduled'
@@ -185,29 +253,69 @@ def _create_job(body: Dict, request_id: str) -> Dict[str, Any]:
     jobs_table = dynamodb.Table(BULK_JOBS_TABLE)
     jobs_table.put_item(Item=job)
     
-    # Store recipients
+    # Store recipients (suppressed ones for the report only)
     _store_recipients(job_id, recipients)
     
     # Enqueue for processing (if not scheduled)
     if not scheduled_at and BULK_QUEUE_URL:
         _enqueue_job(job_id, channel, content, template_name, template_params, 
-                     phone_number_id, recipients)
+                     phone_number_id, sendable, subject, html_content)
     
     logger.info(json.dumps({
         'event': 'bulk_job_created',
         'jobId': job_id,
         'channel': channel,
         'totalRecipients': len(recipients),
+        'suppressedCount': len(suppressed),
         'scheduled': bool(scheduled_at),
+        'senderCounts': sender_counts,
         'requestId': request_id
     }))
     
-    return _response(201, {
+    result = {
         'jobId': job_id,
         'status': job['status'],
         'totalRecipients': len(recipients),
+        'suppressedCount': len(suppressed),
         'message': 'Job created successfully'
-    })
+    }
+    if sender_counts:
+        result['senderCounts'] = sender_counts
+    return _response(201, result)
+
+
+def _shard_recipients(primary_id: str, phone_number_ids: List[str],
+                      recipients: List[Dict]) -> Tuple[Dict[str, List[Dict]], str]:
+    """
+    Assign each recipient a sending number from the job's sender pool.
+    
+    All numbers must belong to one WABA (templates are per WABA). Sets
+    phoneNumberId on each recipient; see utils/sender_pool.py.
+    
+    Returns:
+        (phone number id -> recipients, error message or '')
+    """
+    registry = get_phone_registry()
+    primary_id = primary_id or registry.default_phone_number_id()
+    if not registry.get(primary_id):
+        return {}, f'Unknown phoneNumberId: {primary_id}'
+    waba_id = registry.waba_for(primary_id)
+    for candidate in phone_number_ids:
+        number = registry.get(candidate)
+        if not number:
+            return {}, f'Unknown phoneNumberId: {candidate}'
+        if number.get('wabaId') != waba_id:
+            return {}, f'phoneNumberIds must belong to one WABA ({candidate} is not in {waba_id})'
+    
+    pool = SenderPool.for_waba(waba_id, phone_number_ids or None, rate_limiter=rate_limiter)
+    if not pool:
+        return {}, 'No sending numbers available (disabled or RED quality)'
+    
+    shards = {sender: shard for sender, shard in pool.distribute(recipients).items() if shard}
+    for sender, shard in shards.items():
+        for recipient in shard:
+            recipient['phoneNumberId'] = sender
+    return shards, ''
 
 
 def _store_recipients(job_id: str, recipients: List[Dict]) -> None:
@@ -225,10 +333,13 @@ def _store_recipients(job_id: str, recipients: List[Dict]) -> None:
                     'phone': recipient.get('phone', ''),
                     'email': recipient.get('email', ''),
                     'name': recipient.get('name', ''),
-                    'status': 'pending',
+                    'phoneNumberId': recipient.get('phoneNumberId', ''),
+                    'status': 'suppressed' if recipient.get('suppressionReason') else 'pending',
                     'createdAt': now,
                     'updatedAt': now,
                 }
+                if recipient.get('suppressionReason'):
+                    item['suppressionReason'] = recipient['suppressionReason']
                 batch.put_item(Item=item)
                 
     except Exception as e:
@@ -236,13 +347,27 @@ def _store_recipients(job_id: str, recipients: List[Dict]) -> None:
 
 
 def _enqueue_job(job_id: str, channel: str, content: str, template_name: str,
-                 template_params: List, phone_number_id: str, recipients: List[Dict]) -> None:
-    """Enqueue job chunks to SQS for processing."""
+                 template_params: List, phone_number_id: str, recipients: List[Dict],
+                 subject: str = '', html_content: str = None) -> None:
+    """
+    Enqueue job chunks to SQS for processing.
+    
+    Chunks never mix sending numbers: recipients assigned a number by the
+    sender pool are chunked per number, so each number is rate limited
+    (and sends) in parallel.
+    """
     try:
-        # Chunk recipients
-        chunks = [recipients[i:i+CHUNK_SIZE] for i in range(0, len(recipients), CHUNK_SIZE)]
+        # Chunk recipients per sending number
+        by_sender: Dict[str, List[Dict]] = {}
+        for recipient in recipients:
+            by_sender.setdefault(recipient.get('phoneNumberId') or phone_number_id, []).append(recipient)
+        chunks = [
+            (sender, shard[i:i+CHUNK_SIZE])
+            for sender, shard in by_sender.items()
+            for i in range(0, len(shard), CHUNK_SIZE)
+        ]
         
-        for chunk_idx, chunk in enumerate(chunks):
+        for chunk_idx, (sender, chunk) in enumerate(chunks):
             message = {
                 'jobId': job_id,
                 'chunkIndex': chunk_idx,
@@ -250,9 +375,13 @@ def _enqueue_job(job_id: str, channel: str, content: str, template_name: str,
                 'content': content,
                 'templateName': template_name,
                 'templateParams': template_params,
-                'phoneNumberId': phone_number_id,
+                'phoneNumberId': sender,
+                'lane': 'marketing',
                 'recipients': chunk,
             }
+            if channel == 'EMAIL':
+                message['subject'] = subject
+                message['htmlContent'] = html_content
             
             sqs.send_message(
                 QueueUrl=BULK_QUEUE_URL,
@@ -294,6 +423,7 @@ def _get_recipient_stats(job_id: str) -> Dict[str, int]:
             'sentCount': 0,
             'failedCount': 0,
             'deliveredCount': 0,
+            'suppressedCount': 0,
         }
         
         for r in recipients:
@@ -306,6 +436,8 @@ def _get_recipient_stats(job_id: str) -> Dict[str, int]:
                 stats['failedCount'] += 1
             elif status == 'delivered':
                 stats['deliveredCount'] += 1
+            elif status == 'suppressed':
+                stats['suppressedCount'] += 1
         
         return stats
         
@@ -12,5 +12,7 @@ export const bulkJobCreate = defineFunction({
     BULK_JOBS_TABLE: 'base-wecare-digital-BulkJobsTable',
     BULK_RECIPIENTS_TABLE: 'base-wecare-digital-BulkRecipientsTable',
     BULK_QUEUE_URL: 'https://sqs.us-east-1.amazonaws.com/809904170947/base-wecare-digital-bulk-queue',
+    TEMPLATE_CATALOG_TABLE: 'base-wecare-digital-TemplateCatalogTable',
+    PHONE_REGISTRY_TABLE: 'base-wecare-digital-PhoneNumberRegistryTable',
   },
 });
@@ -6,39 +6,56 @@ Requirements: 9.1, 9.2, 9.3, 9.4, 9.5, 9.6, 9.7
 
 Replays messages from DLQ with deduplication, retry limits,
 and original processing logic.
+
+Replays run on POST /dlq/replay, and on an EventBridge schedule (see
+scripts/update-dlq-lambda.py) for the queues in SCHEDULED_REPLAY_QUEUES:
+outbound-dlq holds sends parked by queue_for_retry while a provider's
+circuit breaker was open, and they are retried without an operator.
 """
 
 import os
 import json
 import time
 import logging
-import boto3
 from typing import Dict, Any, List, Set
 from decimal import Decimal
+from boto3.dynamodb.conditions import Attr
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.pagination import InvalidCursorError
+from utils.time_index import list_newest_first, parse_time_param, time_bucket, DEFAULT_TIME_INDEX
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-sqs = boto3.client('sqs', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-lambda_client = boto3.client('lambda', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+sqs = lazy_client('sqs')
+lambda_client = lazy_client('lambda')
 
 # Environment variables
 DLQ_MESSAGES_TABLE = os.environ.get('DLQ_MESSAGES_TABLE', 'DLQMessages')
+DLQ_TIME_INDEX = os.environ.get('DLQ_TIME_INDEX', DEFAULT_TIME_INDEX)
 INBOUND_DLQ_URL = os.environ.get('INBOUND_DLQ_URL', '')
 BULK_DLQ_URL = os.environ.get('BULK_DLQ_URL', '')
+OUTBOUND_DLQ_URL = os.environ.get('OUTBOUND_DLQ_URL', '')
 
 # Constants
 MAX_RETRIES = 5  # Requirement 9.7
 BATCH_SIZE = 100  # Requirement 9.3
 DLQ_TTL_SECONDS = 7 * 24 * 60 * 60  # 7 days
 
+# Queues drained on the schedule, and the receive batches per queue and run
+SCHEDULED_REPLAY_QUEUES = [q for q in os.environ.get('SCHEDULED_REPLAY_QUEUES', 'outbound-dlq').split(',') if q]
+SCHEDULED_REPLAY_MAX_BATCHES = 5
+# Stop starting batches when less time than this is left in the invocation
+SCHEDULED_REPLAY_RESERVE_MS = 20000
+
 # Queue URL mapping
 DLQ_URLS = {
     'inbound-dlq': INBOUND_DLQ_URL,
     'bulk-dlq': BULK_DLQ_URL,
+    'outbound-dlq': OUTBOUND_DLQ_URL,
 }
 
 # Handler function mapping
@@ -46,6 +63,7 @@ HANDLERS = {
     'inbound-dlq': os.environ.get('INBOUND_HANDLER_FUNCTION', 'inbound-whatsapp-handler'),
     'bulk-dlq': os.environ.get('BULK_WORKER_FUNCTION', 'bulk-worker'),
 }
+# outbound-dlq messages carry their own handlerFunction (see queue_for_retry)
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -55,6 +73,10 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     request_id = context.aws_request_id if context else 'local'
     
+    # EventBridge schedule: replay the retry queues
+    if event.get('source') == 'aws.events':
+        return _replay_scheduled(context, request_id)
+    
     # Handle both HTTP API v2 and REST API event formats
     http_method = (
         event.get('requestContext', {}).get('http', {}).get('method') or
@@ -70,18 +92,38 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     # GET /dlq - List DLQ messages
     if http_method == 'GET':
-        return _list_dlq_messages(request_id)
+        return _list_dlq_messages(event.get('queryStringParameters') or {}, request_id)
     
     # POST /dlq/replay - Replay messages
     return _replay_dlq_messages(event, request_id)
 
 
-def _list_dlq_messages(request_id: str) -> Dict[str, Any]:
-    """List all DLQ messages from tracking table."""
+def _list_dlq_messages(query_params: Dict[str, str], request_id: str) -> Dict[str, Any]:
+    """List DLQ messages from tracking table, newest first, one page at a time."""
     try:
+        try:
+            start = parse_time_param(query_params.get('from'))
+            end = parse_time_param(query_params.get('to'), end_of_day=True)
+        except ValueError:
+            return _error_response(400, 'from/to must be epoch seconds or ISO 8601')
+        
+        filter_kwargs = {}
+        if query_params.get('queueName'):
+            filter_kwargs['FilterExpression'] = Attr('queueName').eq(query_params['queueName'])
+        
         dlq_table = dynamodb.Table(DLQ_MESSAGES_TABLE)
-        response = dlq_table.scan(Limit=100)
-        items = response.get('Items', [])
+        page = list_newest_first(
+            dlq_table,
+            DLQ_TIME_INDEX,
+            limit=int(query_params.get('limit', 100)),
+            start=start,
+            end=end,
+            cursor=query_params.get('nextToken'),
+            key_attributes=('dlqMessageId',),
+            lookback_days=DLQ_TTL_SECONDS // 86400 + 1,
+            **filter_kwargs
+        )
+        items = page.items
         
         messages = []
         for item in items:
@@ -103,9 +145,12 @@ def _list_dlq_messages(request_id: str) -> Dict[str, Any]:
             },
             'body': json.dumps({
                 'messages': messages,
-                'count': len(messages)
+                'count': len(messages),
+                'nextToken': page.cursor
             })
         }
+    except InvalidCursorError:
+        return _error_response(400, 'Invalid nextToken')
     except Exception as e:
         logger.error(f"List DLQ error: {str(e)}")
         return _error_response(500, 'Failed to list DLQ messages')
@@ -255,6 +300,33 @@ def _replay_dlq_messages(event: Dict[str, Any], request_id: str) -> Dict[str, An
         return _error_response(500, 'Internal server error')
 
 
+def _replay_scheduled(context: Any, request_id: str) -> Dict[str, Any]:
+    """Replay SCHEDULED_REPLAY_QUEUES batch by batch until empty or out of time."""
+    results = {}
+    for queue_name in SCHEDULED_REPLAY_QUEUES:
+        totals = {'processed': 0, 'succeeded': 0, 'failed': 0, 'skipped': 0}
+        for _ in range(SCHEDULED_REPLAY_MAX_BATCHES):
+            if context and context.get_remaining_time_in_millis() < SCHEDULED_REPLAY_RESERVE_MS:
+                break
+            response = _replay_dlq_messages({'body': json.dumps({'queueName': queue_name})}, request_id)
+            if response['statusCode'] != 200:
+                break
+            stats = json.loads(response['body'])
+            for name in totals:
+                totals[name] += stats.get(name, 0)
+            # Failed messages stay invisible until the next run
+            if not stats.get('processed') and not stats.get('skipped'):
+                break
+        results[queue_name] = totals
+    
+    logger.info(json.dumps({
+        'event': 'dlq_scheduled_replay_complete',
+        'results': results,
+        'requestId': request_id
+    }))
+    return {'statusCode': 200, 'body': json.dumps(results)}
+
+
 def _receive_messages(queue_url: str, batch_size: int) -> List[Dict]:
     """Receive messages from SQS DLQ."""
     try:
@@ -297,6 +369,8 @@ def _get_or_create_dlq_record(message_id: str, queue_name: str, payload: Dict) -
             'originalMessageId': message_id,
             'queueName': queue_name,
             'retryCount': 0,
+            'createdAt': Decimal(str(now)),
+            'createdMonth': time_bucket(now),
             'lastAttemptAt': Decimal(str(now)),
             'payload': json.dumps(payload, default=str),
             'expiresAt': Decimal(str(now + DLQ_TTL_SECONDS)),  # TTL: 7 days
@@ -341,13 +415,16 @@ def _delete_dlq_record(message_id: str) -> None:
 def _replay_message(queue_name: str, message_body: Dict, request_id: str) -> bool:
     """Replay message using original handler."""
     try:
-        handler_function = HANDLERS.get(queue_name)
+        handler_function = message_body.get('handlerFunction') or HANDLERS.get(queue_name)
         if not handler_function:
             logger.error(f"No handler configured for queue: {queue_name}")
             return False
         
         # Extract original record/payload
         original_record = message_body.get('originalRecord', message_body)
+        if isinstance(original_record, dict) and message_body.get('handlerFunction'):
+            # Tell the handler not to re-queue if its provider is still down
+            original_record = {**original_record, 'dlqReplay': True}
         
         # Invoke original handler
         response = lambda_client.invoke(
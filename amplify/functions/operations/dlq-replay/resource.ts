@@ -14,7 +14,9 @@ export const dlqReplay = defineFunction({
     DLQ_MESSAGES_TABLE: 'base-wecare-digital-DLQMessagesTable',
     INBOUND_DLQ_URL: 'https://sqs.us-east-1.amazonaws.com/809904170947/base-wecare-digital-inbound-dlq',
     BULK_DLQ_URL: 'https://sqs.us-east-1.amazonaws.com/809904170947/base-wecare-digital-bulk-dlq',
+    OUTBOUND_DLQ_URL: 'https://sqs.us-east-1.amazonaws.com/809904170947/base-wecare-digital-outbound-dlq',
     INBOUND_HANDLER_FUNCTION: 'inbound-whatsapp-handler',
     BULK_WORKER_FUNCTION: 'bulk-worker',
+    SCHEDULED_REPLAY_QUEUES: 'outbound-dlq',
   },
 });
@@ -0,0 +1,248 @@
+"""
+Stats Reconciler Lambda Function
+
+Purpose: Keep the sharded dashboard counters (utils.stats_counters) exact
+
+Writers increment the counters as they go; this function recounts the
+source tables on a schedule and applies the difference. It corrects
+drift from TTL expiry, failed increments and writes made outside the
+handlers. Full scans run here, once per schedule period, instead of on
+every stats request.
+
+The contacts count and the bulk-send suppression snapshots
+(utils.suppression) come from the same scan of the contacts table.
+The run also deletes the SES
+templates registered for bulk email (outbound-email, named by content
+hash) once they are older than BULK_TEMPLATE_MAX_AGE_DAYS.
+
+Razorpay events still pending in PaymentEvents well after they were
+received have run out of razorpay-webhook's async retries; they are
+handed back to its processor, one invocation per payment.
+
+Trigger: EventBridge schedule (see scripts/deploy-lambdas.py)
+"""
+
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Dict, Any, List, Tuple
+from boto3.dynamodb.conditions import Attr
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.pagination import parallel_scan, parallel_count
+from utils.stats_counters import (
+    get_stats_counters,
+    ai_language_counter,
+    COUNTER_CONTACTS,
+    COUNTER_INBOUND_MESSAGES,
+    COUNTER_OUTBOUND_MESSAGES,
+    COUNTER_AI_INTERACTIONS,
+    COUNTER_AI_APPROVED,
+)
+from utils.suppression import build_snapshots, get_suppression_list
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# AWS clients
+dynamodb = lazy_resource('dynamodb')
+ses = lazy_client('ses')
+lambda_client = lazy_client('lambda')
+
+# Environment variables
+CONTACTS_TABLE = os.environ.get('CONTACTS_TABLE', 'base-wecare-digital-ContactsTable')
+INBOUND_TABLE = os.environ.get('INBOUND_TABLE', 'base-wecare-digital-WhatsAppInboundTable')
+OUTBOUND_TABLE = os.environ.get('OUTBOUND_TABLE', 'base-wecare-digital-WhatsAppOutboundTable')
+AI_INTERACTIONS_TABLE = os.environ.get('AI_INTERACTIONS_TABLE', 'base-wecare-digital-AIInteractionsTable')
+SCAN_SEGMENTS = int(os.environ.get('SCAN_SEGMENTS', '4'))
+
+# Bulk email SES templates (see outbound-email); a bulk job sends within
+# hours, and a later job with the same content registers it again
+BULK_TEMPLATE_PREFIX = os.environ.get('BULK_TEMPLATE_PREFIX', 'wecare-bulk-')
+BULK_TEMPLATE_MAX_AGE_DAYS = int(os.environ.get('BULK_TEMPLATE_MAX_AGE_DAYS', '3'))
+
+# Pending Razorpay events (see razorpay-webhook); the async retries of a
+# processing run are over well within the grace period
+PAYMENT_EVENTS_TABLE = os.environ.get('PAYMENT_EVENTS_TABLE', 'base-wecare-digital-PaymentEventsTable')
+PENDING_EVENTS_INDEX = os.environ.get('PENDING_EVENTS_INDEX', 'pendingPaymentKey-receivedAt-index')
+RAZORPAY_WEBHOOK_FUNCTION = os.environ.get('RAZORPAY_WEBHOOK_FUNCTION', 'wecare-razorpay-webhook')
+PENDING_EVENT_GRACE_SECONDS = int(os.environ.get('PENDING_EVENT_GRACE_SECONDS', '3600'))
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Recount the source tables and correct the stats counters."""
+    request_id = context.aws_request_id if context else 'local'
+    started = time.time()
+    
+    try:
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            contacts = pool.submit(_scan_contacts)
+            inbound = pool.submit(_count, INBOUND_TABLE)
+            outbound = pool.submit(_count, OUTBOUND_TABLE)
+            ai_counts = pool.submit(_count_ai_interactions)
+            templates = pool.submit(_expire_bulk_templates)
+            payment_events = pool.submit(_requeue_pending_payment_events)
+            
+            contact_count, suppressed = contacts.result()
+            actual = {
+                COUNTER_CONTACTS: contact_count,
+                COUNTER_INBOUND_MESSAGES: inbound.result(),
+                COUNTER_OUTBOUND_MESSAGES: outbound.result(),
+            }
+            actual.update(ai_counts.result())
+        
+        corrections = get_stats_counters().reconcile(actual)
+        expired_templates = templates.result()
+        requeued_payments = payment_events.result()
+        
+        logger.info(json.dumps({
+            'event': 'stats_reconciled',
+            'actual': actual,
+            'corrections': corrections,
+            'suppressed': suppressed,
+            'expiredTemplates': expired_templates,
+            'requeuedPayments': requeued_payments,
+            'durationMs': int((time.time() - started) * 1000),
+            'requestId': request_id
+        }))
+        
+        return {
+            'statusCode': 200,
+            'body': json.dumps({'actual': actual, 'corrections': corrections, 'suppressed': suppressed,
+                                'expiredTemplates': expired_templates, 'requeuedPayments': requeued_payments})
+        }
+        
+    except Exception as e:
+        logger.error(json.dumps({
+            'event': 'stats_reconcile_error',
+            'error': str(e),
+            'requestId': request_id
+        }))
+        raise
+
+
+def _count(table_name: str, **scan_kwargs) -> int:
+    """Count items in a table with a segmented COUNT scan."""
+    return parallel_count(dynamodb.Table(table_name), total_segments=SCAN_SEGMENTS, **scan_kwargs)
+
+
+def _count_ai_interactions() -> Dict[str, int]:
+    """Count AI interactions, approvals and interactions per language."""
+    table = dynamodb.Table(AI_INTERACTIONS_TABLE)
+    counts = {COUNTER_AI_INTERACTIONS: 0, COUNTER_AI_APPROVED: 0}
+    pages = parallel_scan(
+        table,
+        total_segments=SCAN_SEGMENTS,
+        ProjectionExpression='approved, detectedLanguage'
+    )
+    for items in pages:
+        for item in items:
+            counts[COUNTER_AI_INTERACTIONS] += 1
+            if item.get('approved'):
+                counts[COUNTER_AI_APPROVED] += 1
+            language_counter = ai_language_counter(item.get('detectedLanguage'))
+            counts[language_counter] = counts.get(language_counter, 0) + 1
+    return counts
+
+
+def _scan_contacts() -> Tuple[int, Dict[str, int]]:
+    """
+    Count contacts and rebuild the suppression snapshots in one scan.
+    
+    Returns:
+        (contacts that are not soft-deleted, suppressed keys per channel)
+    """
+    pages = parallel_scan(
+        dynamodb.Table(CONTACTS_TABLE),
+        total_segments=SCAN_SEGMENTS,
+        ProjectionExpression='phone, email, optInWhatsApp, optInSms, optInEmail, deletedAt'
+    )
+    live = 0
+    
+    def contacts():
+        nonlocal live
+        for items in pages:
+            for item in items:
+                if item.get('deletedAt') is None:
+                    live += 1
+                yield item
+    
+    snapshots = build_snapshots(contacts())
+    return live, get_suppression_list().publish(snapshots)
+
+
+def _expire_bulk_templates() -> int:
+    """
+    Delete bulk email SES templates older than BULK_TEMPLATE_MAX_AGE_DAYS.
+    
+    SES errors are logged, never raised: the counters and suppression
+    snapshots of the same run must not fail because of them.
+    """
+    cutoff = time.time() - BULK_TEMPLATE_MAX_AGE_DAYS * 24 * 60 * 60
+    expired = []
+    kwargs = {'MaxItems': 100}
+    try:
+        while True:
+            response = ses.list_templates(**kwargs)
+            for template in response.get('TemplatesMetadata', []):
+                name = template.get('Name', '')
+                created = template.get('CreatedTimestamp')
+                if name.startswith(BULK_TEMPLATE_PREFIX) and created and created.timestamp() < cutoff:
+                    expired.append(name)
+            if not response.get('NextToken'):
+                break
+            kwargs['NextToken'] = response['NextToken']
+    except Exception as e:
+        logger.warning(f"List SES templates failed: {str(e)}")
+    
+    deleted = 0
+    for name in expired:
+        try:
+            ses.delete_template(TemplateName=name)
+            deleted += 1
+        except Exception as e:
+            logger.warning(f"Delete SES template {name} failed: {str(e)}")
+    return deleted
+
+
+def _requeue_pending_payment_events() -> int:
+    """
+    Hand stale pending Razorpay events back to the razorpay-webhook processor.
+    
+    The pending index is sparse (only unapplied events), so the scan is small.
+    
+    Returns:
+        Number of payments whose events were requeued
+    """
+    cutoff = Decimal(str(int(time.time()) - PENDING_EVENT_GRACE_SECONDS))
+    stale: Dict[str, List[str]] = {}
+    try:
+        pages = parallel_scan(
+            dynamodb.Table(PAYMENT_EVENTS_TABLE),
+            total_segments=1,
+            IndexName=PENDING_EVENTS_INDEX,
+            FilterExpression=Attr('receivedAt').lt(cutoff),
+            ProjectionExpression='eventId, pendingPaymentKey'
+        )
+        for items in pages:
+            for item in items:
+                stale.setdefault(item['pendingPaymentKey'], []).append(item['eventId'])
+    except Exception as e:
+        logger.warning(f"Pending payment events scan failed: {str(e)}")
+        return 0
+    
+    requeued = 0
+    for payment_key, event_ids in stale.items():
+        try:
+            lambda_client.invoke(
+                FunctionName=RAZORPAY_WEBHOOK_FUNCTION,
+                InvocationType='Event',
+                Payload=json.dumps({'paymentEvents': {'paymentKey': payment_key, 'eventIds': event_ids}}).encode('utf-8')
+            )
+            requeued += 1
+        except Exception as e:
+            logger.warning(f"Requeue payment events for {payment_key} failed: {str(e)}")
+    return requeued
@@ -0,0 +1,33 @@
+import { defineFunction } from '@aws-amplify/backend';
+
+/**
+ * Stats Reconciler
+ *
+ * Recounts contacts, messages and AI interactions on a schedule and
+ * corrects the sharded stats counters in SystemConfig. Also rebuilds the
+ * bulk-send suppression snapshots in the media bucket, deletes expired
+ * bulk email SES templates and requeues Razorpay events left pending.
+ */
+export const statsReconciler = defineFunction({
+  name: 'wecare-stats-reconciler',
+  entry: './handler.py',
+  runtime: 20,
+  timeoutSeconds: 900,
+  memoryMB: 512,
+  environment: {
+    AWS_REGION: 'us-east-1',
+    LOG_LEVEL: 'INFO',
+    CONTACTS_TABLE: 'base-wecare-digital-ContactsTable',
+    INBOUND_TABLE: 'base-wecare-digital-WhatsAppInboundTable',
+    OUTBOUND_TABLE: 'base-wecare-digital-WhatsAppOutboundTable',
+    AI_INTERACTIONS_TABLE: 'base-wecare-digital-AIInteractionsTable',
+    SYSTEM_CONFIG_TABLE: 'base-wecare-digital-SystemConfigTable',
+    STATS_SHARD_COUNT: '10',
+    MEDIA_BUCKET: 'auth.wecare.digital',
+    BULK_TEMPLATE_PREFIX: 'wecare-bulk-',
+    BULK_TEMPLATE_MAX_AGE_DAYS: '3',
+    PAYMENT_EVENTS_TABLE: 'base-wecare-digital-PaymentEventsTable',
+    PENDING_EVENTS_INDEX: 'pendingPaymentKey-receivedAt-index',
+    RAZORPAY_WEBHOOK_FUNCTION: 'wecare-razorpay-webhook',
+  },
+});
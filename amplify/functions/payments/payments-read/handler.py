@@ -7,19 +7,24 @@ Purpose: List and retrieve payment records
 import os
 import json
 import logging
-import boto3
 from typing import Dict, Any
 from boto3.dynamodb.conditions import Key, Attr
+from utils.aws_clients import lazy_resource
+from utils.pagination import InvalidCursorError
+from utils.payment_ledger import get_payment_ledger, sanitize_reference_id
+from utils.time_index import list_newest_first, parse_time_param, DEFAULT_TIME_INDEX
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
 
 # Environment variables
 PAYMENTS_TABLE = os.environ.get('PAYMENTS_TABLE', 'base-wecare-digital-PaymentsTable')
+PAYMENTS_TIME_INDEX = os.environ.get('PAYMENTS_TIME_INDEX', DEFAULT_TIME_INDEX)
+PAYMENTS_LOOKBACK_DAYS = int(os.environ.get('PAYMENTS_LOOKBACK_DAYS', '365'))
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -60,7 +65,13 @@ def _list_payments(params: Dict, request_id: str) -> Dict[str, Any]:
     try:
         table = dynamodb.Table(PAYMENTS_TABLE)
         
-        scan_kwargs = {'Limit': int(params.get('limit', 100))}
+        try:
+            start = parse_time_param(params.get('from'))
+            end = parse_time_param(params.get('to'), end_of_day=True)
+        except ValueError:
+            return _response(400, {'error': 'from/to must be epoch seconds or ISO 8601'})
+        
+        filter_kwargs = {}
         filter_expressions = []
         
         if params.get('status'):
@@ -76,19 +87,29 @@ def _list_payments(params: Dict, request_id: str) -> Dict[str, Any]:
             combined = filter_expressions[0]
             for expr in filter_expressions[1:]:
                 combined = combined & expr
-            scan_kwargs['FilterExpression'] = combined
-        
-        result = table.scan(**scan_kwargs)
-        payments = result.get('Items', [])
+            filter_kwargs['FilterExpression'] = combined
         
-        # Sort by createdAt descending
-        payments.sort(key=lambda x: float(x.get('createdAt', 0)), reverse=True)
+        page = list_newest_first(
+            table,
+            PAYMENTS_TIME_INDEX,
+            limit=int(params.get('limit', 100)),
+            start=start,
+            end=end,
+            cursor=params.get('nextToken'),
+            key_attributes=('id',),
+            lookback_days=PAYMENTS_LOOKBACK_DAYS,
+            **filter_kwargs
+        )
+        payments = page.items
         
         return _response(200, {
             'payments': [_normalize_payment(p) for p in payments],
-            'count': len(payments)
+            'count': len(payments),
+            'nextToken': page.cursor
         })
         
+    except InvalidCursorError:
+        return _response(400, {'error': 'Invalid nextToken'})
     except Exception as e:
         logger.error(f"List payments error: {str(e)}")
         return _response(500, {'error': str(e)})
@@ -104,14 +125,15 @@ def _get_payment(payment_id: str, request_id: str) -> Dict[str, Any]:
         if payment:
             return _response(200, {'payment': _normalize_payment(payment)})
         
-        # Try by paymentId (Razorpay ID)
-        result = table.scan(
-            FilterExpression=Attr('paymentId').eq(payment_id),
-            Limit=1
+        # Razorpay payment/order id, or a reference id in another format
+        ledger = get_payment_ledger()
+        payment = (
+            ledger.find_by_payment_id(payment_id) or
+            ledger.find_by_order_id(payment_id) or
+            ledger.get(sanitize_reference_id(payment_id))
         )
-        items = result.get('Items', [])
-        if items:
-            return _response(200, {'payment': _normalize_payment(items[0])})
+        if payment:
+            return _response(200, {'payment': _normalize_payment(payment)})
         
         return _response(404, {'error': 'Payment not found'})
         
@@ -4,28 +4,53 @@ Razorpay Webhook Handler Lambda Function
 Purpose: Process Razorpay payment webhooks
 Webhook URL: https://k4vqzmi07b.execute-api.us-east-1.amazonaws.com/prod/razorpay-webhook
 Webhook Secret: b@c4mk9t9Z8qLq3
+
+Ingestion is split in two:
+- Ack path: verify the signature, store the raw event with a conditional
+  put on the Razorpay event id (retries become no-ops), return 200.
+- Processor: the function invokes itself asynchronously with the
+  payment key. It loads every pending event for that payment, applies
+  them in event order as one ledger update, and marks them processed.
+  Events whose handling or ledger write failed stay pending and the
+  invocation fails, so the async retry (or a Razorpay retry of the
+  event, or the next event of the payment) applies them again. Events
+  still pending after that are handed back to the processor by
+  stats-reconciler.
+
+The PaymentEvents table is created by scripts/create-payment-events-table.py.
+Until it exists, events are applied straight to the ledger.
 """
 
 import os
 import json
 import hmac
+import time
 import hashlib
 import logging
-import boto3
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from decimal import Decimal
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from utils.aws_clients import lazy_client, lazy_resource
+from utils.payment_ledger import get_payment_ledger, sanitize_reference_id, STATUS_RANK
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+dynamodb = lazy_resource('dynamodb')
+lambda_client = lazy_client('lambda')
 
 # Environment variables
 WEBHOOK_SECRET = os.environ.get('RAZORPAY_WEBHOOK_SECRET', 'b@c4mk9t9Z8qLq3')
 PAYMENTS_TABLE = os.environ.get('PAYMENTS_TABLE', 'base-wecare-digital-PaymentsTable')
 MESSAGES_TABLE = os.environ.get('MESSAGES_TABLE', 'base-wecare-digital-WhatsAppInboundTable')
+PAYMENT_EVENTS_TABLE = os.environ.get('PAYMENT_EVENTS_TABLE', 'base-wecare-digital-PaymentEventsTable')
+PENDING_EVENTS_INDEX = os.environ.get('PENDING_EVENTS_INDEX', 'pendingPaymentKey-receivedAt-index')
+
+# Razorpay retries for up to 24 hours; keep ids longer than that
+EVENT_TTL_SECONDS = 7 * 24 * 60 * 60
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -42,6 +67,10 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     request_id = context.aws_request_id if context else 'local'
     
+    # Async processing of stored events (invoked by the ack path below)
+    if event.get('paymentEvents'):
+        return _process_payment_events(event['paymentEvents'], request_id)
+    
     logger.info(json.dumps({
         'event': 'razorpay_webhook_received',
         'requestId': request_id
@@ -68,37 +97,35 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         event_type = payload.get('event', '')
         event_data = payload.get('payload', {})
         
+        # Same id on every retry of one event; fall back to the body hash
+        event_id = (
+            headers.get('x-razorpay-event-id') or
+            headers.get('X-Razorpay-Event-Id') or
+            hashlib.sha256((body if isinstance(body, str) else json.dumps(body)).encode('utf-8')).hexdigest()
+        )
+        payment_key = _payment_key(event_type, event_data)
+        
         logger.info(json.dumps({
             'event': 'razorpay_event_received',
             'eventType': event_type,
+            'eventId': event_id,
+            'paymentKey': payment_key,
             'requestId': request_id
         }))
         
-        # Route to appropriate handler
-        if event_type == 'payment.captured':
-            _handle_payment_captured(event_data, request_id)
-        elif event_type == 'payment.failed':
-            _handle_payment_failed(event_data, request_id)
-        elif event_type == 'payment.authorized':
-            _handle_payment_authorized(event_data, request_id)
-        elif event_type == 'refund.created':
-            _handle_refund_created(event_data, request_id)
-        elif event_type == 'refund.processed':
-            _handle_refund_processed(event_data, request_id)
-        elif event_type == 'order.paid':
-            _handle_order_paid(event_data, request_id)
-        elif event_type == 'payment_link.paid':
-            _handle_payment_link_paid(event_data, request_id)
-        elif event_type.startswith('payment.dispute'):
-            _handle_dispute(event_type, event_data, request_id)
-        elif event_type.startswith('settlement'):
-            _handle_settlement(event_type, event_data, request_id)
-        else:
-            logger.info(json.dumps({
-                'event': 'razorpay_event_unhandled',
-                'eventType': event_type,
-                'requestId': request_id
-            }))
+        try:
+            recorded, still_pending = _record_event(event_id, event_type, payment_key, payload, request_id)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ResourceNotFoundException':
+                raise
+            return _apply_event_directly(event_id, event_type, event_data, request_id)
+        if not recorded:
+            if still_pending:
+                # An earlier attempt stored the event but did not apply it
+                _schedule_processing(payment_key, [event_id], context, request_id)
+            return _response(200, {'status': 'duplicate', 'event': event_type})
+        
+        _schedule_processing(payment_key, [event_id], context, request_id)
         
         return _response(200, {'status': 'ok', 'event': event_type})
         
@@ -118,6 +145,257 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return _response(500, {'error': 'Internal server error'})
 
 
+def _payment_key(event_type: str, data: Dict) -> str:
+    """Key grouping the events of one payment (order id, else payment id)."""
+    entity_name = event_type.split('.')[0]
+    entity = data.get(entity_name, {}).get('entity', {})
+    if entity_name == 'payment':
+        return entity.get('order_id') or entity.get('id') or 'unknown'
+    if entity_name in ('refund', 'dispute'):
+        payment = data.get('payment', {}).get('entity', {})
+        return payment.get('order_id') or entity.get('payment_id') or entity.get('id') or 'unknown'
+    return entity.get('id') or 'unknown'
+
+
+def _record_event(event_id: str, event_type: str, payment_key: str, payload: Dict,
+                  request_id: str) -> Tuple[bool, bool]:
+    """
+    Persist a webhook event once.
+    
+    Returns:
+        (recorded, still pending): recorded is False if the event id was
+        already recorded (a Razorpay retry); still pending tells whether
+        that earlier copy has not been applied yet
+    """
+    now = int(time.time())
+    try:
+        dynamodb.Table(PAYMENT_EVENTS_TABLE).put_item(
+            Item={
+                'eventId': event_id,
+                'eventType': event_type,
+                'paymentKey': payment_key,
+                # Sparse index attribute; removed once processed
+                'pendingPaymentKey': payment_key,
+                'status': 'pending',
+                'eventCreatedAt': Decimal(str(int(payload.get('created_at') or now))),
+                'receivedAt': Decimal(str(time.time())),
+                'payload': json.dumps(payload),
+                'expiresAt': Decimal(str(now + EVENT_TTL_SECONDS)),
+            },
+            ConditionExpression='attribute_not_exists(eventId)',
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+        return True, True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        existing = e.response.get('Item') or {}
+        still_pending = existing.get('status', {}).get('S', 'pending') == 'pending'
+        logger.info(json.dumps({
+            'event': 'razorpay_event_duplicate',
+            'eventId': event_id,
+            'eventType': event_type,
+            'stillPending': still_pending,
+            'requestId': request_id
+        }))
+        return False, still_pending
+
+
+def _apply_event_directly(event_id: str, event_type: str, event_data: Dict, request_id: str) -> Dict[str, Any]:
+    """Apply one event to the ledger without the event store (PaymentEvents table missing)."""
+    logger.warning(json.dumps({
+        'event': 'payment_events_table_missing',
+        'table': PAYMENT_EVENTS_TABLE,
+        'eventId': event_id,
+        'requestId': request_id
+    }))
+    update = _dispatch_event(event_type, event_data, request_id)
+    if update and not _store_payment_record(request_id=request_id, **update):
+        # Razorpay retries the event
+        return _response(500, {'error': 'Payment record not stored'})
+    return _response(200, {'status': 'ok', 'event': event_type})
+
+
+def _schedule_processing(payment_key: str, event_ids: List[str], context: Any, request_id: str) -> None:
+    """Hand the events to an async invocation, or process inline if that fails."""
+    job = {'paymentKey': payment_key, 'eventIds': event_ids}
+    if context:
+        try:
+            lambda_client.invoke(
+                FunctionName=context.function_name,
+                InvocationType='Event',
+                Payload=json.dumps({'paymentEvents': job}).encode('utf-8')
+            )
+            return
+        except Exception as e:
+            logger.warning(json.dumps({
+                'event': 'payment_events_async_invoke_failed',
+                'paymentKey': payment_key,
+                'error': str(e),
+                'requestId': request_id
+            }))
+    _process_payment_events(job, request_id)
+
+
+def _process_payment_events(job: Dict[str, Any], request_id: str) -> Dict[str, Any]:
+    """
+    Apply every pending event of one payment.
+    
+    Events that arrived close together are collapsed into a single ledger
+    update. A processor that finds its events already handled by another
+    invocation does nothing.
+    
+    Only events that were handled and, if they update the payment, whose
+    ledger write succeeded are marked processed.
+    
+    Raises:
+        RuntimeError: If any event is left pending (so the invocation is retried)
+    """
+    payment_key = job.get('paymentKey', '')
+    events = _load_pending_events(payment_key, job.get('eventIds', []))
+    if not events:
+        return {'processed': 0}
+    
+    events.sort(key=lambda e: (int(e.get('eventCreatedAt', 0)), float(e.get('receivedAt', 0))))
+    
+    ledger_update: Optional[Dict[str, Any]] = None
+    handled: List[str] = []
+    ledger_events: List[str] = []
+    failed: List[str] = []
+    for item in events:
+        try:
+            payload = json.loads(item['payload'])
+            update = _dispatch_event(payload.get('event', ''), payload.get('payload', {}), request_id)
+        except Exception as e:
+            logger.error(json.dumps({
+                'event': 'razorpay_event_processing_error',
+                'eventId': item['eventId'],
+                'error': str(e),
+                'requestId': request_id
+            }))
+            failed.append(item['eventId'])
+            continue
+        if update:
+            ledger_update = _merge_payment_update(ledger_update, update)
+            ledger_events.append(item['eventId'])
+        else:
+            handled.append(item['eventId'])
+    
+    if ledger_update:
+        if _store_payment_record(request_id=request_id, **ledger_update):
+            handled.extend(ledger_events)
+        else:
+            failed.extend(ledger_events)
+    
+    for event_id in handled:
+        _mark_event_processed(event_id)
+    
+    logger.info(json.dumps({
+        'event': 'payment_events_processed',
+        'paymentKey': payment_key,
+        'eventCount': len(events),
+        'processedCount': len(handled),
+        'pendingEventIds': failed,
+        'status': ledger_update.get('status') if ledger_update else None,
+        'requestId': request_id
+    }))
+    
+    if failed:
+        raise RuntimeError(f"{len(failed)} payment event(s) left pending for {payment_key}")
+    return {'processed': len(handled)}
+
+
+def _load_pending_events(payment_key: str, event_ids: List[str]) -> List[Dict[str, Any]]:
+    """Events named by the job (read consistently) plus any other pending ones for the payment."""
+    table = dynamodb.Table(PAYMENT_EVENTS_TABLE)
+    events = {}
+    for event_id in event_ids:
+        item = table.get_item(Key={'eventId': event_id}, ConsistentRead=True).get('Item')
+        if item:
+            events[event_id] = item
+    
+    if payment_key:
+        query_kwargs = {
+            'IndexName': PENDING_EVENTS_INDEX,
+            'KeyConditionExpression': Key('pendingPaymentKey').eq(payment_key),
+        }
+        while True:
+            response = table.query(**query_kwargs)
+            for item in response.get('Items', []):
+                events.setdefault(item['eventId'], item)
+            if not response.get('LastEvaluatedKey'):
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    return [item for item in events.values() if item.get('status') == 'pending']
+
+
+def _mark_event_processed(event_id: str) -> None:
+    try:
+        dynamodb.Table(PAYMENT_EVENTS_TABLE).update_item(
+            Key={'eventId': event_id},
+            UpdateExpression='SET #status = :processed, processedAt = :now REMOVE pendingPaymentKey',
+            ConditionExpression='#status = :pending',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':processed': 'processed',
+                ':pending': 'pending',
+                ':now': Decimal(str(int(time.time())))
+            }
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            logger.error(f"Mark payment event processed error: {str(e)}")
+
+
+def _merge_payment_update(current: Optional[Dict[str, Any]], update: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold a later event into the pending update: newer values win, status only moves forward."""
+    if not current:
+        return dict(update)
+    merged = dict(current)
+    for name, value in update.items():
+        if name == 'status' or value in (None, '', 0, {}):
+            continue
+        merged[name] = value
+    if STATUS_RANK.get(update['status'], 0) >= STATUS_RANK.get(current['status'], 0):
+        merged['status'] = update['status']
+    return merged
+
+
+def _dispatch_event(event_type: str, event_data: Dict, request_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Route an event to its handler.
+    
+    Returns:
+        Payment record fields for events that update the ledger, else None
+    """
+    if event_type == 'payment.captured':
+        return _handle_payment_captured(event_data, request_id)
+    elif event_type == 'payment.failed':
+        return _handle_payment_failed(event_data, request_id)
+    elif event_type == 'payment.authorized':
+        _handle_payment_authorized(event_data, request_id)
+    elif event_type == 'refund.created':
+        _handle_refund_created(event_data, request_id)
+    elif event_type == 'refund.processed':
+        _handle_refund_processed(event_data, request_id)
+    elif event_type == 'order.paid':
+        _handle_order_paid(event_data, request_id)
+    elif event_type == 'payment_link.paid':
+        _handle_payment_link_paid(event_data, request_id)
+    elif event_type.startswith('payment.dispute'):
+        _handle_dispute(event_type, event_data, request_id)
+    elif event_type.startswith('settlement'):
+        _handle_settlement(event_type, event_data, request_id)
+    else:
+        logger.info(json.dumps({
+            'event': 'razorpay_event_unhandled',
+            'eventType': event_type,
+            'requestId': request_id
+        }))
+    return None
+
+
 def _verify_signature(body: str, signature: str) -> bool:
     """Verify Razorpay webhook signature using HMAC SHA256."""
     if not signature or not WEBHOOK_SECRET:
@@ -136,7 +414,7 @@ def _verify_signature(body: str, signature: str) -> bool:
         return False
 
 
-def _handle_payment_captured(data: Dict, request_id: str) -> None:
+def _handle_payment_captured(data: Dict, request_id: str) -> Dict[str, Any]:
     """Handle payment.captured event - Payment successful."""
     payment = data.get('payment', {}).get('entity', {})
     
@@ -147,10 +425,10 @@ def _handle_payment_captured(data: Dict, request_id: str) -> None:
     method = payment.get('method', '')  # upi, card, netbanking, wallet
     email = payment.get('email', '')
     contact = payment.get('contact', '')
-    notes = payment.get('notes', {})
+    notes = payment.get('notes') or {}
     
-    # Extract reference_id from notes if available
-    reference_id = notes.get('reference_id', order_id)
+    # reference_id (WDSR...) is in the notes for WhatsApp payments
+    reference_id = notes.get('reference_id', '') if isinstance(notes, dict) else ''
     
     logger.info(json.dumps({
         'event': 'payment_captured',
@@ -164,23 +442,21 @@ def _handle_payment_captured(data: Dict, request_id: str) -> None:
         'requestId': request_id
     }))
     
-    # Store payment record
-    _store_payment_record(
-        payment_id=payment_id,
-        order_id=order_id,
-        reference_id=reference_id,
-        status='captured',
-        amount=amount,
-        currency=currency,
-        method=method,
-        contact=contact,
-        email=email,
-        notes=notes,
-        request_id=request_id
-    )
-
-
-def _handle_payment_failed(data: Dict, request_id: str) -> None:
+    return {
+        'payment_id': payment_id,
+        'order_id': order_id,
+        'reference_id': reference_id,
+        'status': 'captured',
+        'amount': amount,
+        'currency': currency,
+        'method': method,
+        'contact': contact,
+        'email': email,
+        'notes': notes,
+    }
+
+
+def _handle_payment_failed(data: Dict, request_id: str) -> Dict[str, Any]:
     """Handle payment.failed event."""
     payment = data.get('payment', {}).get('entity', {})
     
@@ -190,6 +466,8 @@ def _handle_payment_failed(data: Dict, request_id: str) -> None:
     error_code = payment.get('error_code', '')
     error_description = payment.get('error_description', '')
     error_reason = payment.get('error_reason', '')
+    notes = payment.get('notes') or {}
+    reference_id = notes.get('reference_id', '') if isinstance(notes, dict) else ''
     
     logger.info(json.dumps({
         'event': 'payment_failed',
@@ -202,19 +480,18 @@ def _handle_payment_failed(data: Dict, request_id: str) -> None:
         'requestId': request_id
     }))
     
-    _store_payment_record(
-        payment_id=payment_id,
-        order_id=order_id,
-        reference_id=order_id,
-        status='failed',
-        amount=amount,
-        currency='INR',
-        method='',
-        contact='',
-        email='',
-        notes={'error_code': error_code, 'error_description': error_description},
-        request_id=request_id
-    )
+    return {
+        'payment_id': payment_id,
+        'order_id': order_id,
+        'reference_id': reference_id,
+        'status': 'failed',
+        'amount': amount,
+        'currency': 'INR',
+        'method': '',
+        'contact': '',
+        'email': '',
+        'notes': {'error_code': error_code, 'error_description': error_description},
+    }
 
 
 def _handle_payment_authorized(data: Dict, request_id: str) -> None:
@@ -312,50 +589,60 @@ def _handle_settlement(event_type: str, data: Dict, request_id: str) -> None:
     }))
 
 
+def _resolve_reference_id(reference_id: str, payment_id: str, order_id: str) -> str:
+    """
+    Ledger key for a Razorpay payment.
+    
+    WhatsApp payments carry their WDSR reference in the notes. Otherwise
+    an earlier event for the same order or payment decides; a payment seen
+    for the first time is keyed by its Razorpay order (or payment) id.
+    """
+    if reference_id:
+        return sanitize_reference_id(reference_id)
+    
+    ledger = get_payment_ledger()
+    existing = ledger.find_by_order_id(order_id) or ledger.find_by_payment_id(payment_id)
+    if existing:
+        return existing['id']
+    return order_id or payment_id
+
+
 def _store_payment_record(payment_id: str, order_id: str, reference_id: str,
                           status: str, amount: int, currency: str, method: str,
-                          contact: str, email: str, notes: Dict, request_id: str) -> None:
-    """Store payment record in DynamoDB."""
-    import time
-    import uuid
+                          contact: str, email: str, notes: Dict, request_id: str) -> bool:
+    """
+    Upsert the payment into the payment ledger.
     
+    Returns:
+        True if the ledger write succeeded
+    """
     try:
-        record = {
-            'id': str(uuid.uuid4()),
+        ledger_id = _resolve_reference_id(reference_id, payment_id, order_id)
+        
+        stored = get_payment_ledger().upsert(
+            ledger_id,
+            status=status,
+            paymentId=payment_id,
+            orderId=order_id,
+            amount=Decimal(str(amount)) if amount else None,
+            amountInRupees=Decimal(str(amount / 100)) if amount else None,
+            currency=currency,
+            method=method,
+            contact=contact,
+            email=email,
+            notes=json.dumps(notes) if notes else None,
+            source='razorpay_webhook'
+        )
+        
+        logger.info(json.dumps({
+            'event': 'payment_record_stored' if stored else 'payment_record_store_skipped',
             'paymentId': payment_id,
-            'orderId': order_id,
-            'referenceId': reference_id,
+            'referenceId': ledger_id,
             'status': status,
-            'amount': Decimal(str(amount)),
-            'amountInRupees': Decimal(str(amount / 100)),
-            'currency': currency,
-            'method': method,
-            'contact': contact,
-            'email': email,
-            'notes': json.dumps(notes) if notes else None,
-            'source': 'razorpay_webhook',
-            'createdAt': Decimal(str(int(time.time()))),
-        }
-        
-        # Try to store in payments table (may not exist)
-        try:
-            payments_table = dynamodb.Table(PAYMENTS_TABLE)
-            payments_table.put_item(Item={k: v for k, v in record.items() if v is not None})
-            
-            logger.info(json.dumps({
-                'event': 'payment_record_stored',
-                'paymentId': payment_id,
-                'status': status,
-                'requestId': request_id
-            }))
-        except Exception as e:
-            # Table may not exist, log and continue
-            logger.warning(json.dumps({
-                'event': 'payment_record_store_skipped',
-                'paymentId': payment_id,
-                'error': str(e),
-                'requestId': request_id
-            }))
+            'ledgerStatus': stored.get('status') if stored else None,
+            'requestId': request_id
+        }))
+        return stored is not None
             
     except Exception as e:
         logger.error(json.dumps({
@@ -364,6 +651,7 @@ def _store_payment_record(payment_id: str, order_id: str, reference_id: str,
             'error': str(e),
             'requestId': request_id
         }))
+        return False
 
 
 def _response(status_code: int, body: Dict) -> Dict[str, Any]:
@@ -10,6 +10,8 @@ export const razorpayWebhook = defineFunction({
     RAZORPAY_WEBHOOK_SECRET: 'b@c4mk9t9Z8qLq3',
     PAYMENTS_TABLE: 'base-wecare-digital-PaymentsTable',
     MESSAGES_TABLE: 'base-wecare-digital-WhatsAppInboundTable',
+    PAYMENT_EVENTS_TABLE: 'base-wecare-digital-PaymentEventsTable',
+    PENDING_EVENTS_INDEX: 'pendingPaymentKey-receivedAt-index',
     LOG_LEVEL: 'INFO',
   },
 });
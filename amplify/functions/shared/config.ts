@@ -24,6 +24,7 @@ export const TABLES = {
   RATE_LIMIT: process.env.RATE_LIMIT_TABLE || 'base-wecare-digital-RateLimitTable',
   SYSTEM_CONFIG: process.env.SYSTEM_CONFIG_TABLE || 'base-wecare-digital-SystemConfigTable',
   VOICE_CALLS: process.env.VOICE_CALLS_TABLE || 'base-wecare-digital-VoiceCalls',
+  AI_RESPONSE_CACHE: process.env.AI_CACHE_TABLE || 'base-wecare-digital-AIResponseCacheTable',
 };
 
 // S3 Buckets
@@ -87,6 +88,7 @@ export const TTL_CONFIG = {
   AUDIT_LOGS: 180 * 24 * 60 * 60,   // 180 days
   RATE_LIMIT: 24 * 60 * 60,         // 24 hours
   VOICE_CALLS: 90 * 24 * 60 * 60,   // 90 days
+  AI_RESPONSE_CACHE: 6 * 60 * 60,   // 6 hours
 };
 
 // Rate Limits
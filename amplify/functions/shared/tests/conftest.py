@@ -0,0 +1,38 @@
+"""
+Test setup for the shared utils.
+
+Makes `utils` importable the way the Lambda zip lays it out and gives
+tests a frozen clock.
+"""
+
+import os
+import sys
+
+import pytest
+
+SHARED_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SHARED_DIR not in sys.path:
+    sys.path.insert(0, SHARED_DIR)
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+
+class FrozenClock:
+    """time.time() replacement that only moves when told to."""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze time.time() at the start of a second."""
+    frozen = FrozenClock(1767225600.0)  # 2026-01-01T00:00:00Z
+    monkeypatch.setattr('time.time', frozen)
+    return frozen
@@ -0,0 +1,326 @@
+"""
+In-memory stand-ins for the AWS clients used by the shared utils.
+
+FakeDynamoDB implements the low-level client calls the utils make
+(update_item, put_item, get_item, query, scan, delete_item) including
+condition and update expressions, for the expression forms used in this
+repo: attribute_exists / attribute_not_exists, comparisons, AND / OR /
+NOT, SET with if_not_exists and +/-, ADD and REMOVE. Failed conditions
+raise a botocore ClientError, as the real client does.
+
+FakeDynamoDBResource puts the boto3 resource API (Table(name).put_item
+with plain values) in front of a FakeDynamoDB, for handler code.
+"""
+
+import re
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class ConditionalCheckFailedException(ClientError):
+    """Raised when a ConditionExpression does not hold."""
+
+    def __init__(self, operation_name: str = 'UpdateItem', item: Optional[Dict[str, Any]] = None):
+        response = {'Error': {'Code': 'ConditionalCheckFailedException',
+                              'Message': 'The conditional request failed'}}
+        if item:
+            response['Item'] = item
+        super().__init__(response, operation_name)
+
+
+_TOKEN = re.compile(r'\s*(<>|<=|>=|[()<>=,+\-]|[#:]?[A-Za-z_][A-Za-z0-9_.#]*)')
+
+
+def _tokenize(expression: str) -> List[str]:
+    tokens, position = [], 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match:
+            raise ValueError(f"Cannot parse expression at: {expression[position:]!r}")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+def _plain(value: Dict[str, Any]) -> Any:
+    """Low-level attribute value -> comparable Python value."""
+    if 'N' in value:
+        return Decimal(value['N'])
+    if 'S' in value:
+        return value['S']
+    if 'BOOL' in value:
+        return value['BOOL']
+    if 'NULL' in value:
+        return None
+    return value
+
+
+class _Expression:
+    """Recursive-descent evaluator over one item."""
+
+    def __init__(self, expression: str, names: Dict[str, str], values: Dict[str, Any]):
+        self.tokens = _tokenize(expression)
+        self.position = 0
+        self.names = names or {}
+        self.values = values or {}
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self, expected: Optional[str] = None) -> str:
+        token = self.peek()
+        if expected is not None and (token or '').upper() != expected:
+            raise ValueError(f"Expected {expected}, got {token}")
+        self.position += 1
+        return token
+
+    def attribute(self, token: str) -> str:
+        return self.names.get(token, token)
+
+    # Conditions
+
+    def condition(self, item: Dict[str, Any]) -> bool:
+        result = self._or(item)
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected token {self.peek()}")
+        return result
+
+    def _or(self, item) -> bool:
+        result = self._and(item)
+        while (self.peek() or '').upper() == 'OR':
+            self.take()
+            right = self._and(item)
+            result = result or right
+        return result
+
+    def _and(self, item) -> bool:
+        result = self._not(item)
+        while (self.peek() or '').upper() == 'AND':
+            self.take()
+            right = self._not(item)
+            result = result and right
+        return result
+
+    def _not(self, item) -> bool:
+        if (self.peek() or '').upper() == 'NOT':
+            self.take()
+            return not self._not(item)
+        return self._primary(item)
+
+    def _primary(self, item) -> bool:
+        token = self.peek()
+        if token == '(':
+            self.take()
+            result = self._or(item)
+            self.take(')')
+            return result
+        if token in ('attribute_exists', 'attribute_not_exists'):
+            self.take()
+            self.take('(')
+            name = self.attribute(self.take())
+            self.take(')')
+            return (name in item) == (token == 'attribute_exists')
+        left = self._operand(item)
+        operator = self.take()
+        if operator.upper() == 'BETWEEN':
+            low = self._operand(item)
+            self.take('AND')
+            high = self._operand(item)
+            return left is not None and low <= left <= high
+        right = self._operand(item)
+        if operator == '=':
+            return left == right
+        if operator == '<>':
+            return left != right
+        if left is None or right is None:
+            return False
+        return {'<': left < right, '<=': left <= right, '>': left > right, '>=': left >= right}[operator]
+
+    def _operand(self, item) -> Any:
+        token = self.take()
+        if token.startswith(':'):
+            return _plain(self.values[token])
+        value = item.get(self.attribute(token))
+        return _plain(value) if value is not None else None
+
+    # Updates
+
+    def apply_update(self, item: Dict[str, Any]) -> None:
+        action = None
+        while self.peek() is not None:
+            if self.peek().upper() in ('SET', 'ADD', 'REMOVE'):
+                action = self.take().upper()
+                continue
+            if self.peek() == ',':
+                self.take()
+                continue
+            name = self.attribute(self.take())
+            if action == 'SET':
+                self.take('=')
+                value = self._value(item)
+                while self.peek() in ('+', '-'):
+                    sign = self.take()
+                    other = self._value(item)
+                    value = {'N': str(Decimal(value['N']) + (Decimal(other['N']) if sign == '+' else -Decimal(other['N'])))}
+                item[name] = value
+            elif action == 'ADD':
+                value = self.values[self.take()]
+                current = Decimal(item[name]['N']) if name in item else Decimal(0)
+                item[name] = {'N': str(current + Decimal(value['N']))}
+            elif action == 'REMOVE':
+                item.pop(name, None)
+            else:
+                raise ValueError(f"Unsupported update near {name}")
+
+    def _value(self, item) -> Dict[str, Any]:
+        token = self.take()
+        if token == 'if_not_exists':
+            self.take('(')
+            name = self.attribute(self.take())
+            self.take(',')
+            default = self._value(item)
+            self.take(')')
+            return item.get(name, default)
+        if token.startswith(':'):
+            return self.values[token]
+        return item[self.attribute(token)]
+
+
+class FakeDynamoDB:
+    """Low-level DynamoDB client over in-memory tables."""
+
+    def __init__(self, key_schema: Optional[Dict[str, List[str]]] = None):
+        """
+        Args:
+            key_schema: table name -> key attribute names (hash first); tables
+                not listed are keyed by the Key / Item attributes given
+        """
+        self.key_schema = key_schema or {}
+        self.tables: Dict[str, Dict[tuple, Dict[str, Any]]] = {}
+        self.calls: List[tuple] = []
+        self.exceptions = SimpleNamespace(ConditionalCheckFailedException=ConditionalCheckFailedException)
+
+    def _table(self, name: str) -> Dict[tuple, Dict[str, Any]]:
+        return self.tables.setdefault(name, {})
+
+    def _key(self, table: str, key: Dict[str, Any]) -> tuple:
+        names = self.key_schema.get(table) or sorted(key)
+        return tuple(_plain(key[n]) for n in names)
+
+    def _check(self, item, kwargs, operation_name: str) -> None:
+        if kwargs.get('ConditionExpression'):
+            expression = _Expression(kwargs['ConditionExpression'],
+                                     kwargs.get('ExpressionAttributeNames'),
+                                     kwargs.get('ExpressionAttributeValues'))
+            if not expression.condition(item):
+                old = item if kwargs.get('ReturnValuesOnConditionCheckFailure') == 'ALL_OLD' else None
+                raise ConditionalCheckFailedException(operation_name, old)
+
+    def update_item(self, **kwargs) -> Dict[str, Any]:
+        self.calls.append(('update_item', kwargs))
+        table = self._table(kwargs['TableName'])
+        key = self._key(kwargs['TableName'], kwargs['Key'])
+        current = dict(table.get(key) or {})
+        self._check(current, kwargs, 'UpdateItem')
+        item = current or dict(kwargs['Key'])
+        _Expression(kwargs['UpdateExpression'],
+                    kwargs.get('ExpressionAttributeNames'),
+                    kwargs.get('ExpressionAttributeValues')).apply_update(item)
+        table[key] = item
+        return {'Attributes': dict(item)} if kwargs.get('ReturnValues') else {}
+
+    def put_item(self, **kwargs) -> Dict[str, Any]:
+        self.calls.append(('put_item', kwargs))
+        table = self._table(kwargs['TableName'])
+        item = kwargs['Item']
+        names = self.key_schema.get(kwargs['TableName'])
+        key = tuple(_plain(item[n]) for n in names) if names else tuple(sorted(item.items(), key=str))
+        self._check(dict(table.get(key) or {}), kwargs, 'PutItem')
+        table[key] = dict(item)
+        return {}
+
+    def get_item(self, **kwargs) -> Dict[str, Any]:
+        self.calls.append(('get_item', kwargs))
+        item = self._table(kwargs['TableName']).get(self._key(kwargs['TableName'], kwargs['Key']))
+        return {'Item': dict(item)} if item else {}
+
+    def delete_item(self, **kwargs) -> Dict[str, Any]:
+        self.calls.append(('delete_item', kwargs))
+        table = self._table(kwargs['TableName'])
+        key = self._key(kwargs['TableName'], kwargs['Key'])
+        self._check(dict(table.get(key) or {}), kwargs, 'DeleteItem')
+        table.pop(key, None)
+        return {}
+
+    def query(self, **kwargs) -> Dict[str, Any]:
+        self.calls.append(('query', kwargs))
+        expression = kwargs['KeyConditionExpression']
+        items = [
+            dict(item) for item in self._table(kwargs['TableName']).values()
+            if _Expression(expression, kwargs.get('ExpressionAttributeNames'),
+                           kwargs.get('ExpressionAttributeValues')).condition(item)
+        ]
+        return {'Items': items, 'Count': len(items)}
+
+    def scan(self, **kwargs) -> Dict[str, Any]:
+        self.calls.append(('scan', kwargs))
+        items = [dict(item) for item in self._table(kwargs['TableName']).values()]
+        return {'Items': items, 'Count': len(items)}
+
+    def items(self, table: str) -> List[Dict[str, Any]]:
+        return list(self._table(table).values())
+
+
+def _to_low_level(values: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    return {k: _serializer.serialize(v) for k, v in values.items()} if values is not None else None
+
+
+def _from_low_level(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: _deserializer.deserialize(v) for k, v in item.items()}
+
+
+class _FakeTable:
+    """boto3 Table over one FakeDynamoDB table (string expressions only)."""
+
+    def __init__(self, client: FakeDynamoDB, name: str):
+        self.client = client
+        self.name = name
+
+    def _request(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        request = dict(kwargs, TableName=self.name)
+        for field in ('Key', 'Item', 'ExpressionAttributeValues'):
+            if field in request:
+                request[field] = _to_low_level(request[field])
+        return request
+
+    def put_item(self, **kwargs) -> Dict[str, Any]:
+        return self.client.put_item(**self._request(kwargs))
+
+    def get_item(self, **kwargs) -> Dict[str, Any]:
+        response = self.client.get_item(**self._request(kwargs))
+        return {'Item': _from_low_level(response['Item'])} if 'Item' in response else {}
+
+    def update_item(self, **kwargs) -> Dict[str, Any]:
+        response = self.client.update_item(**self._request(kwargs))
+        return {'Attributes': _from_low_level(response['Attributes'])} if 'Attributes' in response else {}
+
+    def delete_item(self, **kwargs) -> Dict[str, Any]:
+        return self.client.delete_item(**self._request(kwargs))
+
+
+class FakeDynamoDBResource:
+    """boto3 DynamoDB resource over a FakeDynamoDB."""
+
+    def __init__(self, client: FakeDynamoDB):
+        self.client = client
+
+    def Table(self, name: str) -> _FakeTable:
+        return _FakeTable(self.client, name)
@@ -0,0 +1,21 @@
+"""Import a Lambda handler module by its function directory."""
+
+import importlib.util
+import os
+
+FUNCTIONS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def load_handler(function_dir: str):
+    """
+    Load amplify/functions/<function_dir>/handler.py as a fresh module.
+
+    Every handler file is named handler.py, so each gets its own module
+    name instead of sharing sys.modules['handler'].
+    """
+    path = os.path.join(FUNCTIONS_DIR, function_dir, 'handler.py')
+    name = 'handler_' + function_dir.replace('/', '_').replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
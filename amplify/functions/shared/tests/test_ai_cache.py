@@ -0,0 +1,83 @@
+"""Two-tier Bedrock response cache (utils/ai_cache.py)."""
+
+from utils.ai_cache import AIResponseCache, normalize_query
+
+
+class FakeDynamoDB:
+    """get/put of cache items and the ADD on the version counter."""
+
+    def __init__(self):
+        self.items = {}
+        self.reads = 0
+
+    def get_item(self, TableName, Key, **kwargs):
+        self.reads += 1
+        item = self.items.get((TableName, next(iter(Key.values()))['S']))
+        return {'Item': item} if item else {}
+
+    def put_item(self, TableName, Item):
+        self.items[(TableName, Item['cacheKey']['S'])] = Item
+
+    def update_item(self, TableName, Key, ExpressionAttributeValues, **kwargs):
+        item = self.items.setdefault((TableName, Key['configKey']['S']), {'cacheVersion': {'N': '0'}})
+        item['cacheVersion'] = {'N': str(int(item['cacheVersion']['N']) + 1)}
+        return {'Attributes': {'cacheVersion': item['cacheVersion']}}
+
+
+def _cache(db):
+    return AIResponseCache(db, 'Cache', 'SystemConfig')
+
+
+def test_questions_fold_to_one_form():
+    assert normalize_query('  Price??  🙏 ') == normalize_query('price') == 'price'
+    assert normalize_query('क्या कीमत है?') == 'क्या कीमत है'
+
+
+def test_answer_is_shared_across_containers():
+    db = FakeDynamoDB()
+    _cache(db).put('agent', 'Price?', 'en', 'kb-1', 'Rs 499')
+
+    other = _cache(db)
+
+    assert other.get('agent', 'price', 'en', 'kb-1') == 'Rs 499'
+    assert other.get('agent', 'price', 'hi', 'kb-1') is None
+    assert other.get('retrieve', 'price', 'en', 'kb-1') is None
+
+
+def test_warm_container_answers_without_a_read(clock):
+    db = FakeDynamoDB()
+    cache = _cache(db)
+    cache.put('agent', 'hi', 'en', 'kb-1', 'Hello!')
+    reads = db.reads
+
+    assert cache.get('agent', 'Hi!', 'en', 'kb-1') == 'Hello!'
+    assert db.reads == reads
+
+
+def test_expired_entries_are_misses(clock):
+    db = FakeDynamoDB()
+    _cache(db).put('agent', 'hi', 'en', 'kb-1', 'Hello!')
+
+    clock.advance(6 * 60 * 60 + 1)
+
+    assert _cache(db).get('agent', 'hi', 'en', 'kb-1') is None
+
+
+def test_invalidate_orphans_earlier_entries():
+    db = FakeDynamoDB()
+    cache = _cache(db)
+    cache.put('agent', 'hi', 'en', 'kb-1', 'Hello!')
+
+    assert cache.invalidate('prompt updated') == 1
+    assert cache.get('agent', 'hi', 'en', 'kb-1') is None
+
+
+def test_long_questions_are_not_cached():
+    db = FakeDynamoDB()
+    cache = _cache(db)
+    question = 'please tell me ' * 30
+
+    cache.put('agent', question, 'en', 'kb-1', 'answer')
+
+    assert cache.get('agent', question, 'en', 'kb-1') is None
+    assert not any(table == 'Cache' for table, _ in db.items)
@@ -0,0 +1,97 @@
+"""Retrieve-once AI reply pipeline (utils/ai_pipeline.py)."""
+
+from botocore.exceptions import ClientError
+
+from utils.ai_pipeline import AIPipeline, detect_language, get_fallback_response
+from utils.error_handler import CircuitBreaker, RetryConfig, RetryPolicy
+
+
+class FakeBedrock:
+    """retrieve() on the agent runtime and converse() on the runtime."""
+
+    def __init__(self, reply='Visit bnbclub.in 😊', fail=None):
+        self.reply = reply
+        self.fail = fail
+        self.retrieves = []
+        self.prompts = []
+
+    def retrieve(self, knowledgeBaseId, retrievalQuery, **kwargs):
+        self.retrieves.append(retrievalQuery['text'])
+        return {'retrievalResults': [
+            {'content': {'text': 'BNB Club books hotels.'}, 'score': 0.9},
+            {'content': {'text': 'Unrelated.'}, 'score': 0.2},
+        ]}
+
+    def converse(self, system, **kwargs):
+        if self.fail:
+            raise self.fail
+        self.prompts.append(system[0]['text'])
+        return {'output': {'message': {'content': [{'text': self.reply}]}}}
+
+
+class DictCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, *key):
+        return self.entries.get(key)
+
+    def put(self, *key_and_value):
+        self.entries[key_and_value[:-1]] = key_and_value[-1]
+
+
+def _pipeline(bedrock, cache=None):
+    pipeline = AIPipeline(kb_id='kb-1', bedrock_agent_runtime=bedrock, bedrock_runtime=bedrock, use_cache=False)
+    pipeline.breaker = CircuitBreaker('bedrock')
+    pipeline.retry = RetryPolicy('bedrock', RetryConfig(max_retries=0))
+    pipeline.cache = cache
+    return pipeline
+
+
+def test_retrieves_once_and_passes_relevant_context_to_the_model():
+    bedrock = FakeBedrock()
+
+    result = _pipeline(bedrock).run('Need a hotel in Goa')
+
+    assert result.suggestion == 'Visit bnbclub.in 😊'
+    assert result.source == 'model'
+    assert result.results_count == 2
+    assert bedrock.retrieves == ['Need a hotel in Goa']
+    assert 'BNB Club books hotels.' in bedrock.prompts[0]
+    assert 'Unrelated.' not in bedrock.prompts[0]
+
+
+def test_given_context_skips_retrieval():
+    bedrock = FakeBedrock()
+
+    _pipeline(bedrock).run('Need a hotel', context_text='From ai-query-kb')
+
+    assert bedrock.retrieves == []
+    assert 'From ai-query-kb' in bedrock.prompts[0]
+
+
+def test_repeated_question_is_served_from_cache():
+    bedrock, cache = FakeBedrock(), DictCache()
+    _pipeline(bedrock, cache).run('Need a hotel')
+
+    result = _pipeline(bedrock, cache).run('Need a hotel')
+
+    assert result.source == 'cache'
+    assert len(bedrock.prompts) == 1 and len(bedrock.retrieves) == 1
+
+
+def test_model_failure_falls_back_in_the_detected_language():
+    error = ClientError({'Error': {'Code': 'AccessDeniedException', 'Message': 'denied'}}, 'Converse')
+
+    result = _pipeline(FakeBedrock(fail=error)).run('mujhe hotel chahiye, kya price hai')
+
+    assert result.source == 'fallback'
+    assert result.language_name == 'Hinglish'
+    assert result.suggestion == get_fallback_response('Hinglish')
+    assert result.error
+
+
+def test_detect_language():
+    assert detect_language('नमस्ते') == ('hi', 'Hindi')
+    assert detect_language('মূল্য কত') == ('bn', 'Bengali')
+    assert detect_language('What is the price?') == ('en', 'English')
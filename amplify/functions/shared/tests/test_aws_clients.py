@@ -0,0 +1,52 @@
+"""Tuned, lazily built boto3 clients (utils/aws_clients.py)."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from utils import aws_clients
+from utils.aws_clients import get_client, get_client_config, lazy_client
+
+
+@pytest.fixture
+def built(monkeypatch):
+    """Record boto3.client() calls instead of building real clients."""
+    calls = []
+
+    def client(service_name, region_name=None, config=None):
+        calls.append((service_name, region_name, config))
+        return SimpleNamespace(put_object=lambda **kwargs: service_name)
+
+    monkeypatch.setattr(aws_clients.boto3, 'client', client)
+    monkeypatch.setattr(aws_clients, '_clients', {})
+    return calls
+
+
+def test_config_uses_service_timeouts_and_pool():
+    config = get_client_config('dynamodb')
+
+    assert (config.connect_timeout, config.read_timeout) == aws_clients.SERVICE_TIMEOUTS['dynamodb']
+    assert config.max_pool_connections == aws_clients.MAX_POOL_CONNECTIONS
+    assert config.tcp_keepalive is True
+    assert config.retries == {'mode': 'adaptive', 'total_max_attempts': aws_clients.DEFAULT_MAX_ATTEMPTS}
+
+
+def test_long_invokes_get_fewer_sdk_attempts():
+    assert get_client_config('lambda').retries['total_max_attempts'] == 2
+
+
+def test_clients_are_shared_per_service_region_and_attempts(built):
+    first = get_client('s3')
+
+    assert get_client('s3') is first
+    assert get_client('s3', max_attempts=1) is not first
+    assert len(built) == 2
+    assert built[1][2].retries['total_max_attempts'] == 1
+
+
+def test_lazy_client_builds_on_first_use(built):
+    s3 = lazy_client('s3')
+    assert built == []
+
+    assert s3.put_object(Bucket='media', Key='k') == 's3'
+    assert [call[0] for call in built] == ['s3']
@@ -0,0 +1,61 @@
+"""Contact lookup of bulk email chunks (outbound-email)."""
+
+import pytest
+
+from handlers import load_handler
+
+
+class ThrottledDynamoDB:
+    """batch_get_item that leaves every key unprocessed `throttled` times."""
+
+    def __init__(self, table, contacts, throttled):
+        self.table = table
+        self.contacts = contacts
+        self.throttled = throttled
+        self.calls = 0
+
+    def batch_get_item(self, RequestItems):
+        self.calls += 1
+        keys = RequestItems[self.table]['Keys']
+        if self.throttled:
+            self.throttled -= 1
+            return {'Responses': {self.table: []}, 'UnprocessedKeys': RequestItems}
+        found = [self.contacts[k['contactId']] for k in keys if k['contactId'] in self.contacts]
+        return {'Responses': {self.table: found}}
+
+
+@pytest.fixture
+def outbound_email(monkeypatch):
+    module = load_handler('messaging/outbound-email')
+    sleeps = []
+    monkeypatch.setattr(module.time, 'sleep', sleeps.append)
+    module.sleeps = sleeps
+    return module
+
+
+def _contacts():
+    return {
+        'c1': {'contactId': 'c1', 'email': 'a@example.com', 'optInEmail': True},
+        'c2': {'contactId': 'c2', 'email': 'b@example.com', 'optInEmail': False},
+    }
+
+
+def test_unprocessed_keys_are_retried_with_backoff(outbound_email, monkeypatch):
+    db = ThrottledDynamoDB(outbound_email.CONTACTS_TABLE, _contacts(), throttled=3)
+    monkeypatch.setattr(outbound_email, 'dynamodb', db)
+
+    targets, failed = outbound_email._resolve_bulk_recipients(
+        [{'contactId': 'c1'}, {'contactId': 'c2'}, {'contactId': 'c3'}])
+
+    assert [t['contactId'] for t in targets] == ['c1']
+    assert [reason for _, reason in failed] == ['Contact has not opted in for email', 'Contact not found']
+    assert outbound_email.sleeps == [0.05, 0.1, 0.2]
+
+
+def test_lookup_gives_up_after_the_attempt_cap(outbound_email, monkeypatch):
+    db = ThrottledDynamoDB(outbound_email.CONTACTS_TABLE, _contacts(), throttled=100)
+    monkeypatch.setattr(outbound_email, 'dynamodb', db)
+
+    with pytest.raises(RuntimeError):
+        outbound_email._resolve_bulk_recipients([{'contactId': 'c1'}])
+    assert db.calls == outbound_email.BATCH_GET_MAX_ATTEMPTS
@@ -0,0 +1,48 @@
+"""Expiry of the bulk email SES templates (stats-reconciler)."""
+
+from datetime import datetime, timedelta, timezone
+
+from handlers import load_handler
+
+
+class FakeSES:
+    def __init__(self, templates):
+        self.templates = dict(templates)
+
+    def list_templates(self, MaxItems, NextToken=None):
+        names = sorted(self.templates)
+        start = int(NextToken or 0)
+        page = names[start:start + MaxItems]
+        response = {'TemplatesMetadata': [{'Name': n, 'CreatedTimestamp': self.templates[n]} for n in page]}
+        if start + MaxItems < len(names):
+            response['NextToken'] = str(start + MaxItems)
+        return response
+
+    def delete_template(self, TemplateName):
+        del self.templates[TemplateName]
+
+
+def test_only_old_bulk_templates_are_deleted(monkeypatch):
+    reconciler = load_handler('operations/stats-reconciler')
+    now = datetime.now(timezone.utc)
+    old = {f'wecare-bulk-{i:03d}': now - timedelta(days=10) for i in range(150)}
+    ses = FakeSES(dict(old, **{
+        'wecare-bulk-recent': now - timedelta(hours=2),
+        'order-confirmation': now - timedelta(days=400),
+    }))
+    monkeypatch.setattr(reconciler, 'ses', ses)
+
+    assert reconciler._expire_bulk_templates() == 150
+    assert set(ses.templates) == {'wecare-bulk-recent', 'order-confirmation'}
+
+
+def test_ses_errors_do_not_fail_the_reconcile(monkeypatch):
+    reconciler = load_handler('operations/stats-reconciler')
+
+    class DeniedSES:
+        def list_templates(self, **kwargs):
+            raise RuntimeError('AccessDenied')
+
+    monkeypatch.setattr(reconciler, 'ses', DeniedSES())
+
+    assert reconciler._expire_bulk_templates() == 0
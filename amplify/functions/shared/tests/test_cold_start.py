@@ -0,0 +1,27 @@
+"""Cold-start work of the WhatsApp handlers (import without AWS clients)."""
+
+import boto3
+import pytest
+
+from handlers import load_handler
+from utils import aws_clients
+
+
+@pytest.mark.parametrize('function_dir', [
+    'messaging/inbound-whatsapp-handler',
+    'messaging/outbound-whatsapp',
+])
+def test_import_builds_no_aws_clients(monkeypatch, function_dir):
+    def refuse(*args, **kwargs):
+        raise AssertionError(f'AWS client built at import: {args[:1]}')
+
+    monkeypatch.setattr(boto3, 'client', refuse)
+    monkeypatch.setattr(boto3, 'resource', refuse)
+    monkeypatch.setattr(boto3.session.Session, 'client', refuse)
+    monkeypatch.setattr(boto3.session.Session, 'resource', refuse)
+    monkeypatch.setattr(aws_clients, '_clients', {})
+    monkeypatch.setattr(aws_clients, '_resources', {})
+
+    module = load_handler(function_dir)
+
+    assert callable(module.handler)
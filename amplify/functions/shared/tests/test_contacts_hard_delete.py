@@ -0,0 +1,145 @@
+"""Batched, resumable contact hard delete (core/contacts-delete)."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from handlers import load_handler
+
+
+class FakeTable:
+    """Items keyed by one attribute; query() pages a contact's messages by Limit."""
+
+    def __init__(self, key='id', items=()):
+        self.key = key
+        self.items = {item[key]: dict(item) for item in items}
+
+    def get_item(self, Key):
+        item = self.items.get(Key[self.key])
+        return {'Item': dict(item)} if item else {}
+
+    def put_item(self, Item):
+        self.items[Item[self.key]] = dict(Item)
+
+    def delete_item(self, Key, ReturnValues=None):
+        old = self.items.pop(Key[self.key], None)
+        return {'Attributes': old} if ReturnValues == 'ALL_OLD' and old else {}
+
+    def query(self, Limit, ExclusiveStartKey=None, **kwargs):
+        rows = sorted(self.items.values(), key=lambda item: item['id'])
+        if ExclusiveStartKey:
+            rows = [r for r in rows if r['id'] > ExclusiveStartKey['id']]
+        response = {'Items': [{'id': r['id'], 's3Key': r.get('s3Key')} for r in rows[:Limit]]}
+        if len(rows) > Limit:
+            response['LastEvaluatedKey'] = {'id': rows[Limit - 1]['id']}
+        return response
+
+
+class FakeDynamoDB:
+    """Resource with Table() and meta.client.batch_write_item (first call leaves one row unprocessed)."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.batch_writes = 0
+        self.meta = SimpleNamespace(client=SimpleNamespace(batch_write_item=self.batch_write_item))
+
+    def Table(self, name):
+        return self.tables[name]
+
+    def batch_write_item(self, RequestItems):
+        self.batch_writes += 1
+        (name, requests), = RequestItems.items()
+        unprocessed = requests[:1] if self.batch_writes == 1 else []
+        for request in requests[len(unprocessed):]:
+            self.tables[name].delete_item(Key=request['DeleteRequest']['Key'])
+        return {'UnprocessedItems': {name: unprocessed} if unprocessed else {}}
+
+
+class FakeS3:
+    def __init__(self, errors=()):
+        self.deleted = []
+        self.errors = list(errors)
+
+    def delete_objects(self, Bucket, Delete):
+        if self.errors:
+            return {'Errors': self.errors}
+        self.deleted.extend(obj['Key'] for obj in Delete['Objects'])
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix, MaxKeys):
+        return {'Contents': [{'Key': Prefix + '_1234567890.jpg'}]}
+
+
+@pytest.fixture
+def contacts_delete(monkeypatch):
+    module = load_handler('core/contacts-delete')
+    inbound = FakeTable(items=[
+        {'id': 'in-1', 's3Key': 'whatsapp-media/inbound/a.jpg'},
+        {'id': 'in-2'},
+        {'id': 'in-3', 's3Key': 'whatsapp-media/outbound/wecare-digital-abcd1234.jpg'},
+    ])
+    outbound = FakeTable(items=[{'id': 'out-1', 's3Key': 'whatsapp-media/outbound/b.pdf'}])
+    db = FakeDynamoDB({
+        module.CONTACTS_TABLE: FakeTable(items=[{'id': 'c-1', 'name': 'Asha'}]),
+        module.INBOUND_TABLE: inbound,
+        module.OUTBOUND_TABLE: outbound,
+        module.SYSTEM_CONFIG_TABLE: FakeTable(key='configKey'),
+    })
+    invokes = []
+    module.s3_client = FakeS3()
+    module.dynamodb = db
+    module.lambda_client = SimpleNamespace(invoke=lambda **kwargs: invokes.append(json.loads(kwargs['Payload'])))
+    module.QUERY_PAGE_SIZE = 2
+    monkeypatch.setattr(module, 'get_stats_counters', lambda: SimpleNamespace(decrement=lambda *args: True))
+    monkeypatch.setattr(module.time, 'sleep', lambda seconds: None)
+    return SimpleNamespace(module=module, db=db, invokes=invokes)
+
+
+def _hard_delete(module):
+    return module.handler({'pathParameters': {'contactId': 'c-1'},
+                           'queryStringParameters': {'hard': 'true'}}, None)
+
+
+def test_hard_delete_removes_media_then_rows_in_batches(contacts_delete):
+    module, db = contacts_delete.module, contacts_delete.db
+
+    response = _hard_delete(module)
+
+    body = json.loads(response['body'])
+    assert response['statusCode'] == 200
+    assert (body['messagesDeleted'], body['mediaDeleted'], body['contactDeleted']) == (4, 3, True)
+    assert sorted(module.s3_client.deleted) == [
+        'whatsapp-media/inbound/a.jpg',
+        'whatsapp-media/outbound/b.pdf',
+        'whatsapp-media/outbound/wecare-digital-abcd1234.jpg',
+        'whatsapp-media/outbound/wecare-digital-abcd1234_1234567890.jpg',
+    ]
+    assert all(not db.tables[name].items for name in (module.INBOUND_TABLE, module.OUTBOUND_TABLE, module.CONTACTS_TABLE))
+
+
+def test_rows_stay_when_media_delete_fails(contacts_delete):
+    module, db = contacts_delete.module, contacts_delete.db
+    module.s3_client = FakeS3(errors=[{'Key': 'whatsapp-media/inbound/a.jpg', 'Code': 'AccessDenied'}])
+
+    response = _hard_delete(module)
+
+    assert response['statusCode'] == 500
+    assert len(db.tables[module.INBOUND_TABLE].items) == 3
+
+
+def test_long_delete_continues_in_the_background(contacts_delete):
+    module, db = contacts_delete.module, contacts_delete.db
+    module.SYNC_DELETE_BUDGET_SECONDS = 0
+
+    response = _hard_delete(module)
+
+    assert response['statusCode'] == 202
+    assert contacts_delete.invokes == [{'deleteJob': {'contactId': 'c-1', 'jobId': 'local'}}]
+    assert json.loads(_hard_delete(module)['body'])['status'] == 'running'
+
+    result = module.handler(contacts_delete.invokes[0], None)
+
+    assert result == {'status': 'completed', 'messagesDeleted': 4}
+    assert not db.tables[module.SYSTEM_CONFIG_TABLE].items
+    assert not db.tables[module.CONTACTS_TABLE].items
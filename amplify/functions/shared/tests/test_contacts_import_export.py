@@ -0,0 +1,151 @@
+"""Server-side contact import and export jobs (core/contacts-import-export)."""
+
+import gzip
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from handlers import load_handler
+
+
+class ContactsTable:
+    """Contacts keyed by id, with the phone index and a segmented scan."""
+
+    def __init__(self, items=()):
+        self.items = {item['id']: dict(item) for item in items}
+        self.updates = []
+
+    def query(self, IndexName, KeyConditionExpression, **kwargs):
+        phone = KeyConditionExpression.get_expression()['values'][1]
+        return {'Items': [{'id': i['id']} for i in self.items.values() if i.get('phone') == phone][:1]}
+
+    def update_item(self, Key, ExpressionAttributeValues, **kwargs):
+        self.updates.append((Key['id'], ExpressionAttributeValues))
+
+    def scan(self, Segment, TotalSegments, **kwargs):
+        items = sorted(self.items.values(), key=lambda i: i['id'])
+        return {'Items': [dict(i) for n, i in enumerate(items) if n % TotalSegments == Segment]}
+
+
+class ConfigTable:
+    def __init__(self):
+        self.items = {}
+
+    def get_item(self, Key):
+        item = self.items.get(Key['configKey'])
+        return {'Item': item} if item else {}
+
+    def put_item(self, Item):
+        self.items[Item['configKey']] = Item
+
+
+class FakeS3:
+    """Uploaded import files and multipart export uploads."""
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+        self.uploads = {}
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self.files[Key])}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self.uploads[Key] = []
+        return {'UploadId': Key}
+
+    def upload_part(self, UploadId, PartNumber, Body, **kwargs):
+        self.uploads[UploadId].append(Body)
+        return {'ETag': str(PartNumber)}
+
+    def complete_multipart_upload(self, Key, **kwargs):
+        self.files[Key] = b''.join(self.uploads.pop(Key))
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    module = load_handler('core/contacts-import-export')
+    contacts = ContactsTable([
+        {'id': 'c-1', 'phone': '+919876543210', 'name': 'Old Name'},
+        {'id': 'c-2', 'phone': '+14155550123', 'name': 'Sam', 'createdAt': 1767225600},
+    ])
+    written = []
+
+    def batch_write_item(RequestItems):
+        for request in RequestItems[module.CONTACTS_TABLE]:
+            written.append(request['PutRequest']['Item'])
+        return {}
+
+    invokes = []
+    tables = {module.CONTACTS_TABLE: contacts, module.SYSTEM_CONFIG_TABLE: ConfigTable()}
+    module.dynamodb = SimpleNamespace(Table=tables.__getitem__,
+                                      meta=SimpleNamespace(client=SimpleNamespace(batch_write_item=batch_write_item)))
+    module.s3_client = FakeS3()
+    module.lambda_client = SimpleNamespace(invoke=lambda **kwargs: invokes.append(json.loads(kwargs['Payload'])))
+    monkeypatch.setattr(module, 'get_stats_counters', lambda: SimpleNamespace(increment=lambda *args: True))
+    return SimpleNamespace(module=module, contacts=contacts, written=written, invokes=invokes)
+
+
+def _post(module, path, body):
+    response = module.handler({'httpMethod': 'POST', 'path': path, 'body': json.dumps(body)}, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def _run(jobs, job_id):
+    assert jobs.invokes[-1] == {'contactJob': {'jobId': job_id}}
+    return jobs.module.handler(jobs.invokes[-1], None)
+
+
+def test_csv_import_dedups_and_updates_existing_contacts(jobs):
+    module = jobs.module
+    module.s3_client.files['stream/imports/list.csv'] = (
+        '\ufeffFull Name,Mobile,Email\n'
+        'Asha,98765 43210,asha@example.com\n'
+        'Ravi,09123456789,not-an-email\n'
+        'Ravi K,+91 91234 56789,ravi@example.com\n'
+        'Nobody,12,\n'
+    ).encode('utf-8')
+
+    status, job = _post(module, '/contacts/import', {'s3Key': 'stream/imports/list.csv'})
+    assert status == 202
+
+    assert _run(jobs, job['jobId']) == {'status': 'completed'}
+
+    response = module.handler({'httpMethod': 'GET', 'path': f"/contacts/jobs/{job['jobId']}"}, None)
+    job = json.loads(response['body'])
+    assert (job['rowsRead'], job['created'], job['updated'], job['skipped'], job['failed']) == (4, 1, 1, 1, 1)
+    assert [(i['name'], i['phone'], i['email']) for i in jobs.written] == [('Ravi K', '+919123456789', 'ravi@example.com')]
+    assert jobs.contacts.updates[0][0] == 'c-1'
+    assert jobs.contacts.updates[0][1][':email'] == 'asha@example.com'
+
+
+def test_vcf_rows_are_unfolded():
+    module = load_handler('core/contacts-import-export')
+    lines = iter([
+        'BEGIN:VCARD', 'FN:Asha', ' Rao', 'TEL;TYPE=CELL:+91 98765 43210', 'TEL:+911111111111', 'END:VCARD',
+        'BEGIN:VCARD', 'FN:No Contact', 'END:VCARD',
+    ])
+
+    assert list(module._parse_vcf(lines)) == [{'name': 'AshaRao', 'phone': '+91 98765 43210', 'email': ''}]
+
+
+def test_normalize_phone():
+    module = load_handler('core/contacts-import-export')
+
+    assert module.normalize_phone('98765 43210') == '+919876543210'
+    assert module.normalize_phone('098765-43210') == '+919876543210'
+    assert module.normalize_phone('0044 20 7946 0958') == '+442079460958'
+    assert module.normalize_phone('12') is None
+
+
+def test_export_streams_gzip_ndjson_to_a_multipart_upload(jobs):
+    module = jobs.module
+
+    status, job = _post(module, '/contacts/export', {'format': 'ndjson'})
+    assert status == 202
+    assert _run(jobs, job['jobId']) == {'status': 'completed'}
+
+    rows = [json.loads(line) for line in gzip.decompress(module.s3_client.files[job['s3Key']]).splitlines()]
+    assert sorted(r['contactId'] for r in rows) == ['c-1', 'c-2']
+    assert next(r for r in rows if r['id'] == 'c-2')['createdAt'] == 1767225600
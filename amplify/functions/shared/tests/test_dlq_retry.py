@@ -0,0 +1,123 @@
+"""Shared circuit breakers and the scheduled replay of parked sends (028)."""
+
+import io
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+from fakes import FakeDynamoDB, FakeDynamoDBResource
+from handlers import load_handler
+from utils import error_handler
+from utils.error_handler import CircuitBreaker, CircuitStateStore, is_provider_failure, queue_for_retry
+
+QUEUE_URL = 'https://sqs.example/outbound-dlq'
+
+
+class FakeSQS:
+    """A queue whose received messages stay invisible until deleted or the test ends."""
+
+    def __init__(self):
+        self.messages = {}
+        self.invisible = set()
+
+    def send_message(self, QueueUrl, MessageBody, **kwargs):
+        handle = f'm{len(self.messages)}'
+        self.messages[handle] = MessageBody
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages, **kwargs):
+        visible = [h for h in self.messages if h not in self.invisible][:MaxNumberOfMessages]
+        self.invisible.update(visible)
+        return {'Messages': [{'MessageId': h, 'ReceiptHandle': h, 'Body': self.messages[h]} for h in visible]}
+
+    def delete_message(self, QueueUrl, ReceiptHandle):
+        self.messages.pop(ReceiptHandle, None)
+
+
+class FakeLambda:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.invocations = []
+
+    def invoke(self, FunctionName, Payload, **kwargs):
+        self.invocations.append((FunctionName, json.loads(Payload)))
+        return {'Payload': io.BytesIO(json.dumps({'statusCode': self.status_code}).encode('utf-8'))}
+
+
+def _breaker(db, container, monkeypatch):
+    monkeypatch.setattr(error_handler, 'CONTAINER_ID', container)
+    store = CircuitStateStore(db, 'SystemConfig', cache_ttl_seconds=0)
+    return CircuitBreaker('whatsapp', failure_threshold=3, recovery_timeout_seconds=30, store=store)
+
+
+def test_breaker_state_is_shared_across_containers(clock, monkeypatch):
+    db = FakeDynamoDB({'SystemConfig': ['configKey']})
+    for _ in range(3):
+        _breaker(db, 'c1', monkeypatch).record_failure()
+
+    assert not _breaker(db, 'c2', monkeypatch).allow_request()
+
+    clock.advance(31)
+    assert _breaker(db, 'c2', monkeypatch).allow_request()
+    # c2 holds the probe lease; everyone else keeps failing fast
+    assert not _breaker(db, 'c3', monkeypatch).allow_request()
+
+    probe = _breaker(db, 'c2', monkeypatch)
+    probe.allow_request()
+    probe.record_success()
+    assert _breaker(db, 'c3', monkeypatch).allow_request()
+
+
+def test_only_provider_failures_count():
+    throttled = ClientError({'Error': {'Code': 'ThrottlingException'},
+                             'ResponseMetadata': {'HTTPStatusCode': 400}}, 'SendWhatsAppMessage')
+    invalid = ClientError({'Error': {'Code': 'ValidationException'},
+                           'ResponseMetadata': {'HTTPStatusCode': 400}}, 'SendWhatsAppMessage')
+
+    assert is_provider_failure(throttled)
+    assert not is_provider_failure(invalid)
+    assert is_provider_failure(ConnectionError('reset'))
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    module = load_handler('operations/dlq-replay')
+    sqs = FakeSQS()
+    monkeypatch.setattr(module, 'sqs', sqs)
+    monkeypatch.setattr(module, 'dynamodb', FakeDynamoDBResource(FakeDynamoDB({module.DLQ_MESSAGES_TABLE: ['dlqMessageId']})))
+    monkeypatch.setitem(module.DLQ_URLS, 'outbound-dlq', QUEUE_URL)
+    monkeypatch.setenv('OUTBOUND_DLQ_URL', QUEUE_URL)
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', 'wecare-outbound-whatsapp')
+    return module
+
+
+def _park(sqs, count=1):
+    breaker = CircuitBreaker('whatsapp')
+    for i in range(count):
+        assert queue_for_retry({'messageId': f'req-{i}', 'body': '{}'}, 'breaker open', breaker, sqs_client=sqs)
+
+
+def test_schedule_replays_parked_sends_without_an_operator(replay, monkeypatch):
+    lambda_client = FakeLambda(200)
+    monkeypatch.setattr(replay, 'lambda_client', lambda_client)
+    _park(replay.sqs, count=12)
+
+    response = replay.handler({'source': 'aws.events', 'detail-type': 'Scheduled Event'}, None)
+
+    assert json.loads(response['body'])['outbound-dlq']['succeeded'] == 12
+    assert replay.sqs.messages == {}
+    function, payload = lambda_client.invocations[0]
+    assert function == 'wecare-outbound-whatsapp'
+    # A replay that hits an open breaker fails instead of parking itself again
+    assert payload['dlqReplay'] is True
+    assert not queue_for_retry(payload, 'still open', CircuitBreaker('whatsapp'), sqs_client=replay.sqs)
+
+
+def test_failed_replay_stays_queued_for_the_next_run(replay, monkeypatch):
+    monkeypatch.setattr(replay, 'lambda_client', FakeLambda(503))
+    _park(replay.sqs)
+
+    response = replay.handler({'source': 'aws.events'}, None)
+
+    assert json.loads(response['body'])['outbound-dlq']['failed'] == 1
+    assert len(replay.sqs.messages) == 1
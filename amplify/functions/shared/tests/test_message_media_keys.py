@@ -0,0 +1,82 @@
+"""Page-wide media key resolution in messages-read (core/messages-read)."""
+
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+from handlers import load_handler
+
+
+class FakeS3:
+    """Objects by key; counts head/list calls."""
+
+    exceptions = SimpleNamespace(ClientError=ClientError)
+
+    def __init__(self, keys):
+        self.keys = set(keys)
+        self.calls = 0
+
+    def head_object(self, Bucket, Key):
+        self.calls += 1
+        if Key not in self.keys:
+            raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'HeadObject')
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix, MaxKeys):
+        self.calls += 1
+        return {'Contents': [{'Key': k} for k in sorted(self.keys) if k.startswith(Prefix)][:MaxKeys]}
+
+
+class FakeTables:
+    def __init__(self):
+        self.updates = []
+
+    def Table(self, name):
+        return SimpleNamespace(update_item=lambda Key, ExpressionAttributeValues, **kwargs:
+                               self.updates.append((name, Key, ExpressionAttributeValues[':key'])))
+
+
+@pytest.fixture
+def messages_read():
+    module = load_handler('core/messages-read')
+    module.s3_client = FakeS3({
+        'whatsapp-media/incoming/a.jpg',
+        'whatsapp-media/outgoing/b.jpg1234567890.jpeg',
+    })
+    module.dynamodb = FakeTables()
+    return module
+
+
+def test_stored_actual_keys_need_no_s3_calls(messages_read):
+    items = [{'id': 'm1', 's3Key': 'x.jpg', 'actualS3Key': 'x.jpg99.jpeg'}, {'id': 'm2'}]
+
+    assert messages_read._resolve_media_keys(items) == {'x.jpg': 'x.jpg99.jpeg'}
+    assert messages_read.s3_client.calls == 0
+
+
+def test_keys_are_resolved_written_back_and_cached(messages_read):
+    items = [
+        {'id': 'm1', 'direction': 'INBOUND', 's3Key': 'whatsapp-media/incoming/a.jpg'},
+        {'id': 'm2', 'direction': 'OUTBOUND', 's3Key': 'whatsapp-media/outgoing/b.jpg'},
+        {'id': 'm3', 'direction': 'OUTBOUND', 's3Key': 'whatsapp-media/outgoing/missing.png'},
+    ]
+
+    resolved = messages_read._resolve_media_keys(items)
+
+    assert resolved == {
+        'whatsapp-media/incoming/a.jpg': 'whatsapp-media/incoming/a.jpg',
+        'whatsapp-media/outgoing/b.jpg': 'whatsapp-media/outgoing/b.jpg1234567890.jpeg',
+        'whatsapp-media/outgoing/missing.png': None,
+    }
+    assert sorted(messages_read.dynamodb.updates) == [
+        (messages_read.INBOUND_TABLE, {'id': 'm1'}, 'whatsapp-media/incoming/a.jpg'),
+        (messages_read.OUTBOUND_TABLE, {'id': 'm2'}, 'whatsapp-media/outgoing/b.jpg1234567890.jpeg'),
+    ]
+
+    calls = messages_read.s3_client.calls
+    again = messages_read._resolve_media_keys([{'id': 'm4', 'direction': 'OUTBOUND', 's3Key': 'whatsapp-media/outgoing/b.jpg'}])
+
+    assert again == {'whatsapp-media/outgoing/b.jpg': 'whatsapp-media/outgoing/b.jpg1234567890.jpeg'}
+    assert messages_read.s3_client.calls == calls
+    assert messages_read.dynamodb.updates[-1][1] == {'id': 'm4'}
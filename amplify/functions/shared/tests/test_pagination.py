@@ -0,0 +1,109 @@
+"""Paginated listings and parallel scans (utils/pagination.py)."""
+
+import pytest
+
+from utils.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+    parallel_count,
+    parallel_scan,
+)
+
+
+class FakeTable:
+    """
+    scan() over ordered items keyed by 'id'.
+
+    Like DynamoDB, Limit counts evaluated items and the filter
+    (`matches`) is applied afterwards, so pages can come back short.
+    """
+
+    def __init__(self, count, matches=lambda item: True):
+        self.rows = [{'id': f'{i:04d}', 'n': i} for i in range(count)]
+        self.matches = matches
+        self.calls = []
+
+    def scan(self, Limit=None, ExclusiveStartKey=None, Segment=None, TotalSegments=None, Select=None, **kwargs):
+        self.calls.append(Limit)
+        rows = self.rows
+        if Segment is not None:
+            rows = [r for r in rows if r['n'] % TotalSegments == Segment]
+        if ExclusiveStartKey:
+            rows = [r for r in rows if r['id'] > ExclusiveStartKey['id']]
+        evaluated = rows[:Limit] if Limit else rows
+        items = [dict(r) for r in evaluated if self.matches(r)]
+        response = {'Items': items, 'Count': len(items), 'ScannedCount': len(evaluated)}
+        if Limit and len(rows) > Limit:
+            response['LastEvaluatedKey'] = {'id': evaluated[-1]['id']}
+        return response
+
+
+def _list_all(table, limit, **kwargs):
+    seen, cursor = [], None
+    while True:
+        page = paginate(table.scan, limit, cursor=cursor, **kwargs)
+        assert len(page.items) <= limit
+        seen.extend(item['n'] for item in page.items)
+        cursor = page.cursor
+        if not cursor:
+            return seen
+
+
+@pytest.mark.parametrize('key_attributes', [(), ('id',)], ids=['untrimmed', 'trimmed'])
+def test_pages_resume_exactly_after_the_last_item(key_attributes):
+    table = FakeTable(500, matches=lambda item: item['n'] % 7 == 0)
+
+    seen = _list_all(table, 10, key_attributes=key_attributes)
+
+    assert seen == list(range(0, 500, 7))
+
+
+def test_sparse_filter_fills_the_page_across_reads():
+    table = FakeTable(1000, matches=lambda item: item['n'] % 50 == 0)
+
+    page = paginate(table.scan, 5, key_attributes=('id',))
+
+    assert [item['n'] for item in page.items] == [0, 50, 100, 150, 200]
+    assert page.requests == 3
+    assert decode_cursor(page.cursor) == {'id': '0200'}
+
+
+def test_read_budget_returns_a_short_page_with_a_cursor():
+    table = FakeTable(1000, matches=lambda item: item['n'] >= 900)
+
+    page = paginate(table.scan, 10, key_attributes=('id',), max_requests=2)
+
+    assert page.items == []
+    assert page.requests == 2
+    assert page.cursor
+
+
+@pytest.mark.parametrize('limit', [0, -5])
+def test_non_positive_limit_returns_one_item(limit):
+    table = FakeTable(20)
+
+    page = paginate(table.scan, limit, key_attributes=('id',))
+
+    assert [item['n'] for item in page.items] == [0]
+    assert decode_cursor(page.cursor) == {'id': '0000'}
+
+
+def test_cursor_round_trip_and_rejection():
+    key = {'id': '0042', 'createdAt': 1767225600}
+
+    assert decode_cursor(encode_cursor(key)) == key
+    assert encode_cursor(key) == encode_cursor(dict(reversed(list(key.items()))))
+    assert encode_cursor(None) is None
+    with pytest.raises(InvalidCursorError):
+        decode_cursor('not-a-cursor')
+
+
+def test_parallel_scan_and_count_cover_every_segment():
+    table = FakeTable(250, matches=lambda item: item['n'] % 2 == 0)
+
+    items = [item['n'] for page in parallel_scan(table, total_segments=4) for item in page]
+
+    assert sorted(items) == list(range(0, 250, 2))
+    assert parallel_count(table, total_segments=4) == 125
@@ -0,0 +1,84 @@
+"""Payment ledger upserts: status ordering and index lookups (utils/payment_ledger.py)."""
+
+from botocore.exceptions import ClientError
+
+from fakes import FakeDynamoDB
+from utils.payment_ledger import PaymentLedger
+
+TABLE = 'Payments'
+
+
+def _ledger(client=None):
+    return PaymentLedger(client or FakeDynamoDB({TABLE: ['id']}), TABLE)
+
+
+class NoIndexDynamoDB(FakeDynamoDB):
+    """A Payments table before scripts/create-payment-indexes.py has run."""
+
+    def query(self, **kwargs):
+        raise ClientError({'Error': {'Code': 'ValidationException',
+                                     'Message': 'The table does not have the specified index'}}, 'Query')
+
+
+def test_status_only_moves_forward():
+    ledger = _ledger()
+    ledger.upsert('WDSR1', status='captured', paymentId='pay_1', amount=49900)
+
+    stored = ledger.upsert('WDSR1', status='authorized', method='upi')
+
+    assert stored['status'] == 'captured'
+    assert stored['statusRank'] == 4
+    # Fields of the late event only fill in what is missing
+    assert stored['method'] == 'upi'
+    assert stored['amount'] == 49900
+
+
+def test_late_event_does_not_overwrite_fields_of_a_later_status():
+    ledger = _ledger()
+    ledger.upsert('WDSR1', status='captured', paymentId='pay_2', amount=49900, notes='{"upi": "ok"}')
+
+    stored = ledger.upsert('WDSR1', status='failed', paymentId='pay_1', amount=100,
+                           notes='{"error_code": "BAD_REQUEST_ERROR"}', contact='+919999999999')
+
+    assert stored['status'] == 'captured'
+    assert stored['paymentId'] == 'pay_2'
+    assert stored['amount'] == 49900
+    assert stored['notes'] == '{"upi": "ok"}'
+    assert stored['contact'] == '+919999999999'
+
+
+def test_later_status_replaces_earlier_one():
+    ledger = _ledger()
+    ledger.upsert('WDSR1', status='pending')
+    ledger.upsert('WDSR1', status='failed')
+
+    assert ledger.upsert('WDSR1', status='captured')['status'] == 'captured'
+    assert ledger.upsert('WDSR1', status='refunded')['status'] == 'refunded'
+    assert ledger.get('WDSR1')['status'] == 'refunded'
+
+
+def test_created_at_is_kept_across_updates(clock):
+    ledger = _ledger()
+    first = ledger.upsert('WDSR1', status='pending')
+    clock.advance(3600)
+
+    later = ledger.upsert('WDSR1', status='captured')
+
+    assert later['createdAt'] == first['createdAt']
+    assert later['updatedAt'] == first['updatedAt'] + 3600
+
+
+def test_lookup_by_razorpay_ids():
+    ledger = _ledger()
+    ledger.upsert('WDSR1', status='captured', paymentId='pay_1', orderId='order_1')
+
+    assert ledger.find_by_payment_id('pay_1')['id'] == 'WDSR1'
+    assert ledger.find_by_order_id('order_1')['id'] == 'WDSR1'
+    assert ledger.find_by_order_id('order_2') is None
+
+
+def test_missing_index_reads_as_no_match():
+    ledger = _ledger(NoIndexDynamoDB({TABLE: ['id']}))
+
+    assert ledger.find_by_payment_id('pay_1') is None
+    assert ledger.find_by_order_id('order_1') is None
@@ -0,0 +1,83 @@
+"""Cached phone number registry (utils/phone_registry.py)."""
+
+from fakes import FakeDynamoDB
+from utils.phone_registry import DEFAULT_THROUGHPUT_MPS, PHONE_NUMBER_ID_1, WABA_ID_1, PhoneNumberRegistry
+
+
+def _registry_db(*numbers):
+    db = FakeDynamoDB({'Registry': ['phoneNumberId']})
+    for number in numbers:
+        db.put_item(TableName='Registry', Item={k: ({'N': str(v)} if isinstance(v, int) else {'S': v}) for k, v in number.items()})
+    return db
+
+
+NUMBER = {
+    'phoneNumberId': 'phone-number-id-a',
+    'wabaId': 'waba-a',
+    'displayPhoneNumber': '+91 90000 00001',
+    'metaPhoneNumberId': '111',
+    'throughputMps': 250,
+}
+
+
+def test_lookups_are_served_from_one_scan(clock):
+    db = _registry_db(NUMBER, dict(NUMBER, phoneNumberId='phone-number-id-b', displayPhoneNumber='+1 415 555 0100',
+                                   metaPhoneNumberId='222', throughputMps=80))
+    registry = PhoneNumberRegistry(db, 'Registry', cache_seconds=300)
+
+    assert registry.get('phone-number-id-a')['wabaId'] == 'waba-a'
+    assert registry.by_display_number('919000000001')['phoneNumberId'] == 'phone-number-id-a'
+    assert registry.resolve_inbound('+1 (415) 555-0100', meta_phone_id='unknown')['phoneNumberId'] == 'phone-number-id-b'
+    assert registry.resolve_inbound(None, meta_phone_id='111')['phoneNumberId'] == 'phone-number-id-a'
+    assert registry.throughput('phone-number-id-a') == 250
+    assert registry.throughput('unregistered') == DEFAULT_THROUGHPUT_MPS
+    assert [call[0] for call in db.calls].count('scan') == 1
+
+    clock.advance(301)
+    registry.get('phone-number-id-a')
+    assert [call[0] for call in db.calls].count('scan') == 2
+
+
+def test_built_in_numbers_until_the_table_has_items(clock):
+    registry = PhoneNumberRegistry(_registry_db(), 'Registry')
+
+    assert registry.default_phone_number_id() == PHONE_NUMBER_ID_1
+    assert registry.waba_for('unknown') == WABA_ID_1
+    assert registry.apply_quality_update('+91 93309 94400', 'RED') is False
+
+
+def test_quality_webhook_updates_the_table_and_the_cache(clock):
+    db = _registry_db(NUMBER)
+    registry = PhoneNumberRegistry(db, 'Registry')
+
+    assert registry.apply_quality_update('+91 90000 00001', 'YELLOW', 'TIER_10K') is True
+    assert registry.apply_limit_update('+44 7000 000000', 'TIER_1K') is False
+
+    stored = db.items('Registry')[0]
+    assert (stored['qualityRating']['S'], stored['messagingLimitTier']['S']) == ('YELLOW', 'TIER_10K')
+    assert registry.get('phone-number-id-a')['qualityRating'] == 'YELLOW'
+
+
+def test_refresh_writes_api_fields_and_keeps_webhook_fields(clock):
+    phones = {
+        'waba-a': [{'phoneNumberId': 'phone-number-id-a', 'displayPhoneNumber': '+91 90000 00001',
+                    'qualityRating': 'GREEN'}],
+        'waba-b': [{'phoneNumberId': 'phone-number-id-b', 'displayPhoneNumber': '+91 90000 00002'}],
+    }
+
+    class SocialMessaging:
+        def list_linked_whatsapp_business_accounts(self, **kwargs):
+            if kwargs.get('nextToken'):
+                return {'linkedAccounts': [{'id': 'waba-b'}]}
+            return {'linkedAccounts': [{'id': 'waba-a'}], 'nextToken': 'page-2'}
+
+        def get_linked_whatsapp_business_account(self, id):
+            return {'account': {'wabaId': f'meta-{id}', 'phoneNumbers': phones[id]}}
+
+    registry = PhoneNumberRegistry(_registry_db(NUMBER), 'Registry')
+    registry.get('phone-number-id-a')
+
+    assert registry.refresh(SocialMessaging()) == 2
+    assert registry.by_display_number('+91 90000 00002')['wabaId'] == 'waba-b'
+    refreshed = registry.get('phone-number-id-a')
+    assert (refreshed['qualityRating'], refreshed['metaWabaId'], refreshed['throughputMps']) == ('GREEN', 'meta-waba-a', 250)
@@ -0,0 +1,61 @@
+"""Rolling usage roll-up of consumed sends (utils/rate_limiter.py)."""
+
+import pytest
+
+from fakes import FakeDynamoDB
+from utils.rate_limiter import Channel, RateLimiter
+from utils.send_lanes import MARKETING, LaneScheduler
+
+TABLE = 'RateLimitTracker'
+
+
+def _limiters():
+    return [
+        RateLimiter(FakeDynamoDB({TABLE: ['channel', 'windowStart']}), TABLE),
+        RateLimiter(None, TABLE),
+    ]
+
+
+@pytest.mark.parametrize('limiter', _limiters(), ids=['dynamodb', 'local'])
+def test_consumed_sends_appear_in_usage(clock, limiter):
+    for _ in range(5):
+        assert limiter.check_and_consume(Channel.WHATSAPP, 'phone-1').allowed
+    clock.advance(3 * 3600)
+    scheduler = LaneScheduler(limiter)
+    for _ in range(7):
+        assert scheduler.try_acquire('phone-1', MARKETING, 80).allowed
+
+    assert limiter.get_current_usage(Channel.WHATSAPP, 'phone-1')['messageCount'] == 12
+    assert limiter.remaining_tier_capacity('phone-1', 'TIER_250') == 238
+
+
+@pytest.mark.parametrize('limiter', _limiters(), ids=['dynamodb', 'local'])
+def test_rejected_and_uncounted_sends_stay_out_of_usage(clock, limiter):
+    scheduler = LaneScheduler(limiter)
+    admitted = sum(scheduler.try_acquire('phone-1', MARKETING, 80).allowed for _ in range(100))
+    for _ in range(3):
+        limiter.check_and_consume(Channel.WHATSAPP, 'phone-2', count_usage=False)
+
+    assert limiter.get_current_usage(Channel.WHATSAPP, 'phone-1')['messageCount'] == admitted == 60
+    assert limiter.get_current_usage(Channel.WHATSAPP, 'phone-2')['messageCount'] == 0
+
+
+@pytest.mark.parametrize('limiter', _limiters(), ids=['dynamodb', 'local'])
+def test_usage_leaves_the_window_after_24_hours(clock, limiter):
+    for _ in range(4):
+        limiter.check_and_consume(Channel.WHATSAPP, 'phone-1')
+
+    clock.advance(24 * 3600 + 60)
+
+    assert limiter.get_current_usage(Channel.WHATSAPP, 'phone-1')['messageCount'] == 0
+
+
+def test_tier_checks_read_the_consumed_identifier(clock):
+    limiter = RateLimiter(None, TABLE)
+    for _ in range(200):
+        limiter.check_and_consume(Channel.WHATSAPP, 'phone-1')
+        clock.advance(1)
+
+    assert limiter.is_tier_limit_warning(current_tier=1, identifier='phone-1')
+    assert limiter.check_tier_limit(current_tier=1, identifier='phone-1').tokens_remaining == 50
+    assert not limiter.is_tier_limit_warning(current_tier=1, identifier='phone-2')
@@ -0,0 +1,178 @@
+"""Razorpay webhook ingestion: event idempotency and pending-event retries."""
+
+import hashlib
+import hmac
+import json
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+from fakes import FakeDynamoDB
+from handlers import load_handler
+from utils.payment_ledger import PaymentLedger
+
+PAYMENTS = 'Payments'
+
+
+class FakeEventsTable:
+    """The PaymentEvents table through the boto3 resource API the handler uses."""
+
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, Item, ConditionExpression=None, **kwargs):
+        existing = self.items.get(Item['eventId'])
+        if existing:
+            old = {'status': {'S': existing['status']}}
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}, 'Item': old}, 'PutItem')
+        self.items[Item['eventId']] = dict(Item)
+
+    def get_item(self, Key, **kwargs):
+        item = self.items.get(Key['eventId'])
+        return {'Item': dict(item)} if item else {}
+
+    def query(self, KeyConditionExpression, **kwargs):
+        payment_key = KeyConditionExpression.get_expression()['values'][1]
+        return {'Items': [dict(i) for i in self.items.values() if i.get('pendingPaymentKey') == payment_key]}
+
+    def scan(self, IndexName, FilterExpression, **kwargs):
+        cutoff = FilterExpression.get_expression()['values'][1]
+        return {'Items': [dict(i) for i in self.items.values() if 'pendingPaymentKey' in i and i['receivedAt'] < cutoff]}
+
+    def update_item(self, Key, **kwargs):
+        item = self.items[Key['eventId']]
+        if item['status'] != 'pending':
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem')
+        item['status'] = 'processed'
+        item.pop('pendingPaymentKey', None)
+
+
+class FlakyDynamoDB(FakeDynamoDB):
+    """Fails the next `failures` ledger writes with a throttling error."""
+
+    failures = 0
+
+    def update_item(self, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'UpdateItem')
+        return super().update_item(**kwargs)
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    module = load_handler('payments/razorpay-webhook')
+    events = FakeEventsTable()
+    ledger_db = FlakyDynamoDB({PAYMENTS: ['id']})
+    ledger = PaymentLedger(ledger_db, PAYMENTS)
+    monkeypatch.setattr(module, 'dynamodb', SimpleNamespace(Table=lambda name: events))
+    monkeypatch.setattr(module, 'get_payment_ledger', lambda: ledger)
+    return SimpleNamespace(module=module, events=events, ledger=ledger, ledger_db=ledger_db)
+
+
+def _deliver(webhook, event_id, event_type, created_at=1767225600):
+    body = json.dumps({
+        'event': event_type,
+        'created_at': created_at,
+        'payload': {'payment': {'entity': {
+            'id': 'pay_1', 'order_id': 'order_1', 'amount': 49900, 'currency': 'INR',
+            'method': 'upi', 'notes': {'reference_id': 'WDSR1'},
+        }}},
+    })
+    signature = hmac.new(webhook.module.WEBHOOK_SECRET.encode('utf-8'), body.encode('utf-8'),
+                         hashlib.sha256).hexdigest()
+    return webhook.module.handler({
+        'headers': {'x-razorpay-signature': signature, 'x-razorpay-event-id': event_id},
+        'body': body,
+    }, None)
+
+
+def test_redelivered_event_is_applied_once(webhook):
+    first = _deliver(webhook, 'evt_1', 'payment.captured')
+    retry = _deliver(webhook, 'evt_1', 'payment.captured')
+
+    assert first['statusCode'] == 200
+    assert json.loads(retry['body'])['status'] == 'duplicate'
+    assert webhook.events.items['evt_1']['status'] == 'processed'
+    assert webhook.ledger.get('WDSR1')['status'] == 'captured'
+    assert len([c for c in webhook.ledger_db.calls if c[0] == 'update_item']) == 1
+
+
+def test_failed_ledger_write_leaves_event_pending_until_retry(webhook):
+    webhook.ledger_db.failures = 1
+
+    first = _deliver(webhook, 'evt_1', 'payment.captured')
+
+    assert first['statusCode'] == 500
+    assert webhook.events.items['evt_1']['status'] == 'pending'
+    assert webhook.ledger.get('WDSR1') is None
+
+    retry = _deliver(webhook, 'evt_1', 'payment.captured')
+
+    assert json.loads(retry['body'])['status'] == 'duplicate'
+    assert webhook.events.items['evt_1']['status'] == 'processed'
+    assert webhook.ledger.get('WDSR1')['status'] == 'captured'
+
+
+def test_failed_event_is_retried_by_the_next_event_of_the_payment(webhook, monkeypatch):
+    dispatch = webhook.module._dispatch_event
+
+    def failing_once(event_type, data, request_id):
+        monkeypatch.setattr(webhook.module, '_dispatch_event', dispatch)
+        raise RuntimeError('downstream unavailable')
+
+    monkeypatch.setattr(webhook.module, '_dispatch_event', failing_once)
+    _deliver(webhook, 'evt_1', 'payment.authorized')
+    assert webhook.events.items['evt_1']['status'] == 'pending'
+
+    _deliver(webhook, 'evt_2', 'payment.captured', created_at=1767225700)
+
+    assert webhook.events.items['evt_1']['status'] == 'processed'
+    assert webhook.events.items['evt_2']['status'] == 'processed'
+    assert webhook.ledger.get('WDSR1')['status'] == 'captured'
+
+
+def test_events_are_applied_directly_while_the_events_table_is_missing(webhook, monkeypatch):
+    def missing_table(**kwargs):
+        raise ClientError({'Error': {'Code': 'ResourceNotFoundException'}}, 'PutItem')
+
+    monkeypatch.setattr(webhook.events, 'put_item', missing_table)
+
+    response = _deliver(webhook, 'evt_1', 'payment.captured')
+
+    assert response['statusCode'] == 200
+    assert webhook.ledger.get('WDSR1')['status'] == 'captured'
+
+
+def test_reconciler_requeues_events_left_pending(webhook, clock, monkeypatch):
+    webhook.ledger_db.failures = 1
+    _deliver(webhook, 'evt_1', 'payment.captured')
+    assert webhook.events.items['evt_1']['status'] == 'pending'
+
+    reconciler = load_handler('operations/stats-reconciler')
+    invocations = []
+    monkeypatch.setattr(reconciler, 'dynamodb', SimpleNamespace(Table=lambda name: webhook.events))
+    monkeypatch.setattr(reconciler, 'lambda_client', SimpleNamespace(
+        invoke=lambda Payload, **kwargs: invocations.append(json.loads(Payload))))
+
+    assert reconciler._requeue_pending_payment_events() == 0
+
+    clock.advance(2 * 3600)
+    assert reconciler._requeue_pending_payment_events() == 1
+    for payload in invocations:
+        webhook.module.handler(payload, None)
+
+    assert invocations[0]['paymentEvents']['paymentKey'] == 'order_1'
+    assert webhook.events.items['evt_1']['status'] == 'processed'
+    assert webhook.ledger.get('WDSR1')['status'] == 'captured'
+
+
+def test_payment_without_indexes_is_keyed_by_its_order(webhook, monkeypatch):
+    def no_index(**kwargs):
+        raise ClientError({'Error': {'Code': 'ValidationException'}}, 'Query')
+
+    monkeypatch.setattr(webhook.ledger_db, 'query', no_index)
+
+    assert webhook.module._resolve_reference_id('', 'pay_1', 'order_1') == 'order_1'
+    assert webhook.module._resolve_reference_id('', 'pay_1', '') == 'pay_1'
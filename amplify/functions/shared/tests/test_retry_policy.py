@@ -0,0 +1,91 @@
+"""Retry policy: error classes, budget and deadline (utils/error_handler.py)."""
+
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError, ConnectTimeoutError, ReadTimeoutError
+
+from utils import error_handler
+from utils.error_handler import RetryBudget, RetryConfig, RetryPolicy, classify_error, set_retry_deadline
+
+
+def _client_error(code, status=400):
+    return ClientError({'Error': {'Code': code, 'Message': code},
+                        'ResponseMetadata': {'HTTPStatusCode': status}}, 'SendMessage')
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(error_handler.time, 'sleep', slept.append)
+    monkeypatch.setattr(error_handler, '_invocation_deadline', None)
+    return slept
+
+
+class Flaky:
+    """Raises the given errors in turn, then returns 'ok'."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+def test_classify_error():
+    assert classify_error(_client_error('ThrottlingException')) == error_handler.RETRY_RETRYABLE
+    assert classify_error(ConnectTimeoutError(endpoint_url='x')) == error_handler.RETRY_RETRYABLE
+    assert classify_error(_client_error('InternalFailure', 500)) == error_handler.RETRY_RETRYABLE_IF_IDEMPOTENT
+    assert classify_error(ReadTimeoutError(endpoint_url='x')) == error_handler.RETRY_RETRYABLE_IF_IDEMPOTENT
+    assert classify_error(_client_error('ValidationException')) == error_handler.RETRY_TERMINAL
+    assert classify_error(ValueError('bad')) == error_handler.RETRY_TERMINAL
+
+
+def test_throttling_is_retried_with_jittered_backoff(sleeps):
+    policy = RetryPolicy('test', RetryConfig(base_delay_seconds=1.0, max_delay_seconds=30.0))
+    call = Flaky(_client_error('ThrottlingException'), _client_error('ThrottlingException'))
+
+    assert policy.call(call) == 'ok'
+    assert call.calls == 3
+    assert 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 2.0
+
+
+def test_non_idempotent_send_is_not_retried_after_a_server_error(sleeps):
+    policy = RetryPolicy('send', RetryConfig(idempotent=False))
+    call = Flaky(_client_error('InternalFailure', 500))
+
+    with pytest.raises(ClientError):
+        policy.call(call)
+    assert call.calls == 1
+
+
+def test_terminal_errors_are_not_retried(sleeps):
+    call = Flaky(_client_error('ValidationException'))
+
+    with pytest.raises(ClientError):
+        RetryPolicy('test').call(call)
+    assert call.calls == 1 and sleeps == []
+
+
+def test_empty_budget_stops_retries(sleeps):
+    budget = RetryBudget('test', capacity=1.0, refill_per_second=0.0)
+    policy = RetryPolicy('test', RetryConfig(max_retries=5), budget=budget)
+    call = Flaky(*[_client_error('ThrottlingException')] * 3)
+
+    with pytest.raises(ClientError):
+        policy.call(call)
+    assert call.calls == 2
+
+
+def test_retry_that_would_overrun_the_deadline_is_skipped(sleeps):
+    set_retry_deadline(SimpleNamespace(get_remaining_time_in_millis=lambda: 2500))
+    policy = RetryPolicy('test', RetryConfig(base_delay_seconds=1.0, jitter=False, deadline_reserve_seconds=2.0))
+    call = Flaky(_client_error('ThrottlingException'))
+
+    with pytest.raises(ClientError):
+        policy.call(call)
+    assert call.calls == 1 and sleeps == []
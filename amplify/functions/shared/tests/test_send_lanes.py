@@ -0,0 +1,90 @@
+"""Priority lanes on the per-second send budget (utils/send_lanes.py)."""
+
+import pytest
+
+from fakes import FakeDynamoDB
+from utils.rate_limiter import Channel, RateLimiter
+from utils.send_lanes import (
+    CONVERSATIONAL, MARKETING, TRANSACTIONAL, LaneScheduler, classify_send, lane_budget,
+)
+
+TABLE = 'RateLimitTracker'
+
+
+def _limiters():
+    """The DynamoDB-backed limiter and the local fallback must behave the same."""
+    return [
+        RateLimiter(FakeDynamoDB({TABLE: ['channel', 'windowStart']}), TABLE),
+        RateLimiter(None, TABLE),
+    ]
+
+
+def _admit(scheduler, lane, attempts, rate_limit=80):
+    return sum(scheduler.try_acquire('phone-1', lane, rate_limit).allowed for _ in range(attempts))
+
+
+def test_lane_budget_reserves_nothing_for_marketing():
+    assert lane_budget(TRANSACTIONAL, 80) == (8, 80)
+    assert lane_budget(CONVERSATIONAL, 80) == (12, 60)
+    assert lane_budget(MARKETING, 80) == (0, 60)
+
+
+@pytest.mark.parametrize('limiter', _limiters(), ids=['dynamodb', 'local'])
+def test_saturated_marketing_leaves_transactional_reservation(clock, limiter):
+    scheduler = LaneScheduler(limiter)
+
+    conversational = _admit(scheduler, CONVERSATIONAL, 20)
+    marketing = _admit(scheduler, MARKETING, 100)
+    transactional = _admit(scheduler, TRANSACTIONAL, 10)
+
+    assert conversational == 20
+    assert transactional >= 8
+    assert conversational + marketing + transactional <= 80
+
+
+@pytest.mark.parametrize('limiter', _limiters(), ids=['dynamodb', 'local'])
+def test_marketing_alone_is_capped_at_unreserved_share(clock, limiter):
+    scheduler = LaneScheduler(limiter)
+
+    assert _admit(scheduler, MARKETING, 100) == 60
+    assert _admit(scheduler, CONVERSATIONAL, 20) == 12
+    assert _admit(scheduler, TRANSACTIONAL, 20) == 8
+
+
+@pytest.mark.parametrize('limiter', _limiters(), ids=['dynamodb', 'local'])
+def test_transactional_may_use_the_whole_second(clock, limiter):
+    scheduler = LaneScheduler(limiter)
+
+    assert _admit(scheduler, TRANSACTIONAL, 100) == 80
+
+
+@pytest.mark.parametrize('limiter', _limiters(), ids=['dynamodb', 'local'])
+def test_budget_resets_every_second(clock, limiter):
+    scheduler = LaneScheduler(limiter)
+    assert _admit(scheduler, MARKETING, 100) == 60
+
+    clock.advance(1)
+
+    assert _admit(scheduler, MARKETING, 100) == 60
+
+
+def test_classify_send():
+    assert classify_send({'isOrderStatus': True}) == TRANSACTIONAL
+    assert classify_send({'isTemplate': True}) == MARKETING
+    assert classify_send({'isTemplate': True, 'lane': 'transactional'}) == TRANSACTIONAL
+    assert classify_send({'content': 'hi'}) == CONVERSATIONAL
+    assert classify_send({'isReaction': True, 'isTemplate': True}) == CONVERSATIONAL
+
+
+def test_dynamodb_limiter_counts_lanes_on_the_second_row(clock):
+    dynamodb = FakeDynamoDB({TABLE: ['channel', 'windowStart']})
+    limiter = RateLimiter(dynamodb, TABLE)
+    scheduler = LaneScheduler(limiter)
+
+    _admit(scheduler, CONVERSATIONAL, 15)
+
+    row = next(i for i in dynamodb.items(TABLE) if i['windowStart']['S'] == str(int(clock.now)))
+    assert row['channel']['S'] == f'{Channel.WHATSAPP.value}:phone-1'
+    assert row['messageCount']['N'] == '15'
+    assert row['lane_conversational']['N'] == '15'
+    assert row['overflowCount']['N'] == '3'
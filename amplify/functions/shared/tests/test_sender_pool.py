@@ -0,0 +1,68 @@
+"""Sticky assignment of bulk recipients to sending numbers (utils/sender_pool.py)."""
+
+from utils.sender_pool import SenderPool
+
+WABA = 'waba-1'
+NUMBERS = ['phone-a', 'phone-b', 'phone-c']
+
+
+class FakeRegistry:
+    def __init__(self, quality=None):
+        self.quality = quality or {}
+
+    def numbers(self, waba_id=None):
+        return [{'phoneNumberId': n, 'wabaId': WABA, 'qualityRating': self.quality.get(n, 'GREEN'),
+                 'messagingLimitTier': 'TIER_10K'} for n in NUMBERS]
+
+
+class FakeUsage:
+    """remaining_tier_capacity() as the rate limiter reports it during the day."""
+
+    def __init__(self, remaining):
+        self.remaining = remaining
+
+    def remaining_tier_capacity(self, phone_number_id, messaging_tier):
+        return self.remaining[phone_number_id]
+
+
+def _recipients(count):
+    return [{'phone': f'+9198{i:08d}'} for i in range(count)]
+
+
+def _assignment(pool, recipients):
+    return {r['phone']: sender for sender, shard in pool.distribute(recipients).items() for r in shard}
+
+
+def test_draining_numbers_do_not_remap_recipients():
+    recipients = _recipients(3000)
+    morning = SenderPool.for_waba(WABA, registry=FakeRegistry(),
+                                  rate_limiter=FakeUsage({'phone-a': 10000, 'phone-b': 10000, 'phone-c': 10000}))
+    evening = SenderPool.for_waba(WABA, registry=FakeRegistry(),
+                                  rate_limiter=FakeUsage({'phone-a': 1200, 'phone-b': 9000, 'phone-c': 1500}))
+
+    assert _assignment(morning, recipients) == _assignment(evening, recipients)
+
+
+def test_only_an_exhausted_numbers_recipients_overflow():
+    recipients = _recipients(3000)
+    pool = SenderPool.for_waba(WABA, registry=FakeRegistry(),
+                               rate_limiter=FakeUsage({n: 10000 for n in NUMBERS}))
+    before = _assignment(pool, recipients)
+
+    drained = SenderPool.for_waba(WABA, registry=FakeRegistry(),
+                                  rate_limiter=FakeUsage({'phone-a': 0, 'phone-b': 10000, 'phone-c': 10000}))
+    after = _assignment(drained, recipients)
+
+    assert 'phone-a' not in after.values()
+    moved = {phone for phone in before if before[phone] != after[phone]}
+    assert moved == {phone for phone, sender in before.items() if sender == 'phone-a'}
+
+
+def test_share_follows_quality():
+    pool = SenderPool.for_waba(WABA, registry=FakeRegistry({'phone-c': 'YELLOW'}))
+    shards = pool.distribute(_recipients(6000))
+
+    # Weights 1 : 1 : 0.5
+    assert 2200 < len(shards['phone-a']) < 2600
+    assert 2200 < len(shards['phone-b']) < 2600
+    assert 1000 < len(shards['phone-c']) < 1400
@@ -0,0 +1,64 @@
+"""Sharded dashboard counters (utils/stats_counters.py)."""
+
+from fakes import FakeDynamoDB
+from utils.stats_counters import COUNTER_CONTACTS, StatsCounters, ai_language_counter
+
+
+class ShardedDynamoDB(FakeDynamoDB):
+    """FakeDynamoDB plus batch_get_item, leaving one key unprocessed per first call."""
+
+    def __init__(self):
+        super().__init__({'Stats': ['configKey']})
+        self.batch_gets = 0
+
+    def batch_get_item(self, RequestItems):
+        self.batch_gets += 1
+        (table, request), = RequestItems.items()
+        keys = request['Keys']
+        unprocessed = keys[:1] if self.batch_gets == 1 and len(keys) > 1 else []
+        found = [self.get_item(TableName=table, Key=key).get('Item') for key in keys[len(unprocessed):]]
+        response = {'Responses': {table: [item for item in found if item]}}
+        if unprocessed:
+            response['UnprocessedKeys'] = {table: {'Keys': unprocessed}}
+        return response
+
+
+def _counters(db):
+    return StatsCounters(db, 'Stats', shard_count=4)
+
+
+def test_increments_spread_over_shards_sum_on_read():
+    db = ShardedDynamoDB()
+    counters = _counters(db)
+    for _ in range(20):
+        counters.increment(COUNTER_CONTACTS)
+    counters.decrement(COUNTER_CONTACTS, 5)
+
+    assert counters.read() == {COUNTER_CONTACTS: 15}
+    assert len(db.items('Stats')) > 1
+
+
+def test_failed_increment_does_not_raise():
+    class Broken:
+        def update_item(self, **kwargs):
+            raise RuntimeError('throttled')
+
+    assert StatsCounters(Broken(), 'Stats').increment(COUNTER_CONTACTS) is False
+
+
+def test_reconcile_adds_the_difference_and_drops_stale_languages():
+    db = ShardedDynamoDB()
+    counters = _counters(db)
+    counters.increment({COUNTER_CONTACTS: 7, ai_language_counter('Tamil'): 2})
+
+    deltas = counters.reconcile({COUNTER_CONTACTS: 10})
+
+    assert deltas == {COUNTER_CONTACTS: 3, ai_language_counter('Tamil'): -2}
+    assert counters.read()[COUNTER_CONTACTS] == 10
+    assert counters.reconcile({COUNTER_CONTACTS: 10}) == {}
+
+
+def test_language_counter_names_are_attribute_safe():
+    assert ai_language_counter('hi-Latn') == 'aiLanguage_hi-Latn'
+    assert ai_language_counter('pt BR') == 'aiLanguage_pt_BR'
+    assert ai_language_counter(None) == 'aiLanguage_unknown'
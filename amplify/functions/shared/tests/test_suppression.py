@@ -0,0 +1,122 @@
+"""Suppression snapshots (utils/suppression.py): build, publish, load and filter."""
+
+import hashlib
+import io
+from types import SimpleNamespace
+
+from botocore.exceptions import ClientError
+
+from handlers import load_handler
+from utils.suppression import (
+    REASON_INVALID, REASON_OPTED_OUT, SuppressionList, SuppressionSnapshot, build_snapshots,
+)
+
+
+class FakeS3:
+    """put_object / get_object with ETags and If-None-Match."""
+
+    def __init__(self):
+        self.objects = {}
+        self.gets = []
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        etag = '"%s"' % hashlib.md5(Body).hexdigest()
+        self.objects[(Bucket, Key)] = (Body, etag)
+        return {'ETag': etag}
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        self.gets.append(Key)
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+        body, etag = self.objects[(Bucket, Key)]
+        if IfNoneMatch == etag:
+            raise ClientError({'Error': {'Code': '304'}}, 'GetObject')
+        return {'Body': io.BytesIO(body), 'ETag': etag}
+
+
+CONTACTS = [
+    {'phone': '+91 98000 00001', 'email': 'One@Example.com', 'optInWhatsApp': False, 'optInEmail': False},
+    {'phone': '+919800000002', 'optInWhatsApp': True, 'optInSms': False},
+    {'phone': '+919800000003'},  # no explicit opt-out
+    {'phone': '+919800000004', 'optInWhatsApp': False, 'deletedAt': 1767225600},
+]
+
+
+def test_snapshot_round_trips_through_bytes():
+    keys = [f'9198{i:08d}' for i in range(5000)]
+    snapshot = SuppressionSnapshot.build('WHATSAPP', keys, version=7)
+
+    loaded = SuppressionSnapshot.from_bytes(snapshot.to_bytes())
+
+    assert (loaded.channel, loaded.version, len(loaded)) == ('WHATSAPP', 7, 5000)
+    assert all(loaded.contains(k) for k in keys)
+    assert not any(loaded.contains(f'9199{i:08d}') for i in range(5000))
+
+
+def test_only_explicit_opt_outs_of_live_contacts_are_suppressed():
+    snapshots = build_snapshots(CONTACTS)
+
+    assert snapshots['WHATSAPP'].contains('919800000001')
+    assert not snapshots['WHATSAPP'].contains('919800000003')
+    assert not snapshots['WHATSAPP'].contains('919800000004')
+    assert snapshots['SMS'].contains('919800000002')
+    assert snapshots['EMAIL'].contains('one@example.com')
+
+
+def test_published_snapshot_filters_in_another_container():
+    s3 = FakeS3()
+    SuppressionList(s3, 'bucket').publish(build_snapshots(CONTACTS))
+    recipients = [
+        {'phone': '+919800000003', 'name': 'kept'},
+        {'phone': '919800000001', 'name': 'opted out'},
+        {'phone': '12345', 'name': 'invalid'},
+        {'contactId': 'c-1', 'name': 'resolved at send time'},
+        {'phone': '+919800000004', 'name': 'deleted contact'},
+    ]
+
+    kept, suppressed = SuppressionList(s3, 'bucket').filter('whatsapp', recipients)
+
+    assert [r['name'] for r in kept] == ['kept', 'resolved at send time', 'deleted contact']
+    assert [(r['name'], r['suppressionReason']) for r in suppressed] == [
+        ('opted out', REASON_OPTED_OUT), ('invalid', REASON_INVALID)]
+
+
+def test_unchanged_snapshot_is_revalidated_not_reloaded(clock):
+    s3 = FakeS3()
+    SuppressionList(s3, 'bucket').publish(build_snapshots(CONTACTS))
+    suppression = SuppressionList(s3, 'bucket', cache_seconds=60)
+    first = suppression.snapshot('WHATSAPP')
+
+    clock.advance(61)
+    again = suppression.snapshot('WHATSAPP')
+
+    assert again is first
+    assert len(s3.gets) == 2
+
+
+def test_nothing_is_suppressed_without_a_snapshot():
+    suppression = SuppressionList(FakeS3(), 'bucket')
+
+    assert suppression.snapshot('SMS') is None
+    assert suppression.is_suppressed('SMS', '+919800000002') is None
+    assert suppression.is_suppressed('SMS', '123') == REASON_INVALID
+
+
+def test_reconciler_counts_contacts_from_the_snapshot_scan(monkeypatch):
+    reconciler = load_handler('operations/stats-reconciler')
+    scans = []
+
+    class ContactsTable:
+        def scan(self, Segment, **kwargs):
+            scans.append(kwargs)
+            return {'Items': [dict(c) for c in CONTACTS] if Segment == 0 else []}
+
+    suppression = SuppressionList(FakeS3(), 'bucket')
+    monkeypatch.setattr(reconciler, 'dynamodb', SimpleNamespace(Table=lambda name: ContactsTable()))
+    monkeypatch.setattr(reconciler, 'get_suppression_list', lambda: suppression)
+
+    live, suppressed = reconciler._scan_contacts()
+
+    assert live == 3
+    assert suppressed == {'WHATSAPP': 1, 'SMS': 1, 'EMAIL': 1}
+    assert len(scans) == reconciler.SCAN_SEGMENTS
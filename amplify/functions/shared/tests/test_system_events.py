@@ -0,0 +1,53 @@
+"""Append-only system event log (utils/system_events.py)."""
+
+from fakes import FakeDynamoDB
+from utils.system_events import SystemEventLog
+from utils.ttl import TTL_SYSTEM_EVENTS
+
+
+class EventsDynamoDB(FakeDynamoDB):
+    """FakeDynamoDB whose query honours the sort key order and Limit."""
+
+    def __init__(self):
+        super().__init__({'Events': ['eventType', 'eventKey']})
+
+    def query(self, **kwargs):
+        items = super().query(**kwargs)['Items']
+        items.sort(key=lambda item: item['eventKey']['S'], reverse=not kwargs.get('ScanIndexForward', True))
+        return {'Items': items[:kwargs.get('Limit')]}
+
+
+def test_events_are_appended_and_read_newest_first(clock):
+    db = EventsDynamoDB()
+    log = SystemEventLog(db, 'Events')
+    for status in ('PENDING', 'APPROVED', 'PAUSED'):
+        log.record('template_status', {'event': status}, request_id='req-1')
+        clock.advance(1)
+    log.record('phone_quality', {'rating': 'GREEN'})
+
+    latest = log.latest('template_status', limit=2)
+
+    assert [e['data']['event'] for e in latest] == ['PAUSED', 'APPROVED']
+    assert latest[0]['timestamp'] == 1767225602
+    assert len(db.items('Events')) == 4
+
+
+def test_events_in_the_same_millisecond_do_not_overwrite(clock):
+    db = EventsDynamoDB()
+    log = SystemEventLog(db, 'Events')
+
+    log.record('account_update', {'n': 1})
+    log.record('account_update', {'n': 2})
+
+    assert len(log.latest('account_update')) == 2
+    assert all(int(item['expiresAt']['N']) == 1767225600 + TTL_SYSTEM_EVENTS for item in db.items('Events'))
+
+
+def test_limit_is_clamped(clock):
+    db = EventsDynamoDB()
+    log = SystemEventLog(db, 'Events')
+
+    log.latest('template_status', limit=0)
+    log.latest('template_status', limit=10_000)
+
+    assert [call[1]['Limit'] for call in db.calls] == [1, 100]
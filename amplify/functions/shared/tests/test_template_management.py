@@ -0,0 +1,69 @@
+"""Template listing (whatsapp-template-management) with and without the catalog table."""
+
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+from fakes import FakeDynamoDB
+from handlers import load_handler
+from utils.template_catalog import TemplateCatalog
+
+WABA = 'waba-1'
+TEMPLATES = [
+    {'templateName': f'offer_{i}', 'templateLanguage': 'en', 'metaTemplateId': str(1000 + i),
+     'templateStatus': 'APPROVED' if i % 3 else 'PENDING', 'templateCategory': 'MARKETING'}
+    for i in range(150)
+]
+
+
+class FakeSocialMessaging:
+    def list_whatsapp_message_templates(self, id, maxResults, nextToken=None):
+        start = int(nextToken or 0)
+        response = {'templates': TEMPLATES[start:start + maxResults]}
+        if start + maxResults < len(TEMPLATES):
+            response['nextToken'] = str(start + maxResults)
+        return response
+
+    def get_whatsapp_message_template(self, metaTemplateId, id):
+        return {'template': json.dumps({'components': [{'type': 'BODY', 'text': 'Hi {{1}}'}]})}
+
+
+class MissingTableDynamoDB(FakeDynamoDB):
+    def query(self, **kwargs):
+        raise ClientError({'Error': {'Code': 'ResourceNotFoundException',
+                                     'Message': 'Requested resource not found'}}, 'Query')
+
+
+def _list(module, status=''):
+    response = module._list_templates(WABA, {'status': status} if status else {})
+    return response['statusCode'], json.loads(response['body'])
+
+
+@pytest.mark.parametrize('client', [MissingTableDynamoDB(), FakeDynamoDB({'TemplateCatalog': ['wabaId', 'templateKey']})],
+                         ids=['no-catalog-table', 'catalog'])
+def test_templates_are_listed_with_or_without_the_catalog(monkeypatch, client):
+    module = load_handler('messaging/whatsapp-template-management')
+    catalog = TemplateCatalog(client, 'TemplateCatalog')
+    monkeypatch.setattr(catalog, '_batch_write', lambda requests: None)
+    monkeypatch.setattr(module, 'get_template_catalog', lambda: catalog)
+    monkeypatch.setattr(module, 'social_messaging', FakeSocialMessaging())
+
+    status_code, body = _list(module, 'approved')
+
+    assert status_code == 200
+    assert len(body['templates']) == 100
+    assert all(t['templateStatus'] == 'APPROVED' for t in body['templates'])
+
+
+def test_other_catalog_errors_still_fail(monkeypatch):
+    module = load_handler('messaging/whatsapp-template-management')
+
+    class Throttled(FakeDynamoDB):
+        def query(self, **kwargs):
+            raise ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'Query')
+
+    monkeypatch.setattr(module, 'get_template_catalog', lambda: TemplateCatalog(Throttled(), 'TemplateCatalog'))
+    monkeypatch.setattr(module, 'social_messaging', FakeSocialMessaging())
+
+    assert _list(module)[0] == 500
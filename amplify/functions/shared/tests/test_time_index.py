@@ -0,0 +1,100 @@
+"""Newest-first listings over the month time index (utils/time_index.py)."""
+
+from botocore.exceptions import ClientError
+
+from utils.time_index import list_newest_first, parse_time_param, query_time_range, time_bucket
+
+DAY = 86400
+INDEX = 'createdMonth-createdAt-index'
+
+
+def _condition_values(condition):
+    """(bucket, start, end) from Key(bucket).eq(..) & Key(sort).between(..)."""
+    bucket_eq, sort_between = condition.get_expression()['values']
+    bucket = bucket_eq.get_expression()['values'][1]
+    _, start, end = sort_between.get_expression()['values']
+    return bucket, start, end
+
+
+class FakeTable:
+    """query() on the time index and scan() over items keyed by 'id'."""
+
+    name = 'Records'
+
+    def __init__(self, items, has_index=True):
+        self.items = items
+        self.has_index = has_index
+        self.queries = []
+        self.scans = 0
+
+    def query(self, IndexName, KeyConditionExpression, ScanIndexForward=True,
+              Limit=None, ExclusiveStartKey=None, **kwargs):
+        if not self.has_index:
+            raise ClientError({'Error': {'Code': 'ValidationException', 'Message': 'no index'}}, 'Query')
+        bucket, start, end = _condition_values(KeyConditionExpression)
+        self.queries.append(bucket)
+        rows = sorted(
+            (i for i in self.items if i['createdMonth'] == bucket and start <= i['createdAt'] <= end),
+            key=lambda i: i['createdAt'], reverse=not ScanIndexForward,
+        )
+        if ExclusiveStartKey:
+            rows = [r for r in rows if r['createdAt'] < ExclusiveStartKey['createdAt']]
+        evaluated = rows[:Limit] if Limit else rows
+        response = {'Items': [dict(r) for r in evaluated], 'Count': len(evaluated), 'ScannedCount': len(evaluated)}
+        if Limit and len(rows) > Limit:
+            last = evaluated[-1]
+            response['LastEvaluatedKey'] = {k: last[k] for k in ('id', 'createdMonth', 'createdAt')}
+        return response
+
+    def scan(self, Limit=None, ExclusiveStartKey=None, **kwargs):
+        self.scans += 1
+        return {'Items': [dict(i) for i in self.items], 'Count': len(self.items), 'ScannedCount': len(self.items)}
+
+
+def _item(n, timestamp):
+    return {'id': f'r{n}', 'createdAt': timestamp, 'createdMonth': time_bucket(timestamp)}
+
+
+# 2026-01-01 .. 2026-03-01, four records per month
+START = 1767225600
+ITEMS = [_item(month * 10 + n, START + month * 31 * DAY + n * DAY) for month in range(3) for n in range(4)]
+
+
+def test_query_time_range_pages_newest_first_across_buckets():
+    table = FakeTable(ITEMS)
+    end = START + 90 * DAY
+    seen, cursor = [], None
+    while True:
+        page = query_time_range(table, INDEX, limit=5, start=START, end=end,
+                                cursor=cursor, key_attributes=('id',))
+        assert len(page.items) <= 5
+        seen.extend(item['createdAt'] for item in page.items)
+        cursor = page.cursor
+        if not cursor:
+            break
+
+    assert seen == sorted((i['createdAt'] for i in ITEMS), reverse=True)
+
+
+def test_query_time_range_only_reads_buckets_in_the_range():
+    table = FakeTable(ITEMS)
+    page = query_time_range(table, INDEX, limit=50, start=START + 31 * DAY, end=START + 35 * DAY)
+
+    assert table.queries == ['2026-02']
+    assert [i['id'] for i in page.items] == ['r13', 'r12', 'r11', 'r10']
+    assert page.cursor is None
+
+
+def test_list_newest_first_scans_when_the_index_is_missing():
+    table = FakeTable(ITEMS, has_index=False)
+    page = list_newest_first(table, INDEX, limit=50, start=START, end=START + 90 * DAY)
+
+    assert table.scans == 1
+    assert [i['createdAt'] for i in page.items] == sorted((i['createdAt'] for i in ITEMS), reverse=True)
+
+
+def test_parse_time_param_covers_the_whole_end_day():
+    assert parse_time_param('2026-01-01') == START
+    assert parse_time_param('2026-01-01', end_of_day=True) == START + DAY - 1
+    assert parse_time_param(str(START)) == START
+    assert parse_time_param('') is None
@@ -0,0 +1,93 @@
+"""Rendered TTS audio cache (utils/tts_cache.py)."""
+
+import io
+
+import pytest
+from botocore.exceptions import ClientError
+
+from utils.tts_cache import TTSAudioCache, tts_cache_key
+
+
+class FakePolly:
+    def __init__(self):
+        self.requests = []
+
+    def synthesize_speech(self, Text, **kwargs):
+        self.requests.append(Text)
+        return {'AudioStream': io.BytesIO(b'audio:' + Text.encode()), 'ContentType': 'audio/mpeg'}
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.heads = 0
+
+    def head_object(self, Bucket, Key):
+        self.heads += 1
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'HeadObject')
+        return {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://{Params['Bucket']}/{Params['Key']}"
+
+
+def _cache(**kwargs):
+    polly, s3 = FakePolly(), FakeS3()
+    return TTSAudioCache(polly_client=polly, s3_client=s3, bucket='media', prefix='stream/tts/', **kwargs), polly, s3
+
+
+def test_script_is_rendered_once_and_then_served_from_memory():
+    cache, polly, s3 = _cache()
+
+    first = cache.get_audio_url('Your order has shipped.', 'Aditi')
+    second = cache.get_audio_url('Your  order has\nshipped. ', 'Aditi')
+
+    assert first == second
+    assert polly.requests == ['Your order has shipped.']
+    assert s3.heads == 1
+
+
+def test_another_container_reuses_the_stored_audio():
+    cache, polly, s3 = _cache()
+    cache.get_audio_url('Hello', 'Aditi')
+
+    cold = TTSAudioCache(polly_client=polly, s3_client=s3, bucket='media', prefix='stream/tts/')
+    cold.get_audio_url('Hello', 'Aditi')
+
+    assert polly.requests == ['Hello']
+
+
+def test_voice_and_engine_are_part_of_the_key():
+    assert tts_cache_key('Hello', 'Aditi') != tts_cache_key('Hello', 'Raveena')
+    assert tts_cache_key('Hello', 'Aditi', 'standard') != tts_cache_key('Hello', 'Aditi', 'neural')
+
+
+def test_local_entries_are_bounded():
+    cache, polly, s3 = _cache(max_local_entries=2)
+    for text in ('one', 'two', 'three'):
+        cache.get_audio_url(text, 'Aditi')
+
+    cache.get_audio_url('one', 'Aditi')
+
+    assert s3.heads == 4
+    assert polly.requests == ['one', 'two', 'three']
+
+
+def test_empty_script_is_rejected():
+    cache, _, _ = _cache()
+    with pytest.raises(ValueError):
+        cache.get_audio_url('   ', 'Aditi')
+
+
+def test_prerender_renders_duplicates_once_and_reports_failures():
+    cache, polly, s3 = _cache()
+
+    urls = cache.prerender(['Hi', 'Hi', 'x' * 3001], 'Aditi')
+
+    assert urls['Hi'].startswith('https://media/stream/tts/')
+    assert urls['x' * 3001] is None
+    assert polly.requests == ['Hi']
@@ -0,0 +1,93 @@
+"""MessageValidator.validate_batch against the per-contact checks (utils/validator.py)."""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.validator import MessageValidator, ValidationErrorCode
+
+ALLOWED = MessageValidator.WHATSAPP_ALLOWLIST[0]
+
+
+def _last_inbound(rng, now):
+    """lastInboundMessageAt in every form the Contacts table holds, clear of the 24h edge."""
+    hours = rng.choice((1, 12, 23, 25, 72))
+    moment = now - timedelta(hours=hours)
+    return rng.choice((
+        None,
+        '',
+        'not-a-timestamp',
+        moment.isoformat(),
+        moment.isoformat() + 'Z',
+        moment.replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=5, minutes=30))).isoformat(),
+        moment,
+        moment.replace(tzinfo=timezone.utc),
+    ))
+
+
+def _contacts(count, now, seed=11):
+    rng = random.Random(seed)
+    return [{
+        'contactId': f'c-{i}',
+        'phone': rng.choice(('', None, f'+9198{rng.randrange(10 ** 8):08d}', f'+9198{rng.randrange(10 ** 8):08d}')),
+        'email': rng.choice(('', None, f'user{i}@example.com', f'user{i}@example.com')),
+        'optInWhatsApp': rng.choice((True, True, False, None)),
+        'optInSms': rng.choice((True, False)),
+        'optInEmail': rng.choice((True, False, None)),
+        'lastInboundMessageAt': _last_inbound(rng, now),
+    } for i in range(count)]
+
+
+def _expected(validator, channel, contacts, phone_number_id, is_template):
+    check = {
+        'WHATSAPP': lambda c: validator.validate_whatsapp(c, phone_number_id, is_template),
+        'SMS': validator.validate_sms,
+        'EMAIL': validator.validate_email,
+    }[channel]
+    return [None if result.success else result.error_code for result in map(check, contacts)]
+
+
+@pytest.mark.parametrize('channel,phone_number_id,is_template', [
+    ('WHATSAPP', ALLOWED, True),
+    ('WHATSAPP', ALLOWED, False),
+    ('WHATSAPP', 'phone-number-id-not-allowed', False),
+    ('SMS', None, False),
+    ('EMAIL', None, False),
+])
+def test_batch_matches_per_contact_validation(channel, phone_number_id, is_template):
+    validator = MessageValidator()
+    now = datetime.utcnow()
+    contacts = _contacts(2000, now)
+    opt_in_field = {'WHATSAPP': 'optInWhatsApp', 'SMS': 'optInSms', 'EMAIL': 'optInEmail'}[channel]
+    columns = {}
+    if channel == 'SMS':
+        columns['phones'] = [c['phone'] for c in contacts]
+    if channel == 'EMAIL':
+        columns['emails'] = [c['email'] for c in contacts]
+    if channel == 'WHATSAPP':
+        columns['last_inbound'] = [c['lastInboundMessageAt'] for c in contacts]
+
+    result = validator.validate_batch(channel, [c.get(opt_in_field, False) for c in contacts],
+                                      phone_number_id=phone_number_id, is_template=is_template,
+                                      now=now, **columns)
+
+    expected = _expected(validator, channel, contacts, phone_number_id, is_template)
+    assert [result.reason(i) for i in range(len(contacts))] == expected
+    assert list(result.accepted) == [i for i, code in enumerate(expected) if code is None]
+
+
+def test_whatsapp_batch_rejects_missing_phones_when_given():
+    result = MessageValidator().validate_batch(
+        'WHATSAPP', [True, True, False], phones=['+919800000001', '', '+919800000003'],
+        phone_number_id=ALLOWED, is_template=True
+    )
+
+    assert list(result.accepted) == [0]
+    assert result.rejected_counts() == {ValidationErrorCode.MISSING_PHONE.value: 1,
+                                        ValidationErrorCode.OPT_IN_REQUIRED.value: 1}
+
+
+def test_batch_requires_aligned_columns():
+    with pytest.raises(ValueError):
+        MessageValidator().validate_batch('SMS', [True, True], phones=['+919800000001'])
@@ -0,0 +1,95 @@
+"""Voice campaign runs: lease on the campaign, attempt claims before dialing."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from fakes import FakeDynamoDB, FakeDynamoDBResource
+from handlers import load_handler
+
+RECIPIENTS = [{'phoneNumber': f'+9198000000{i:02d}'} for i in range(5)]
+
+
+@pytest.fixture
+def voice(monkeypatch):
+    module = load_handler('messaging/voice-calls')
+    db = FakeDynamoDB({module.SYSTEM_CONFIG_TABLE: ['configKey'], module.VOICE_CALLS_TABLE: ['id']})
+    dialed = []
+
+    def make_call(phone, *args):
+        dialed.append(phone)
+        return {'success': True, 'providerCallId': f'contact-{len(dialed)}'}
+
+    monkeypatch.setattr(module, 'dynamodb', FakeDynamoDBResource(db))
+    monkeypatch.setattr(module, '_load_recipients', lambda campaign_id: RECIPIENTS)
+    monkeypatch.setattr(module, '_cached_tts_url', lambda *args: 'https://audio.example/tts.mp3')
+    monkeypatch.setattr(module, '_make_aws_call', make_call)
+    monkeypatch.setattr(module, '_call_outcome', lambda provider, call_id: 'answered')
+    monkeypatch.setattr(module, '_invoke_campaign', lambda campaign, context: None)
+    monkeypatch.setattr(module, 'CALL_SLOT_SECONDS', 0)
+
+    campaign = {
+        'campaignId': 'camp-1', 'status': 'queued', 'provider': 'aws', 'callType': 'tts',
+        'messageText': 'Hello', 'voiceId': 'Aditi', 'engine': 'standard', 'audioUrl': None,
+        'maxConcurrent': 2, 'callsPerSecond': 200, 'maxAttempts': 3, 'total': len(RECIPIENTS),
+        'position': 0, 'active': [], 'retries': [],
+        'counts': {'attempts': 0, 'completed': 0, 'noAnswer': 0, 'failed': 0},
+        'startedAt': 1767225600,
+    }
+    module._save_campaign(dict(campaign))
+    return SimpleNamespace(module=module, db=db, dialed=dialed, campaign=campaign)
+
+
+def _saved(voice):
+    item = voice.db.items(voice.module.SYSTEM_CONFIG_TABLE)[0]
+    return json.loads(item['configValue']['S']), item
+
+
+def test_campaign_leased_by_another_invocation_is_skipped(voice):
+    assert voice.module._claim_campaign('camp-1', 'other-run', 4102444800)
+
+    assert voice.module._run_campaign({'campaignId': 'camp-1'}, None, 'run-1') == {'status': 'skipped'}
+    assert voice.dialed == []
+
+
+def test_completed_run_releases_the_lease(voice):
+    assert voice.module._run_campaign({'campaignId': 'camp-1'}, None, 'run-1') == {'status': 'completed'}
+
+    campaign, item = _saved(voice)
+    assert campaign['counts']['completed'] == 5
+    assert 'leaseOwner' not in item
+    assert sorted(voice.dialed) == sorted(r['phoneNumber'] for r in RECIPIENTS)
+
+
+def test_rerun_from_stale_progress_does_not_redial(voice):
+    voice.module._run_campaign({'campaignId': 'camp-1'}, None, 'run-1')
+    # A run that dialed everyone but crashed before saving progress
+    voice.module._save_campaign(dict(voice.campaign, counts=dict(voice.campaign['counts'])))
+
+    assert voice.module._run_campaign({'campaignId': 'camp-1'}, None, 'run-2') == {'status': 'completed'}
+
+    campaign, _ = _saved(voice)
+    assert len(voice.dialed) == 5
+    assert campaign['counts']['alreadyDialed'] == 5
+
+
+def test_lost_lease_stops_the_run(voice):
+    # run-1's lease has expired, so run-2 may take the campaign over
+    assert voice.module._claim_campaign('camp-1', 'run-1', 1000000000)
+    assert voice.module._claim_campaign('camp-1', 'run-2', 4102444800)
+
+    with pytest.raises(voice.module.CampaignLeaseLostError):
+        voice.module._save_campaign(dict(voice.campaign), owner='run-1', lease_until=4102444800)
+
+
+def test_call_records_keep_their_first_created_at(voice):
+    voice.module._run_campaign({'campaignId': 'camp-1'}, None, 'run-1')
+    table = voice.db.tables[voice.module.VOICE_CALLS_TABLE]
+    record = table[('camp-1-0',)]
+    record['createdAt'] = {'N': '1700000000'}
+
+    voice.module._write_calls([voice.module._call_item('camp-1-0', '', '+919800000000', 'aws', 'tts', 'completed')])
+
+    assert table[('camp-1-0',)]['createdAt'] == {'N': '1700000000'}
+    assert table[('camp-1-0',)]['dialedAttempts'] == {'N': '1'}
@@ -2,20 +2,77 @@
 WECARE.DIGITAL Shared Utilities
 
 Core utility modules for message validation, rate limiting,
-logging, metrics, error handling, TTL management, and environment validation.
+logging, metrics, error handling, TTL management, environment validation,
+tuned AWS client construction, AI response caching, the AI reply
+pipeline, sharded stats counters, paginated listing, time-ordered
+indexes, the payment ledger, the TTS audio cache, the system event log,
+the WhatsApp template catalog, the phone number registry,
+multi-number sender pools, priority send lanes and the bulk-send
+suppression list.
 """
 
-from .validator import MessageValidator, ValidationResult
+from .aws_clients import get_client, get_resource, lazy_client, lazy_resource
+from .ai_cache import AIResponseCache, get_ai_response_cache, normalize_query
+from .ai_pipeline import AIPipeline, AIPipelineResult, detect_language, get_fallback_response
+from .stats_counters import StatsCounters, get_stats_counters, ai_language_counter
+from .pagination import (
+    paginate,
+    parallel_scan,
+    parallel_count,
+    encode_cursor,
+    decode_cursor,
+    InvalidCursorError,
+    Page,
+)
+from .time_index import (
+    time_bucket,
+    parse_time_param,
+    query_time_range,
+    list_newest_first,
+    TIME_BUCKET_ATTRIBUTE,
+    DEFAULT_TIME_INDEX,
+)
+from .payment_ledger import PaymentLedger, get_payment_ledger, sanitize_reference_id
+from .tts_cache import TTSAudioCache, get_tts_cache, tts_cache_key
+from .system_events import SystemEventLog, get_system_event_log
+from .phone_registry import PhoneNumberRegistry, get_phone_registry, phone_digits
+from .sender_pool import Sender, SenderPool
+from .send_lanes import LaneScheduler, classify_send, lane_budget
+from .suppression import SuppressionList, get_suppression_list, build_snapshots
+from .template_catalog import (
+    TemplateCatalog,
+    get_template_catalog,
+    split_template_language,
+    waba_for_phone_number,
+)
+from .validator import MessageValidator, ValidationResult, BatchValidationResult
 from .rate_limiter import RateLimiter
 from .logger import Logger, log_validation_failure, log_api_error, log_authentication_attempt
 from .metrics import MetricsEmitter, get_metrics_emitter, AlertPublisher, get_alert_publisher
-from .error_handler import retry_with_exponential_backoff, send_to_dlq, CircuitBreaker
+from .error_handler import (
+    retry_with_exponential_backoff,
+    RetryConfig,
+    RetryBudget,
+    RetryPolicy,
+    ServiceRetryPolicies,
+    classify_error,
+    is_retryable_error,
+    set_retry_deadline,
+    send_to_dlq,
+    queue_for_retry,
+    CircuitBreaker,
+    CircuitBreakerOpenError,
+    CircuitStateStore,
+    ServiceCircuitBreakers,
+    is_provider_failure,
+)
 from .ttl import (
     TTLManager,
     calculate_message_ttl,
     calculate_dlq_message_ttl,
     calculate_audit_log_ttl,
     calculate_rate_limit_ttl,
+    calculate_system_event_ttl,
     ttl_to_decimal,
     is_expired,
     get_ttl_filter_expression,
@@ -24,6 +81,7 @@ from .ttl import (
     TTL_DLQ_MESSAGES,
     TTL_AUDIT_LOGS,
     TTL_RATE_LIMIT_TRACKERS,
+    TTL_SYSTEM_EVENTS,
 )
 from .env_validator import (
     EnvironmentValidator,
@@ -35,8 +93,59 @@ from .env_validator import (
 )
 
 __all__ = [
+    'get_client',
+    'get_resource',
+    'lazy_client',
+    'lazy_resource',
+    'AIResponseCache',
+    'get_ai_response_cache',
+    'normalize_query',
+    'AIPipeline',
+    'AIPipelineResult',
+    'detect_language',
+    'get_fallback_response',
+    'StatsCounters',
+    'get_stats_counters',
+    'ai_language_counter',
+    'paginate',
+    'parallel_scan',
+    'parallel_count',
+    'encode_cursor',
+    'decode_cursor',
+    'InvalidCursorError',
+    'Page',
+    'time_bucket',
+    'parse_time_param',
+    'query_time_range',
+    'list_newest_first',
+    'TIME_BUCKET_ATTRIBUTE',
+    'DEFAULT_TIME_INDEX',
+    'PaymentLedger',
+    'get_payment_ledger',
+    'sanitize_reference_id',
+    'TTSAudioCache',
+    'get_tts_cache',
+    'tts_cache_key',
+    'SystemEventLog',
+    'get_system_event_log',
+    'PhoneNumberRegistry',
+    'get_phone_registry',
+    'phone_digits',
+    'Sender',
+    'SenderPool',
+    'LaneScheduler',
+    'classify_send',
+    'lane_budget',
+    'SuppressionList',
+    'get_suppression_list',
+    'build_snapshots',
+    'TemplateCatalog',
+    'get_template_catalog',
+    'split_template_language',
+    'waba_for_phone_number',
     'MessageValidator',
     'ValidationResult',
+    'BatchValidationResult',
     'RateLimiter',
     'Logger',
     'log_validation_failure',
@@ -47,13 +156,26 @@ __all__ = [
     'AlertPublisher',
     'get_alert_publisher',
     'retry_with_exponential_backoff',
+    'RetryConfig',
+    'RetryBudget',
+    'RetryPolicy',
+    'ServiceRetryPolicies',
+    'classify_error',
+    'is_retryable_error',
+    'set_retry_deadline',
     'send_to_dlq',
+    'queue_for_retry',
     'CircuitBreaker',
+    'CircuitBreakerOpenError',
+    'CircuitStateStore',
+    'ServiceCircuitBreakers',
+    'is_provider_failure',
     'TTLManager',
     'calculate_message_ttl',
     'calculate_dlq_message_ttl',
     'calculate_audit_log_ttl',
     'calculate_rate_limit_ttl',
+    'calculate_system_event_ttl',
     'ttl_to_decimal',
     'is_expired',
     'get_ttl_filter_expression',
@@ -62,6 +184,7 @@ __all__ = [
     'TTL_DLQ_MESSAGES',
     'TTL_AUDIT_LOGS',
     'TTL_RATE_LIMIT_TRACKERS',
+    'TTL_SYSTEM_EVENTS',
     'EnvironmentValidator',
     'validate_environment',
     'get_send_mode',
@@ -0,0 +1,277 @@
+"""
+AI Response Cache Module
+
+Caches Bedrock answers for repeated customer questions ("price?", "hi").
+
+Entries are keyed by the normalized question (case, whitespace and
+punctuation folded), the detected language and the knowledge base id,
+and live in two tiers:
+- a per-container LRU, so warm containers answer without any I/O
+- the AIResponseCache DynamoDB table with a TTL, shared by all containers
+
+Invalidation bumps a version counter in SystemConfig (ai_cache_version)
+that is part of every key. Updating prompts, AI config or the knowledge
+base orphans all earlier entries, which then expire through the TTL.
+
+Usage:
+    from utils.ai_cache import get_ai_response_cache
+
+    cache = get_ai_response_cache()
+    answer = cache.get('agent', text, 'hi', kb_id)
+    if answer is None:
+        answer = generate(...)
+        cache.put('agent', text, 'hi', kb_id, answer)
+"""
+
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AI_CACHE_TABLE = os.environ.get('AI_CACHE_TABLE', 'base-wecare-digital-AIResponseCacheTable')
+SYSTEM_CONFIG_TABLE = os.environ.get('SYSTEM_CONFIG_TABLE', 'base-wecare-digital-SystemConfigTable')
+
+# SystemConfig key holding the cache version counter
+AI_CACHE_VERSION_KEY = 'ai_cache_version'
+
+# Shared entry lifetime (DynamoDB TTL) and per-container limits
+AI_CACHE_TTL_SECONDS = int(os.environ.get('AI_CACHE_TTL_SECONDS', str(6 * 60 * 60)))
+AI_CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get('AI_CACHE_LOCAL_MAX_ENTRIES', '256'))
+AI_CACHE_LOCAL_TTL_SECONDS = 15 * 60
+
+# How long a container trusts its copy of the version counter
+AI_CACHE_VERSION_REFRESH_SECONDS = 30
+
+# Long messages are specific and rarely repeat; not worth caching
+MAX_CACHEABLE_QUERY_LENGTH = 300
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_query(text: str) -> str:
+    """
+    Fold a customer message to its cache form.
+
+    Lowercases, drops punctuation and symbols (including emoji) and
+    collapses whitespace. Combining marks are kept, so Indic vowel
+    signs still distinguish words.
+
+    Args:
+        text: Raw message text
+
+    Returns:
+        Normalized text
+    """
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = ''.join(
+        ' ' if unicodedata.category(ch)[0] in ('P', 'S') else ch
+        for ch in text
+    )
+    return _WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+class AIResponseCache:
+    """
+    Two-tier cache for Bedrock responses.
+
+    Cache failures are logged and treated as misses; they never fail
+    the AI reply.
+    """
+
+    def __init__(self, dynamodb_client=None, table_name: str = None,
+                 config_table_name: str = None, ttl_seconds: int = None,
+                 max_local_entries: int = None):
+        """
+        Initialize cache.
+
+        Args:
+            dynamodb_client: Boto3 DynamoDB client (optional, for testing)
+            table_name: Cache table name
+            config_table_name: SystemConfig table holding the version counter
+            ttl_seconds: Lifetime of shared entries
+            max_local_entries: Per-container LRU size
+        """
+        self._dynamodb = dynamodb_client
+        self.table_name = table_name or AI_CACHE_TABLE
+        self.config_table_name = config_table_name or SYSTEM_CONFIG_TABLE
+        self.ttl_seconds = ttl_seconds or AI_CACHE_TTL_SECONDS
+        self.max_local_entries = max_local_entries or AI_CACHE_LOCAL_MAX_ENTRIES
+        self._local: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._version_loaded_at = 0.0
+
+    @property
+    def dynamodb(self):
+        if self._dynamodb is None:
+            from .aws_clients import get_client
+            self._dynamodb = get_client('dynamodb')
+        return self._dynamodb
+
+    def _get_version(self) -> int:
+        """Current cache version, refreshed every few seconds."""
+        now = time.time()
+        if self._version is not None and now - self._version_loaded_at < AI_CACHE_VERSION_REFRESH_SECONDS:
+            return self._version
+        try:
+            response = self.dynamodb.get_item(
+                TableName=self.config_table_name,
+                Key={'configKey': {'S': AI_CACHE_VERSION_KEY}},
+                ProjectionExpression='cacheVersion'
+            )
+            self._version = int(response.get('Item', {}).get('cacheVersion', {}).get('N', '0'))
+        except Exception as e:
+            logger.warning(f"AI cache version unavailable: {str(e)}")
+            if self._version is None:
+                self._version = 0
+        self._version_loaded_at = now
+        return self._version
+
+    def cache_key(self, kind: str, text: str, language: str, kb_id: str) -> Optional[str]:
+        """
+        Build the cache key for a question.
+
+        Args:
+            kind: What is cached ('agent', 'kb', 'retrieve')
+            text: Raw message text
+            language: Detected language code
+            kb_id: Knowledge base id
+
+        Returns:
+            Key string, or None if the message should not be cached
+        """
+        normalized = normalize_query(text)
+        if not normalized or len(normalized) > MAX_CACHEABLE_QUERY_LENGTH:
+            return None
+        digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        return f"v{self._get_version()}#{kind}#{kb_id or '-'}#{language or '-'}#{digest}"
+
+    def get(self, kind: str, text: str, language: str, kb_id: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Returns:
+            Cached response text, or None on a miss
+        """
+        key = self.cache_key(kind, text, language, kb_id)
+        if not key:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry and entry[1] > now:
+                self._local.move_to_end(key)
+                return entry[0]
+            if entry:
+                del self._local[key]
+
+        try:
+            response = self.dynamodb.get_item(
+                TableName=self.table_name,
+                Key={'cacheKey': {'S': key}}
+            )
+        except Exception as e:
+            logger.warning(f"AI cache read failed: {str(e)}")
+            return None
+
+        item = response.get('Item')
+        if not item or int(item.get('expiresAt', {}).get('N', '0')) <= now:
+            return None
+        value = item.get('response', {}).get('S')
+        if value:
+            self._remember(key, value, now)
+        return value
+
+    def put(self, kind: str, text: str, language: str, kb_id: str, value: str) -> None:
+        """Store a response in both tiers."""
+        key = self.cache_key(kind, text, language, kb_id)
+        if not key or not value:
+            return
+
+        now = time.time()
+        self._remember(key, value, now)
+        try:
+            self.dynamodb.put_item(
+                TableName=self.table_name,
+                Item={
+                    'cacheKey': {'S': key},
+                    'response': {'S': value},
+                    'kind': {'S': kind},
+                    'kbId': {'S': kb_id or '-'},
+                    'language': {'S': language or '-'},
+                    'createdAt': {'N': str(int(now))},
+                    'expiresAt': {'N': str(int(now) + self.ttl_seconds)},
+                }
+            )
+        except Exception as e:
+            logger.warning(f"AI cache write failed: {str(e)}")
+
+    def _remember(self, key: str, value: str, now: float) -> None:
+        expires_at = now + min(self.ttl_seconds, AI_CACHE_LOCAL_TTL_SECONDS)
+        with self._lock:
+            self._local[key] = (value, expires_at)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def invalidate(self, reason: str = '', updated_by: str = None) -> int:
+        """
+        Invalidate every cached response.
+
+        Args:
+            reason: Why the cache was invalidated (logged and stored)
+            updated_by: User or function requesting invalidation
+
+        Returns:
+            New cache version
+        """
+        response = self.dynamodb.update_item(
+            TableName=self.config_table_name,
+            Key={'configKey': {'S': AI_CACHE_VERSION_KEY}},
+            UpdateExpression='ADD cacheVersion :one SET configValue = :reason, '
+                             'updatedAt = :now, updatedBy = :by',
+            ExpressionAttributeValues={
+                ':one': {'N': '1'},
+                ':reason': {'S': reason or 'manual'},
+                ':now': {'N': str(int(time.time()))},
+                ':by': {'S': updated_by or 'system'},
+            },
+            ReturnValues='UPDATED_NEW'
+        )
+        self._version = int(response['Attributes']['cacheVersion']['N'])
+        self._version_loaded_at = time.time()
+        with self._lock:
+            self._local.clear()
+
+        logger.info(f"AI response cache invalidated (version {self._version}): {reason}")
+        return self._version
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-container cache statistics."""
+        return {
+            'version': self._version,
+            'localEntries': len(self._local),
+            'maxLocalEntries': self.max_local_entries,
+            'ttlSeconds': self.ttl_seconds,
+        }
+
+
+# Global cache instance
+_ai_response_cache = None
+
+def get_ai_response_cache() -> AIResponseCache:
+    """Get or create global AIResponseCache instance."""
+    global _ai_response_cache
+    if _ai_response_cache is None:
+        _ai_response_cache = AIResponseCache()
+    return _ai_response_cache
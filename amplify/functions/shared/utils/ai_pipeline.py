@@ -0,0 +1,348 @@
+"""
+AI Reply Pipeline Module
+
+Single entry point for customer-facing AI replies: detect language,
+retrieve knowledge base context once, and generate the reply from that
+context with one model call.
+
+The previous path took three synchronous hops: inbound handler,
+ai-query-kb (Retrieve), then ai-generate-response, which queried the KB
+again through the agent or RetrieveAndGenerate. The pipeline runs in
+process (inbound handler) or behind ai-generate-response
+({"pipeline": true}), and ai-query-kb uses the same retrieval step.
+
+Usage:
+    from utils.ai_pipeline import AIPipeline
+
+    result = AIPipeline(kb_id='CTH8DH3RXY').run(message, request_id)
+    if result.suggestion:
+        send(result.suggestion)
+"""
+
+import os
+import re
+import json
+import logging
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+
+from .ai_cache import get_ai_response_cache
+from .error_handler import ServiceCircuitBreakers, ServiceRetryPolicies, CircuitBreakerOpenError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_ID = os.environ.get('AI_MODEL_ID', 'amazon.nova-lite-v1:0')
+DEFAULT_KB_ID = os.environ.get('EXTERNAL_KB_ID', 'CTH8DH3RXY')
+
+# Retrieval: top results above the relevance floor are passed to the model
+KB_MAX_RESULTS = 3
+KB_MIN_SCORE = 0.5
+
+# Generation limits (replies are 2-3 sentences)
+MAX_OUTPUT_TOKENS = 400
+TEMPERATURE = 0.3
+
+DEVANAGARI_PATTERN = re.compile(r'[\u0900-\u097F]')
+BENGALI_PATTERN = re.compile(r'[\u0980-\u09FF]')
+TAMIL_PATTERN = re.compile(r'[\u0B80-\u0BFF]')
+TELUGU_PATTERN = re.compile(r'[\u0C00-\u0C7F]')
+GUJARATI_PATTERN = re.compile(r'[\u0A80-\u0AFF]')
+
+MARATHI_WORDS = ['आहे', 'काय', 'मला', 'तुम्ही', 'आम्ही']
+HINGLISH_WORDS = ['kya', 'hai', 'kaise', 'mujhe', 'aap', 'hum', 'tum', 'kab', 'kahan', 'kyun', 'nahi', 'haan', 'theek', 'accha', 'bahut']
+
+FALLBACK_RESPONSES = {
+    'Hindi': "नमस्ते! 👋 WECARE.DIGITAL से संपर्क करने के लिए धन्यवाद। त्वरित सहायता के लिए +91 9330994400 पर कॉल करें या one@wecare.digital पर ईमेल करें। 😊",
+    'Bengali': "নমস্কার! 👋 WECARE.DIGITAL-এ যোগাযোগ করার জন্য ধন্যবাদ। দ্রুত সাহায্যের জন্য +91 9330994400-এ কল করুন বা one@wecare.digital-এ ইমেল করুন। 😊",
+    'Hinglish': "Hi! 👋 WECARE.DIGITAL se contact karne ke liye thanks. Quick help ke liye +91 9330994400 pe call karein ya one@wecare.digital pe email karein. 😊",
+    'Tamil': "வணக்கம்! 👋 WECARE.DIGITAL-ஐ தொடர்பு கொண்டதற்கு நன்றி। விரைவான உதவிக்கு +91 9330994400 அழைக்கவும் அல்லது one@wecare.digital மின்னஞ்சல் அனுப்பவும். 😊",
+    'Telugu': "నమస్కారం! 👋 WECARE.DIGITAL ని సంప్రదించినందుకు ధన్యవాదాలు। త్వరిత సహాయం కోసం +91 9330994400 కు కాల్ చేయండి లేదా one@wecare.digital కు ఇమెయిల్ చేయండి. 😊",
+    'Gujarati': "નમસ્તે! 👋 WECARE.DIGITAL નો સંપર્ક કરવા બદલ આભાર. ઝડપી મદદ માટે +91 9330994400 પર કૉલ કરો અથવા one@wecare.digital પર ઇમેઇલ કરો. 😊",
+    'Marathi': "नमस्कार! 👋 WECARE.DIGITAL शी संपर्क साधल्याबद्दल धन्यवाद। जलद मदतीसाठी +91 9330994400 वर कॉल करा किंवा one@wecare.digital वर ईमेल करा. 😊",
+}
+DEFAULT_FALLBACK_RESPONSE = "Hi! 👋 Thanks for reaching out to WECARE.DIGITAL. For quick help, call us at +91 9330994400 or email one@wecare.digital. We're here to help! 😊"
+
+
+def detect_language(text: str) -> Tuple[str, str]:
+    """Detect language from text using character patterns."""
+    if not text:
+        return ('en', 'English')
+
+    # Hindi/Devanagari
+    if DEVANAGARI_PATTERN.search(text):
+        if any(word in text for word in MARATHI_WORDS):
+            return ('mr', 'Marathi')
+        return ('hi', 'Hindi')
+
+    if BENGALI_PATTERN.search(text):
+        return ('bn', 'Bengali')
+    if TAMIL_PATTERN.search(text):
+        return ('ta', 'Tamil')
+    if TELUGU_PATTERN.search(text):
+        return ('te', 'Telugu')
+    if GUJARATI_PATTERN.search(text):
+        return ('gu', 'Gujarati')
+
+    # Hinglish
+    lowered = text.lower()
+    if sum(1 for word in HINGLISH_WORDS if word in lowered) >= 2:
+        return ('hi-Latn', 'Hinglish')
+
+    return ('en', 'English')
+
+
+def get_fallback_response(lang_name: str = 'English') -> str:
+    """Return a friendly fallback response in the detected language."""
+    return FALLBACK_RESPONSES.get(lang_name, DEFAULT_FALLBACK_RESPONSE)
+
+
+def build_prompt(lang_name: str, context_text: str, question: str) -> str:
+    """
+    Build the WECARE.DIGITAL assistant prompt.
+
+    RetrieveAndGenerate passes the placeholders $search_results$ and
+    $query$ as context_text and question.
+    """
+    return f"""You are WECARE.DIGITAL's friendly AI assistant.
+
+CRITICAL: You MUST respond ONLY in {lang_name}. Do not mix languages.
+
+INSTRUCTIONS:
+- Respond ONLY in {lang_name} language
+- Keep responses SHORT (2-3 sentences max)
+- Use 1-2 emojis for warmth
+- Always mention the specific brand name
+- End with a clear action (website, phone, or next step)
+
+BRANDS:
+- Travel/Hotels/Visa → BNB Club (bnbclub.in)
+- Documents/Registration/GST → Legal Champ (legalchamp.in)
+- Disputes/Complaints → No Fault (nofault.in)
+- Puja/Rituals → Ritual Guru (ritualguru.in)
+- Self-inquiry/Reflection → Swdhya (swdhya.in)
+
+CONTACT: +91 9330994400 | one@wecare.digital
+
+CONTEXT FROM KNOWLEDGE BASE:
+{context_text}
+
+USER QUESTION ({lang_name}): {question}
+
+Respond helpfully in {lang_name} and end with a specific action."""
+
+
+@dataclass
+class AIPipelineResult:
+    """Result of one pipeline run."""
+    suggestion: str
+    language: str
+    language_name: str
+    kb_context: str = ''
+    results_count: int = 0
+    source: str = 'model'  # model, cache, fallback
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize with the camelCase keys used in Lambda payloads."""
+        data = asdict(self)
+        return {
+            'suggestion': data['suggestion'],
+            'language': data['language'],
+            'languageName': data['language_name'],
+            'kbContext': data['kb_context'],
+            'resultsCount': data['results_count'],
+            'source': data['source'],
+            'error': data['error'],
+        }
+
+
+class AIPipeline:
+    """
+    Retrieve-once, generate-once AI reply pipeline.
+
+    Retrieval and generation results are cached (see ai_cache) and every
+    Bedrock call goes through the shared Bedrock retry policy and
+    circuit breaker. Errors never raise: the result falls back to the
+    canned reply in the detected language.
+    """
+
+    def __init__(self, kb_id: str = None, model_id: str = None,
+                 bedrock_agent_runtime=None, bedrock_runtime=None,
+                 use_cache: bool = True):
+        """
+        Initialize pipeline.
+
+        Args:
+            kb_id: Knowledge base to retrieve from
+            model_id: Foundation model used for generation
+            bedrock_agent_runtime: Boto3 client for Retrieve (optional, for testing)
+            bedrock_runtime: Boto3 client for Converse (optional, for testing)
+            use_cache: Serve repeated questions from the AI response cache
+        """
+        self.kb_id = kb_id or DEFAULT_KB_ID
+        self.model_id = model_id or DEFAULT_MODEL_ID
+        self._agent_runtime = bedrock_agent_runtime
+        self._runtime = bedrock_runtime
+        self.cache = get_ai_response_cache() if use_cache else None
+        self.breaker = ServiceCircuitBreakers.bedrock()
+        self.retry = ServiceRetryPolicies.bedrock()
+
+    @property
+    def agent_runtime(self):
+        if self._agent_runtime is None:
+            from .aws_clients import get_client
+            self._agent_runtime = get_client('bedrock-agent-runtime', max_attempts=1)
+        return self._agent_runtime
+
+    @property
+    def runtime(self):
+        if self._runtime is None:
+            from .aws_clients import get_client
+            self._runtime = get_client('bedrock-runtime', max_attempts=1)
+        return self._runtime
+
+    def _call(self, func, **kwargs) -> Dict[str, Any]:
+        return self.retry.call(self.breaker.call, func, **kwargs)
+
+    def retrieve(self, query: str) -> Tuple[str, int]:
+        """
+        Retrieve knowledge base context for a query.
+
+        Args:
+            query: Customer message
+
+        Returns:
+            Tuple of (context text, number of results returned)
+
+        Raises:
+            Bedrock errors and CircuitBreakerOpenError
+        """
+        if self.cache:
+            cached = self.cache.get('retrieve', query, '', self.kb_id)
+            if cached:
+                data = json.loads(cached)
+                return data.get('context', ''), data.get('resultsCount', 0)
+
+        response = self._call(
+            self.agent_runtime.retrieve,
+            knowledgeBaseId=self.kb_id,
+            retrievalQuery={'text': query},
+            retrievalConfiguration={
+                'vectorSearchConfiguration': {
+                    'numberOfResults': KB_MAX_RESULTS
+                }
+            }
+        )
+
+        results = response.get('retrievalResults', [])
+        context_parts = []
+        for result in results:
+            content = result.get('content', {}).get('text', '')
+            if content and result.get('score', 0) > KB_MIN_SCORE:
+                context_parts.append(content)
+        context_text = '\n\n'.join(context_parts[:KB_MAX_RESULTS])
+
+        # Empty context is cached too: greetings match nothing in the KB
+        if self.cache:
+            self.cache.put('retrieve', query, '', self.kb_id, json.dumps({
+                'context': context_text,
+                'resultsCount': len(results),
+            }))
+        return context_text, len(results)
+
+    def generate(self, message: str, context_text: str, lang: str, lang_name: str) -> str:
+        """
+        Generate a reply from already retrieved context.
+
+        Args:
+            message: Customer message
+            context_text: Knowledge base context (may be empty)
+            lang: Detected language code
+            lang_name: Detected language name
+
+        Returns:
+            Reply text (empty if the model returned nothing)
+
+        Raises:
+            Bedrock errors and CircuitBreakerOpenError
+        """
+        response = self._call(
+            self.runtime.converse,
+            modelId=self.model_id,
+            system=[{'text': build_prompt(lang_name, context_text or 'No matching entries.', message)}],
+            messages=[{'role': 'user', 'content': [{'text': message}]}],
+            inferenceConfig={'maxTokens': MAX_OUTPUT_TOKENS, 'temperature': TEMPERATURE}
+        )
+        content = response.get('output', {}).get('message', {}).get('content', [])
+        return ''.join(block.get('text', '') for block in content).strip()
+
+    def run(self, message: str, request_id: str = None,
+            context_text: Optional[str] = None) -> AIPipelineResult:
+        """
+        Produce a reply for a customer message.
+
+        Args:
+            message: Customer message
+            request_id: Request id for logging
+            context_text: Pre-retrieved KB context; skips retrieval when given
+
+        Returns:
+            AIPipelineResult (never raises)
+        """
+        lang, lang_name = detect_language(message)
+        if not message:
+            return AIPipelineResult(get_fallback_response(lang_name), lang, lang_name, source='fallback')
+
+        if self.cache:
+            cached = self.cache.get(f'rag:{self.model_id}', message, lang, self.kb_id)
+            if cached:
+                logger.info(json.dumps({
+                    'event': 'ai_cache_hit',
+                    'kind': 'rag',
+                    'detectedLanguage': lang_name,
+                    'requestId': request_id
+                }))
+                return AIPipelineResult(cached, lang, lang_name, source='cache')
+
+        results_count = 0
+        try:
+            if context_text is None:
+                context_text, results_count = self.retrieve(message)
+            suggestion = self.generate(message, context_text, lang, lang_name)
+        except CircuitBreakerOpenError as e:
+            logger.warning(json.dumps({
+                'event': 'bedrock_circuit_open',
+                'error': str(e),
+                'requestId': request_id
+            }))
+            return AIPipelineResult(get_fallback_response(lang_name), lang, lang_name,
+                                    source='fallback', error=str(e))
+        except Exception as e:
+            logger.error(json.dumps({
+                'event': 'ai_pipeline_error',
+                'kbId': self.kb_id,
+                'error': str(e),
+                'requestId': request_id
+            }))
+            return AIPipelineResult(get_fallback_response(lang_name), lang, lang_name,
+                                    kb_context=context_text or '', source='fallback', error=str(e))
+
+        if not suggestion:
+            return AIPipelineResult(get_fallback_response(lang_name), lang, lang_name,
+                                    kb_context=context_text, results_count=results_count,
+                                    source='fallback')
+
+        if self.cache:
+            self.cache.put(f'rag:{self.model_id}', message, lang, self.kb_id, suggestion)
+
+        logger.info(json.dumps({
+            'event': 'ai_pipeline_success',
+            'kbId': self.kb_id,
+            'resultsCount': results_count,
+            'contextLength': len(context_text),
+            'responseLength': len(suggestion),
+            'detectedLanguage': lang_name,
+            'requestId': request_id
+        }))
+        return AIPipelineResult(suggestion, lang, lang_name, kb_context=context_text,
+                                results_count=results_count)
@@ -0,0 +1,215 @@
+"""
+AWS Client Factory Module
+
+Provides tuned, lazily constructed boto3 clients and resources shared
+by every Lambda handler in a container.
+
+Default botocore config gives a pool of 10 connections, legacy retries
+and no TCP keepalive. Clients built here use a larger connection pool,
+adaptive retry mode, keepalive and per-service timeouts. Construction is
+deferred until a client is first used, so a handler only pays for the
+clients the current route actually touches.
+
+Usage:
+    from utils.aws_clients import lazy_client, lazy_resource
+
+    dynamodb = lazy_resource('dynamodb')
+    s3 = lazy_client('s3')
+
+    s3.put_object(...)  # client is built on first attribute access
+"""
+
+import os
+import threading
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+
+# Connection pool size per client. Sized for thread-pool fan-out inside
+# a single invocation (parallel scans, batch writes, S3 resolution).
+MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '50'))
+
+# Adaptive mode adds client-side rate limiting on throttling errors
+DEFAULT_RETRY_MODE = 'adaptive'
+DEFAULT_MAX_ATTEMPTS = 3
+
+# (connect_timeout, read_timeout) in seconds per service.
+# Read timeouts must stay well below the Lambda timeout of the callers.
+SERVICE_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    'dynamodb': (1.0, 5.0),
+    's3': (2.0, 15.0),
+    'sqs': (1.0, 5.0),
+    'sns': (2.0, 10.0),
+    'lambda': (2.0, 60.0),
+    'socialmessaging': (2.0, 10.0),
+    'ses': (2.0, 10.0),
+    'pinpoint': (2.0, 10.0),
+    'connect': (2.0, 10.0),
+    'polly': (2.0, 15.0),
+    'cloudwatch': (1.0, 5.0),
+    'bedrock-agent-runtime': (2.0, 60.0),
+    'bedrock-runtime': (2.0, 30.0),
+    'ce': (2.0, 20.0),
+}
+DEFAULT_TIMEOUTS: Tuple[float, float] = (2.0, 10.0)
+
+# Total attempts (including the first call) for long-running synchronous
+# invokes that must not be silently duplicated by the SDK
+SERVICE_MAX_ATTEMPTS: Dict[str, int] = {
+    'lambda': 2,
+    'bedrock-agent-runtime': 2,
+}
+
+_clients: Dict[Tuple[str, str, Optional[int]], Any] = {}
+_resources: Dict[Tuple[str, str], Any] = {}
+_lock = threading.Lock()
+
+
+def get_client_config(service_name: str, **overrides) -> Config:
+    """
+    Build botocore Config for a service.
+
+    Args:
+        service_name: AWS service name (e.g. 'dynamodb', 's3')
+        **overrides: Config keyword overrides
+
+    Returns:
+        botocore Config with pool, retry, keepalive and timeouts set
+    """
+    connect_timeout, read_timeout = SERVICE_TIMEOUTS.get(service_name, DEFAULT_TIMEOUTS)
+    options = {
+        'max_pool_connections': MAX_POOL_CONNECTIONS,
+        'retries': {
+            'mode': DEFAULT_RETRY_MODE,
+            'total_max_attempts': SERVICE_MAX_ATTEMPTS.get(service_name, DEFAULT_MAX_ATTEMPTS),
+        },
+        'tcp_keepalive': True,
+        'connect_timeout': connect_timeout,
+        'read_timeout': read_timeout,
+    }
+    options.update(overrides)
+    return Config(**options)
+
+
+def get_client(service_name: str, region_name: Optional[str] = None,
+               max_attempts: Optional[int] = None):
+    """
+    Get or create a tuned boto3 client singleton for this container.
+
+    Args:
+        service_name: AWS service name
+        region_name: AWS region (defaults to AWS_REGION)
+        max_attempts: Total SDK attempts override. Pass 1 when the caller
+            retries itself (see error_handler.RetryPolicy).
+
+    Returns:
+        boto3 client
+    """
+    region = region_name or DEFAULT_REGION
+    key = (service_name, region, max_attempts)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                overrides = {}
+                if max_attempts is not None:
+                    overrides['retries'] = {
+                        'mode': DEFAULT_RETRY_MODE,
+                        'total_max_attempts': max_attempts,
+                    }
+                client = boto3.client(
+                    service_name,
+                    region_name=region,
+                    config=get_client_config(service_name, **overrides)
+                )
+                _clients[key] = client
+    return client
+
+
+def get_resource(service_name: str, region_name: Optional[str] = None):
+    """
+    Get or create a tuned boto3 resource singleton for this container.
+
+    Args:
+        service_name: AWS service name (e.g. 'dynamodb')
+        region_name: AWS region (defaults to AWS_REGION)
+
+    Returns:
+        boto3 service resource
+    """
+    region = region_name or DEFAULT_REGION
+    key = (service_name, region)
+    resource = _resources.get(key)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(key)
+            if resource is None:
+                resource = boto3.resource(
+                    service_name,
+                    region_name=region,
+                    config=get_client_config(service_name)
+                )
+                _resources[key] = resource
+    return resource
+
+
+class _LazyProxy:
+    """Module-level stand-in that builds the real client on first use."""
+
+    __slots__ = ('_factory', '_service_name', '_region_name', '_options')
+
+    def __init__(self, factory, service_name: str, region_name: Optional[str], **options):
+        self._factory = factory
+        self._service_name = service_name
+        self._region_name = region_name
+        self._options = options
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._factory(self._service_name, self._region_name, **self._options), name)
+
+    def __repr__(self) -> str:
+        return f"<lazy {self._service_name} ({self._region_name or DEFAULT_REGION})>"
+
+
+def lazy_client(service_name: str, region_name: Optional[str] = None,
+                max_attempts: Optional[int] = None) -> Any:
+    """
+    Get a proxy for a client that is only constructed on first use.
+
+    Args:
+        service_name: AWS service name
+        region_name: AWS region (defaults to AWS_REGION)
+        max_attempts: Total SDK attempts override (see get_client)
+
+    Returns:
+        Proxy forwarding attribute access to the shared client
+    """
+    return _LazyProxy(get_client, service_name, region_name, max_attempts=max_attempts)
+
+
+def lazy_resource(service_name: str, region_name: Optional[str] = None) -> Any:
+    """
+    Get a proxy for a resource that is only constructed on first use.
+
+    Args:
+        service_name: AWS service name
+        region_name: AWS region (defaults to AWS_REGION)
+
+    Returns:
+        Proxy forwarding attribute access to the shared resource
+    """
+    return _LazyProxy(get_resource, service_name, region_name)
+
+
+def reset_clients() -> None:
+    """Drop cached clients (for testing or credential rotation)."""
+    with _lock:
+        _clients.clear()
+        _resources.clear()
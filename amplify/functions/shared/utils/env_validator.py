@@ -235,3 +235,8 @@ def get_send_mode() -> str:
 def is_live_mode() -> bool:
     """Check if running in LIVE mode. Always True in production."""
     return True
+
+
+def is_dry_run_mode() -> bool:
+    """Check if running in DRY_RUN mode. Always False in production."""
+    return not is_live_mode()
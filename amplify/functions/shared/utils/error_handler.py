@@ -4,6 +4,13 @@ Error Handling Utilities Module
 Provides retry logic with exponential backoff, DLQ handling,
 and circuit breaker pattern for external API calls.
 
+Retries use full jitter, a per-service token-bucket budget and the
+Lambda deadline, and only retry errors classified as retryable.
+
+Circuit breaker state can be shared across Lambda containers through a
+single SystemConfig item per breaker, so one container discovering an
+outage stops every container from hammering the provider.
+
 Requirements: 4.7, 8.9, 13.8
 """
 
@@ -13,13 +20,29 @@ import json
 import random
 import logging
 import functools
+import uuid
 from typing import Callable, Any, Dict, Optional, List
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime, timedelta
 
+from botocore.exceptions import (
+    ClientError,
+    ConnectionError as BotoConnectionError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    HTTPClientError,
+    ReadTimeoutError,
+)
+
 logger = logging.getLogger(__name__)
 
+# Identifies this container when it holds the half-open probe lease
+CONTAINER_ID = str(uuid.uuid4())
+
+# Shared breaker items live in SystemConfig under this key prefix
+CIRCUIT_BREAKER_KEY_PREFIX = 'circuit_breaker#'
+
 
 class CircuitState(Enum):
     """Circuit breaker states."""
@@ -28,6 +51,69 @@ class CircuitState(Enum):
     HALF_OPEN = "HALF_OPEN"  # Testing if service recovered
 
 
+# Error codes that are always safe to retry: the provider rejected the
+# request before doing any work (throttling, shedding load)
+THROTTLING_ERROR_CODES = frozenset({
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'RequestLimitExceeded',
+    'BandwidthLimitExceeded',
+    'SlowDown',
+    'ServiceUnavailable',
+    'ServiceUnavailableException',
+})
+
+# Transient server-side errors. The request may already have taken effect,
+# so these are only retried for idempotent operations.
+TRANSIENT_ERROR_CODES = frozenset({
+    'InternalError',
+    'InternalFailure',
+    'InternalServerError',
+    'InternalServerException',
+    'ServiceException',
+    'RequestTimeout',
+    'RequestTimeoutException',
+    'PriorRequestNotComplete',
+    'TransactionInProgressException',
+    'DependencyFailedException',
+    'ModelNotReadyException',
+    'ModelTimeoutException',
+})
+
+# Caller errors that will fail the same way on every attempt
+TERMINAL_ERROR_CODES = frozenset({
+    'ValidationException',
+    'InvalidParameterException',
+    'InvalidParameterValue',
+    'InvalidRequestException',
+    'BadRequestException',
+    'AccessDeniedException',
+    'AccessDenied',
+    'UnauthorizedException',
+    'UnrecognizedClientException',
+    'ExpiredTokenException',
+    'ResourceNotFoundException',
+    'NotFoundException',
+    'ConditionalCheckFailedException',
+    'MessageRejected',
+    'MailFromDomainNotVerifiedException',
+    'AccountSendingPausedException',
+    'ConfigurationSetDoesNotExist',
+    'OptedOutException',
+})
+
+RETRY_RETRYABLE = 'retryable'
+RETRY_RETRYABLE_IF_IDEMPOTENT = 'retryable_if_idempotent'
+RETRY_TERMINAL = 'terminal'
+
+# Deadline of the current invocation (epoch seconds), set per invocation
+_invocation_deadline: Optional[float] = None
+
+
 @dataclass
 class RetryConfig:
     """Configuration for retry with exponential backoff."""
@@ -37,13 +123,199 @@ class RetryConfig:
     exponential_base: float = 2.0
     jitter: bool = True
     retryable_exceptions: tuple = (Exception,)
+    idempotent: bool = True
+    deadline_reserve_seconds: float = 2.0
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Classify an exception for retry purposes.
+    
+    Args:
+        error: Exception raised by a provider call
+        
+    Returns:
+        RETRY_RETRYABLE, RETRY_RETRYABLE_IF_IDEMPOTENT or RETRY_TERMINAL
+    """
+    if isinstance(error, CircuitBreakerOpenError):
+        return RETRY_TERMINAL
+    
+    if isinstance(error, (ConnectTimeoutError, EndpointConnectionError)):
+        # Never reached the provider
+        return RETRY_RETRYABLE
+    if isinstance(error, (ReadTimeoutError, BotoConnectionError, HTTPClientError)):
+        return RETRY_RETRYABLE_IF_IDEMPOTENT
+    
+    if isinstance(error, ClientError):
+        code = error.response.get('Error', {}).get('Code', '')
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+        if code in THROTTLING_ERROR_CODES or 'Throttl' in code or status == 429:
+            return RETRY_RETRYABLE
+        if code in TERMINAL_ERROR_CODES:
+            return RETRY_TERMINAL
+        if code in TRANSIENT_ERROR_CODES or status >= 500:
+            return RETRY_RETRYABLE_IF_IDEMPOTENT
+        return RETRY_TERMINAL
+    
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return RETRY_RETRYABLE_IF_IDEMPOTENT
+    return RETRY_TERMINAL
+
+
+def is_retryable_error(error: Exception, idempotent: bool = True) -> bool:
+    """Check whether an exception may be retried."""
+    classification = classify_error(error)
+    if classification == RETRY_RETRYABLE_IF_IDEMPOTENT:
+        return idempotent
+    return classification == RETRY_RETRYABLE
+
+
+def set_retry_deadline(context: Any) -> None:
+    """
+    Bound retries of the current invocation by the Lambda deadline.
+    
+    Call at the top of a handler. Without a context (local runs) retries
+    are bounded only by max_retries and the retry budget.
+    
+    Args:
+        context: Lambda context (provides get_remaining_time_in_millis)
+    """
+    global _invocation_deadline
+    remaining = getattr(context, 'get_remaining_time_in_millis', None)
+    _invocation_deadline = time.time() + remaining() / 1000.0 if callable(remaining) else None
+
+
+def get_remaining_seconds() -> Optional[float]:
+    """Seconds left in the current invocation, or None if unknown."""
+    if _invocation_deadline is None:
+        return None
+    return _invocation_deadline - time.time()
+
+
+@dataclass
+class RetryBudget:
+    """
+    Token bucket limiting retries per service within a container.
+    
+    Every retry spends one token; tokens refill at a fixed rate. When a
+    provider is failing for everyone, the bucket drains and callers fail
+    on the first error instead of multiplying load with retries.
+    """
+    
+    name: str
+    capacity: float = 10.0
+    refill_per_second: float = 0.5
+    
+    _tokens: float = field(default=-1.0, init=False)
+    _updated_at: float = field(default=0.0, init=False)
+    
+    def _refill(self) -> None:
+        now = time.time()
+        if self._tokens < 0:
+            self._tokens = self.capacity
+        else:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+    
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Spend tokens for a retry. Returns False when the budget is exhausted."""
+        self._refill()
+        if self._tokens < tokens:
+            return False
+        self._tokens -= tokens
+        return True
+    
+    @property
+    def available(self) -> float:
+        """Tokens currently available."""
+        self._refill()
+        return self._tokens
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retry engine: classified errors, full-jitter backoff, a shared retry
+    budget and the Lambda deadline.
+    
+    Delays follow full jitter, uniform(0, min(max_delay, base * exp^n)),
+    which spreads correlated retries from many containers. A retry is
+    skipped when the error is terminal, the budget is empty, or the
+    sleep would leave less than deadline_reserve_seconds of the invocation.
+    """
+    
+    name: str
+    config: RetryConfig = field(default_factory=RetryConfig)
+    budget: Optional[RetryBudget] = None
+    
+    def backoff_delay(self, attempt: int) -> float:
+        """Delay before retry number attempt + 1."""
+        cap = min(
+            self.config.max_delay_seconds,
+            self.config.base_delay_seconds * (self.config.exponential_base ** attempt)
+        )
+        return random.uniform(0, cap) if self.config.jitter else cap
+    
+    def _give_up_reason(self, error: Exception, attempt: int, delay: float) -> Optional[str]:
+        if not isinstance(error, self.config.retryable_exceptions):
+            return 'not_retryable'
+        if not is_retryable_error(error, self.config.idempotent):
+            return 'terminal_error'
+        if attempt >= self.config.max_retries:
+            return 'max_retries'
+        remaining = get_remaining_seconds()
+        if remaining is not None and remaining - delay < self.config.deadline_reserve_seconds:
+            return 'deadline'
+        if self.budget and not self.budget.try_acquire():
+            return 'budget_exhausted'
+        return None
+    
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Execute function, retrying per this policy.
+        
+        Args:
+            func: Function to execute
+            *args: Function arguments
+            **kwargs: Function keyword arguments
+            
+        Returns:
+            Function result
+            
+        Raises:
+            The last exception once the policy gives up
+        """
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                delay = self.backoff_delay(attempt)
+                reason = self._give_up_reason(e, attempt, delay)
+                if reason:
+                    if attempt > 0 or reason not in ('not_retryable', 'terminal_error'):
+                        logger.warning(
+                            f"Retry policy '{self.name}' giving up after {attempt + 1} attempts: {reason}",
+                            extra={'error': str(e), 'reason': reason}
+                        )
+                    raise
+                
+                logger.warning(
+                    f"Retry {attempt + 1}/{self.config.max_retries} for '{self.name}' "
+                    f"after {delay:.2f}s delay",
+                    extra={'error': str(e), 'delay': delay}
+                )
+                time.sleep(delay)
+                attempt += 1
 
 
 def retry_with_exponential_backoff(
     max_retries: int = 3,
     base_delay: float = 1.0,
     max_delay: float = 30.0,
-    retryable_exceptions: tuple = None
+    retryable_exceptions: tuple = None,
+    service: str = None,
+    idempotent: bool = True
 ) -> Callable:
     """
     Decorator for retry with exponential backoff.
@@ -51,11 +323,17 @@ def retry_with_exponential_backoff(
     Requirement 13.8: Implement exponential backoff for API retry
     attempts with maximum 3 retries.
     
+    Uses full jitter, skips terminal errors, stops at the invocation
+    deadline (see set_retry_deadline) and, when service is given, spends
+    that service's shared retry budget.
+    
     Args:
         max_retries: Maximum number of retry attempts (default 3)
         base_delay: Initial delay in seconds (default 1.0)
         max_delay: Maximum delay in seconds (default 30.0)
         retryable_exceptions: Tuple of exceptions to retry on
+        service: Retry budget to draw from (optional)
+        idempotent: Whether ambiguous failures (5xx, read timeouts) may be retried
         
     Returns:
         Decorated function with retry logic
@@ -64,39 +342,21 @@ def retry_with_exponential_backoff(
         retryable_exceptions = (Exception,)
     
     def decorator(func: Callable) -> Callable:
+        policy = RetryPolicy(
+            name=func.__name__,
+            config=RetryConfig(
+                max_retries=max_retries,
+                base_delay_seconds=base_delay,
+                max_delay_seconds=max_delay,
+                retryable_exceptions=retryable_exceptions,
+                idempotent=idempotent
+            ),
+            budget=ServiceRetryPolicies.budget(service) if service else None
+        )
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            last_exception = None
-            
-            for attempt in range(max_retries + 1):
-                try:
-                    return func(*args, **kwargs)
-                except retryable_exceptions as e:
-                    last_exception = e
-                    
-                    if attempt == max_retries:
-                        logger.error(
-                            f"Max retries ({max_retries}) exceeded for {func.__name__}",
-                            extra={'error': str(e), 'attempts': attempt + 1}
-                        )
-                        raise
-                    
-                    # Calculate delay with exponential backoff
-                    delay = min(base_delay * (2 ** attempt), max_delay)
-                    
-                    # Add jitter (±25%)
-                    jitter = delay * 0.25 * (random.random() * 2 - 1)
-                    delay = max(0, delay + jitter)
-                    
-                    logger.warning(
-                        f"Retry {attempt + 1}/{max_retries} for {func.__name__} "
-                        f"after {delay:.2f}s delay",
-                        extra={'error': str(e), 'delay': delay}
-                    )
-                    
-                    time.sleep(delay)
-            
-            raise last_exception
+            return policy.call(func, *args, **kwargs)
         
         return wrapper
     return decorator
@@ -107,7 +367,9 @@ def send_to_dlq(
     queue_name: str,
     error: str,
     sqs_client=None,
-    retry_count: int = 0
+    retry_count: int = 0,
+    handler_function: Optional[str] = None,
+    delay_seconds: int = 0
 ) -> bool:
     """
     Send failed message to Dead Letter Queue.
@@ -121,12 +383,12 @@ def send_to_dlq(
         error: Error message/reason
         sqs_client: Boto3 SQS client (optional)
         retry_count: Current retry count
+        handler_function: Lambda to re-invoke with the original event on replay
+        delay_seconds: Hold the message back before it becomes visible (max 900)
         
     Returns:
         True if successfully sent to DLQ, False otherwise
     """
-    import uuid
-    
     dlq_message = {
         'dlqMessageId': str(uuid.uuid4()),
         'originalMessageId': message.get('messageId') or message.get('id'),
@@ -138,6 +400,10 @@ def send_to_dlq(
         # TTL: 7 days in seconds
         'expiresAt': int(time.time()) + (7 * 24 * 60 * 60)
     }
+    if handler_function:
+        # dlq-replay invokes handlerFunction with originalRecord
+        dlq_message['originalRecord'] = message
+        dlq_message['handlerFunction'] = handler_function
     
     logger.warning(
         f"Sending message to DLQ: {queue_name}",
@@ -162,7 +428,8 @@ def send_to_dlq(
         
         sqs_client.send_message(
             QueueUrl=queue_url,
-            MessageBody=json.dumps(dlq_message),
+            MessageBody=json.dumps(dlq_message, default=str),
+            DelaySeconds=max(0, min(int(delay_seconds), 900)),
             MessageAttributes={
                 'RetryCount': {
                     'DataType': 'Number',
@@ -181,6 +448,271 @@ def send_to_dlq(
         return False
 
 
+def queue_for_retry(
+    event: Dict[str, Any],
+    error: str,
+    breaker: 'CircuitBreaker',
+    sqs_client=None,
+    queue_name: str = 'outbound-dlq'
+) -> bool:
+    """
+    Park a request whose provider breaker is open.
+    
+    The original Lambda event goes to the retry queue, delayed until the
+    breaker may probe again, and dlq-replay re-invokes this function with
+    it. Replayed events are never re-queued, so a replay during an outage
+    fails instead of looping.
+    
+    Args:
+        event: Original Lambda event
+        error: Reason for queueing
+        breaker: Breaker that rejected the call (sets the delay)
+        sqs_client: Boto3 SQS client
+        queue_name: Retry queue name (default outbound-dlq)
+        
+    Returns:
+        True if the event was queued
+    """
+    if event.get('dlqReplay'):
+        return False
+    return send_to_dlq(
+        event,
+        queue_name,
+        error,
+        sqs_client=sqs_client,
+        handler_function=os.environ.get('AWS_LAMBDA_FUNCTION_NAME'),
+        delay_seconds=breaker.retry_after_seconds()
+    )
+
+
+def is_provider_failure(error: Exception) -> bool:
+    """
+    Check whether an exception should count against a circuit breaker.
+    
+    Caller errors (4xx validation, auth, not found) say nothing about
+    provider health and must not trip the breaker. Throttling, 5xx,
+    timeouts and connection errors do.
+    
+    Args:
+        error: Exception raised by a provider call
+        
+    Returns:
+        True if the error indicates the provider is unhealthy
+    """
+    response = getattr(error, 'response', None)
+    if not isinstance(response, dict):
+        return True
+    
+    code = response.get('Error', {}).get('Code', '')
+    status = response.get('ResponseMetadata', {}).get('HTTPStatusCode', 500)
+    if 'Throttl' in code or code in ('TooManyRequestsException', 'RequestLimitExceeded'):
+        return True
+    return status >= 500
+
+
+class CircuitStateStore:
+    """
+    Circuit breaker state shared across containers via DynamoDB.
+    
+    One SystemConfig item per breaker (configKey = circuit_breaker#<name>)
+    holds the state, a windowed failure count, the open deadline and the
+    half-open probe lease. Reads are cached per container for a few
+    seconds, and the closed/success path performs no writes, so a
+    healthy provider costs at most one GetItem per cache interval.
+    
+    Only the container that wins the conditional probe-lease update may
+    send traffic while HALF_OPEN; every other container keeps failing fast.
+    """
+    
+    def __init__(self, dynamodb_client=None, table_name: str = None,
+                 cache_ttl_seconds: float = 5.0):
+        """
+        Initialize store.
+        
+        Args:
+            dynamodb_client: Boto3 DynamoDB client (optional, for testing)
+            table_name: Table holding breaker items (default SystemConfig)
+            cache_ttl_seconds: How long a container trusts its cached state
+        """
+        self._dynamodb = dynamodb_client
+        self.table_name = table_name or os.environ.get(
+            'CIRCUIT_BREAKER_TABLE',
+            os.environ.get('SYSTEM_CONFIG_TABLE', 'base-wecare-digital-SystemConfigTable')
+        )
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self._cache: Dict[str, Dict[str, Any]] = {}
+    
+    @property
+    def dynamodb(self):
+        if self._dynamodb is None:
+            from .aws_clients import get_client
+            self._dynamodb = get_client('dynamodb')
+        return self._dynamodb
+    
+    def _key(self, name: str) -> Dict[str, Any]:
+        return {'configKey': {'S': f'{CIRCUIT_BREAKER_KEY_PREFIX}{name}'}}
+    
+    @staticmethod
+    def _parse(item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'state': item.get('state', {}).get('S', CircuitState.CLOSED.value),
+            'failureCount': int(item.get('failureCount', {}).get('N', '0')),
+            'windowStart': float(item.get('windowStart', {}).get('N', '0')),
+            'openUntil': float(item.get('openUntil', {}).get('N', '0')),
+            'probeOwner': item.get('probeOwner', {}).get('S'),
+            'probeLeaseUntil': float(item.get('probeLeaseUntil', {}).get('N', '0')),
+        }
+    
+    def _remember(self, name: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        state['_cachedAt'] = time.time()
+        self._cache[name] = state
+        return state
+    
+    def peek(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get the last state this container saw, without a read."""
+        return self._cache.get(name)
+    
+    def load(self, name: str, force: bool = False) -> Dict[str, Any]:
+        """Get breaker state, served from the container cache when fresh."""
+        cached = self._cache.get(name)
+        if cached and not force and time.time() - cached['_cachedAt'] < self.cache_ttl_seconds:
+            return cached
+        response = self.dynamodb.get_item(
+            TableName=self.table_name,
+            Key=self._key(name),
+            ConsistentRead=force
+        )
+        return self._remember(name, self._parse(response.get('Item', {})))
+    
+    def record_failure(self, name: str, now: float, window_seconds: int) -> int:
+        """Count a failure in the current window. Returns the window count."""
+        try:
+            response = self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key=self._key(name),
+                UpdateExpression='ADD failureCount :one SET updatedAt = :now',
+                ConditionExpression='windowStart >= :floor',
+                ExpressionAttributeValues={
+                    ':one': {'N': '1'},
+                    ':now': {'N': str(now)},
+                    ':floor': {'N': str(now - window_seconds)},
+                },
+                ReturnValues='ALL_NEW'
+            )
+        except self.dynamodb.exceptions.ConditionalCheckFailedException:
+            # Window expired (or item missing): start a new one
+            response = self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key=self._key(name),
+                UpdateExpression='SET failureCount = :one, windowStart = :now, updatedAt = :now',
+                ExpressionAttributeValues={
+                    ':one': {'N': '1'},
+                    ':now': {'N': str(now)},
+                },
+                ReturnValues='ALL_NEW'
+            )
+        state = self._remember(name, self._parse(response.get('Attributes', {})))
+        return state['failureCount']
+    
+    def open(self, name: str, now: float, recovery_timeout_seconds: int,
+             probe_owner: Optional[str] = None) -> bool:
+        """
+        Move breaker to OPEN.
+        
+        From CLOSED any container may open it; from HALF_OPEN only the
+        probe owner may (re)open it. Returns True if this call opened it.
+        """
+        condition = 'attribute_not_exists(#st) OR #st = :closed'
+        values = {
+            ':open': {'S': CircuitState.OPEN.value},
+            ':closed': {'S': CircuitState.CLOSED.value},
+            ':until': {'N': str(now + recovery_timeout_seconds)},
+            ':now': {'N': str(now)},
+        }
+        if probe_owner:
+            condition = '#st = :half AND probeOwner = :me'
+            values[':half'] = {'S': CircuitState.HALF_OPEN.value}
+            values[':me'] = {'S': probe_owner}
+            del values[':closed']
+        try:
+            self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key=self._key(name),
+                UpdateExpression='SET #st = :open, openUntil = :until, updatedAt = :now '
+                                 'REMOVE probeOwner, probeLeaseUntil',
+                ConditionExpression=condition,
+                ExpressionAttributeNames={'#st': 'state'},
+                ExpressionAttributeValues=values
+            )
+            opened = True
+        except self.dynamodb.exceptions.ConditionalCheckFailedException:
+            opened = False
+        self._cache.pop(name, None)
+        return opened
+    
+    def acquire_probe(self, name: str, owner: str, now: float, lease_seconds: int) -> bool:
+        """Try to become the single container probing a recovering provider."""
+        try:
+            self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key=self._key(name),
+                UpdateExpression='SET #st = :half, probeOwner = :me, probeLeaseUntil = :lease, updatedAt = :now',
+                ConditionExpression=(
+                    '(#st = :open AND openUntil <= :now) OR '
+                    '(#st = :half AND (probeOwner = :me OR probeLeaseUntil < :now))'
+                ),
+                ExpressionAttributeNames={'#st': 'state'},
+                ExpressionAttributeValues={
+                    ':half': {'S': CircuitState.HALF_OPEN.value},
+                    ':open': {'S': CircuitState.OPEN.value},
+                    ':me': {'S': owner},
+                    ':lease': {'N': str(now + lease_seconds)},
+                    ':now': {'N': str(now)},
+                }
+            )
+        except self.dynamodb.exceptions.ConditionalCheckFailedException:
+            self._cache.pop(name, None)
+            return False
+        self._remember(name, {
+            'state': CircuitState.HALF_OPEN.value,
+            'failureCount': 0,
+            'windowStart': 0.0,
+            'openUntil': 0.0,
+            'probeOwner': owner,
+            'probeLeaseUntil': now + lease_seconds,
+        })
+        return True
+    
+    def close(self, name: str, owner: str, now: float) -> bool:
+        """Close the breaker after a successful probe by its owner."""
+        try:
+            self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key=self._key(name),
+                UpdateExpression='SET #st = :closed, failureCount = :zero, windowStart = :now, '
+                                 'updatedAt = :now REMOVE probeOwner, probeLeaseUntil, openUntil',
+                ConditionExpression='#st = :half AND probeOwner = :me',
+                ExpressionAttributeNames={'#st': 'state'},
+                ExpressionAttributeValues={
+                    ':closed': {'S': CircuitState.CLOSED.value},
+                    ':half': {'S': CircuitState.HALF_OPEN.value},
+                    ':zero': {'N': '0'},
+                    ':me': {'S': owner},
+                    ':now': {'N': str(now)},
+                }
+            )
+            closed = True
+        except self.dynamodb.exceptions.ConditionalCheckFailedException:
+            closed = False
+        self._cache.pop(name, None)
+        return closed
+    
+    def reset(self, name: str) -> None:
+        """Delete shared state for a breaker (manual recovery)."""
+        self.dynamodb.delete_item(TableName=self.table_name, Key=self._key(name))
+        self._cache.pop(name, None)
+
+
 @dataclass
 class CircuitBreaker:
     """
@@ -193,12 +725,20 @@ class CircuitBreaker:
     - CLOSED: Normal operation, requests pass through
     - OPEN: Service failing, requests rejected immediately
     - HALF_OPEN: Testing if service recovered
+    
+    Without a store, state is kept per process. With a CircuitStateStore,
+    state is shared across containers: failures are counted in a
+    window of failure_window_seconds, and while HALF_OPEN only the
+    container holding the probe lease sends traffic.
     """
     
     name: str
     failure_threshold: int = 5
     recovery_timeout_seconds: int = 30
     half_open_max_calls: int = 3
+    failure_window_seconds: int = 60
+    probe_lease_seconds: int = 15
+    store: Optional[CircuitStateStore] = None
     
     # Internal state
     _state: CircuitState = field(default=CircuitState.CLOSED, init=False)
@@ -210,6 +750,9 @@ class CircuitBreaker:
     @property
     def state(self) -> CircuitState:
         """Get current circuit state, checking for recovery."""
+        if self.store:
+            shared = self._load_shared()
+            return CircuitState(shared['state']) if shared else CircuitState.CLOSED
         if self._state == CircuitState.OPEN:
             if self._should_attempt_recovery():
                 self._state = CircuitState.HALF_OPEN
@@ -224,6 +767,54 @@ class CircuitBreaker:
         elapsed = time.time() - self._last_failure_time
         return elapsed >= self.recovery_timeout_seconds
 
+    def _load_shared(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Read shared state; a store outage must never block sends."""
+        try:
+            return self.store.load(self.name, force=force)
+        except Exception as e:
+            logger.warning(f"Circuit breaker '{self.name}' state unavailable: {str(e)}")
+            return None
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may go to the provider right now.
+        
+        Returns:
+            False while OPEN (or HALF_OPEN with another container probing)
+        """
+        if not self.store:
+            return self.state != CircuitState.OPEN
+        
+        shared = self._load_shared()
+        if not shared or shared['state'] == CircuitState.CLOSED.value:
+            return True
+        
+        now = time.time()
+        if shared['state'] == CircuitState.HALF_OPEN.value and shared['probeOwner'] == CONTAINER_ID:
+            return True
+        if shared['state'] == CircuitState.OPEN.value and shared['openUntil'] > now:
+            return False
+        if shared['state'] == CircuitState.HALF_OPEN.value and shared['probeLeaseUntil'] >= now:
+            return False
+        
+        # Recovery window elapsed (or probe lease expired): race for the probe
+        try:
+            acquired = self.store.acquire_probe(self.name, CONTAINER_ID, now, self.probe_lease_seconds)
+        except Exception as e:
+            logger.warning(f"Circuit breaker '{self.name}' probe acquire failed: {str(e)}")
+            return False
+        if acquired:
+            logger.info(f"Circuit breaker '{self.name}' HALF_OPEN, probing from {CONTAINER_ID}")
+        return acquired
+
+    def retry_after_seconds(self) -> int:
+        """Seconds until the breaker may start probing again."""
+        if self.store:
+            shared = self._load_shared()
+            if shared and shared['openUntil']:
+                return max(1, int(shared['openUntil'] - time.time()))
+        return self.recovery_timeout_seconds
+
     def call(self, func: Callable, *args, **kwargs) -> Any:
         """
         Execute function through circuit breaker.
@@ -240,21 +831,63 @@ class CircuitBreaker:
             CircuitBreakerOpenError: If circuit is open
             Original exception: If function fails
         """
-        state = self.state
-        
-        if state == CircuitState.OPEN:
+        if not self.allow_request():
             raise CircuitBreakerOpenError(
                 f"Circuit breaker '{self.name}' is OPEN. "
-                f"Retry after {self.recovery_timeout_seconds}s"
+                f"Retry after {self.retry_after_seconds()}s"
             )
         
         try:
             result = func(*args, **kwargs)
+        except Exception as e:
+            if is_provider_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def record_success(self) -> None:
+        """Record a successful provider call."""
+        if not self.store:
             self._on_success()
-            return result
+            return
+        
+        shared = self.store.peek(self.name)
+        if not shared or shared['state'] != CircuitState.HALF_OPEN.value \
+                or shared['probeOwner'] != CONTAINER_ID:
+            return
+        try:
+            if self.store.close(self.name, CONTAINER_ID, time.time()):
+                logger.info(f"Circuit breaker '{self.name}' recovered, closing")
         except Exception as e:
+            logger.warning(f"Circuit breaker '{self.name}' close failed: {str(e)}")
+
+    def record_failure(self) -> None:
+        """Record a failed provider call."""
+        if not self.store:
             self._on_failure()
-            raise
+            return
+        
+        now = time.time()
+        try:
+            shared = self.store.peek(self.name)
+            if shared and shared['state'] == CircuitState.HALF_OPEN.value \
+                    and shared['probeOwner'] == CONTAINER_ID:
+                logger.warning(f"Circuit breaker '{self.name}' failed in HALF_OPEN, reopening")
+                self.store.open(self.name, now, self.recovery_timeout_seconds, probe_owner=CONTAINER_ID)
+                return
+            
+            count = self.store.record_failure(self.name, now, self.failure_window_seconds)
+            if count >= self.failure_threshold and self.store.open(
+                    self.name, now, self.recovery_timeout_seconds):
+                logger.warning(
+                    f"Circuit breaker '{self.name}' opened after "
+                    f"{count} failures in {self.failure_window_seconds}s"
+                )
+        except Exception as e:
+            logger.warning(f"Circuit breaker '{self.name}' failure not recorded: {str(e)}")
 
     def _on_success(self) -> None:
         """Handle successful call."""
@@ -294,6 +927,8 @@ class CircuitBreaker:
         self._last_failure_time = None
         self._half_open_calls = 0
         self._half_open_successes = 0
+        if self.store:
+            self.store.reset(self.name)
 
 
 class CircuitBreakerOpenError(Exception):
@@ -303,9 +938,23 @@ class CircuitBreakerOpenError(Exception):
 
 # Pre-configured circuit breakers for AWS services
 class ServiceCircuitBreakers:
-    """Collection of circuit breakers for AWS services."""
+    """
+    Collection of circuit breakers for AWS services.
+    
+    Breakers share state across containers through CircuitStateStore
+    unless CIRCUIT_BREAKER_SHARED=false.
+    """
     
     _breakers: Dict[str, CircuitBreaker] = {}
+    _store: Optional[CircuitStateStore] = None
+    
+    @classmethod
+    def _get_store(cls) -> Optional[CircuitStateStore]:
+        if os.environ.get('CIRCUIT_BREAKER_SHARED', 'true').lower() == 'false':
+            return None
+        if cls._store is None:
+            cls._store = CircuitStateStore()
+        return cls._store
     
     @classmethod
     def get(cls, service_name: str) -> CircuitBreaker:
@@ -314,7 +963,8 @@ class ServiceCircuitBreakers:
             cls._breakers[service_name] = CircuitBreaker(
                 name=service_name,
                 failure_threshold=5,
-                recovery_timeout_seconds=30
+                recovery_timeout_seconds=30,
+                store=cls._get_store()
             )
         return cls._breakers[service_name]
     
@@ -337,3 +987,57 @@ class ServiceCircuitBreakers:
     def bedrock(cls) -> CircuitBreaker:
         """Circuit breaker for Bedrock AI."""
         return cls.get('bedrock-ai')
+
+
+class ServiceRetryPolicies:
+    """
+    Retry policies for provider calls, one shared budget per service.
+    
+    Message sends are not idempotent: a 5xx or read timeout may mean the
+    message went out, so only throttling and connect failures are retried.
+    """
+    
+    _budgets: Dict[str, RetryBudget] = {}
+    _policies: Dict[str, RetryPolicy] = {}
+    
+    @classmethod
+    def budget(cls, service_name: str) -> RetryBudget:
+        """Get or create the retry budget for a service."""
+        if service_name not in cls._budgets:
+            cls._budgets[service_name] = RetryBudget(name=service_name)
+        return cls._budgets[service_name]
+    
+    @classmethod
+    def get(cls, service_name: str, **config) -> RetryPolicy:
+        """Get or create retry policy for a service."""
+        if service_name not in cls._policies:
+            cls._policies[service_name] = RetryPolicy(
+                name=service_name,
+                config=RetryConfig(**config),
+                budget=cls.budget(service_name)
+            )
+        return cls._policies[service_name]
+    
+    @classmethod
+    def whatsapp(cls) -> RetryPolicy:
+        """Retry policy for WhatsApp sends."""
+        return cls.get('whatsapp-api', max_retries=2, base_delay_seconds=0.5,
+                       max_delay_seconds=4.0, idempotent=False)
+    
+    @classmethod
+    def sms(cls) -> RetryPolicy:
+        """Retry policy for SMS sends."""
+        return cls.get('pinpoint-sms', max_retries=2, base_delay_seconds=0.5,
+                       max_delay_seconds=4.0, idempotent=False)
+    
+    @classmethod
+    def email(cls) -> RetryPolicy:
+        """Retry policy for SES sends."""
+        return cls.get('ses-email', max_retries=2, base_delay_seconds=0.5,
+                       max_delay_seconds=4.0, idempotent=False)
+    
+    @classmethod
+    def bedrock(cls) -> RetryPolicy:
+        """Retry policy for Bedrock calls (read-only, safe to repeat)."""
+        return cls.get('bedrock-ai', max_retries=2, base_delay_seconds=1.0,
+                       max_delay_seconds=8.0, deadline_reserve_seconds=5.0)
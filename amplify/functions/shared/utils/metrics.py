@@ -10,25 +10,17 @@ Requirements: 14.4, 14.5
 import os
 import time
 import logging
-import boto3
 from typing import Dict, Any, List, Optional
 from enum import Enum
 from dataclasses import dataclass
 
-logger = logging.getLogger(__name__)
+from .aws_clients import get_client
 
-# Initialize CloudWatch client
-_cloudwatch_client = None
+logger = logging.getLogger(__name__)
 
 def get_cloudwatch_client():
     """Get or create CloudWatch client singleton."""
-    global _cloudwatch_client
-    if _cloudwatch_client is None:
-        _cloudwatch_client = boto3.client(
-            'cloudwatch',
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
-    return _cloudwatch_client
+    return get_client('cloudwatch')
 
 
 class MetricUnit(Enum):
@@ -487,10 +479,7 @@ class AlertPublisher:
     
     def __init__(self, sns_client=None):
         """Initialize AlertPublisher."""
-        self.sns = sns_client or boto3.client(
-            'sns',
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
+        self.sns = sns_client or get_client('sns')
     
     def publish_critical_error(
         self,
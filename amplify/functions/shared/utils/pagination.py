@@ -0,0 +1,239 @@
+"""
+Pagination Module
+
+Listing helpers for DynamoDB scans and queries.
+
+A single scan/query with Limit and a FilterExpression evaluates Limit
+items and then filters them, so a page can come back short or empty
+while more matching rows exist. paginate() keeps reading until the page
+is full or the read budget is spent, and returns an opaque cursor that
+resumes exactly after the last returned item.
+
+parallel_scan() and parallel_count() fan a full-table read out over
+Segment/TotalSegments on a thread pool, for exports and reconciliation.
+
+Usage:
+    from utils.pagination import paginate, InvalidCursorError
+
+    page = paginate(table.scan, limit=50, cursor=params.get('nextToken'),
+                    key_attributes=('id',), FilterExpression=...)
+    body = {'items': page.items, 'nextToken': page.cursor}
+"""
+
+import json
+import base64
+import logging
+import threading
+from dataclasses import dataclass, field
+from decimal import Decimal
+from queue import Queue, Full
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Reads per page before returning a short page with a cursor
+DEFAULT_MAX_REQUESTS = 10
+
+# Minimum items evaluated per read when trimming is possible
+DEFAULT_READ_SIZE = 100
+
+# Page sizes are clamped to 1..MAX_PAGE_SIZE (limits come from query strings)
+MAX_PAGE_SIZE = 1000
+
+DEFAULT_SEGMENTS = 8
+
+_CURSOR_VERSION = 1
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor cannot be decoded."""
+    pass
+
+
+@dataclass
+class Page:
+    """One page of listing results."""
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    cursor: Optional[str] = None
+    scanned_count: int = 0
+    requests: int = 0
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value % 1 == 0 else float(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in cursor")
+
+
+def encode_cursor(key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Encode a DynamoDB start key as an opaque, URL-safe cursor.
+
+    The same key always encodes to the same cursor.
+    """
+    if not key:
+        return None
+    payload = json.dumps({'v': _CURSOR_VERSION, 'k': key}, sort_keys=True,
+                         separators=(',', ':'), default=_json_default)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Decode a cursor from encode_cursor() back into a start key.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')),
+                             parse_float=Decimal, parse_int=Decimal)
+        key = payload['k']
+        if payload.get('v') != _CURSOR_VERSION or not isinstance(key, dict) or not key:
+            raise ValueError('unsupported cursor')
+        return key
+    except Exception as e:
+        raise InvalidCursorError(f"Invalid cursor: {str(e)}")
+
+
+def paginate(read: Callable[..., Dict[str, Any]], limit: int, cursor: Optional[str] = None,
+             key_attributes: Sequence[str] = (), max_requests: int = DEFAULT_MAX_REQUESTS,
+             read_size: int = DEFAULT_READ_SIZE, **kwargs) -> Page:
+    """
+    Fill one page from a scan or query.
+
+    Args:
+        read: Bound table.scan or table.query
+        limit: Items wanted on the page (clamped to 1..MAX_PAGE_SIZE)
+        cursor: Cursor from a previous page
+        key_attributes: Key attributes of the items (table key, plus index
+            keys for index reads). When given, reads evaluate at least
+            read_size items and the surplus is trimmed; without them each
+            read asks only for the items still missing.
+        max_requests: Read budget for the page
+        read_size: Minimum evaluated items per read when trimming
+        **kwargs: Passed through to read (FilterExpression, IndexName, ...)
+
+    Returns:
+        Page with items and a cursor (None once the listing is exhausted)
+
+    Raises:
+        InvalidCursorError: If cursor is malformed
+    """
+    start_key = decode_cursor(cursor)
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    page = Page()
+
+    while page.requests < max_requests:
+        remaining = limit - len(page.items)
+        call_kwargs = dict(kwargs)
+        call_kwargs['Limit'] = max(remaining, read_size) if key_attributes else remaining
+        if start_key:
+            call_kwargs['ExclusiveStartKey'] = start_key
+
+        response = read(**call_kwargs)
+        page.requests += 1
+        page.scanned_count += response.get('ScannedCount', 0)
+
+        items = response.get('Items', [])
+        start_key = response.get('LastEvaluatedKey')
+        if len(items) > remaining:
+            items = items[:remaining]
+            start_key = {name: items[-1][name] for name in key_attributes}
+        page.items.extend(items)
+
+        if len(page.items) >= limit or not start_key:
+            break
+
+    page.cursor = encode_cursor(start_key)
+    return page
+
+
+def parallel_scan(table, total_segments: int = DEFAULT_SEGMENTS, **scan_kwargs) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Scan a whole table with parallel segments.
+
+    Yields pages as segments produce them (no ordering). Memory stays
+    bounded: segments block while the consumer is behind.
+
+    Args:
+        table: boto3 DynamoDB Table resource
+        total_segments: Number of parallel segments
+        **scan_kwargs: Passed through to table.scan
+
+    Yields:
+        Lists of items
+    """
+    pages: Queue = Queue(maxsize=total_segments * 2)
+    done = object()
+    stop = threading.Event()
+
+    def put(page) -> None:
+        # stop unblocks producers if the consumer goes away
+        while not stop.is_set():
+            try:
+                pages.put(page, timeout=1)
+                return
+            except Full:
+                continue
+
+    def scan_segment(segment: int) -> None:
+        try:
+            kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=total_segments)
+            while not stop.is_set():
+                response = table.scan(**kwargs)
+                if response.get('Items'):
+                    put(response['Items'])
+                if not response.get('LastEvaluatedKey'):
+                    break
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            put(done)
+        except Exception as e:
+            put(e)
+
+    with ThreadPoolExecutor(max_workers=total_segments) as pool:
+        for segment in range(total_segments):
+            pool.submit(scan_segment, segment)
+
+        try:
+            finished = 0
+            while finished < total_segments:
+                page = pages.get()
+                if page is done:
+                    finished += 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield page
+        finally:
+            stop.set()
+
+
+def parallel_count(table, total_segments: int = DEFAULT_SEGMENTS, **scan_kwargs) -> int:
+    """
+    Count items (after any FilterExpression) with parallel COUNT scans.
+
+    Args:
+        table: boto3 DynamoDB Table resource
+        total_segments: Number of parallel segments
+        **scan_kwargs: Passed through to table.scan
+
+    Returns:
+        Matching item count
+    """
+    def count_segment(segment: int) -> int:
+        kwargs = dict(scan_kwargs, Select='COUNT', Segment=segment, TotalSegments=total_segments)
+        total = 0
+        while True:
+            response = table.scan(**kwargs)
+            total += response.get('Count', 0)
+            if not response.get('LastEvaluatedKey'):
+                return total
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    with ThreadPoolExecutor(max_workers=total_segments) as pool:
+        return sum(pool.map(count_segment, range(total_segments)))
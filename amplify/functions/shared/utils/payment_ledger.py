@@ -0,0 +1,319 @@
+"""
+Payment Ledger Module
+
+One payment record per reference id, shared by every payment path.
+
+A payment shows up several times: outbound-whatsapp sends the payment
+request, WhatsApp reports the payment status to the inbound handler and
+Razorpay calls razorpay-webhook. All of them upsert the same item in the
+Payments table, keyed (id) by the sanitized reference id, instead of
+each writing its own record and later scanning for the others.
+
+The table has two secondary indexes for webhooks that only know the
+Razorpay ids: paymentId-index and orderId-index (see
+scripts/create-payment-indexes.py). Every lookup is a GetItem or an
+index Query.
+
+Status only moves forward (see STATUS_RANK), so webhooks arriving out
+of order or more than once do not undo a captured payment, and
+claim_notification() lets exactly one caller confirm each status to the
+customer.
+
+Usage:
+    from utils.payment_ledger import get_payment_ledger, sanitize_reference_id
+
+    ledger = get_payment_ledger()
+    ledger.upsert(sanitize_reference_id(raw_ref), status='captured', amount=50000)
+    payment = ledger.get(reference_id)
+"""
+
+import os
+import re
+import time
+import uuid
+import logging
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+PAYMENTS_TABLE = os.environ.get('PAYMENTS_TABLE', 'base-wecare-digital-PaymentsTable')
+PAYMENT_ID_INDEX = os.environ.get('PAYMENT_ID_INDEX', 'paymentId-index')
+ORDER_ID_INDEX = os.environ.get('ORDER_ID_INDEX', 'orderId-index')
+
+REFERENCE_PREFIX = 'WDSR'
+
+# UPI allows at most 35 characters in a reference id
+MAX_REFERENCE_LENGTH = 35
+
+# Later statuses win; an equal or lower rank never overwrites
+STATUS_RANK = {
+    'requested': 0,
+    'pending': 1,
+    'authorized': 2,
+    'failed': 3,
+    'captured': 4,
+    'refunded': 5,
+}
+
+_NON_ALNUM_PATTERN = re.compile(r'[^A-Za-z0-9]')
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def sanitize_reference_id(reference_id: Optional[str], generate_if_empty: bool = False) -> str:
+    """
+    Normalize a payment reference id to WDSR<ID>.
+
+    WhatsApp/Razorpay may echo the id back with underscores, plus signs,
+    lower case or a repeated prefix; every variant maps to the same id.
+
+    Examples:
+    - "WDSR_WDSR41BA3534" -> "WDSR41BA3534" (remove duplicate prefix)
+    - "WDSR_41BA3534" -> "WDSR41BA3534" (remove underscore)
+    - "WDSR+41BA3534" -> "WDSR41BA3534" (remove plus sign)
+    - "41ba3534" -> "WDSR41BA3534" (add prefix)
+
+    Args:
+        reference_id: Raw reference id
+        generate_if_empty: Return a new unique id instead of '' when empty
+
+    Returns:
+        Sanitized reference id (UPI safe, max 35 chars)
+    """
+    cleaned = _NON_ALNUM_PATTERN.sub('', reference_id or '').upper()
+    if not cleaned:
+        if not generate_if_empty:
+            return ''
+        return REFERENCE_PREFIX + uuid.uuid4().hex[:8].upper()
+
+    # Remove ALL duplicate WDSR prefixes (handle WDSRWDSRWDSR... cases)
+    while REFERENCE_PREFIX * 2 in cleaned:
+        cleaned = cleaned.replace(REFERENCE_PREFIX * 2, REFERENCE_PREFIX)
+    if not cleaned.startswith(REFERENCE_PREFIX):
+        cleaned = REFERENCE_PREFIX + cleaned
+    return cleaned[:MAX_REFERENCE_LENGTH]
+
+
+def _to_dynamo(value: Any) -> Any:
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {k: _to_dynamo(v) for k, v in value.items()}
+    return value
+
+
+class PaymentLedger:
+    """Upserts and point lookups on the Payments table."""
+
+    def __init__(self, dynamodb_client=None, table_name: str = None):
+        """
+        Initialize ledger.
+
+        Args:
+            dynamodb_client: Boto3 DynamoDB client (optional, for testing)
+            table_name: Payments table name
+        """
+        self._dynamodb = dynamodb_client
+        self.table_name = table_name or PAYMENTS_TABLE
+
+    @property
+    def dynamodb(self):
+        if self._dynamodb is None:
+            from .aws_clients import get_client
+            self._dynamodb = get_client('dynamodb')
+        return self._dynamodb
+
+    def upsert(self, reference_id: str, status: Optional[str] = None, **fields) -> Optional[Dict[str, Any]]:
+        """
+        Create or update the payment for a reference id.
+
+        Fields that are None or '' are left untouched, so each caller only
+        writes what it knows. The status (and its statusRank) is only
+        written when it ranks at least as high as the stored one; a
+        lower-ranked (late) event only fills in fields that are not set
+        yet, so it cannot overwrite the amount or ids of a later status.
+
+        Args:
+            reference_id: Sanitized reference id (the item key)
+            status: Payment status, if this event carries one
+            **fields: Attributes to set (amount in paise, paymentId, orderId, ...)
+
+        Returns:
+            The item after the update, or None if the write failed
+        """
+        if not reference_id:
+            return None
+
+        from .time_index import time_bucket
+
+        now = int(time.time())
+        values = {k: _to_dynamo(v) for k, v in fields.items() if v is not None and v != ''}
+        values['updatedAt'] = now
+
+        names = {}
+        expression_values = {
+            ':createdAt': now,
+            ':createdMonth': time_bucket(now),
+            ':referenceId': reference_id,
+        }
+        clauses = [
+            'createdAt = if_not_exists(createdAt, :createdAt)',
+            'createdMonth = if_not_exists(createdMonth, :createdMonth)',
+            'referenceId = :referenceId',
+        ]
+        late_clauses = list(clauses)
+        for i, (name, value) in enumerate(values.items()):
+            names[f'#f{i}'] = name
+            expression_values[f':f{i}'] = value
+            clauses.append(f'#f{i} = :f{i}')
+            if name == 'updatedAt':
+                late_clauses.append(f'#f{i} = :f{i}')
+            else:
+                late_clauses.append(f'#f{i} = if_not_exists(#f{i}, :f{i})')
+
+        request = {
+            'TableName': self.table_name,
+            'Key': {'id': {'S': reference_id}},
+            'ReturnValues': 'ALL_NEW',
+        }
+
+        rank = STATUS_RANK.get((status or '').lower())
+        if status:
+            status_values = dict(expression_values, **{':status': status.lower(), ':rank': rank or 0})
+            status_names = dict(names, **{'#status': 'status'})
+            try:
+                return self._update(
+                    request,
+                    'SET ' + ', '.join(clauses + ['#status = :status', 'statusRank = :rank']),
+                    status_names,
+                    status_values,
+                    'attribute_not_exists(statusRank) OR statusRank <= :rank'
+                )
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                    logger.error(f"Payment ledger upsert failed for {reference_id}: {str(e)}")
+                    return None
+                logger.info(f"Payment {reference_id} already past status {status}, keeping stored status")
+                clauses = late_clauses
+            except Exception as e:
+                logger.error(f"Payment ledger upsert failed for {reference_id}: {str(e)}")
+                return None
+
+        try:
+            return self._update(request, 'SET ' + ', '.join(clauses), names, expression_values)
+        except Exception as e:
+            logger.error(f"Payment ledger upsert failed for {reference_id}: {str(e)}")
+            return None
+
+    def _update(self, request: Dict[str, Any], update_expression: str, names: Dict[str, str],
+                values: Dict[str, Any], condition: Optional[str] = None) -> Dict[str, Any]:
+        kwargs = dict(
+            request,
+            UpdateExpression=update_expression,
+            ExpressionAttributeValues={k: _serializer.serialize(v) for k, v in values.items()},
+        )
+        if names:
+            kwargs['ExpressionAttributeNames'] = names
+        if condition:
+            kwargs['ConditionExpression'] = condition
+        response = self.dynamodb.update_item(**kwargs)
+        return self._deserialize(response.get('Attributes', {}))
+
+    def claim_notification(self, reference_id: str, status: str) -> bool:
+        """
+        Reserve the customer order-status notification for a status.
+
+        Only the first caller for a status wins, and never for a status
+        ranked below one already notified, so retried or reordered
+        webhooks do not message the customer twice.
+
+        Returns:
+            True if the caller should send the notification
+        """
+        if not reference_id:
+            return True
+        rank = STATUS_RANK.get((status or '').lower(), 0)
+        try:
+            self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key={'id': {'S': reference_id}},
+                UpdateExpression='SET notifiedStatus = :status, notifiedRank = :rank, notifiedAt = :now',
+                ConditionExpression='attribute_not_exists(notifiedRank) OR notifiedRank < :rank',
+                ExpressionAttributeValues={
+                    ':status': {'S': (status or '').lower()},
+                    ':rank': {'N': str(rank)},
+                    ':now': {'N': str(int(time.time()))},
+                }
+            )
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                return False
+            logger.warning(f"Notification claim failed for {reference_id}: {str(e)}")
+            # A duplicate confirmation beats a missing one
+            return True
+
+    def get(self, reference_id: str) -> Optional[Dict[str, Any]]:
+        """Get the payment for a sanitized reference id."""
+        if not reference_id:
+            return None
+        response = self.dynamodb.get_item(
+            TableName=self.table_name,
+            Key={'id': {'S': reference_id}}
+        )
+        item = response.get('Item')
+        return self._deserialize(item) if item else None
+
+    def find_by_payment_id(self, payment_id: str) -> Optional[Dict[str, Any]]:
+        """Get the payment holding a Razorpay payment id (pay_...)."""
+        return self._query_index(PAYMENT_ID_INDEX, 'paymentId', payment_id)
+
+    def find_by_order_id(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Get the payment holding a Razorpay order id (order_...)."""
+        return self._query_index(ORDER_ID_INDEX, 'orderId', order_id)
+
+    def _query_index(self, index_name: str, attribute: str, value: str) -> Optional[Dict[str, Any]]:
+        """
+        First payment with attribute = value on index_name.
+
+        Returns None, like no match, while the table does not have the
+        index yet (scripts/create-payment-indexes.py not run).
+        """
+        if not value:
+            return None
+        try:
+            response = self.dynamodb.query(
+                TableName=self.table_name,
+                IndexName=index_name,
+                KeyConditionExpression='#k = :v',
+                ExpressionAttributeNames={'#k': attribute},
+                ExpressionAttributeValues={':v': {'S': value}},
+                Limit=1
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ValidationException':
+                raise
+            logger.warning(f"Payment index {index_name} unavailable on {self.table_name}: {str(e)}")
+            return None
+        items = response.get('Items', [])
+        return self._deserialize(items[0]) if items else None
+
+    @staticmethod
+    def _deserialize(item: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: _deserializer.deserialize(v) for k, v in item.items()}
+
+
+# Global ledger instance
+_payment_ledger = None
+
+def get_payment_ledger() -> PaymentLedger:
+    """Get or create global PaymentLedger instance."""
+    global _payment_ledger
+    if _payment_ledger is None:
+        _payment_ledger = PaymentLedger()
+    return _payment_ledger
@@ -0,0 +1,285 @@
+"""
+Phone Number Registry Module
+
+WABA and phone-number metadata for routing, without per-request API calls.
+
+Each WhatsApp sending number has one item in the PhoneNumberRegistry
+table, keyed by the AWS phone number id, holding its WABA, Meta ids,
+display number, quality rating, messaging limit tier and throughput.
+The table is tiny, so a container loads all of it with one Scan and
+keeps it for PHONE_REGISTRY_CACHE_SECONDS, indexed by AWS phone id,
+display number and Meta phone id; every routing lookup is a dict hit.
+
+It is kept current by:
+- refresh(): ListLinkedWhatsAppBusinessAccounts + GetLinkedWhatsAppBusinessAccount
+  (waba-management, POST /waba/registry/refresh)
+- apply_quality_update() / apply_limit_update(): phone quality and
+  account update webhooks (inbound-whatsapp-handler)
+
+Until the table has been populated, the two numbers configured through
+WHATSAPP_PHONE_NUMBER_ID_1/2 and WABA_ID_1/2 are used, so routing keeps
+working on a fresh deployment.
+
+Usage:
+    from utils.phone_registry import get_phone_registry
+
+    registry = get_phone_registry()
+    number = registry.resolve_inbound(display_phone, meta_phone_id)
+    waba_id = registry.waba_for(phone_number_id)
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+
+logger = logging.getLogger(__name__)
+
+PHONE_REGISTRY_TABLE = os.environ.get('PHONE_REGISTRY_TABLE', 'base-wecare-digital-PhoneNumberRegistryTable')
+PHONE_REGISTRY_CACHE_SECONDS = int(os.environ.get('PHONE_REGISTRY_CACHE_SECONDS', '300'))
+
+# Built-in numbers, used until the registry table is populated
+PHONE_NUMBER_ID_1 = os.environ.get('WHATSAPP_PHONE_NUMBER_ID_1', 'phone-number-id-baa217c3f11b4ffd956f6f3afb44ce54')
+PHONE_NUMBER_ID_2 = os.environ.get('WHATSAPP_PHONE_NUMBER_ID_2', 'phone-number-id-1447bc72d1b040f4bf2341c9e04b2e06')
+WABA_ID_1 = os.environ.get('WABA_ID_1', 'waba-0aae9cf04cf24c66960f291c793359b4')
+WABA_ID_2 = os.environ.get('WABA_ID_2', 'waba-9bbe054d8404487397c38a9d197bc44a')
+
+# Meta's default Cloud API throughput per number (messages per second)
+DEFAULT_THROUGHPUT_MPS = int(os.environ.get('WHATSAPP_DEFAULT_THROUGHPUT_MPS', '80'))
+
+DEFAULT_NUMBERS = [
+    {
+        'phoneNumberId': PHONE_NUMBER_ID_1,
+        'wabaId': WABA_ID_1,
+        'displayPhoneNumber': '+91 93309 94400',
+        'displayName': 'WECARE.DIGITAL',
+        'isDefault': True,
+    },
+    {
+        'phoneNumberId': PHONE_NUMBER_ID_2,
+        'wabaId': WABA_ID_2,
+        'displayPhoneNumber': '+91 99033 00044',
+        'displayName': 'Manish Agarwal',
+    },
+]
+
+_NON_DIGIT_PATTERN = re.compile(r'\D')
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def phone_digits(phone: Optional[str]) -> str:
+    """Digits of a phone number ('+91 93309 94400' -> '919330994400')."""
+    return _NON_DIGIT_PATTERN.sub('', phone or '')
+
+
+class PhoneNumberRegistry:
+    """In-memory view of the PhoneNumberRegistry table."""
+
+    def __init__(self, dynamodb_client=None, table_name: str = None,
+                 cache_seconds: int = PHONE_REGISTRY_CACHE_SECONDS):
+        """
+        Initialize registry.
+
+        Args:
+            dynamodb_client: Boto3 DynamoDB client (optional, for testing)
+            table_name: PhoneNumberRegistry table name
+            cache_seconds: How long the loaded registry is served from memory
+        """
+        self._dynamodb = dynamodb_client
+        self.table_name = table_name or PHONE_REGISTRY_TABLE
+        self.cache_seconds = cache_seconds
+        self._lock = threading.Lock()
+        self._expires_at = 0.0
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_display: Dict[str, Dict[str, Any]] = {}
+        self._by_meta_id: Dict[str, Dict[str, Any]] = {}
+        self._default_id = PHONE_NUMBER_ID_1
+
+    @property
+    def dynamodb(self):
+        if self._dynamodb is None:
+            from .aws_clients import get_client
+            self._dynamodb = get_client('dynamodb')
+        return self._dynamodb
+
+    def get(self, phone_number_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Registry entry of an AWS phone number id, or None."""
+        self._ensure_loaded()
+        return self._by_id.get(phone_number_id or '')
+
+    def by_display_number(self, phone: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Registry entry of a display number in any format, or None."""
+        self._ensure_loaded()
+        return self._by_display.get(phone_digits(phone))
+
+    def resolve_inbound(self, display_phone: Optional[str], meta_phone_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Number that received a webhook (Meta phone id first, then display number)."""
+        self._ensure_loaded()
+        return self._by_meta_id.get(meta_phone_id or '') or self._by_display.get(phone_digits(display_phone))
+
+    def waba_for(self, phone_number_id: Optional[str]) -> str:
+        """WABA owning a phone number id (the default number's WABA when unknown)."""
+        entry = self.get(phone_number_id) or self.get(self.default_phone_number_id())
+        return entry.get('wabaId', WABA_ID_1) if entry else WABA_ID_1
+
+    def default_phone_number_id(self) -> str:
+        """Sending number used when a request does not name one."""
+        self._ensure_loaded()
+        return self._default_id
+
+    def throughput(self, phone_number_id: Optional[str]) -> int:
+        """Messages per second a number may send."""
+        entry = self.get(phone_number_id)
+        return int(entry.get('throughputMps') or DEFAULT_THROUGHPUT_MPS) if entry else DEFAULT_THROUGHPUT_MPS
+
+    def numbers(self, waba_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """All registered numbers, optionally of one WABA."""
+        self._ensure_loaded()
+        return [n for n in self._by_id.values() if not waba_id or n.get('wabaId') == waba_id]
+
+    def refresh(self, social_messaging) -> int:
+        """
+        Update the registry from the linked WABAs.
+
+        Only the fields the API returns are written, so the tier and
+        throughput recorded from webhooks are kept.
+
+        Args:
+            social_messaging: Boto3 socialmessaging client
+
+        Returns:
+            Number of phone numbers written
+        """
+        waba_ids = []
+        kwargs = {}
+        while True:
+            response = social_messaging.list_linked_whatsapp_business_accounts(**kwargs)
+            waba_ids.extend(a.get('id', '') for a in response.get('linkedAccounts', []) if a.get('id'))
+            if not response.get('nextToken'):
+                break
+            kwargs['nextToken'] = response['nextToken']
+
+        written = 0
+        for waba_id in waba_ids:
+            account = social_messaging.get_linked_whatsapp_business_account(id=waba_id).get('account', {})
+            for phone in account.get('phoneNumbers', []):
+                phone_number_id = phone.get('phoneNumberId', '')
+                if not phone_number_id:
+                    continue
+                self._update(phone_number_id, {
+                    'wabaId': waba_id,
+                    'metaWabaId': account.get('wabaId', ''),
+                    'wabaName': account.get('wabaName', ''),
+                    'metaPhoneNumberId': phone.get('metaPhoneNumberId', ''),
+                    'phoneNumber': phone.get('phoneNumber', ''),
+                    'displayPhoneNumber': phone.get('displayPhoneNumber', ''),
+                    'displayDigits': phone_digits(phone.get('displayPhoneNumber') or phone.get('phoneNumber')),
+                    'displayName': phone.get('displayPhoneNumberName', ''),
+                    'qualityRating': phone.get('qualityRating', 'UNKNOWN'),
+                    'enableSending': bool(account.get('enableSending', True)),
+                })
+                written += 1
+        self.invalidate()
+        logger.info(f"Phone registry refreshed: {len(waba_ids)} WABAs, {written} numbers")
+        return written
+
+    def apply_quality_update(self, display_phone: str, quality_rating: str = '', messaging_tier: str = '') -> bool:
+        """Record a phone quality webhook. Returns False if the number is not registered."""
+        return self._apply_webhook(display_phone, {'qualityRating': quality_rating, 'messagingLimitTier': messaging_tier})
+
+    def apply_limit_update(self, display_phone: str, messaging_tier: str) -> bool:
+        """Record a messaging limit change. Returns False if the number is not registered."""
+        return self._apply_webhook(display_phone, {'messagingLimitTier': messaging_tier})
+
+    def invalidate(self) -> None:
+        """Reload the registry on the next lookup in this container."""
+        with self._lock:
+            self._expires_at = 0.0
+
+    def _apply_webhook(self, display_phone: str, fields: Dict[str, Any]) -> bool:
+        entry = self.by_display_number(display_phone)
+        fields = {k: v for k, v in fields.items() if v}
+        if not entry or not fields or entry.get('builtIn'):
+            return False
+        self._update(entry['phoneNumberId'], fields)
+        with self._lock:
+            entry.update(fields)
+        return True
+
+    def _update(self, phone_number_id: str, fields: Dict[str, Any]) -> None:
+        values = dict(fields, updatedAt=int(time.time()))
+        names = {f'#f{i}': name for i, name in enumerate(values)}
+        self.dynamodb.update_item(
+            TableName=self.table_name,
+            Key={'phoneNumberId': {'S': phone_number_id}},
+            UpdateExpression='SET ' + ', '.join(f'#f{i} = :f{i}' for i in range(len(values))),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues={f':f{i}': _serializer.serialize(v) for i, v in enumerate(values.values())}
+        )
+
+    def _ensure_loaded(self) -> None:
+        if self._expires_at > time.time():
+            return
+        with self._lock:
+            if self._expires_at > time.time():
+                return
+            try:
+                numbers = self._scan()
+            except Exception as e:
+                logger.warning(f"Phone registry load failed, using built-in numbers: {str(e)}")
+                numbers = []
+            if not numbers:
+                numbers = [dict(n, builtIn=True) for n in DEFAULT_NUMBERS]
+            self._index(numbers)
+            self._expires_at = time.time() + self.cache_seconds
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        numbers = []
+        kwargs = {'TableName': self.table_name}
+        while True:
+            response = self.dynamodb.scan(**kwargs)
+            for raw in response.get('Items', []):
+                numbers.append({k: _deserializer.deserialize(v) for k, v in raw.items()})
+            if 'LastEvaluatedKey' not in response:
+                return numbers
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _index(self, numbers: List[Dict[str, Any]]) -> None:
+        by_id, by_display, by_meta_id = {}, {}, {}
+        default_id = None
+        for number in numbers:
+            if number.get('throughputMps') is not None:
+                number['throughputMps'] = int(number['throughputMps'])
+            phone_number_id = number.get('phoneNumberId', '')
+            by_id[phone_number_id] = number
+            digits = number.get('displayDigits') or phone_digits(number.get('displayPhoneNumber'))
+            if digits:
+                by_display[digits] = number
+            if number.get('metaPhoneNumberId'):
+                by_meta_id[str(number['metaPhoneNumberId'])] = number
+            if number.get('isDefault'):
+                default_id = phone_number_id
+        self._by_id, self._by_display, self._by_meta_id = by_id, by_display, by_meta_id
+        if default_id:
+            self._default_id = default_id
+        elif PHONE_NUMBER_ID_1 in by_id or not by_id:
+            self._default_id = PHONE_NUMBER_ID_1
+        else:
+            self._default_id = sorted(by_id)[0]
+
+
+# Global registry instance
+_phone_registry = None
+
+def get_phone_registry() -> PhoneNumberRegistry:
+    """Get or create global PhoneNumberRegistry instance."""
+    global _phone_registry
+    if _phone_registry is None:
+        _phone_registry = PhoneNumberRegistry()
+    return _phone_registry
@@ -4,6 +4,26 @@ Rate Limiter Module
 Implements token bucket algorithm with DynamoDB atomic counters
 for rate limiting across all messaging channels.
 
+Rolling usage (tier limits) is kept in coarser buckets next to the
+per-second rate limit rows, in the same partition:
+- '<epoch>'          per-second rows (rate limit)
+- 'm#<epoch minute>' per-minute usage buckets
+- 'h#<epoch hour>'   per-hour usage buckets
+A 24h sliding sum reads the whole hours of the window plus the minutes
+before the first whole hour: at most 24 + 60 items.
+
+Admitted sends are rolled up into the usage buckets of the same
+identifier by check_and_consume() / check_and_consume_lane() (unless the
+caller says the send does not count). WhatsApp usage per phone number
+('WHATSAPP:<phone id>') gives each sender's remaining messaging tier
+capacity, used to spread multi-number bulk sending (see
+utils/sender_pool.py).
+
+Priority lanes share the same per-second rows: each lane also counts
+into its own attribute ('lane_<name>'), and sends beyond a lane's
+reservation into 'overflowCount', see check_and_consume_lane() and
+utils/send_lanes.py.
+
 Requirements: 5.9, 6.5, 7.5, 13.1, 13.2, 13.5
 """
 
@@ -102,9 +122,28 @@ class RateLimiter:
         4: 100000, # Tier 4: 100000 conversations/24h
     }
 
+    # Meta messaging limit tiers (webhook current_limit); None = unlimited
+    MESSAGING_TIER_LIMITS = {
+        'TIER_50': 50,
+        'TIER_250': 250,
+        'TIER_1K': 1000,
+        'TIER_2K': 2000,
+        'TIER_10K': 10000,
+        'TIER_100K': 100000,
+        'TIER_UNLIMITED': None,
+    }
+
     # TTL for rate limit trackers (24 hours in seconds)
     TRACKER_TTL_SECONDS = 86400
 
+    # Usage bucket prefixes (windowStart); per-second rows use the bare epoch
+    MINUTE_BUCKET_PREFIX = 'm#'
+    HOUR_BUCKET_PREFIX = 'h#'
+
+    # Usage buckets must outlive the longest window they are summed over
+    MAX_USAGE_WINDOW_HOURS = 24
+    USAGE_TTL_SECONDS = (MAX_USAGE_WINDOW_HOURS + 1) * 3600
+
     def __init__(self, dynamodb_client=None, table_name: str = None):
         """
         Initialize RateLimiter.
@@ -116,12 +155,15 @@ class RateLimiter:
         self.dynamodb = dynamodb_client
         self.table_name = table_name or os.environ.get('RATE_LIMIT_TABLE', 'RateLimitTrackers')
         self._local_buckets: Dict[str, Dict[str, Any]] = {}
+        self._local_usage: Dict[str, Dict[int, int]] = {}
 
     def check_and_consume(
         self,
         channel: Channel,
         identifier: str = "default",
-        tokens: int = 1
+        tokens: int = 1,
+        rate_limit: Optional[int] = None,
+        count_usage: bool = True
     ) -> RateLimitResult:
         """
         Check rate limit and consume tokens if allowed.
@@ -133,20 +175,25 @@ class RateLimiter:
             channel: Messaging channel (WHATSAPP, SMS, EMAIL)
             identifier: Unique identifier (e.g., phone_number_id for WhatsApp)
             tokens: Number of tokens to consume (default 1)
+            rate_limit: Per-second limit override (e.g. a number's throughput)
+            count_usage: Add admitted tokens to the rolling usage (tier limits)
             
         Returns:
             RateLimitResult with allowed status and remaining tokens
         """
-        rate_limit = self.RATE_LIMITS.get(channel, 10)
+        rate_limit = rate_limit or self.RATE_LIMITS.get(channel, 10)
         bucket_key = f"{channel.value}:{identifier}"
         current_second = int(time.time())
         window_start = str(current_second)
 
         try:
             if self.dynamodb:
-                return self._check_dynamodb(bucket_key, window_start, rate_limit, tokens)
+                result = self._check_dynamodb(bucket_key, window_start, rate_limit, tokens)
             else:
-                return self._check_local(bucket_key, current_second, rate_limit, tokens)
+                result = self._check_local(bucket_key, current_second, rate_limit, tokens)
+            if result.allowed and count_usage:
+                self.record_usage(channel, identifier, tokens, current_second)
+            return result
         except Exception as e:
             logger.error(f"Rate limit check failed: {str(e)}")
             # Fail open - allow the request but log warning
@@ -197,6 +244,150 @@ class RateLimiter:
                 message=f"Rate limit exceeded for {bucket_key}"
             )
 
+    def check_and_consume_lane(
+        self,
+        channel: Channel,
+        identifier: str,
+        lane: str,
+        reserved: int,
+        overflow_cap: int,
+        rate_limit: Optional[int] = None,
+        tokens: int = 1,
+        count_usage: bool = True
+    ) -> RateLimitResult:
+        """
+        Consume from the per-second budget on behalf of a priority lane.
+        
+        A send first goes into the lane's own reservation ('lane_<name>'
+        below reserved). Beyond it, it is overflow: admitted while the
+        second's overflow ('overflowCount', shared by all lanes) is below
+        the lane's overflow cap. Either way the total stays below the
+        rate limit. Lower lanes get a cap that leaves the unused
+        reservations of higher lanes free (see utils/send_lanes.py).
+        
+        Args:
+            channel: Messaging channel
+            identifier: Unique identifier (phone_number_id for WhatsApp)
+            lane: Lane name
+            reserved: Tokens per second reserved for the lane
+            overflow_cap: Overflow tokens per second the lane may be admitted under
+            rate_limit: Per-second limit (default channel limit)
+            tokens: Number of tokens to consume
+            count_usage: Add admitted tokens to the rolling usage (tier limits)
+            
+        Returns:
+            RateLimitResult with allowed status and remaining tokens
+        """
+        rate_limit = rate_limit or self.RATE_LIMITS.get(channel, 10)
+        bucket_key = f"{channel.value}:{identifier}"
+        current_second = int(time.time())
+
+        try:
+            if not self.dynamodb:
+                result = self._check_local_lane(bucket_key, current_second, lane, reserved, overflow_cap, rate_limit, tokens)
+            else:
+                new_count = None
+                if reserved > 0:
+                    new_count = self._consume_lane(bucket_key, current_second, lane, reserved, rate_limit, tokens, overflow=False)
+                if new_count is None:
+                    new_count = self._consume_lane(bucket_key, current_second, lane, overflow_cap, rate_limit, tokens, overflow=True)
+                if new_count is None:
+                    return RateLimitResult(
+                        allowed=False,
+                        tokens_remaining=0,
+                        retry_after_seconds=1.0 - (time.time() % 1),
+                        message=f"Rate limit exceeded for {bucket_key} ({lane})"
+                    )
+                result = RateLimitResult(allowed=True, tokens_remaining=max(0, rate_limit - new_count))
+            if result.allowed and count_usage:
+                self.record_usage(channel, identifier, tokens, current_second)
+            return result
+
+        except Exception as e:
+            logger.error(f"Rate limit check failed: {str(e)}")
+            logger.warning(f"Rate limiter unavailable, allowing request for {bucket_key}")
+            return RateLimitResult(allowed=True, tokens_remaining=rate_limit - tokens)
+
+    def _consume_lane(
+        self,
+        bucket_key: str,
+        current_second: int,
+        lane: str,
+        cap: int,
+        rate_limit: int,
+        tokens: int,
+        overflow: bool
+    ) -> Optional[int]:
+        """One conditional lane increment; returns the new total, or None if the condition failed."""
+        counter = '#overflow' if overflow else '#lane'
+        update = 'SET messageCount = if_not_exists(messageCount, :zero) + :inc, #lane = if_not_exists(#lane, :zero) + :inc'
+        if overflow:
+            update += ', #overflow = if_not_exists(#overflow, :zero) + :inc'
+        names = {'#lane': f'lane_{lane}'}
+        if overflow:
+            names['#overflow'] = 'overflowCount'
+        try:
+            response = self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key={
+                    'channel': {'S': bucket_key},
+                    'windowStart': {'S': str(current_second)}
+                },
+                UpdateExpression=update + ', lastUpdatedAt = :ttl',
+                ConditionExpression=(
+                    f'(attribute_not_exists({counter}) OR {counter} < :cap) AND '
+                    '(attribute_not_exists(messageCount) OR messageCount < :limit)'
+                ),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues={
+                    ':zero': {'N': '0'},
+                    ':inc': {'N': str(tokens)},
+                    ':cap': {'N': str(cap)},
+                    ':limit': {'N': str(rate_limit)},
+                    ':ttl': {'N': str(current_second + self.TRACKER_TTL_SECONDS)}
+                },
+                ReturnValues='ALL_NEW'
+            )
+        except Exception as e:
+            if e.__class__.__name__ == 'ConditionalCheckFailedException':
+                return None
+            raise
+        return int(response['Attributes']['messageCount']['N'])
+
+    def _check_local_lane(
+        self,
+        bucket_key: str,
+        current_second: int,
+        lane: str,
+        reserved: int,
+        overflow_cap: int,
+        rate_limit: int,
+        tokens: int
+    ) -> RateLimitResult:
+        """Lane admission on a local per-second window (for testing/fallback)."""
+        window = self._local_buckets.get(bucket_key)
+        if not window or window.get('second') != current_second:
+            window = {'second': current_second, 'total': 0, 'overflow': 0, 'lanes': {}}
+            self._local_buckets[bucket_key] = window
+
+        lane_count = window['lanes'].get(lane, 0)
+        if window['total'] < rate_limit:
+            if lane_count < reserved:
+                window['lanes'][lane] = lane_count + tokens
+                window['total'] += tokens
+                return RateLimitResult(allowed=True, tokens_remaining=max(0, rate_limit - window['total']))
+            if window['overflow'] < overflow_cap:
+                window['lanes'][lane] = lane_count + tokens
+                window['overflow'] += tokens
+                window['total'] += tokens
+                return RateLimitResult(allowed=True, tokens_remaining=max(0, rate_limit - window['total']))
+        return RateLimitResult(
+            allowed=False,
+            tokens_remaining=0,
+            retry_after_seconds=1.0,
+            message=f"Rate limit exceeded for {bucket_key} ({lane})"
+        )
+
     def _check_local(
         self,
         bucket_key: str,
@@ -234,6 +425,50 @@ class RateLimiter:
                 message=f"Rate limit exceeded for {bucket_key}"
             )
 
+    def record_usage(
+        self,
+        channel: Channel,
+        identifier: str = "default",
+        count: int = 1,
+        timestamp: Optional[int] = None
+    ) -> None:
+        """
+        Add to the rolling usage counters (minute and hour buckets).
+        
+        Args:
+            channel: Messaging channel
+            identifier: Unique identifier (phone_number_id for WhatsApp)
+            count: Amount to add
+            timestamp: Epoch seconds of the usage (default now)
+        """
+        bucket_key = f"{channel.value}:{identifier}"
+        now = int(timestamp if timestamp is not None else time.time())
+        minute_start = now - now % 60
+        hour_start = now - now % 3600
+
+        if not self.dynamodb:
+            usage = self._local_usage.setdefault(bucket_key, {})
+            usage[minute_start] = usage.get(minute_start, 0) + count
+            return
+
+        expires_at = str(now + self.USAGE_TTL_SECONDS)
+        for window_start in (self._minute_bucket(minute_start), self._hour_bucket(hour_start)):
+            try:
+                self.dynamodb.update_item(
+                    TableName=self.table_name,
+                    Key={
+                        'channel': {'S': bucket_key},
+                        'windowStart': {'S': window_start}
+                    },
+                    UpdateExpression='ADD messageCount :count SET lastUpdatedAt = :ttl',
+                    ExpressionAttributeValues={
+                        ':count': {'N': str(count)},
+                        ':ttl': {'N': expires_at}
+                    }
+                )
+            except Exception as e:
+                logger.error(f"Failed to record usage for {bucket_key}: {str(e)}")
+
     def get_current_usage(
         self,
         channel: Channel,
@@ -244,48 +479,30 @@ class RateLimiter:
         Get current usage for rolling window tracking.
         
         Used for WhatsApp tier limit tracking (250 conversations/24h).
+        Sums the usage buckets written by record_usage().
         
         Args:
             channel: Messaging channel
             identifier: Unique identifier
-            window_hours: Rolling window size in hours (default 24)
+            window_hours: Rolling window size in hours (default 24, at most
+                MAX_USAGE_WINDOW_HOURS)
             
         Returns:
             Dict with usage statistics
         """
         bucket_key = f"{channel.value}:{identifier}"
+        window_hours = min(window_hours, self.MAX_USAGE_WINDOW_HOURS)
         current_time = int(time.time())
         window_start = current_time - (window_hours * 3600)
-
-        # For local testing
-        if not self.dynamodb:
-            return {
-                'channel': channel.value,
-                'identifier': identifier,
-                'windowHours': window_hours,
-                'messageCount': 0,
-                'limit': self.TIER_LIMITS.get(1, 250) if channel == Channel.WHATSAPP else self.RATE_LIMITS.get(channel, 10),
-                'percentUsed': 0.0
-            }
+        limit = self.TIER_LIMITS.get(1, 250) if channel == Channel.WHATSAPP else self.RATE_LIMITS.get(channel, 10) * 3600 * window_hours
 
         try:
-            # Query DynamoDB for all entries in window
-            # Note: In production, use a GSI or separate table for efficient querying
-            response = self.dynamodb.query(
-                TableName=self.table_name,
-                KeyConditionExpression='channel = :channel AND windowStart >= :start',
-                ExpressionAttributeValues={
-                    ':channel': {'S': bucket_key},
-                    ':start': {'S': str(window_start)}
-                }
-            )
-            
-            total_count = sum(
-                int(item.get('messageCount', {}).get('N', 0))
-                for item in response.get('Items', [])
-            )
-            
-            limit = self.TIER_LIMITS.get(1, 250) if channel == Channel.WHATSAPP else self.RATE_LIMITS.get(channel, 10) * 3600 * window_hours
+            if self.dynamodb:
+                total_count = self._sum_usage(bucket_key, window_start, current_time)
+            else:
+                usage = self._local_usage.get(bucket_key, {})
+                first_minute = window_start - window_start % 60
+                total_count = sum(count for minute, count in usage.items() if minute >= first_minute)
             
             return {
                 'channel': channel.value,
@@ -308,7 +525,56 @@ class RateLimiter:
                 'error': str(e)
             }
 
-    def check_tier_limit(self, current_tier: int = 1) -> RateLimitResult:
+    def _sum_usage(self, bucket_key: str, start: int, end: int) -> int:
+        """
+        Sum usage over [start, end].
+        
+        Whole hours come from hour buckets; the minutes before the first
+        whole hour come from minute buckets (the first minute is counted
+        in full).
+        """
+        first_hour = start + (-start % 3600)
+        first_minute = start - start % 60
+        total = 0
+        if first_minute < first_hour:
+            total += self._sum_buckets(
+                bucket_key,
+                self._minute_bucket(first_minute),
+                self._minute_bucket(first_hour - 60)
+            )
+        total += self._sum_buckets(
+            bucket_key,
+            self._hour_bucket(first_hour),
+            self._hour_bucket(end - end % 3600)
+        )
+        return total
+
+    def _sum_buckets(self, bucket_key: str, first: str, last: str) -> int:
+        kwargs = {
+            'TableName': self.table_name,
+            'KeyConditionExpression': 'channel = :channel AND windowStart BETWEEN :first AND :last',
+            'ProjectionExpression': 'messageCount',
+            'ExpressionAttributeValues': {
+                ':channel': {'S': bucket_key},
+                ':first': {'S': first},
+                ':last': {'S': last}
+            }
+        }
+        total = 0
+        while True:
+            response = self.dynamodb.query(**kwargs)
+            total += sum(int(item.get('messageCount', {}).get('N', 0)) for item in response.get('Items', []))
+            if not response.get('LastEvaluatedKey'):
+                return total
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _minute_bucket(self, minute_start: int) -> str:
+        return f"{self.MINUTE_BUCKET_PREFIX}{minute_start:010d}"
+
+    def _hour_bucket(self, hour_start: int) -> str:
+        return f"{self.HOUR_BUCKET_PREFIX}{hour_start:010d}"
+
+    def check_tier_limit(self, current_tier: int = 1, identifier: str = "default") -> RateLimitResult:
         """
         Check WhatsApp business tier limit.
         
@@ -316,11 +582,12 @@ class RateLimiter:
         
         Args:
             current_tier: Current WhatsApp business tier (1-4)
+            identifier: Identifier the sends were consumed under (phone_number_id)
             
         Returns:
             RateLimitResult indicating if tier limit allows more conversations
         """
-        usage = self.get_current_usage(Channel.WHATSAPP, "tier", window_hours=24)
+        usage = self.get_current_usage(Channel.WHATSAPP, identifier, window_hours=24)
         tier_limit = self.TIER_LIMITS.get(current_tier, 250)
         
         if usage['messageCount'] >= tier_limit:
@@ -335,7 +602,26 @@ class RateLimiter:
             tokens_remaining=tier_limit - usage['messageCount']
         )
 
-    def is_tier_limit_warning(self, current_tier: int = 1, threshold: float = 0.8) -> bool:
+    def remaining_tier_capacity(self, phone_number_id: str, messaging_tier: Optional[str]) -> Optional[int]:
+        """
+        Conversations a phone number may still start in the rolling 24h.
+        
+        Args:
+            phone_number_id: Sending number (usage recorded as WHATSAPP:<id>)
+            messaging_tier: Meta tier name (TIER_1K, ...); unknown tiers count as TIER_250
+            
+        Returns:
+            Remaining capacity, or None for TIER_UNLIMITED
+        """
+        tier = (messaging_tier or '').upper()
+        limit = self.MESSAGING_TIER_LIMITS.get(tier, self.TIER_LIMITS[1]) if tier else self.TIER_LIMITS[1]
+        if limit is None:
+            return None
+        usage = self.get_current_usage(Channel.WHATSAPP, phone_number_id, window_hours=24)
+        return max(0, limit - usage['messageCount'])
+
+    def is_tier_limit_warning(self, current_tier: int = 1, threshold: float = 0.8,
+                              identifier: str = "default") -> bool:
         """
         Check if tier usage is above warning threshold.
         
@@ -344,9 +630,11 @@ class RateLimiter:
         Args:
             current_tier: Current WhatsApp business tier
             threshold: Warning threshold (default 0.8 = 80%)
+            identifier: Identifier the sends were consumed under (phone_number_id)
             
         Returns:
             True if usage is above threshold
         """
-        usage = self.get_current_usage(Channel.WHATSAPP, "tier", window_hours=24)
-        return usage['percentUsed'] >= (threshold * 100)
+        usage = self.get_current_usage(Channel.WHATSAPP, identifier, window_hours=24)
+        tier_limit = self.TIER_LIMITS.get(current_tier, 250)
+        return usage['messageCount'] >= threshold * tier_limit
@@ -0,0 +1,172 @@
+"""
+Send Lanes Module
+
+Priority lanes on a sending number's per-second budget, so bulk
+campaigns never starve transactional or conversational messages.
+
+Every WhatsApp send belongs to one lane, in priority order:
+- transactional: order status / payment messages
+- conversational: replies inside a conversation (reactions, interactive,
+  AI and agent replies)
+- marketing: business-initiated template sends (bulk jobs, schedules)
+
+Transactional and conversational reserve a share of the number's
+throughput (WHATSAPP_LANE_RESERVED, default 10% and 15%); marketing
+reserves nothing. A send first uses its lane's reservation; beyond it,
+it takes overflow capacity:
+- transactional may overflow up to the whole throughput
+- conversational and marketing share the unreserved part (75% by default)
+So a lane never gets the unused reservations of the lanes above it: a
+campaign alone fills at most 75% of a second, and transactional and
+conversational sends always find their reserved slots.
+
+Transactional and conversational sends wait for the next second when
+their budget is used up (LaneScheduler.acquire); marketing sends are
+turned away at once and retried by their queue.
+
+Usage:
+    from utils.send_lanes import LaneScheduler, classify_send
+
+    lane = classify_send(body)
+    result, waited_ms = LaneScheduler(rate_limiter).acquire(phone_number_id, lane, throughput)
+"""
+
+import os
+import math
+import time
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from .rate_limiter import Channel, RateLimitResult
+
+logger = logging.getLogger(__name__)
+
+TRANSACTIONAL = 'transactional'
+CONVERSATIONAL = 'conversational'
+MARKETING = 'marketing'
+
+# Highest priority first
+LANES = (TRANSACTIONAL, CONVERSATIONAL, MARKETING)
+
+DEFAULT_RESERVED = 'transactional:0.1,conversational:0.15'
+
+# How long a send may wait for budget inside one invocation
+LANE_MAX_WAIT_SECONDS = {
+    TRANSACTIONAL: float(os.environ.get('WHATSAPP_TRANSACTIONAL_MAX_WAIT_SECONDS', '3')),
+    CONVERSATIONAL: float(os.environ.get('WHATSAPP_CONVERSATIONAL_MAX_WAIT_SECONDS', '2')),
+    MARKETING: 0.0,
+}
+
+
+def parse_reserved(spec: Optional[str]) -> Dict[str, float]:
+    """
+    Parse 'lane:share,...' into reserved shares.
+
+    Unknown lanes and bad values are ignored; the lowest lane (marketing)
+    never has a reservation.
+    """
+    reserved = {lane: 0.0 for lane in LANES}
+    for part in (spec or '').split(','):
+        lane, _, share = part.partition(':')
+        lane = lane.strip().lower()
+        if lane not in reserved:
+            continue
+        try:
+            reserved[lane] = min(max(float(share), 0.0), 1.0)
+        except ValueError:
+            logger.warning(f"Ignoring lane reservation {part!r}")
+    above = reserved[TRANSACTIONAL] + reserved[CONVERSATIONAL]
+    if above > 1.0:
+        reserved[TRANSACTIONAL] /= above
+        reserved[CONVERSATIONAL] /= above
+    reserved[MARKETING] = 0.0
+    return reserved
+
+
+LANE_RESERVED = parse_reserved(os.environ.get('WHATSAPP_LANE_RESERVED', DEFAULT_RESERVED))
+
+
+def lane_budget(lane: str, rate_limit: int) -> Tuple[int, int]:
+    """
+    Reservation and overflow cap of a lane for a per-second limit.
+
+    Transactional may overflow into any free slot; the other lanes only
+    into the part of the limit no lane has reserved.
+
+    Returns:
+        (reserved, overflow cap) in messages per second
+    """
+    reserved = {name: math.floor(rate_limit * LANE_RESERVED[name]) for name in LANES}
+    # A reserved lane always gets at least one message per second
+    for name in (TRANSACTIONAL, CONVERSATIONAL):
+        if LANE_RESERVED[name] > 0 and rate_limit > 1:
+            reserved[name] = max(reserved[name], 1)
+    if lane == TRANSACTIONAL:
+        return reserved[lane], rate_limit
+    return reserved[lane], max(rate_limit - sum(reserved.values()), 0)
+
+
+def classify_send(body: Dict[str, Any]) -> str:
+    """
+    Lane of an outbound-whatsapp request.
+
+    An explicit 'lane' wins; otherwise order status and payment sends are
+    transactional, templates are marketing and everything else is a reply.
+    """
+    lane = str(body.get('lane') or '').lower()
+    if lane in LANES:
+        return lane
+    if body.get('isOrderStatus') or body.get('isPaymentTemplate') or body.get('isInteractivePayment'):
+        return TRANSACTIONAL
+    if body.get('isTemplate') and not body.get('isReaction'):
+        return MARKETING
+    return CONVERSATIONAL
+
+
+class LaneScheduler:
+    """Admits sends into a number's per-second budget by lane."""
+
+    def __init__(self, rate_limiter, channel: Channel = Channel.WHATSAPP):
+        """
+        Initialize scheduler.
+
+        Args:
+            rate_limiter: RateLimiter holding the per-second rows
+            channel: Channel whose budget is shared
+        """
+        self.rate_limiter = rate_limiter
+        self.channel = channel
+
+    def try_acquire(self, identifier: str, lane: str, rate_limit: int,
+                    count_usage: bool = True) -> RateLimitResult:
+        """One admission attempt for the current second."""
+        reserved, overflow_cap = lane_budget(lane, rate_limit)
+        return self.rate_limiter.check_and_consume_lane(
+            self.channel, identifier, lane, reserved, overflow_cap, rate_limit=rate_limit,
+            count_usage=count_usage
+        )
+
+    def acquire(self, identifier: str, lane: str, rate_limit: int,
+                max_wait_seconds: Optional[float] = None,
+                count_usage: bool = True) -> Tuple[RateLimitResult, int]:
+        """
+        Admit a send, waiting up to the lane's max wait for a later second.
+
+        Args:
+            count_usage: Count the admitted send against the number's
+                messaging tier (business-initiated sends)
+
+        Returns:
+            (result of the last attempt, milliseconds waited)
+        """
+        if max_wait_seconds is None:
+            max_wait_seconds = LANE_MAX_WAIT_SECONDS.get(lane, 0.0)
+        started = time.time()
+        deadline = started + max_wait_seconds
+        while True:
+            result = self.try_acquire(identifier, lane, rate_limit, count_usage)
+            now = time.time()
+            retry_after = result.retry_after_seconds or 1.0
+            if result.allowed or now + retry_after > deadline:
+                return result, int((now - started) * 1000)
+            time.sleep(retry_after)
@@ -0,0 +1,164 @@
+"""
+Sender Pool Module
+
+Spreads a bulk job's recipients across several phone numbers of a WABA.
+
+One number sends at most its throughput (80 msg/s by default) and its
+messaging tier per 24h, so a campaign on a single number is capped by
+both. A SenderPool assigns every recipient to one of N numbers; each
+number is rate limited on its own (WHATSAPP:<phone id>), so the job runs
+about N times faster.
+
+Assignment is weighted rendezvous hashing on the recipient's phone:
+- sticky: a recipient lands on the same number on every job (and keeps
+  its conversation there) as long as that number stays in the pool and
+  has capacity left
+- weighted: each number's share follows its quality rating. The weight
+  does not depend on usage, so numbers draining during the day do not
+  remap recipients
+- capacity aware: remaining tier capacity (utils/rate_limiter.py usage)
+  only applies when distributing; once a number's capacity is used up,
+  its recipients fall through to their next-ranked number
+
+Usage:
+    from utils.sender_pool import SenderPool
+
+    pool = SenderPool.for_waba(waba_id, phone_number_ids)
+    shards = pool.distribute(recipients)   # {phone_number_id: [recipient, ...]}
+"""
+
+import math
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from .phone_registry import get_phone_registry, phone_digits
+
+logger = logging.getLogger(__name__)
+
+# Share of traffic by quality rating; RED numbers are left out of pools
+QUALITY_WEIGHTS = {
+    'GREEN': 1.0,
+    'UNKNOWN': 0.75,
+    'YELLOW': 0.5,
+    'RED': 0.0,
+}
+
+
+@dataclass
+class Sender:
+    """A phone number in a sender pool."""
+    phone_number_id: str
+    weight: float
+    remaining: Optional[int] = None  # None = unlimited
+    quality_rating: str = 'UNKNOWN'
+
+
+def recipient_key(recipient: Dict[str, Any]) -> str:
+    """Stable identity of a recipient for sticky assignment."""
+    return phone_digits(recipient.get('phone')) or recipient.get('contactId') or recipient.get('recipientId', '')
+
+
+def _hash_unit(key: str, phone_number_id: str) -> float:
+    """Uniform value in (0, 1) for a (recipient, number) pair."""
+    digest = hashlib.sha1(f"{key}|{phone_number_id}".encode('utf-8')).digest()
+    return (int.from_bytes(digest[:8], 'big') + 0.5) / 2 ** 64
+
+
+class SenderPool:
+    """Sticky, weighted assignment of recipients to sending numbers."""
+
+    def __init__(self, senders: List[Sender]):
+        """
+        Initialize pool.
+
+        Args:
+            senders: Numbers to send from; zero-weight senders are dropped
+        """
+        self.senders = [s for s in senders if s.weight > 0]
+
+    @classmethod
+    def for_waba(cls, waba_id: str, phone_number_ids: Optional[List[str]] = None,
+                 registry=None, rate_limiter=None) -> 'SenderPool':
+        """
+        Pool of a WABA's sending numbers, weighted by quality.
+
+        Args:
+            waba_id: WABA whose numbers may send (templates are per WABA)
+            phone_number_ids: Restrict to these numbers (default: all of the WABA)
+            registry: PhoneNumberRegistry (default: global registry)
+            rate_limiter: RateLimiter holding per-number usage (default: no usage known)
+
+        Returns:
+            SenderPool (possibly empty)
+        """
+        registry = registry or get_phone_registry()
+        wanted = set(phone_number_ids or [])
+        senders = []
+        for number in registry.numbers(waba_id):
+            phone_number_id = number['phoneNumberId']
+            if wanted and phone_number_id not in wanted:
+                continue
+            if number.get('enableSending') is False:
+                continue
+            quality = (number.get('qualityRating') or 'UNKNOWN').upper()
+            remaining = None
+            if rate_limiter is not None:
+                remaining = rate_limiter.remaining_tier_capacity(phone_number_id, number.get('messagingLimitTier'))
+            # Exhausted numbers stay in the pool; distribute() routes around them
+            weight = QUALITY_WEIGHTS.get(quality, QUALITY_WEIGHTS['UNKNOWN'])
+            senders.append(Sender(phone_number_id, weight, remaining, quality))
+        return cls(senders)
+
+    def __len__(self) -> int:
+        return len(self.senders)
+
+    def rank(self, key: str) -> List[Sender]:
+        """Senders in preference order for a recipient key."""
+        return sorted(
+            self.senders,
+            key=lambda s: -s.weight / math.log(_hash_unit(key, s.phone_number_id)),
+            reverse=True
+        )
+
+    def assign(self, key: str) -> Optional[str]:
+        """Preferred number of a recipient key, ignoring capacity."""
+        if not self.senders:
+            return None
+        if len(self.senders) == 1:
+            return self.senders[0].phone_number_id
+        return self.rank(key)[0].phone_number_id
+
+    def distribute(self, recipients: List[Dict[str, Any]],
+                   key_fn: Callable[[Dict[str, Any]], str] = recipient_key) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Split recipients across the pool.
+
+        A recipient goes to its highest-ranked number that still has tier
+        capacity left; when every number is full it goes to its preferred
+        number and waits for the rate limiter there.
+
+        Returns:
+            phone_number_id -> recipients, in input order
+        """
+        shards: Dict[str, List[Dict[str, Any]]] = {s.phone_number_id: [] for s in self.senders}
+        if not self.senders:
+            return shards
+        if len(self.senders) == 1:
+            shards[self.senders[0].phone_number_id] = list(recipients)
+            return shards
+
+        left = {s.phone_number_id: s.remaining for s in self.senders}
+        for recipient in recipients:
+            ranked = self.rank(key_fn(recipient))
+            chosen = next(
+                (s.phone_number_id for s in ranked if left[s.phone_number_id] is None or left[s.phone_number_id] > 0),
+                ranked[0].phone_number_id
+            )
+            if left[chosen]:
+                left[chosen] -= 1
+            shards[chosen].append(recipient)
+
+        logger.info(f"Sender pool distribution: { {k: len(v) for k, v in shards.items()} }")
+        return shards
@@ -0,0 +1,196 @@
+"""
+Stats Counters Module
+
+Maintained dashboard counters, so stats reads are O(1) instead of a
+COUNT scan over every table.
+
+Writers (contact create/delete, message store, AI interaction store)
+increment counters on one of N shard items in SystemConfig
+(configKey = stats#<shard>), picked at random so no single item becomes
+a hot key. Readers fetch all shards with one BatchGetItem and sum them.
+
+Counters drift where items disappear without a writer seeing it (TTL
+expiry of messages, failed increments). The stats-reconciler function
+recounts the tables periodically and applies the difference.
+
+Usage:
+    from utils.stats_counters import get_stats_counters, COUNTER_CONTACTS
+
+    get_stats_counters().increment(COUNTER_CONTACTS)
+    totals = get_stats_counters().read()
+"""
+
+import os
+import re
+import time
+import random
+import logging
+from typing import Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+STATS_TABLE = os.environ.get(
+    'STATS_TABLE',
+    os.environ.get('SYSTEM_CONFIG_TABLE', 'base-wecare-digital-SystemConfigTable')
+)
+STATS_SHARD_COUNT = int(os.environ.get('STATS_SHARD_COUNT', '10'))
+STATS_KEY_PREFIX = 'stats#'
+
+# Counter names (numeric attributes on the shard items)
+COUNTER_CONTACTS = 'contacts'
+COUNTER_INBOUND_MESSAGES = 'inboundMessages'
+COUNTER_OUTBOUND_MESSAGES = 'outboundMessages'
+COUNTER_AI_INTERACTIONS = 'aiInteractions'
+COUNTER_AI_APPROVED = 'aiApproved'
+AI_LANGUAGE_COUNTER_PREFIX = 'aiLanguage_'
+
+# Shard item attributes that are not counters
+_BOOKKEEPING_ATTRIBUTES = ('configKey', 'updatedAt', 'reconciledAt')
+
+_COUNTER_NAME_PATTERN = re.compile(r'[^A-Za-z0-9_-]')
+
+
+def ai_language_counter(language: Optional[str]) -> str:
+    """Counter name for AI interactions in a language."""
+    return AI_LANGUAGE_COUNTER_PREFIX + _COUNTER_NAME_PATTERN.sub('_', language or 'unknown')
+
+
+class StatsCounters:
+    """
+    Sharded counters stored in SystemConfig.
+
+    Increments never raise: a lost increment is drift the reconciler
+    fixes, and must not fail the write that triggered it.
+    """
+
+    def __init__(self, dynamodb_client=None, table_name: str = None, shard_count: int = None):
+        """
+        Initialize counters.
+
+        Args:
+            dynamodb_client: Boto3 DynamoDB client (optional, for testing)
+            table_name: Table holding the shard items (default SystemConfig)
+            shard_count: Number of shard items
+        """
+        self._dynamodb = dynamodb_client
+        self.table_name = table_name or STATS_TABLE
+        self.shard_count = max(1, shard_count or STATS_SHARD_COUNT)
+
+    @property
+    def dynamodb(self):
+        if self._dynamodb is None:
+            from .aws_clients import get_client
+            self._dynamodb = get_client('dynamodb')
+        return self._dynamodb
+
+    def _key(self, shard: int) -> Dict[str, Dict[str, str]]:
+        return {'configKey': {'S': f'{STATS_KEY_PREFIX}{shard}'}}
+
+    def _add(self, shard: int, deltas: Dict[str, int], timestamp_attribute: str = 'updatedAt') -> None:
+        names = {'#ts': timestamp_attribute}
+        values = {':now': {'N': str(int(time.time()))}}
+        clauses = []
+        for i, (name, delta) in enumerate(deltas.items()):
+            names[f'#c{i}'] = name
+            values[f':d{i}'] = {'N': str(int(delta))}
+            clauses.append(f'#c{i} :d{i}')
+        self.dynamodb.update_item(
+            TableName=self.table_name,
+            Key=self._key(shard),
+            UpdateExpression='ADD ' + ', '.join(clauses) + ' SET #ts = :now',
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+
+    def increment(self, counters: Union[str, Dict[str, int]], delta: int = 1) -> bool:
+        """
+        Add to one or more counters on a random shard.
+
+        Args:
+            counters: Counter name, or dict of counter name -> delta
+            delta: Amount to add when counters is a single name
+
+        Returns:
+            True if the increment was written
+        """
+        deltas = {counters: delta} if isinstance(counters, str) else dict(counters)
+        deltas = {name: value for name, value in deltas.items() if value}
+        if not deltas:
+            return True
+        try:
+            self._add(random.randrange(self.shard_count), deltas)
+            return True
+        except Exception as e:
+            logger.warning(f"Stats counter update failed {deltas}: {str(e)}")
+            return False
+
+    def decrement(self, counters: Union[str, Dict[str, int]], delta: int = 1) -> bool:
+        """Subtract from one or more counters."""
+        if isinstance(counters, str):
+            return self.increment(counters, -delta)
+        return self.increment({name: -value for name, value in counters.items()})
+
+    def read(self) -> Dict[str, int]:
+        """
+        Sum every counter across all shards.
+
+        Returns:
+            Dict of counter name -> total (counters never written are absent)
+        """
+        keys = [self._key(shard) for shard in range(self.shard_count)]
+        items = []
+        # BatchGetItem takes up to 100 keys per call
+        for start in range(0, len(keys), 100):
+            request = {self.table_name: {'Keys': keys[start:start + 100]}}
+            while request:
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                items.extend(response.get('Responses', {}).get(self.table_name, []))
+                request = response.get('UnprocessedKeys') or None
+
+        totals: Dict[str, int] = {}
+        for item in items:
+            for name, value in item.items():
+                if name in _BOOKKEEPING_ATTRIBUTES or 'N' not in value:
+                    continue
+                totals[name] = totals.get(name, 0) + int(value['N'])
+        return totals
+
+    def reconcile(self, actual: Dict[str, int]) -> Dict[str, int]:
+        """
+        Correct drift against freshly counted totals.
+
+        The difference is added to shard 0 rather than overwriting, so
+        increments racing with the reconciler are kept.
+
+        Args:
+            actual: Counter name -> true total
+
+        Returns:
+            Deltas that were applied
+        """
+        current = self.read()
+        deltas = {
+            name: total - current.get(name, 0)
+            for name, total in actual.items()
+            if total != current.get(name, 0)
+        }
+        # Language counters that no longer occur at all
+        for name, value in current.items():
+            if name.startswith(AI_LANGUAGE_COUNTER_PREFIX) and name not in actual and value:
+                deltas[name] = -value
+
+        if deltas:
+            self._add(0, deltas, timestamp_attribute='reconciledAt')
+        logger.info(f"Stats reconciled, {len(deltas)} counters corrected")
+        return deltas
+
+
+# Global counters instance
+_stats_counters = None
+
+def get_stats_counters() -> StatsCounters:
+    """Get or create global StatsCounters instance."""
+    global _stats_counters
+    if _stats_counters is None:
+        _stats_counters = StatsCounters()
+    return _stats_counters
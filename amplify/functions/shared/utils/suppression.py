@@ -0,0 +1,360 @@
+"""
+Suppression List Module
+
+Drops opted-out and invalid recipients from bulk sends without a
+DynamoDB read per recipient.
+
+A contact is suppressed on a channel when its opt-in flag for that
+channel (optInWhatsApp / optInSms / optInEmail) is explicitly false.
+For each channel, a snapshot of the suppressed keys (phone digits or
+lower-cased email) is built from one scan of the contacts table
+(stats-reconciler) and stored in the media bucket under suppression/:
+- a bloom filter (SUPPRESSION_BITS_PER_KEY bits per key, ~1% false
+  positives at 10), answering "not suppressed" for almost every recipient
+- the sorted 64-bit hashes of every key, an exact check for the few
+  recipients the bloom filter flags
+
+A snapshot of a million suppressed numbers is ~9 MB and loads with one
+GetObject. Containers keep it in memory and revalidate it every
+SUPPRESSION_CACHE_SECONDS with a conditional GET (If-None-Match), so an
+unchanged snapshot costs a 304. Numbers that are not 8-15 digits are
+rejected without a lookup.
+
+When no snapshot exists yet, nothing is suppressed (the per-contact
+MessageValidator checks still apply).
+
+Usage:
+    from utils.suppression import get_suppression_list
+
+    kept, suppressed = get_suppression_list().filter('WHATSAPP', recipients)
+"""
+
+import os
+import io
+import json
+import math
+import time
+import struct
+import bisect
+import hashlib
+import logging
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from .phone_registry import phone_digits
+
+logger = logging.getLogger(__name__)
+
+MEDIA_BUCKET = os.environ.get('MEDIA_BUCKET', 'auth.wecare.digital')
+SUPPRESSION_PREFIX = os.environ.get('SUPPRESSION_PREFIX', 'suppression/')
+SUPPRESSION_CACHE_SECONDS = int(os.environ.get('SUPPRESSION_CACHE_SECONDS', '300'))
+SUPPRESSION_BITS_PER_KEY = int(os.environ.get('SUPPRESSION_BITS_PER_KEY', '10'))
+
+SNAPSHOT_FORMAT = 1
+
+# Opt-in flag per channel; False means the contact opted out
+OPT_IN_FIELDS = {
+    'WHATSAPP': 'optInWhatsApp',
+    'SMS': 'optInSms',
+    'EMAIL': 'optInEmail',
+}
+
+# E.164 numbers carry at most 15 digits
+MIN_PHONE_DIGITS = 8
+MAX_PHONE_DIGITS = 15
+
+# Reasons reported for suppressed recipients
+REASON_OPTED_OUT = 'OPTED_OUT'
+REASON_INVALID = 'INVALID_ADDRESS'
+
+_HEADER_LENGTH = struct.Struct('<I')
+
+
+def suppression_key(channel: str, address: Optional[str]) -> str:
+    """Normalized address of a recipient on a channel ('' when unusable)."""
+    if channel == 'EMAIL':
+        return (address or '').strip().lower()
+    return phone_digits(address)
+
+
+def recipient_address(channel: str, recipient: Dict[str, Any]) -> Optional[str]:
+    """Address field of a recipient or contact for a channel."""
+    return recipient.get('email') if channel == 'EMAIL' else recipient.get('phone')
+
+
+def is_valid_key(channel: str, key: str) -> bool:
+    """Whether a normalized address can be sent to at all."""
+    if channel == 'EMAIL':
+        local, _, domain = key.partition('@')
+        return bool(local) and '.' in domain
+    return MIN_PHONE_DIGITS <= len(key) <= MAX_PHONE_DIGITS
+
+
+def _key_hashes(key: str) -> Tuple[int, int]:
+    """Two independent 64-bit hashes of a key."""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+class BloomFilter:
+    """Fixed-size bloom filter with double hashing."""
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[bytearray] = None):
+        self.num_bits = max(num_bits, 8)
+        self.num_hashes = max(num_hashes, 1)
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, bits_per_key: int = SUPPRESSION_BITS_PER_KEY) -> 'BloomFilter':
+        """Filter sized for a number of keys."""
+        return cls(max(capacity, 1) * bits_per_key, round(bits_per_key * math.log(2)))
+
+    def add_hashes(self, h1: int, h2: int) -> None:
+        for i in range(self.num_hashes):
+            bit = (h1 + i * h2) % self.num_bits
+            self.bits[bit >> 3] |= 1 << (bit & 7)
+
+    def contains_hashes(self, h1: int, h2: int) -> bool:
+        for i in range(self.num_hashes):
+            bit = (h1 + i * h2) % self.num_bits
+            if not self.bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+
+class SuppressionSnapshot:
+    """Suppressed keys of one channel: bloom filter plus sorted exact hashes."""
+
+    def __init__(self, channel: str, bloom: BloomFilter, exact: array, version: int):
+        self.channel = channel
+        self.bloom = bloom
+        self.exact = exact
+        self.version = version
+
+    @classmethod
+    def build(cls, channel: str, keys: Iterable[str], version: Optional[int] = None) -> 'SuppressionSnapshot':
+        """Snapshot of a set of normalized keys."""
+        hashes = sorted({_key_hashes(k) for k in keys if k})
+        bloom = BloomFilter.for_capacity(len(hashes))
+        for h1, h2 in hashes:
+            bloom.add_hashes(h1, h2)
+        exact = array('Q', sorted({h1 for h1, _ in hashes}))
+        return cls(channel, bloom, exact, version or int(time.time() * 1000))
+
+    def __len__(self) -> int:
+        return len(self.exact)
+
+    def contains(self, key: str) -> bool:
+        """Whether a normalized key is suppressed."""
+        h1, h2 = _key_hashes(key)
+        if not self.bloom.contains_hashes(h1, h2):
+            return False
+        index = bisect.bisect_left(self.exact, h1)
+        return index < len(self.exact) and self.exact[index] == h1
+
+    def to_bytes(self) -> bytes:
+        """Serialize as <header length><JSON header><bloom bits><exact hashes>."""
+        exact = array('Q', self.exact)
+        if exact.itemsize != 8:
+            raise ValueError('64-bit array items are required')
+        header = json.dumps({
+            'format': SNAPSHOT_FORMAT,
+            'channel': self.channel,
+            'version': self.version,
+            'numBits': self.bloom.num_bits,
+            'numHashes': self.bloom.num_hashes,
+            'count': len(exact),
+        }).encode('utf-8')
+        buffer = io.BytesIO()
+        buffer.write(_HEADER_LENGTH.pack(len(header)))
+        buffer.write(header)
+        buffer.write(bytes(self.bloom.bits))
+        buffer.write(exact.tobytes())
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'SuppressionSnapshot':
+        """Parse a serialized snapshot."""
+        (header_length,) = _HEADER_LENGTH.unpack_from(data, 0)
+        offset = _HEADER_LENGTH.size
+        header = json.loads(data[offset:offset + header_length].decode('utf-8'))
+        if header.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported suppression snapshot format: {header.get('format')}")
+        offset += header_length
+        bloom_length = (header['numBits'] + 7) // 8
+        bloom = BloomFilter(header['numBits'], header['numHashes'], bytearray(data[offset:offset + bloom_length]))
+        offset += bloom_length
+        exact = array('Q')
+        exact.frombytes(data[offset:offset + header['count'] * 8])
+        return cls(header['channel'], bloom, exact, header['version'])
+
+
+def build_snapshots(contacts: Iterable[Dict[str, Any]]) -> Dict[str, SuppressionSnapshot]:
+    """
+    Snapshots of every channel from contact items.
+
+    Soft-deleted contacts are skipped; only explicit opt-outs suppress.
+    """
+    keys: Dict[str, set] = {channel: set() for channel in OPT_IN_FIELDS}
+    for contact in contacts:
+        if contact.get('deletedAt') is not None:
+            continue
+        for channel, field in OPT_IN_FIELDS.items():
+            if contact.get(field) is False:
+                key = suppression_key(channel, recipient_address(channel, contact))
+                if key:
+                    keys[channel].add(key)
+    version = int(time.time() * 1000)
+    return {channel: SuppressionSnapshot.build(channel, channel_keys, version)
+            for channel, channel_keys in keys.items()}
+
+
+class SuppressionList:
+    """Per-channel suppression snapshots loaded from S3."""
+
+    def __init__(self, s3_client=None, bucket: str = None, prefix: str = None,
+                 cache_seconds: int = SUPPRESSION_CACHE_SECONDS):
+        """
+        Initialize suppression list.
+
+        Args:
+            s3_client: Boto3 S3 client (optional, for testing)
+            bucket: Bucket holding the snapshots
+            prefix: Key prefix for the snapshots
+            cache_seconds: How long a loaded snapshot is used before revalidating
+        """
+        self._s3 = s3_client
+        self.bucket = bucket or MEDIA_BUCKET
+        self.prefix = prefix or SUPPRESSION_PREFIX
+        self.cache_seconds = cache_seconds
+        self._lock = threading.Lock()
+        # channel -> (snapshot or None, etag, checked until)
+        self._loaded: Dict[str, Tuple[Optional[SuppressionSnapshot], str, float]] = {}
+
+    @property
+    def s3(self):
+        if self._s3 is None:
+            from .aws_clients import get_client
+            self._s3 = get_client('s3')
+        return self._s3
+
+    def object_key(self, channel: str) -> str:
+        """S3 key of a channel's snapshot."""
+        return f"{self.prefix}{channel.lower()}.bin"
+
+    def snapshot(self, channel: str) -> Optional[SuppressionSnapshot]:
+        """Current snapshot of a channel, or None when none has been published."""
+        channel = channel.upper()
+        cached = self._loaded.get(channel)
+        if cached and cached[2] > time.time():
+            return cached[0]
+        with self._lock:
+            cached = self._loaded.get(channel)
+            if cached and cached[2] > time.time():
+                return cached[0]
+            snapshot, etag = self._fetch(channel, cached)
+            self._loaded[channel] = (snapshot, etag, time.time() + self.cache_seconds)
+            return snapshot
+
+    def is_suppressed(self, channel: str, address: Optional[str]) -> Optional[str]:
+        """Suppression reason of an address on a channel, or None."""
+        channel = channel.upper()
+        key = suppression_key(channel, address)
+        if not is_valid_key(channel, key):
+            return REASON_INVALID
+        snapshot = self.snapshot(channel)
+        if snapshot is not None and snapshot.contains(key):
+            return REASON_OPTED_OUT
+        return None
+
+    def filter(self, channel: str, recipients: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Split recipients into sendable and suppressed.
+
+        Suppressed recipients get a 'suppressionReason'. Recipients with
+        only a contactId are kept.
+
+        Returns:
+            (kept, suppressed), each in input order
+        """
+        channel = channel.upper()
+        snapshot = self.snapshot(channel)
+        kept, suppressed = [], []
+        for recipient in recipients:
+            key = suppression_key(channel, recipient_address(channel, recipient))
+            if not key and recipient.get('contactId'):
+                # Address resolved from the contact at send time
+                kept.append(recipient)
+                continue
+            if not is_valid_key(channel, key):
+                reason = REASON_INVALID
+            elif snapshot is not None and snapshot.contains(key):
+                reason = REASON_OPTED_OUT
+            else:
+                kept.append(recipient)
+                continue
+            recipient['suppressionReason'] = reason
+            suppressed.append(recipient)
+        return kept, suppressed
+
+    def publish(self, snapshots: Dict[str, SuppressionSnapshot]) -> Dict[str, int]:
+        """
+        Store snapshots and use them in this container.
+
+        Returns:
+            channel -> suppressed key count
+        """
+        counts = {}
+        for channel, snapshot in snapshots.items():
+            response = self.s3.put_object(
+                Bucket=self.bucket,
+                Key=self.object_key(channel),
+                Body=snapshot.to_bytes(),
+                ContentType='application/octet-stream',
+                Metadata={'version': str(snapshot.version), 'count': str(len(snapshot))}
+            )
+            with self._lock:
+                self._loaded[channel] = (snapshot, response.get('ETag', ''), time.time() + self.cache_seconds)
+            counts[channel] = len(snapshot)
+        logger.info(f"Suppression snapshots published: {counts}")
+        return counts
+
+    def invalidate(self) -> None:
+        """Revalidate every snapshot on the next lookup in this container."""
+        with self._lock:
+            self._loaded = {channel: (snapshot, etag, 0.0) for channel, (snapshot, etag, _) in self._loaded.items()}
+
+    def _fetch(self, channel: str, cached) -> Tuple[Optional[SuppressionSnapshot], str]:
+        kwargs = {'Bucket': self.bucket, 'Key': self.object_key(channel)}
+        if cached and cached[1]:
+            kwargs['IfNoneMatch'] = cached[1]
+        try:
+            response = self.s3.get_object(**kwargs)
+            snapshot = SuppressionSnapshot.from_bytes(response['Body'].read())
+            logger.info(f"Suppression snapshot loaded: {channel} v{snapshot.version}, {len(snapshot)} keys")
+            return snapshot, response.get('ETag', '')
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code')
+            if code in ('304', 'NotModified') and cached:
+                return cached[0], cached[1]
+            if code in ('404', 'NoSuchKey', 'NotFound'):
+                return None, ''
+            logger.warning(f"Suppression snapshot load failed ({channel}): {str(e)}")
+        except Exception as e:
+            logger.warning(f"Suppression snapshot load failed ({channel}): {str(e)}")
+        # Keep serving the last good snapshot
+        return (cached[0], cached[1]) if cached else (None, '')
+
+
+# Global suppression list instance
+_suppression_list = None
+
+def get_suppression_list() -> SuppressionList:
+    """Get or create global SuppressionList instance."""
+    global _suppression_list
+    if _suppression_list is None:
+        _suppression_list = SuppressionList()
+    return _suppression_list
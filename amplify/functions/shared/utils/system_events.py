@@ -0,0 +1,126 @@
+"""
+System Events Module
+
+Append-only log of WhatsApp account events (template status, phone
+quality, account updates) for the dashboard.
+
+Events live in the SystemEvents table, partitioned by event type and
+sorted by time (eventKey = '<epoch ms>#<random>'), with a TTL. Recording
+is a single PutItem, so concurrent webhooks never overwrite each other,
+and reading the latest N events is one reverse Query with Limit=N.
+
+Usage:
+    from utils.system_events import get_system_event_log
+
+    log = get_system_event_log()
+    log.record('template_status', {'event': 'APPROVED', ...})
+    latest = log.latest('template_status', limit=10)
+"""
+
+import os
+import time
+import uuid
+import logging
+from typing import Any, Dict, List
+
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+
+from .ttl import calculate_system_event_ttl
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_EVENTS_TABLE = os.environ.get('SYSTEM_EVENTS_TABLE', 'base-wecare-digital-SystemEventsTable')
+
+DEFAULT_EVENT_LIMIT = 10
+MAX_EVENT_LIMIT = 100
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class SystemEventLog:
+    """Time-ordered event log per event type."""
+
+    def __init__(self, dynamodb_client=None, table_name: str = None):
+        """
+        Initialize event log.
+
+        Args:
+            dynamodb_client: Boto3 DynamoDB client (optional, for testing)
+            table_name: SystemEvents table name
+        """
+        self._dynamodb = dynamodb_client
+        self.table_name = table_name or SYSTEM_EVENTS_TABLE
+
+    @property
+    def dynamodb(self):
+        if self._dynamodb is None:
+            from .aws_clients import get_client
+            self._dynamodb = get_client('dynamodb')
+        return self._dynamodb
+
+    def record(self, event_type: str, data: Dict[str, Any], request_id: str = None) -> Dict[str, Any]:
+        """
+        Append an event.
+
+        Args:
+            event_type: Partition (template_status, phone_quality, account_update)
+            data: Event payload
+            request_id: Request that produced the event
+
+        Returns:
+            The stored event ({'timestamp', 'data'})
+        """
+        now = time.time()
+        item = {
+            'eventType': event_type,
+            'eventKey': f"{int(now * 1000):013d}#{uuid.uuid4().hex[:8]}",
+            'timestamp': int(now),
+            'data': data,
+            'expiresAt': calculate_system_event_ttl(int(now)),
+        }
+        if request_id:
+            item['requestId'] = request_id
+
+        self.dynamodb.put_item(
+            TableName=self.table_name,
+            Item={k: _serializer.serialize(v) for k, v in item.items()}
+        )
+        return {'timestamp': item['timestamp'], 'data': data}
+
+    def latest(self, event_type: str, limit: int = DEFAULT_EVENT_LIMIT) -> List[Dict[str, Any]]:
+        """
+        Newest events of a type, newest first.
+
+        Args:
+            event_type: Partition to read
+            limit: Number of events (capped at MAX_EVENT_LIMIT)
+
+        Returns:
+            List of {'timestamp', 'data'}
+        """
+        response = self.dynamodb.query(
+            TableName=self.table_name,
+            KeyConditionExpression='eventType = :type',
+            ExpressionAttributeValues={':type': {'S': event_type}},
+            ProjectionExpression='#ts, #data',
+            ExpressionAttributeNames={'#ts': 'timestamp', '#data': 'data'},
+            ScanIndexForward=False,
+            Limit=max(1, min(limit, MAX_EVENT_LIMIT))
+        )
+        events = []
+        for item in response.get('Items', []):
+            event = {k: _deserializer.deserialize(v) for k, v in item.items()}
+            events.append({'timestamp': int(event.get('timestamp', 0)), 'data': event.get('data', {})})
+        return events
+
+
+# Global event log instance
+_system_event_log = None
+
+def get_system_event_log() -> SystemEventLog:
+    """Get or create global SystemEventLog instance."""
+    global _system_event_log
+    if _system_event_log is None:
+        _system_event_log = SystemEventLog()
+    return _system_event_log
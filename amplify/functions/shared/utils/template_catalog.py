@@ -0,0 +1,416 @@
+"""
+Template Catalog Module
+
+Local copy of the WhatsApp message templates of each WABA.
+
+Template pickers, bulk jobs and outbound sends used to call
+ListWhatsAppMessageTemplates live (first 100 templates only) or not at
+all. The catalog keeps one item per template in the TemplateCatalog
+table, keyed (wabaId, templateKey = '<name>#<language>'), with the
+status, category and the number of body parameters parsed from the
+template definition.
+
+It is kept current two ways:
+- sync(): paginated ListWhatsAppMessageTemplates; definitions are only
+  fetched (GetWhatsAppMessageTemplate) for new or changed templates
+- apply_status(): template status webhooks, matched through the
+  metaTemplateId-index GSI (see scripts/create-template-catalog-table.py)
+
+Reads go through a per-container cache of each WABA's catalog (one Query
+per TEMPLATE_CATALOG_CACHE_SECONDS), so validating a send costs no API
+call. Validation fails open when the catalog is unavailable or has never
+been synced.
+
+Usage:
+    from utils.template_catalog import get_template_catalog, waba_for_phone_number
+
+    catalog = get_template_catalog()
+    error = catalog.validate(waba_for_phone_number(phone_id), 'order_update', 'en', ['Asha'])
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_CATALOG_TABLE = os.environ.get('TEMPLATE_CATALOG_TABLE', 'base-wecare-digital-TemplateCatalogTable')
+META_TEMPLATE_ID_INDEX = os.environ.get('META_TEMPLATE_ID_INDEX', 'metaTemplateId-index')
+TEMPLATE_CATALOG_CACHE_SECONDS = int(os.environ.get('TEMPLATE_CATALOG_CACHE_SECONDS', '300'))
+
+SENDABLE_STATUSES = {'APPROVED'}
+
+# Marker item recording the last full sync of a WABA
+SYNC_MARKER_KEY = '#sync'
+
+LIST_PAGE_SIZE = 100
+DEFINITION_WORKERS = 8
+BATCH_WRITE_SIZE = 25
+
+_PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def template_key(name: str, language: str) -> str:
+    """Sort key of a template in its WABA partition."""
+    return f"{name}#{language}"
+
+
+def waba_for_phone_number(phone_number_id: Optional[str]) -> str:
+    """WABA owning a phone number id, from the phone number registry."""
+    from .phone_registry import get_phone_registry
+    return get_phone_registry().waba_for(phone_number_id)
+
+
+def split_template_language(template_params: Optional[List[Any]], default: str = 'en') -> Tuple[str, List[Any]]:
+    """
+    Split the optional leading language code off template params.
+
+    Callers may pass the language as the first param ('en', 'en_US').
+
+    Returns:
+        (language, remaining params)
+    """
+    params = list(template_params) if template_params else []
+    if params:
+        first = params[0]
+        if isinstance(first, str) and (len(first) == 2 or (2 <= len(first) <= 5 and '_' in first)):
+            return first, params[1:]
+    return default, params
+
+
+def parse_template_definition(definition: Any) -> Dict[str, Any]:
+    """
+    Extract the catalog fields from a Meta template definition.
+
+    Args:
+        definition: Template JSON (string or dict) as returned by GetWhatsAppMessageTemplate
+
+    Returns:
+        Dict with bodyText, bodyParamCount, headerFormat and buttonCount
+    """
+    if isinstance(definition, (str, bytes)):
+        definition = json.loads(definition or '{}')
+    fields = {'bodyText': '', 'bodyParamCount': 0, 'headerFormat': '', 'buttonCount': 0}
+    for component in (definition or {}).get('components', []):
+        component_type = str(component.get('type', '')).upper()
+        if component_type == 'BODY':
+            fields['bodyText'] = component.get('text', '')
+            fields['bodyParamCount'] = len(set(_PLACEHOLDER_PATTERN.findall(fields['bodyText'])))
+        elif component_type == 'HEADER':
+            fields['headerFormat'] = str(component.get('format', 'TEXT')).upper()
+        elif component_type == 'BUTTONS':
+            fields['buttonCount'] = len(component.get('buttons', []))
+    return fields
+
+
+class TemplateCatalog:
+    """Per-WABA template catalog in DynamoDB with a per-container cache."""
+
+    def __init__(self, dynamodb_client=None, table_name: str = None,
+                 cache_seconds: int = TEMPLATE_CATALOG_CACHE_SECONDS):
+        """
+        Initialize catalog.
+
+        Args:
+            dynamodb_client: Boto3 DynamoDB client (optional, for testing)
+            table_name: TemplateCatalog table name
+            cache_seconds: How long a WABA's catalog is served from memory
+        """
+        self._dynamodb = dynamodb_client
+        self.table_name = table_name or TEMPLATE_CATALOG_TABLE
+        self.cache_seconds = cache_seconds
+        # wabaId -> (expires at, {templateKey: item}, synced at)
+        self._cache: Dict[str, Tuple[float, Dict[str, Dict[str, Any]], int]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def dynamodb(self):
+        if self._dynamodb is None:
+            from .aws_clients import get_client
+            self._dynamodb = get_client('dynamodb')
+        return self._dynamodb
+
+    def list(self, waba_id: str, refresh: bool = False) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Templates of a WABA.
+
+        Args:
+            waba_id: AWS WABA id (waba-...)
+            refresh: Bypass the per-container cache
+
+        Returns:
+            (templates sorted by name and language, last sync epoch or 0 if never synced)
+        """
+        templates, synced_at = self._load(waba_id, refresh)
+        return [templates[k] for k in sorted(templates)], synced_at
+
+    def get(self, waba_id: str, name: str, language: str) -> Optional[Dict[str, Any]]:
+        """Catalog entry of one template, or None."""
+        templates, _ = self._load(waba_id)
+        return templates.get(template_key(name, language))
+
+    def validate(self, waba_id: str, name: str, language: str, params: List[Any]) -> Optional[str]:
+        """
+        Check a template send against the catalog.
+
+        Args:
+            waba_id: WABA of the sending phone number
+            name: Template name
+            language: Template language code
+            params: Body parameters (language already split off)
+
+        Returns:
+            Reason the send would be rejected, or None if it may go out
+        """
+        try:
+            templates, synced_at = self._load(waba_id)
+        except Exception as e:
+            logger.warning(f"Template catalog unavailable for {waba_id}: {str(e)}")
+            return None
+        if not synced_at:
+            return None
+
+        template = templates.get(template_key(name, language))
+        if not template:
+            languages = sorted(t['templateLanguage'] for t in templates.values() if t.get('templateName') == name)
+            if languages:
+                return f"Template '{name}' has no '{language}' version (available: {', '.join(languages)})"
+            return f"Template '{name}' not found"
+
+        status = template.get('templateStatus', '')
+        if status not in SENDABLE_STATUSES:
+            return f"Template '{name}' ({language}) is {status or 'not approved'}"
+
+        expected = template.get('bodyParamCount')
+        if expected is not None and len(params or []) != int(expected):
+            return f"Template '{name}' expects {int(expected)} body parameters, got {len(params or [])}"
+        return None
+
+    def sync(self, waba_id: str, social_messaging) -> Dict[str, int]:
+        """
+        Reconcile the catalog of a WABA with ListWhatsAppMessageTemplates.
+
+        Definitions are fetched only for templates that are new or whose
+        status or Meta id changed; templates no longer listed are removed.
+
+        Args:
+            waba_id: AWS WABA id (waba-...)
+            social_messaging: Boto3 socialmessaging client
+
+        Returns:
+            Counts: templates, fetched, removed
+        """
+        listed = []
+        kwargs = {'id': waba_id, 'maxResults': LIST_PAGE_SIZE}
+        while True:
+            response = social_messaging.list_whatsapp_message_templates(**kwargs)
+            listed.extend(response.get('templates', []))
+            if not response.get('nextToken'):
+                break
+            kwargs['nextToken'] = response['nextToken']
+
+        existing, _ = self._load(waba_id, refresh=True)
+        now = int(time.time())
+        items = {}
+        to_fetch = []
+        for summary in listed:
+            name = summary.get('templateName', '')
+            language = summary.get('templateLanguage', '')
+            if not name:
+                continue
+            key = template_key(name, language)
+            item = {
+                'wabaId': waba_id,
+                'templateKey': key,
+                'templateName': name,
+                'templateLanguage': language,
+                'metaTemplateId': str(summary.get('metaTemplateId', '')),
+                'templateStatus': summary.get('templateStatus', ''),
+                'templateCategory': summary.get('templateCategory', ''),
+                'qualityScore': summary.get('templateQualityScore', ''),
+                'updatedAt': now,
+            }
+            previous = existing.get(key)
+            if (previous and previous.get('metaTemplateId') == item['metaTemplateId']
+                    and previous.get('templateStatus') == item['templateStatus']
+                    and 'bodyParamCount' in previous):
+                for field in ('bodyText', 'bodyParamCount', 'headerFormat', 'buttonCount'):
+                    if field in previous:
+                        item[field] = previous[field]
+            else:
+                to_fetch.append(item)
+            items[key] = item
+
+        def fetch(item: Dict[str, Any]) -> None:
+            try:
+                response = social_messaging.get_whatsapp_message_template(
+                    metaTemplateId=item['metaTemplateId'], id=waba_id
+                )
+                item.update(parse_template_definition(response.get('template')))
+            except Exception as e:
+                logger.warning(f"Template definition fetch failed for {item['templateKey']}: {str(e)}")
+
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=min(DEFINITION_WORKERS, len(to_fetch))) as pool:
+                list(pool.map(fetch, to_fetch))
+
+        removed = [key for key in existing if key not in items]
+        requests = [{'PutRequest': {'Item': self._serialize(item)}} for item in items.values()]
+        requests += [
+            {'DeleteRequest': {'Key': {'wabaId': {'S': waba_id}, 'templateKey': {'S': key}}}}
+            for key in removed
+        ]
+        requests.append({'PutRequest': {'Item': self._serialize(
+            {'wabaId': waba_id, 'templateKey': SYNC_MARKER_KEY, 'syncedAt': now, 'templateCount': len(items)}
+        )}})
+        self._batch_write(requests)
+
+        with self._lock:
+            self._cache[waba_id] = (time.time() + self.cache_seconds, items, now)
+
+        logger.info(f"Template catalog synced for {waba_id}: {len(items)} templates, "
+                    f"{len(to_fetch)} fetched, {len(removed)} removed")
+        return {'templates': len(items), 'fetched': len(to_fetch), 'removed': len(removed)}
+
+    def apply_status(self, meta_template_id: str, status: str, reason: str = '') -> int:
+        """
+        Record a template status webhook.
+
+        Templates not in the catalog yet are picked up by the next sync.
+
+        Args:
+            meta_template_id: Meta template id from the webhook
+            status: New status (APPROVED, REJECTED, PAUSED, ...)
+            reason: Rejection/pause reason
+
+        Returns:
+            Number of catalog entries updated
+        """
+        if not meta_template_id or not status:
+            return 0
+        response = self.dynamodb.query(
+            TableName=self.table_name,
+            IndexName=META_TEMPLATE_ID_INDEX,
+            KeyConditionExpression='metaTemplateId = :id',
+            ExpressionAttributeValues={':id': {'S': str(meta_template_id)}},
+            ProjectionExpression='wabaId, templateKey'
+        )
+        updated = 0
+        for key in response.get('Items', []):
+            self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key=key,
+                UpdateExpression='SET templateStatus = :status, statusReason = :reason, updatedAt = :now',
+                ExpressionAttributeValues={
+                    ':status': {'S': status.upper()},
+                    ':reason': {'S': reason or 'NONE'},
+                    ':now': {'N': str(int(time.time()))},
+                }
+            )
+            self.invalidate(key['wabaId']['S'])
+            updated += 1
+        return updated
+
+    def put_pending(self, waba_id: str, meta_template_id: str, definition: Dict[str, Any]) -> None:
+        """Add a template just submitted for review (status PENDING)."""
+        name = definition.get('name', '')
+        language = definition.get('language', '')
+        if not name:
+            return
+        item = {
+            'wabaId': waba_id,
+            'templateKey': template_key(name, language),
+            'templateName': name,
+            'templateLanguage': language,
+            'metaTemplateId': str(meta_template_id or ''),
+            'templateStatus': 'PENDING',
+            'templateCategory': definition.get('category', ''),
+            'updatedAt': int(time.time()),
+        }
+        item.update(parse_template_definition(definition))
+        self.dynamodb.put_item(TableName=self.table_name, Item=self._serialize(item))
+        self.invalidate(waba_id)
+
+    def remove(self, waba_id: str, name: str) -> None:
+        """Drop every language of a deleted template."""
+        templates, _ = self._load(waba_id, refresh=True)
+        keys = [k for k, t in templates.items() if t.get('templateName') == name]
+        self._batch_write([
+            {'DeleteRequest': {'Key': {'wabaId': {'S': waba_id}, 'templateKey': {'S': key}}}}
+            for key in keys
+        ])
+        self.invalidate(waba_id)
+
+    def invalidate(self, waba_id: str) -> None:
+        """Drop the cached catalog of a WABA in this container."""
+        with self._lock:
+            self._cache.pop(waba_id, None)
+
+    def _load(self, waba_id: str, refresh: bool = False) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        if not refresh:
+            with self._lock:
+                cached = self._cache.get(waba_id)
+            if cached and cached[0] > time.time():
+                return cached[1], cached[2]
+
+        templates = {}
+        synced_at = 0
+        kwargs = {
+            'TableName': self.table_name,
+            'KeyConditionExpression': 'wabaId = :waba',
+            'ExpressionAttributeValues': {':waba': {'S': waba_id}},
+        }
+        while True:
+            response = self.dynamodb.query(**kwargs)
+            for raw in response.get('Items', []):
+                item = {k: _deserializer.deserialize(v) for k, v in raw.items()}
+                if item.get('templateKey') == SYNC_MARKER_KEY:
+                    synced_at = int(item.get('syncedAt', 0))
+                    continue
+                for field in ('bodyParamCount', 'buttonCount', 'updatedAt'):
+                    if field in item:
+                        item[field] = int(item[field])
+                templates[item['templateKey']] = item
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        with self._lock:
+            self._cache[waba_id] = (time.time() + self.cache_seconds, templates, synced_at)
+        return templates, synced_at
+
+    def _batch_write(self, requests: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(requests), BATCH_WRITE_SIZE):
+            pending = {self.table_name: requests[start:start + BATCH_WRITE_SIZE]}
+            attempt = 0
+            while pending:
+                response = self.dynamodb.batch_write_item(RequestItems=pending)
+                pending = response.get('UnprocessedItems') or {}
+                if pending:
+                    attempt += 1
+                    time.sleep(min(0.05 * (2 ** attempt), 1.0))
+
+    @staticmethod
+    def _serialize(item: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: _serializer.serialize(v) for k, v in item.items() if v is not None and v != ''}
+
+
+# Global catalog instance
+_template_catalog = None
+
+def get_template_catalog() -> TemplateCatalog:
+    """Get or create global TemplateCatalog instance."""
+    global _template_catalog
+    if _template_catalog is None:
+        _template_catalog = TemplateCatalog()
+    return _template_catalog
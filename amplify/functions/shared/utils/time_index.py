@@ -0,0 +1,214 @@
+"""
+Time Index Module
+
+Newest-first listing over a time-ordered secondary index.
+
+Records written with a month bucket attribute (createdMonth = 'YYYY-MM')
+and a numeric createdAt can be read through a GSI keyed
+(createdMonth, createdAt). query_time_range() walks the buckets of a
+date range from newest to oldest and queries each one with
+ScanIndexForward=False and the range pushed into the key condition, so
+the amount read follows the requested time range, not the table size.
+
+Usage:
+    from utils.time_index import time_bucket, list_newest_first, parse_time_param
+
+    item['createdMonth'] = time_bucket(now)
+
+    page = list_newest_first(table, 'createdMonth-createdAt-index', limit=50,
+                             start=parse_time_param(params.get('from')),
+                             end=parse_time_param(params.get('to'), end_of_day=True),
+                             cursor=params.get('nextToken'), key_attributes=('id',))
+"""
+
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Sequence
+
+from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
+
+from .pagination import Page, paginate, encode_cursor, decode_cursor, InvalidCursorError, DEFAULT_MAX_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+TIME_BUCKET_ATTRIBUTE = 'createdMonth'
+TIME_SORT_ATTRIBUTE = 'createdAt'
+DEFAULT_TIME_INDEX = 'createdMonth-createdAt-index'
+
+# Range used when the caller gives no start
+DEFAULT_LOOKBACK_DAYS = 365
+
+
+def time_bucket(timestamp: Optional[float] = None) -> str:
+    """
+    Month bucket ('YYYY-MM', UTC) for an epoch timestamp.
+
+    Args:
+        timestamp: Epoch seconds (default now)
+
+    Returns:
+        Partition value for the time index
+    """
+    moment = datetime.fromtimestamp(timestamp if timestamp is not None else time.time(), tz=timezone.utc)
+    return moment.strftime('%Y-%m')
+
+
+def parse_time_param(value: Optional[str], end_of_day: bool = False) -> Optional[int]:
+    """
+    Parse a from/to query parameter.
+
+    Accepts epoch seconds or an ISO 8601 date/datetime. A bare date used
+    as the end of a range covers the whole day.
+
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    if value is None or value == '':
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    epoch = int(parsed.timestamp())
+    if end_of_day and len(value) == 10:
+        epoch += 86399
+    return epoch
+
+
+def _month_buckets(start: int, end: int) -> Iterator[str]:
+    """Month buckets from end back to start, newest first."""
+    end_moment = datetime.fromtimestamp(end, tz=timezone.utc)
+    start_moment = datetime.fromtimestamp(start, tz=timezone.utc)
+    year, month = end_moment.year, end_moment.month
+    while (year, month) >= (start_moment.year, start_moment.month):
+        yield f'{year:04d}-{month:02d}'
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+
+
+def query_time_range(table, index_name: str, limit: int, start: Optional[int] = None,
+                     end: Optional[int] = None, cursor: Optional[str] = None,
+                     key_attributes: Sequence[str] = (), lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+                     max_requests: int = DEFAULT_MAX_REQUESTS, **query_kwargs) -> Page:
+    """
+    List records newest first within [start, end].
+
+    Args:
+        table: boto3 DynamoDB Table resource
+        index_name: GSI keyed (createdMonth, createdAt)
+        limit: Items wanted on the page
+        start: Range start, epoch seconds (default end - lookback_days)
+        end: Range end, epoch seconds (default now)
+        cursor: Cursor from a previous page
+        key_attributes: Table key attributes of the items
+        lookback_days: Range used when start is not given
+        max_requests: Read budget for the page across all buckets
+        **query_kwargs: Passed through to table.query (FilterExpression, ...)
+
+    Returns:
+        Page with items and a cursor (None once the range is exhausted)
+
+    Raises:
+        InvalidCursorError: If cursor is malformed
+    """
+    end = int(end if end is not None else time.time())
+    start = int(start if start is not None else end - lookback_days * 86400)
+    index_keys = tuple(key_attributes) + (TIME_BUCKET_ATTRIBUTE, TIME_SORT_ATTRIBUTE)
+
+    # A cursor is either a key inside a bucket, or just the next bucket to start
+    resume_key = decode_cursor(cursor)
+    resume_bucket = resume_key.get(TIME_BUCKET_ATTRIBUTE) if resume_key else None
+    if resume_key and not resume_bucket:
+        raise InvalidCursorError('Invalid cursor: not a time index cursor')
+
+    page = Page()
+    buckets = list(_month_buckets(start, end))
+    if resume_bucket:
+        if resume_bucket not in buckets:
+            return page
+        buckets = buckets[buckets.index(resume_bucket):]
+
+    for position, bucket in enumerate(buckets):
+        bucket_cursor = None
+        if bucket == resume_bucket and len(resume_key) > 1:
+            bucket_cursor = encode_cursor(resume_key)
+
+        result = paginate(
+            table.query,
+            limit=limit - len(page.items),
+            cursor=bucket_cursor,
+            key_attributes=index_keys,
+            max_requests=max_requests - page.requests,
+            IndexName=index_name,
+            KeyConditionExpression=(
+                Key(TIME_BUCKET_ATTRIBUTE).eq(bucket) &
+                Key(TIME_SORT_ATTRIBUTE).between(start, end)
+            ),
+            ScanIndexForward=False,
+            **query_kwargs
+        )
+        page.items.extend(result.items)
+        page.requests += result.requests
+        page.scanned_count += result.scanned_count
+
+        if result.cursor:
+            page.cursor = result.cursor
+            break
+        next_bucket = buckets[position + 1] if position + 1 < len(buckets) else None
+        if next_bucket and (len(page.items) >= limit or page.requests >= max_requests):
+            page.cursor = encode_cursor({TIME_BUCKET_ATTRIBUTE: next_bucket})
+            break
+
+    return page
+
+
+def list_newest_first(table, index_name: Optional[str], limit: int, start: Optional[int] = None,
+                      end: Optional[int] = None, cursor: Optional[str] = None,
+                      key_attributes: Sequence[str] = (), lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+                      **query_kwargs) -> Page:
+    """
+    Newest-first listing with a scan fallback.
+
+    Uses query_time_range() on index_name. When no index is configured,
+    or the table does not have it (ValidationException), falls back to a
+    filtered scan sorted per page, the way listings worked before the
+    index existed.
+
+    Args:
+        See query_time_range(); query_kwargs may carry a FilterExpression.
+
+    Returns:
+        Page with items newest first and a cursor
+
+    Raises:
+        InvalidCursorError: If cursor is malformed
+    """
+    if index_name:
+        try:
+            return query_time_range(
+                table, index_name, limit, start=start, end=end, cursor=cursor,
+                key_attributes=key_attributes, lookback_days=lookback_days, **query_kwargs
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ValidationException':
+                raise
+            logger.warning(f"Time index {index_name} unavailable on {table.name}, scanning: {str(e)}")
+
+    scan_kwargs = dict(query_kwargs)
+    range_filter = None
+    if start is not None and end is not None:
+        range_filter = Attr(TIME_SORT_ATTRIBUTE).between(start, end)
+    elif start is not None:
+        range_filter = Attr(TIME_SORT_ATTRIBUTE).gte(start)
+    elif end is not None:
+        range_filter = Attr(TIME_SORT_ATTRIBUTE).lte(end)
+    if range_filter is not None:
+        existing = scan_kwargs.get('FilterExpression')
+        scan_kwargs['FilterExpression'] = existing & range_filter if existing is not None else range_filter
+
+    page = paginate(table.scan, limit, cursor=cursor, key_attributes=key_attributes, **scan_kwargs)
+    page.items.sort(key=lambda x: float(x.get(TIME_SORT_ATTRIBUTE, 0)), reverse=True)
+    return page
@@ -11,6 +11,7 @@ TTL Retention Periods:
 - DLQMessages: 7 days (604,800 seconds)
 - AuditLogs: 180 days (15,552,000 seconds)
 - RateLimitTrackers: 24 hours (86,400 seconds)
+- SystemEvents: 90 days (7,776,000 seconds)
 """
 
 import time
@@ -23,6 +24,7 @@ TTL_MESSAGES = 30 * 24 * 60 * 60  # 30 days = 2,592,000 seconds
 TTL_DLQ_MESSAGES = 7 * 24 * 60 * 60  # 7 days = 604,800 seconds
 TTL_AUDIT_LOGS = 180 * 24 * 60 * 60  # 180 days = 15,552,000 seconds
 TTL_RATE_LIMIT_TRACKERS = 24 * 60 * 60  # 24 hours = 86,400 seconds
+TTL_SYSTEM_EVENTS = 90 * 24 * 60 * 60  # 90 days = 7,776,000 seconds
 
 
 def calculate_ttl(retention_seconds: int, base_time: int = None) -> int:
@@ -80,6 +82,13 @@ def calculate_rate_limit_ttl(base_time: int = None) -> int:
     return calculate_ttl(TTL_RATE_LIMIT_TRACKERS, base_time)
 
 
+def calculate_system_event_ttl(base_time: int = None) -> int:
+    """
+    Calculate TTL for SystemEvents table (90 days).
+    """
+    return calculate_ttl(TTL_SYSTEM_EVENTS, base_time)
+
+
 def ttl_to_decimal(ttl_value: int) -> Decimal:
     """
     Convert TTL value to Decimal for DynamoDB.
@@ -165,6 +174,11 @@ class TTLManager:
         """Get TTL for RateLimitTrackers table."""
         return ttl_to_decimal(calculate_rate_limit_ttl())
     
+    @staticmethod
+    def for_system_events() -> Decimal:
+        """Get TTL for SystemEvents table."""
+        return ttl_to_decimal(calculate_system_event_ttl())
+    
     @staticmethod
     def is_valid(expires_at: Union[int, Decimal, str]) -> bool:
         """Check if record is still valid (not expired)."""
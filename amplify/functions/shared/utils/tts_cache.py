@@ -0,0 +1,256 @@
+"""
+TTS Audio Cache Module
+
+Renders call scripts to audio once and reuses them across calls.
+
+Campaigns speak the same script to thousands of numbers. Instead of
+sending the text to Connect/Airtel for synthesis on every call, the
+script is rendered once with Polly and stored in the media bucket under
+stream/tts/, keyed by a hash of (text, voice, engine, format). Calls
+then play the stored audio through a presigned audioUrl.
+
+Two tiers:
+- a per-container LRU of keys already known to be in S3, so warm
+  containers sign a URL without any I/O
+- the S3 object itself, shared by all containers and invocations
+
+Usage:
+    from utils.tts_cache import get_tts_cache
+
+    cache = get_tts_cache()
+    audio_url = cache.get_audio_url(text, voice_id='Aditi')
+    urls = cache.prerender(campaign_scripts, voice_id='Aditi')
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+MEDIA_BUCKET = os.environ.get('MEDIA_BUCKET', 'auth.wecare.digital')
+TTS_CACHE_PREFIX = os.environ.get('TTS_CACHE_PREFIX', 'stream/tts/')
+TTS_ENGINE = os.environ.get('TTS_ENGINE', 'standard')
+TTS_OUTPUT_FORMAT = 'mp3'
+
+# Presigned audio URLs; long enough for a queued call to fetch the audio
+TTS_URL_EXPIRY_SECONDS = int(os.environ.get('TTS_URL_EXPIRY_SECONDS', '3600'))
+
+TTS_CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get('TTS_CACHE_LOCAL_MAX_ENTRIES', '512'))
+
+# Polly rejects requests over 3000 billed characters
+MAX_TTS_TEXT_LENGTH = 3000
+
+PRERENDER_WORKERS = 8
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_script(text: str) -> str:
+    """Collapse whitespace so reformatted copies of a script share audio."""
+    return _WHITESPACE_PATTERN.sub(' ', text or '').strip()
+
+
+def tts_cache_key(text: str, voice_id: str, engine: str = TTS_ENGINE,
+                  output_format: str = TTS_OUTPUT_FORMAT) -> str:
+    """
+    Cache key for a rendered script.
+
+    Args:
+        text: Script text (plain text or SSML)
+        voice_id: Polly voice id
+        engine: Polly engine (standard, neural)
+        output_format: Audio format
+
+    Returns:
+        Hex sha256 of the normalized inputs
+    """
+    payload = json.dumps([normalize_script(text), voice_id, engine, output_format], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TTSAudioCache:
+    """Polly renders stored in S3, shared as presigned audio URLs."""
+
+    def __init__(self, polly_client=None, s3_client=None, bucket: str = None,
+                 prefix: str = None, engine: str = None,
+                 max_local_entries: int = TTS_CACHE_LOCAL_MAX_ENTRIES):
+        """
+        Initialize cache.
+
+        Args:
+            polly_client: Boto3 Polly client (optional, for testing)
+            s3_client: Boto3 S3 client (optional, for testing)
+            bucket: Bucket holding rendered audio
+            prefix: Key prefix for rendered audio
+            engine: Default Polly engine
+            max_local_entries: Per-container LRU size
+        """
+        self._polly = polly_client
+        self._s3 = s3_client
+        self.bucket = bucket or MEDIA_BUCKET
+        self.prefix = prefix or TTS_CACHE_PREFIX
+        self.engine = engine or TTS_ENGINE
+        self.max_local_entries = max_local_entries
+        self._known: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def polly(self):
+        if self._polly is None:
+            from .aws_clients import get_client
+            self._polly = get_client('polly')
+        return self._polly
+
+    @property
+    def s3(self):
+        if self._s3 is None:
+            from .aws_clients import get_client
+            self._s3 = get_client('s3')
+        return self._s3
+
+    def object_key(self, text: str, voice_id: str, engine: Optional[str] = None) -> str:
+        """S3 key of the rendered audio for a script."""
+        key = tts_cache_key(text, voice_id, engine or self.engine)
+        return f"{self.prefix}{key}.{TTS_OUTPUT_FORMAT}"
+
+    def get_audio_url(self, text: str, voice_id: str, engine: Optional[str] = None) -> str:
+        """
+        Presigned URL of the audio for a script, rendering it on a miss.
+
+        Args:
+            text: Script text (plain text, or SSML wrapped in <speak>)
+            voice_id: Polly voice id
+            engine: Polly engine (default TTS_ENGINE)
+
+        Returns:
+            Presigned GET URL valid for TTS_URL_EXPIRY_SECONDS
+
+        Raises:
+            ValueError: If the text is empty or too long for Polly
+            ClientError: If Polly or S3 fail
+        """
+        s3_key = self.ensure_rendered(text, voice_id, engine)
+        return self.s3.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': s3_key},
+            ExpiresIn=TTS_URL_EXPIRY_SECONDS
+        )
+
+    def ensure_rendered(self, text: str, voice_id: str, engine: Optional[str] = None) -> str:
+        """
+        Make sure the audio for a script is in S3.
+
+        Returns:
+            S3 key of the audio
+        """
+        script = normalize_script(text)
+        if not script:
+            raise ValueError('TTS text is empty')
+        if len(script) > MAX_TTS_TEXT_LENGTH:
+            raise ValueError(f'TTS text exceeds {MAX_TTS_TEXT_LENGTH} characters')
+
+        engine = engine or self.engine
+        s3_key = self.object_key(script, voice_id, engine)
+        if self._is_known(s3_key):
+            return s3_key
+
+        if not self._exists(s3_key):
+            self._render(script, voice_id, engine, s3_key)
+        self._remember(s3_key)
+        return s3_key
+
+    def prerender(self, texts: Iterable[str], voice_id: str,
+                  engine: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """
+        Render a batch of scripts ahead of a campaign.
+
+        Scripts are rendered in parallel; duplicates are rendered once.
+
+        Args:
+            texts: Scripts to render
+            voice_id: Polly voice id
+            engine: Polly engine (default TTS_ENGINE)
+
+        Returns:
+            Script -> presigned audio URL (None where rendering failed)
+        """
+        unique = list(OrderedDict.fromkeys(t for t in texts if normalize_script(t)))
+
+        def render(text: str) -> Optional[str]:
+            try:
+                return self.get_audio_url(text, voice_id, engine)
+            except Exception as e:
+                logger.warning(f"TTS prerender failed ({voice_id}): {str(e)}")
+                return None
+
+        if not unique:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(PRERENDER_WORKERS, len(unique))) as pool:
+            return dict(zip(unique, pool.map(render, unique)))
+
+    def _render(self, script: str, voice_id: str, engine: str, s3_key: str) -> None:
+        text_type = 'ssml' if script.startswith('<speak>') else 'text'
+        response = self.polly.synthesize_speech(
+            Text=script,
+            TextType=text_type,
+            VoiceId=voice_id,
+            Engine=engine,
+            OutputFormat=TTS_OUTPUT_FORMAT
+        )
+        stream = response['AudioStream']
+        try:
+            audio = stream.read()
+        finally:
+            stream.close()
+
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=s3_key,
+            Body=audio,
+            ContentType=response.get('ContentType', 'audio/mpeg'),
+            Metadata={'voice': voice_id, 'engine': engine, 'characters': str(response.get('RequestCharacters', len(script)))}
+        )
+        logger.info(f"TTS rendered {s3_key} ({voice_id}/{engine}, {len(audio)} bytes)")
+
+    def _exists(self, s3_key: str) -> bool:
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=s3_key)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def _is_known(self, s3_key: str) -> bool:
+        with self._lock:
+            if s3_key in self._known:
+                self._known.move_to_end(s3_key)
+                return True
+            return False
+
+    def _remember(self, s3_key: str) -> None:
+        with self._lock:
+            self._known[s3_key] = s3_key
+            self._known.move_to_end(s3_key)
+            while len(self._known) > self.max_local_entries:
+                self._known.popitem(last=False)
+
+
+# Global cache instance
+_tts_cache = None
+
+def get_tts_cache() -> TTSAudioCache:
+    """Get or create global TTSAudioCache instance."""
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = TTSAudioCache()
+    return _tts_cache
@@ -3,14 +3,17 @@ Message Validator Module
 
 Provides validation for message delivery across all channels.
 Implements opt-in validation, allowlist verification, and
-24-hour customer service window tracking.
+24-hour customer service window tracking, per contact or for a
+whole bulk recipient list at once (validate_batch).
 
 Requirements: 3.1, 3.2, 3.3, 3.4, 3.5, 16.2, 16.3
 """
 
+from array import array
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Optional, List, Dict, Any, Sequence
 from enum import Enum
 
 
@@ -48,6 +51,33 @@ class ValidationResult:
         )
 
 
+# Reason codes of BatchValidationResult.reasons (0 = accepted)
+BATCH_REASON_CODES = (None,) + tuple(ValidationErrorCode)
+_BATCH_REASON = {code: index for index, code in enumerate(BATCH_REASON_CODES) if code}
+
+
+@dataclass
+class BatchValidationResult:
+    """Result of validating a batch of recipients."""
+    accepted: array  # indices of accepted recipients ('I')
+    reasons: bytearray  # per recipient: 0 if accepted, else index into BATCH_REASON_CODES
+
+    def __len__(self) -> int:
+        return len(self.reasons)
+
+    def reason(self, index: int) -> Optional[ValidationErrorCode]:
+        """Rejection reason of a recipient, or None if accepted."""
+        return BATCH_REASON_CODES[self.reasons[index]]
+
+    def rejected_counts(self) -> Dict[str, int]:
+        """Rejected recipients per error code."""
+        return {
+            BATCH_REASON_CODES[code].value: self.reasons.count(code)
+            for code in range(1, len(BATCH_REASON_CODES))
+            if code in self.reasons
+        }
+
+
 class MessageValidator:
     """
     Validates messages before delivery across all channels.
@@ -272,6 +302,121 @@ class MessageValidator:
 
         return ValidationResult.ok()
 
+    def validate_batch(
+        self,
+        channel: str,
+        opt_ins: Sequence[Any],
+        phones: Optional[Sequence[Optional[str]]] = None,
+        emails: Optional[Sequence[Optional[str]]] = None,
+        last_inbound: Optional[Sequence[Any]] = None,
+        phone_number_id: Optional[str] = None,
+        is_template: bool = False,
+        now: Optional[datetime] = None
+    ) -> BatchValidationResult:
+        """
+        Validate a bulk recipient list in one pass.
+        
+        Applies the checks of validate_whatsapp / validate_sms /
+        validate_email and check_customer_service_window to columnar
+        inputs (one entry per recipient), with the same precedence, but
+        evaluates the allowlist and window cutoff once and builds no
+        per-recipient result objects.
+        
+        Args:
+            channel: WHATSAPP, SMS or EMAIL
+            opt_ins: Opt-in flag of the channel per recipient
+            phones: Phone per recipient (checked for SMS, and for WHATSAPP when given)
+            emails: Email per recipient (required for EMAIL)
+            last_inbound: lastInboundMessageAt per recipient (ISO string, datetime or
+                epoch seconds; needed for non-template WhatsApp sends)
+            phone_number_id: WhatsApp phone number ID to send from
+            is_template: Whether this is a template message
+            now: Current UTC time (default: now)
+            
+        Returns:
+            BatchValidationResult with accepted indices and per-recipient reason codes
+        """
+        channel = channel.upper()
+        count = len(opt_ins)
+        reasons = bytearray(count)
+        
+        missing_code = 0
+        addresses = None
+        if channel == 'EMAIL':
+            addresses, missing_code = emails, _BATCH_REASON[ValidationErrorCode.MISSING_EMAIL]
+            if addresses is None:
+                raise ValueError('emails are required for EMAIL validation')
+        elif channel == 'SMS' or phones is not None:
+            addresses, missing_code = phones, _BATCH_REASON[ValidationErrorCode.MISSING_PHONE]
+            if addresses is None:
+                raise ValueError('phones are required for SMS validation')
+        for column in (addresses, last_inbound):
+            if column is not None and len(column) != count:
+                raise ValueError('All columns must have one entry per recipient')
+        
+        opt_in_code = _BATCH_REASON[ValidationErrorCode.OPT_IN_REQUIRED]
+        if addresses is not None:
+            for i, (address, opted_in) in enumerate(zip(addresses, opt_ins)):
+                if not address:
+                    reasons[i] = missing_code
+                elif not opted_in:
+                    reasons[i] = opt_in_code
+        else:
+            for i, opted_in in enumerate(opt_ins):
+                if not opted_in:
+                    reasons[i] = opt_in_code
+        
+        if channel == 'WHATSAPP':
+            # Requirement 3.2: same sender for the whole batch
+            if phone_number_id not in self.allowlist:
+                allowlist_code = _BATCH_REASON[ValidationErrorCode.ALLOWLIST_VIOLATION]
+                reasons = bytearray(code or allowlist_code for code in reasons)
+            elif not is_template:
+                self._check_windows_batch(reasons, last_inbound, now)
+        
+        accepted = array('I', (i for i, code in enumerate(reasons) if not code))
+        return BatchValidationResult(accepted=accepted, reasons=reasons)
+
+    def _check_windows_batch(self, reasons: bytearray, last_inbound: Optional[Sequence[Any]],
+                             now: Optional[datetime]) -> None:
+        """Requirement 16.2-16.6 for a batch: reject recipients outside the window."""
+        template_code = _BATCH_REASON[ValidationErrorCode.TEMPLATE_REQUIRED]
+        if last_inbound is None:
+            for i, code in enumerate(reasons):
+                if not code:
+                    reasons[i] = template_code
+            return
+        
+        # Inside the window when the last inbound message is at or after now - 24h
+        now = now or datetime.utcnow()
+        if now.tzinfo is not None:
+            now = now.astimezone(timezone.utc).replace(tzinfo=None)
+        cutoff = now - timedelta(hours=self.SERVICE_WINDOW_HOURS)
+        cutoff_aware = cutoff.replace(tzinfo=timezone.utc)
+        cutoff_epoch = cutoff_aware.timestamp()
+        parse = datetime.fromisoformat
+        
+        for i, value in enumerate(last_inbound):
+            if reasons[i]:
+                continue
+            if not value:
+                reasons[i] = template_code
+                continue
+            try:
+                if isinstance(value, str):
+                    dt = parse(value.replace('Z', '+00:00'))
+                    inside = dt >= (cutoff if dt.tzinfo is None else cutoff_aware)
+                elif isinstance(value, datetime):
+                    inside = value >= (cutoff if value.tzinfo is None else cutoff_aware)
+                elif isinstance(value, (int, float, Decimal)):
+                    inside = value >= cutoff_epoch
+                else:
+                    inside = False
+            except (ValueError, TypeError):
+                inside = False
+            if not inside:
+                reasons[i] = template_code
+
     def is_within_service_window(self, contact: Dict[str, Any]) -> bool:
         """
         Simple boolean check for customer service window.
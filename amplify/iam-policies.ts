@@ -27,6 +27,8 @@ export const IAM_POLICIES = {
           'dynamodb:DeleteItem',
           'dynamodb:Query',
           'dynamodb:Scan',
+          'dynamodb:BatchGetItem',
+          'dynamodb:BatchWriteItem',
         ],
         Resource: [
           // Actual tables used by the system (base-wecare-digital-* prefix)
@@ -122,8 +124,22 @@ export const IAM_POLICIES = {
         Action: [
           'ses:SendEmail',
           'ses:SendRawEmail',
+          'ses:SendBulkTemplatedEmail',
+        ],
+        Resource: [
+          'arn:aws:ses:us-east-1:809904170947:identity/one@wecare.digital',
+          'arn:aws:ses:us-east-1:809904170947:template/*',
         ],
-        Resource: 'arn:aws:ses:us-east-1:809904170947:identity/one@wecare.digital',
+      },
+      {
+        Effect: 'Allow',
+        Action: [
+          'ses:CreateTemplate',
+          'ses:ListTemplates',
+          'ses:DeleteTemplate',
+          'ses:GetSendQuota',
+        ],
+        Resource: '*',
       },
     ],
   },
@@ -192,6 +208,182 @@ export const IAM_POLICIES = {
     ],
   },
 
+  // Contact hard delete: media removal and background continuation
+  erasure: {
+    Version: '2012-10-17',
+    Statement: [
+      {
+        Effect: 'Allow',
+        Action: [
+          's3:DeleteObject',
+          's3:ListBucket',
+        ],
+        Resource: [
+          'arn:aws:s3:::auth.wecare.digital',
+          'arn:aws:s3:::auth.wecare.digital/*',
+        ],
+      },
+      {
+        Effect: 'Allow',
+        Action: [
+          'lambda:InvokeFunction',
+        ],
+        Resource: 'arn:aws:lambda:us-east-1:809904170947:function:wecare-contacts-delete',
+      },
+    ],
+  },
+
+  // Contact import/export: files under stream/ and background continuation
+  contactTransfer: {
+    Version: '2012-10-17',
+    Statement: [
+      {
+        Effect: 'Allow',
+        Action: [
+          's3:GetObject',
+          's3:PutObject',
+          's3:AbortMultipartUpload',
+        ],
+        Resource: 'arn:aws:s3:::auth.wecare.digital/stream/*',
+      },
+      {
+        Effect: 'Allow',
+        Action: [
+          'lambda:InvokeFunction',
+        ],
+        Resource: 'arn:aws:lambda:us-east-1:809904170947:function:wecare-contacts-import-export',
+      },
+    ],
+  },
+
+  // Razorpay webhook: async processing of stored events (and the stats-reconciler requeue)
+  paymentEvents: {
+    Version: '2012-10-17',
+    Statement: [
+      {
+        Effect: 'Allow',
+        Action: [
+          'lambda:InvokeFunction',
+        ],
+        Resource: 'arn:aws:lambda:us-east-1:809904170947:function:wecare-razorpay-webhook',
+      },
+    ],
+  },
+
+  // Voice calls: outbound contacts, cached TTS audio and campaigns
+  voice: {
+    Version: '2012-10-17',
+    Statement: [
+      {
+        Effect: 'Allow',
+        Action: [
+          'connect:StartOutboundVoiceContact',
+          'connect:DescribeContact',
+        ],
+        Resource: 'arn:aws:connect:us-east-1:809904170947:instance/*',
+      },
+      {
+        Effect: 'Allow',
+        Action: [
+          'polly:SynthesizeSpeech',
+        ],
+        Resource: '*',
+      },
+      {
+        Effect: 'Allow',
+        Action: [
+          's3:GetObject',
+          's3:PutObject',
+        ],
+        Resource: [
+          'arn:aws:s3:::auth.wecare.digital/stream/tts/*',
+          'arn:aws:s3:::auth.wecare.digital/stream/voice-campaigns/*',
+        ],
+      },
+      {
+        // HeadObject on a missing key returns 404 instead of 403
+        Effect: 'Allow',
+        Action: [
+          's3:ListBucket',
+        ],
+        Resource: 'arn:aws:s3:::auth.wecare.digital',
+      },
+      {
+        Effect: 'Allow',
+        Action: [
+          'lambda:InvokeFunction',
+        ],
+        Resource: 'arn:aws:lambda:us-east-1:809904170947:function:wecare-voice-calls',
+      },
+    ],
+  },
+
+  // Template management: catalog sync and template lifecycle
+  templates: {
+    Version: '2012-10-17',
+    Statement: [
+      {
+        Effect: 'Allow',
+        Action: [
+          'social-messaging:ListWhatsAppMessageTemplates',
+          'social-messaging:GetWhatsAppMessageTemplate',
+          'social-messaging:CreateWhatsAppMessageTemplate',
+          'social-messaging:CreateWhatsAppMessageTemplateFromLibrary',
+          'social-messaging:DeleteWhatsAppMessageTemplate',
+          'social-messaging:ListWhatsAppTemplateLibrary',
+        ],
+        Resource: [
+          'arn:aws:social-messaging:us-east-1:809904170947:waba/waba-0aae9cf04cf24c66960f291c793359b4',
+          'arn:aws:social-messaging:us-east-1:809904170947:waba/waba-9bbe054d8404487397c38a9d197bc44a',
+        ],
+      },
+    ],
+  },
+
+  // Expiry of the bulk email SES templates (stats-reconciler)
+  bulkTemplates: {
+    Version: '2012-10-17',
+    Statement: [
+      {
+        Effect: 'Allow',
+        Action: [
+          'ses:ListTemplates',
+        ],
+        Resource: '*',
+      },
+      {
+        Effect: 'Allow',
+        Action: [
+          'ses:DeleteTemplate',
+        ],
+        Resource: 'arn:aws:ses:us-east-1:809904170947:template/wecare-bulk-*',
+      },
+    ],
+  },
+
+  // Bulk-send suppression snapshots (utils/suppression.py)
+  suppression: {
+    Version: '2012-10-17',
+    Statement: [
+      {
+        Effect: 'Allow',
+        Action: [
+          's3:GetObject',
+          's3:PutObject',
+        ],
+        Resource: 'arn:aws:s3:::auth.wecare.digital/suppression/*',
+      },
+      {
+        // GetObject on a missing key returns 404 instead of 403
+        Effect: 'Allow',
+        Action: [
+          's3:ListBucket',
+        ],
+        Resource: 'arn:aws:s3:::auth.wecare.digital',
+      },
+    ],
+  },
+
   // Cognito permissions
   cognito: {
     Version: '2012-10-17',
@@ -219,16 +411,21 @@ export const FUNCTION_POLICIES = {
   'contacts-create': ['common'],
   'contacts-read': ['common'],
   'contacts-update': ['common'],
-  'contacts-delete': ['common'],
+  'contacts-delete': ['common', 'erasure'],
   'contacts-search': ['common'],
-  'inbound-whatsapp-handler': ['common', 'whatsapp', 'sqs', 'sns'],
+  'contacts-import-export': ['common', 'contactTransfer'],
+  'inbound-whatsapp-handler': ['common', 'whatsapp', 'sqs', 'sns', 'bedrock'],
   'outbound-whatsapp': ['common', 'whatsapp', 'sqs'],
   'outbound-sms': ['common', 'sms', 'sqs'],
   'outbound-email': ['common', 'email', 'sqs'],
-  'bulk-job-create': ['common', 'sqs'],
+  'bulk-job-create': ['common', 'sqs', 'suppression'],
   'bulk-worker': ['common', 'sqs', 'whatsapp', 'sms', 'email'],
-  'bulk-job-control': ['common', 'sqs'],
+  'bulk-job-control': ['common', 'sqs', 'suppression'],
   'dlq-replay': ['common', 'sqs', 'sns'],
   'ai-query-kb': ['common', 'bedrock'],
   'ai-generate-response': ['common', 'bedrock'],
+  'stats-reconciler': ['common', 'suppression', 'bulkTemplates', 'paymentEvents'],
+  'razorpay-webhook': ['common', 'paymentEvents'],
+  'voice-calls': ['common', 'voice'],
+  'whatsapp-template-management': ['common', 'templates'],
 };
@@ -0,0 +1,211 @@
+"""
+Cold-Start Benchmark for WhatsApp Lambda Handlers
+
+Measures, in a fresh interpreter per sample:
+- import time of handler.py (no .pyc, like a new Lambda container)
+- first-invocation latency per route
+
+The handler is laid out exactly like the deployment zip (handler.py plus
+the shared `utils` package). AWS calls are answered locally by a
+botocore `before-send` hook, so the numbers cover client construction,
+request serialization and handler code, not network time.
+
+Usage:
+    python scripts/benchmark-cold-start.py
+    python scripts/benchmark-cold-start.py --runs 10 --handler outbound-whatsapp
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHARED_UTILS_DIR = os.path.join(ROOT, 'amplify', 'functions', 'shared', 'utils')
+
+HANDLERS = {
+    'inbound-whatsapp-handler': 'amplify/functions/messaging/inbound-whatsapp-handler/handler.py',
+    'outbound-whatsapp': 'amplify/functions/messaging/outbound-whatsapp/handler.py',
+}
+
+# Canned responses per (service, operation); anything else gets an empty body
+STUB_RESPONSES = {
+    ('dynamodb', 'GetItem'): {'Item': {
+        'id': {'S': 'bench-contact'},
+        'contactId': {'S': 'bench-contact'},
+        'phone': {'S': '+919876543210'},
+        'name': {'S': 'Bench'},
+    }},
+    ('dynamodb', 'UpdateItem'): {'Attributes': {'messageCount': {'N': '1'}}},
+    ('dynamodb', 'Query'): {'Items': [], 'Count': 0},
+    ('dynamodb', 'Scan'): {'Items': [], 'Count': 0},
+    ('socialmessaging', 'SendWhatsAppMessage'): {'messageId': 'wamid.bench'},
+    ('lambda', 'Invoke'): {},
+}
+
+
+def _sns_record(change: dict) -> dict:
+    """Wrap a webhook change in the AWS EUM Social SNS envelope."""
+    entry = {'id': 'bench-waba', 'changes': [change]}
+    return {'Records': [{'Sns': {'Message': json.dumps({
+        'context': {'MetaWabaIds': [], 'MetaPhoneNumberIds': []},
+        'whatsAppWebhookEntry': json.dumps(entry),
+        'messageId': 'bench-message',
+    })}}]}
+
+
+_METADATA = {'display_phone_number': '+91 93309 94400', 'phone_number_id': 'bench-meta-id'}
+
+ROUTES = {
+    'inbound-whatsapp-handler': {
+        'text_message': _sns_record({'field': 'messages', 'value': {
+            'metadata': _METADATA,
+            'contacts': [{'wa_id': '919876543210', 'profile': {'name': 'Bench'}}],
+            'messages': [{'from': '919876543210', 'id': 'wamid.in', 'type': 'text',
+                          'timestamp': '1700000000', 'text': {'body': 'hi'}}],
+        }}),
+        'delivery_status': _sns_record({'field': 'messages', 'value': {
+            'metadata': _METADATA,
+            'statuses': [{'id': 'wamid.out', 'status': 'delivered', 'timestamp': '1700000000',
+                          'recipient_id': '919876543210'}],
+        }}),
+        'template_status': _sns_record({'field': 'message_template_status_update', 'value': {
+            'event': 'APPROVED', 'message_template_id': 1, 'message_template_name': 'bench',
+            'message_template_language': 'en',
+        }}),
+    },
+    'outbound-whatsapp': {
+        'text_send': {'body': json.dumps({'contactId': 'bench-contact', 'content': 'hello'})},
+        'template_send': {'body': json.dumps({
+            'contactId': 'bench-contact', 'isTemplate': True,
+            'templateName': 'bench', 'templateParams': ['a'],
+        })},
+        'reaction_send': {'body': json.dumps({
+            'contactId': 'bench-contact', 'isReaction': True, 'reactionMessageId': 'wamid.in',
+        })},
+    },
+}
+
+
+class _Context:
+    aws_request_id = 'bench'
+    function_name = 'bench'
+
+    @staticmethod
+    def get_remaining_time_in_millis() -> int:
+        return 30000
+
+
+def _stub_send(request, **kwargs):
+    """Answer every AWS request locally (registered on before-send)."""
+    from botocore.awsrequest import AWSResponse
+
+    event_name = kwargs.get('event_name', '')
+    parts = event_name.split('.')
+    key = (parts[1], parts[2]) if len(parts) >= 3 else ('', '')
+    body = json.dumps(STUB_RESPONSES.get(key, {})).encode('utf-8')
+    if key[0] in ('s3', 'cloudwatch', 'sns', 'ses'):
+        body = b''
+
+    class _Raw:
+        def __init__(self, data):
+            self._data = data
+
+        def stream(self, **_):
+            yield self._data
+
+    return AWSResponse(request.url, 200, {'x-amzn-requestid': 'bench'}, _Raw(body))
+
+
+def _child(workdir: str, route: str) -> None:
+    """Run one cold sample and print timings as JSON."""
+    sys.path.insert(0, workdir)
+    os.environ.setdefault('AWS_REGION', 'us-east-1')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'bench')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'bench')
+
+    import boto3
+    boto3.setup_default_session()
+    boto3.DEFAULT_SESSION.events.register('before-send', _stub_send)
+
+    start = time.perf_counter()
+    import handler  # noqa: E402
+    import_ms = (time.perf_counter() - start) * 1000
+
+    result = {'importMs': import_ms}
+    if route:
+        bench_name = os.path.basename(os.path.normpath(workdir))
+        event = ROUTES[bench_name][route]
+        start = time.perf_counter()
+        handler.handler(event, _Context())
+        result['firstInvokeMs'] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        handler.handler(event, _Context())
+        result['warmInvokeMs'] = (time.perf_counter() - start) * 1000
+    print(json.dumps(result))
+
+
+def _prepare(name: str, tmp_root: str) -> str:
+    """Lay out handler.py and utils/ like the deployment zip."""
+    workdir = os.path.join(tmp_root, name)
+    os.makedirs(workdir)
+    shutil.copy(os.path.join(ROOT, HANDLERS[name]), os.path.join(workdir, 'handler.py'))
+    shutil.copytree(SHARED_UTILS_DIR, os.path.join(workdir, 'utils'),
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    return workdir
+
+
+def _sample(workdir: str, route: str) -> dict:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1', LOG_LEVEL='ERROR')
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', workdir, route or ''],
+        capture_output=True, text=True, env=env, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _summarize(samples: list, key: str) -> str:
+    values = sorted(s[key] for s in samples if key in s)
+    if not values:
+        return '-'
+    p90 = values[min(len(values) - 1, round(0.9 * (len(values) - 1)))]
+    return f"{statistics.median(values):8.1f} ms (p90 {p90:.1f})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start benchmark for WhatsApp handlers')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per measurement')
+    parser.add_argument('--handler', choices=sorted(HANDLERS), help='Only benchmark one handler')
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child[0], args.child[1])
+        return
+
+    names = [args.handler] if args.handler else sorted(HANDLERS)
+    tmp_root = tempfile.mkdtemp(prefix='wecare-coldstart-')
+    try:
+        print("Cold-start benchmark")
+        print("=" * 72)
+        for name in names:
+            workdir = _prepare(name, tmp_root)
+            imports = [_sample(workdir, '') for _ in range(args.runs)]
+            print(f"\n{name}")
+            print(f"   import             {_summarize(imports, 'importMs')}")
+            for route in ROUTES[name]:
+                samples = [_sample(workdir, route) for _ in range(args.runs)]
+                print(f"   {route:<18} first {_summarize(samples, 'firstInvokeMs')}"
+                      f"   warm {_summarize(samples, 'warmInvokeMs')}")
+        print("\n" + "=" * 72)
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Bulk Validation Benchmark for MessageValidator
+
+Compares validating a bulk recipient list one contact at a time
+(validate_whatsapp / validate_sms / validate_email) against one
+validate_batch call on the same data in columns, and checks both accept
+the same recipients.
+
+Recipients are synthetic: a mix of opted-in and opted-out contacts,
+missing phones, and last inbound messages inside, outside and without a
+24-hour window, as ISO strings like the Contacts table stores them.
+
+Usage:
+    python scripts/benchmark-validator.py
+    python scripts/benchmark-validator.py --sizes 100000 1000000 --channel WHATSAPP --freeform
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'amplify', 'functions', 'shared'))
+
+from utils.validator import MessageValidator  # noqa: E402
+
+PHONE_NUMBER_ID = MessageValidator.WHATSAPP_ALLOWLIST[0]
+
+
+def _contacts(count: int, now: datetime, seed: int = 7) -> list:
+    """Synthetic contact records."""
+    rng = random.Random(seed)
+    contacts = []
+    for i in range(count):
+        hours_ago = rng.choice((None, 1, 12, 23, 30, 72))
+        contacts.append({
+            'contactId': f'bench-{i}',
+            'phone': '' if rng.random() < 0.02 else f'+9198{rng.randrange(10 ** 8):08d}',
+            'email': '' if rng.random() < 0.05 else f'user{i}@example.com',
+            'optInWhatsApp': rng.random() < 0.9,
+            'optInSms': rng.random() < 0.8,
+            'optInEmail': rng.random() < 0.7,
+            'lastInboundMessageAt': (now - timedelta(hours=hours_ago)).isoformat() if hours_ago else None,
+        })
+    return contacts
+
+
+def _per_contact(validator: MessageValidator, channel: str, contacts: list, is_template: bool) -> list:
+    if channel == 'WHATSAPP':
+        # validate_whatsapp does not look at the phone; the batch call does when given one
+        return [i for i, c in enumerate(contacts)
+                if c['phone'] and validator.validate_whatsapp(c, PHONE_NUMBER_ID, is_template).success]
+    if channel == 'SMS':
+        return [i for i, c in enumerate(contacts) if validator.validate_sms(c).success]
+    return [i for i, c in enumerate(contacts) if validator.validate_email(c).success]
+
+
+def _batch(validator: MessageValidator, channel: str, contacts: list, is_template: bool, now: datetime):
+    opt_in_field = {'WHATSAPP': 'optInWhatsApp', 'SMS': 'optInSms', 'EMAIL': 'optInEmail'}[channel]
+    started = time.perf_counter()
+    # Column extraction is part of the cost when starting from contact dicts
+    opt_ins = [c[opt_in_field] for c in contacts]
+    if channel == 'EMAIL':
+        columns = {'emails': [c['email'] for c in contacts]}
+    else:
+        columns = {'phones': [c['phone'] for c in contacts]}
+    if channel == 'WHATSAPP' and not is_template:
+        columns['last_inbound'] = [c['lastInboundMessageAt'] for c in contacts]
+    result = validator.validate_batch(
+        channel, opt_ins, phone_number_id=PHONE_NUMBER_ID, is_template=is_template, now=now, **columns
+    )
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk validation benchmark for MessageValidator')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000], help='Recipients per run')
+    parser.add_argument('--channel', choices=['WHATSAPP', 'SMS', 'EMAIL'], default='WHATSAPP')
+    parser.add_argument('--freeform', action='store_true', help='WhatsApp free-form sends (window check)')
+    args = parser.parse_args()
+
+    validator = MessageValidator()
+    is_template = not args.freeform
+    now = datetime.utcnow()
+
+    print(f"Bulk validation benchmark ({args.channel}, {'template' if is_template else 'free-form'})")
+    print("=" * 72)
+    for size in args.sizes:
+        contacts = _contacts(size, now)
+
+        started = time.perf_counter()
+        expected = _per_contact(validator, args.channel, contacts, is_template)
+        per_contact_s = time.perf_counter() - started
+
+        result, batch_s = _batch(validator, args.channel, contacts, is_template, now)
+        if list(result.accepted) != expected:
+            print(f"   {size:>9,}  MISMATCH: per-contact accepted {len(expected)}, batch {len(result.accepted)}")
+            sys.exit(1)
+
+        print(f"\n{size:,} recipients ({len(expected):,} accepted)")
+        print(f"   per contact   {per_contact_s * 1000:10.1f} ms   {size / per_contact_s:12,.0f} /s")
+        print(f"   batch         {batch_s * 1000:10.1f} ms   {size / batch_s:12,.0f} /s"
+              f"   ({per_contact_s / batch_s:.1f}x)")
+        print(f"   rejected      {result.rejected_counts()}")
+    print("\n" + "=" * 72)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Create the AIResponseCache table
+
+utils/ai_cache.py keeps Bedrock answers (ai-generate-response) and
+knowledge base retrievals (ai-query-kb) here, one item per cacheKey
+('v<version>#<kind>#<kbId>#<lang>#<sha256>'). Items expire through the
+expiresAt TTL (6 hours); reads also skip expired items, since TTL deletes
+lag. Safe to re-run.
+"""
+import time
+import boto3
+
+dynamodb = boto3.client('dynamodb', region_name='us-east-1')
+
+TABLE_NAME = 'base-wecare-digital-AIResponseCacheTable'
+
+
+def wait_active():
+    while True:
+        time.sleep(5)
+        status = dynamodb.describe_table(TableName=TABLE_NAME)['Table']['TableStatus']
+        if status == 'ACTIVE':
+            print(f'  {TABLE_NAME} active')
+            return
+
+
+try:
+    dynamodb.describe_table(TableName=TABLE_NAME)
+    print(f'{TABLE_NAME} exists')
+except dynamodb.exceptions.ResourceNotFoundException:
+    print(f'Creating {TABLE_NAME}...')
+    dynamodb.create_table(
+        TableName=TABLE_NAME,
+        AttributeDefinitions=[
+            {'AttributeName': 'cacheKey', 'AttributeType': 'S'},
+        ],
+        KeySchema=[
+            {'AttributeName': 'cacheKey', 'KeyType': 'HASH'},
+        ],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    wait_active()
+
+ttl = dynamodb.describe_time_to_live(TableName=TABLE_NAME)['TimeToLiveDescription']
+if ttl.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+    print('  TTL enabled')
+else:
+    dynamodb.update_time_to_live(
+        TableName=TABLE_NAME,
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'expiresAt'},
+    )
+    print('  TTL enabled on expiresAt')
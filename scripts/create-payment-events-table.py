@@ -0,0 +1,64 @@
+"""Create the PaymentEvents table
+
+razorpay-webhook stores every Razorpay event here with a conditional put on
+the event id (retries become no-ops) before applying it to the payment
+ledger. Pending events carry pendingPaymentKey, so
+pendingPaymentKey-receivedAt-index is sparse: it only holds events that
+have not been applied yet. Items expire through the expiresAt TTL.
+Safe to re-run.
+"""
+import time
+import boto3
+
+dynamodb = boto3.client('dynamodb', region_name='us-east-1')
+
+TABLE_NAME = 'base-wecare-digital-PaymentEventsTable'
+INDEX_NAME = 'pendingPaymentKey-receivedAt-index'
+
+
+def wait_active():
+    while True:
+        time.sleep(5)
+        table = dynamodb.describe_table(TableName=TABLE_NAME)['Table']
+        indexes = table.get('GlobalSecondaryIndexes', [])
+        if table['TableStatus'] == 'ACTIVE' and all(i['IndexStatus'] == 'ACTIVE' for i in indexes):
+            print(f'  {TABLE_NAME} active')
+            return
+
+
+try:
+    dynamodb.describe_table(TableName=TABLE_NAME)
+    print(f'{TABLE_NAME} exists')
+except dynamodb.exceptions.ResourceNotFoundException:
+    print(f'Creating {TABLE_NAME}...')
+    dynamodb.create_table(
+        TableName=TABLE_NAME,
+        AttributeDefinitions=[
+            {'AttributeName': 'eventId', 'AttributeType': 'S'},
+            {'AttributeName': 'pendingPaymentKey', 'AttributeType': 'S'},
+            {'AttributeName': 'receivedAt', 'AttributeType': 'N'},
+        ],
+        KeySchema=[
+            {'AttributeName': 'eventId', 'KeyType': 'HASH'},
+        ],
+        GlobalSecondaryIndexes=[{
+            'IndexName': INDEX_NAME,
+            'KeySchema': [
+                {'AttributeName': 'pendingPaymentKey', 'KeyType': 'HASH'},
+                {'AttributeName': 'receivedAt', 'KeyType': 'RANGE'},
+            ],
+            'Projection': {'ProjectionType': 'ALL'},
+        }],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    wait_active()
+
+ttl = dynamodb.describe_time_to_live(TableName=TABLE_NAME)['TimeToLiveDescription']
+if ttl.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+    print('  TTL enabled')
+else:
+    dynamodb.update_time_to_live(
+        TableName=TABLE_NAME,
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'expiresAt'},
+    )
+    print('  TTL enabled on expiresAt')
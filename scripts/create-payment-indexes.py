@@ -0,0 +1,50 @@
+"""Create the payment ledger lookup indexes on the Payments table
+
+utils/payment_ledger.py resolves Razorpay webhooks by payment id and
+order id through these GSIs (paymentId-index, orderId-index). Safe to
+re-run; existing indexes are skipped. DynamoDB builds one GSI at a time,
+so this waits for each to become ACTIVE before creating the next.
+"""
+import time
+import boto3
+
+dynamodb = boto3.client('dynamodb', region_name='us-east-1')
+
+TABLE_NAME = 'base-wecare-digital-PaymentsTable'
+
+INDEXES = {
+    'paymentId-index': 'paymentId',
+    'orderId-index': 'orderId',
+}
+
+
+def wait_active(index_name):
+    while True:
+        time.sleep(15)
+        table = dynamodb.describe_table(TableName=TABLE_NAME)['Table']
+        status = next(i['IndexStatus'] for i in table['GlobalSecondaryIndexes'] if i['IndexName'] == index_name)
+        if status == 'ACTIVE':
+            print(f'  {index_name} active')
+            return
+
+
+for index_name, attribute in INDEXES.items():
+    table = dynamodb.describe_table(TableName=TABLE_NAME)['Table']
+    existing = [i['IndexName'] for i in table.get('GlobalSecondaryIndexes', [])]
+    if index_name in existing:
+        print(f'{index_name} exists')
+        continue
+
+    print(f'Creating {index_name}...')
+    dynamodb.update_table(
+        TableName=TABLE_NAME,
+        AttributeDefinitions=[{'AttributeName': attribute, 'AttributeType': 'S'}],
+        GlobalSecondaryIndexUpdates=[{
+            'Create': {
+                'IndexName': index_name,
+                'KeySchema': [{'AttributeName': attribute, 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'ALL'},
+            }
+        }],
+    )
+    wait_active(index_name)
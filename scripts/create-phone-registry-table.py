@@ -0,0 +1,65 @@
+"""Create and populate the PhoneNumberRegistry table
+
+utils/phone_registry.py routes inbound webhooks and outbound sends through
+this table (one item per AWS phone number id). Until it has items, the
+built-in WHATSAPP_PHONE_NUMBER_ID_1/2 numbers are used. Populates it from
+the linked WABAs; re-run (or POST /waba/registry/refresh) after adding a
+number. Set throughputMps or isDefault on an item to override the defaults.
+"""
+import re
+import time
+import boto3
+
+REGION = 'us-east-1'
+dynamodb = boto3.client('dynamodb', region_name=REGION)
+social_messaging = boto3.client('socialmessaging', region_name=REGION)
+
+TABLE_NAME = 'base-wecare-digital-PhoneNumberRegistryTable'
+
+
+def wait_active():
+    while True:
+        time.sleep(5)
+        if dynamodb.describe_table(TableName=TABLE_NAME)['Table']['TableStatus'] == 'ACTIVE':
+            print(f'  {TABLE_NAME} active')
+            return
+
+
+try:
+    dynamodb.describe_table(TableName=TABLE_NAME)
+    print(f'{TABLE_NAME} exists')
+except dynamodb.exceptions.ResourceNotFoundException:
+    print(f'Creating {TABLE_NAME}...')
+    dynamodb.create_table(
+        TableName=TABLE_NAME,
+        AttributeDefinitions=[{'AttributeName': 'phoneNumberId', 'AttributeType': 'S'}],
+        KeySchema=[{'AttributeName': 'phoneNumberId', 'KeyType': 'HASH'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    wait_active()
+
+for account in social_messaging.list_linked_whatsapp_business_accounts().get('linkedAccounts', []):
+    waba = social_messaging.get_linked_whatsapp_business_account(id=account['id'])['account']
+    for phone in waba.get('phoneNumbers', []):
+        display = phone.get('displayPhoneNumber') or phone.get('phoneNumber', '')
+        dynamodb.update_item(
+            TableName=TABLE_NAME,
+            Key={'phoneNumberId': {'S': phone['phoneNumberId']}},
+            UpdateExpression=(
+                'SET wabaId = :waba, metaWabaId = :metaWaba, wabaName = :wabaName, '
+                'metaPhoneNumberId = :metaPhone, displayPhoneNumber = :display, '
+                'displayDigits = :digits, displayName = :name, qualityRating = :quality, updatedAt = :now'
+            ),
+            ExpressionAttributeValues={
+                ':waba': {'S': account['id']},
+                ':metaWaba': {'S': waba.get('wabaId', '')},
+                ':wabaName': {'S': waba.get('wabaName', '')},
+                ':metaPhone': {'S': phone.get('metaPhoneNumberId', '')},
+                ':display': {'S': display},
+                ':digits': {'S': re.sub(r'\D', '', display)},
+                ':name': {'S': phone.get('displayPhoneNumberName', '')},
+                ':quality': {'S': phone.get('qualityRating', 'UNKNOWN')},
+                ':now': {'N': str(int(time.time()))},
+            },
+        )
+        print(f"  {phone['phoneNumberId']} {display} ({account['id']})")
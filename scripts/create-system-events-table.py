@@ -0,0 +1,52 @@
+"""Create the SystemEvents table
+
+utils/system_events.py appends WhatsApp account events (template status,
+phone quality, account updates) to this table, partitioned by event type
+and sorted by eventKey ('<epoch ms>#<random>'). Items expire through the
+expiresAt TTL. Safe to re-run.
+"""
+import time
+import boto3
+
+dynamodb = boto3.client('dynamodb', region_name='us-east-1')
+
+TABLE_NAME = 'base-wecare-digital-SystemEventsTable'
+
+
+def wait_active():
+    while True:
+        time.sleep(5)
+        status = dynamodb.describe_table(TableName=TABLE_NAME)['Table']['TableStatus']
+        if status == 'ACTIVE':
+            print(f'  {TABLE_NAME} active')
+            return
+
+
+try:
+    dynamodb.describe_table(TableName=TABLE_NAME)
+    print(f'{TABLE_NAME} exists')
+except dynamodb.exceptions.ResourceNotFoundException:
+    print(f'Creating {TABLE_NAME}...')
+    dynamodb.create_table(
+        TableName=TABLE_NAME,
+        AttributeDefinitions=[
+            {'AttributeName': 'eventType', 'AttributeType': 'S'},
+            {'AttributeName': 'eventKey', 'AttributeType': 'S'},
+        ],
+        KeySchema=[
+            {'AttributeName': 'eventType', 'KeyType': 'HASH'},
+            {'AttributeName': 'eventKey', 'KeyType': 'RANGE'},
+        ],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    wait_active()
+
+ttl = dynamodb.describe_time_to_live(TableName=TABLE_NAME)['TimeToLiveDescription']
+if ttl.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+    print('  TTL enabled')
+else:
+    dynamodb.update_time_to_live(
+        TableName=TABLE_NAME,
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'expiresAt'},
+    )
+    print('  TTL enabled on expiresAt')
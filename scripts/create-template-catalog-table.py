@@ -0,0 +1,51 @@
+"""Create the TemplateCatalog table
+
+utils/template_catalog.py keeps one item per WhatsApp template, keyed
+(wabaId, templateKey = '<name>#<language>'). Template status webhooks only
+carry the Meta template id, so they are matched through metaTemplateId-index.
+Populate it with POST /templates/sync (or by opening the template picker).
+Safe to re-run.
+"""
+import time
+import boto3
+
+dynamodb = boto3.client('dynamodb', region_name='us-east-1')
+
+TABLE_NAME = 'base-wecare-digital-TemplateCatalogTable'
+INDEX_NAME = 'metaTemplateId-index'
+
+
+def wait_active():
+    while True:
+        time.sleep(5)
+        table = dynamodb.describe_table(TableName=TABLE_NAME)['Table']
+        indexes = table.get('GlobalSecondaryIndexes', [])
+        if table['TableStatus'] == 'ACTIVE' and all(i['IndexStatus'] == 'ACTIVE' for i in indexes):
+            print(f'  {TABLE_NAME} active')
+            return
+
+
+try:
+    dynamodb.describe_table(TableName=TABLE_NAME)
+    print(f'{TABLE_NAME} exists')
+except dynamodb.exceptions.ResourceNotFoundException:
+    print(f'Creating {TABLE_NAME}...')
+    dynamodb.create_table(
+        TableName=TABLE_NAME,
+        AttributeDefinitions=[
+            {'AttributeName': 'wabaId', 'AttributeType': 'S'},
+            {'AttributeName': 'templateKey', 'AttributeType': 'S'},
+            {'AttributeName': 'metaTemplateId', 'AttributeType': 'S'},
+        ],
+        KeySchema=[
+            {'AttributeName': 'wabaId', 'KeyType': 'HASH'},
+            {'AttributeName': 'templateKey', 'KeyType': 'RANGE'},
+        ],
+        GlobalSecondaryIndexes=[{
+            'IndexName': INDEX_NAME,
+            'KeySchema': [{'AttributeName': 'metaTemplateId', 'KeyType': 'HASH'}],
+            'Projection': {'ProjectionType': 'KEYS_ONLY'},
+        }],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    wait_active()
@@ -0,0 +1,89 @@
+"""Create the createdMonth-createdAt-index GSIs and backfill createdMonth
+
+List endpoints for payments, voice calls, bulk jobs and DLQ messages query
+this index newest first (see utils/time_index.py). Records written before
+the index existed have no createdMonth and stay invisible to it until
+backfilled. Safe to re-run.
+"""
+import time
+from datetime import datetime, timezone
+import boto3
+
+dynamodb = boto3.client('dynamodb', region_name='us-east-1')
+
+INDEX_NAME = 'createdMonth-createdAt-index'
+
+# table -> attribute holding the creation time (epoch seconds) on old records
+TABLES = {
+    'base-wecare-digital-PaymentsTable': 'createdAt',
+    'base-wecare-digital-VoiceCalls': 'createdAt',
+    'base-wecare-digital-BulkJobsTable': 'createdAt',
+    # DLQ records before the index only carry lastAttemptAt
+    'DLQMessages': 'lastAttemptAt',
+}
+
+
+def create_index(table_name):
+    table = dynamodb.describe_table(TableName=table_name)['Table']
+    existing = [i['IndexName'] for i in table.get('GlobalSecondaryIndexes', [])]
+    if INDEX_NAME in existing:
+        print(f'  {INDEX_NAME} exists')
+        return
+    dynamodb.update_table(
+        TableName=table_name,
+        AttributeDefinitions=[
+            {'AttributeName': 'createdMonth', 'AttributeType': 'S'},
+            {'AttributeName': 'createdAt', 'AttributeType': 'N'},
+        ],
+        GlobalSecondaryIndexUpdates=[{
+            'Create': {
+                'IndexName': INDEX_NAME,
+                'KeySchema': [
+                    {'AttributeName': 'createdMonth', 'KeyType': 'HASH'},
+                    {'AttributeName': 'createdAt', 'KeyType': 'RANGE'},
+                ],
+                'Projection': {'ProjectionType': 'ALL'},
+            }
+        }],
+    )
+    print(f'  Creating {INDEX_NAME}...')
+    while True:
+        time.sleep(15)
+        table = dynamodb.describe_table(TableName=table_name)['Table']
+        status = next(i['IndexStatus'] for i in table['GlobalSecondaryIndexes'] if i['IndexName'] == INDEX_NAME)
+        if status == 'ACTIVE':
+            print(f'  {INDEX_NAME} active')
+            return
+
+
+def backfill(table_name, source_attribute):
+    key_names = [k['AttributeName'] for k in dynamodb.describe_table(TableName=table_name)['Table']['KeySchema']]
+    paginator = dynamodb.get_paginator('scan')
+    updated = 0
+    for page in paginator.paginate(
+        TableName=table_name,
+        FilterExpression='attribute_not_exists(createdMonth)',
+    ):
+        for item in page['Items']:
+            value = item.get('createdAt') or item.get(source_attribute)
+            if not value or 'N' not in value:
+                continue
+            created_at = int(float(value['N']))
+            month = datetime.fromtimestamp(created_at, tz=timezone.utc).strftime('%Y-%m')
+            dynamodb.update_item(
+                TableName=table_name,
+                Key={name: item[name] for name in key_names},
+                UpdateExpression='SET createdMonth = :month, createdAt = if_not_exists(createdAt, :createdAt)',
+                ExpressionAttributeValues={':month': {'S': month}, ':createdAt': {'N': str(created_at)}},
+            )
+            updated += 1
+    print(f'  Backfilled {updated} items')
+
+
+for table_name, source_attribute in TABLES.items():
+    print(f'{table_name}:')
+    try:
+        create_index(table_name)
+        backfill(table_name, source_attribute)
+    except dynamodb.exceptions.ResourceNotFoundException:
+        print('  Table not found, skipping')
@@ -26,13 +26,16 @@ LAMBDAS = [
         'name': 'wecare-voice-calls',
         'handler': 'handler.handler',
         'runtime': 'python3.12',
-        'timeout': 30,
+        'timeout': 900,
         'memory': 256,
         'source': 'amplify/functions/messaging/voice-calls/handler.py',
         'env': {
             'LOG_LEVEL': 'INFO',
             'CONTACTS_TABLE': 'base-wecare-digital-ContactsTable',
             'VOICE_CALLS_TABLE': 'base-wecare-digital-VoiceCalls',
+            'SYSTEM_CONFIG_TABLE': 'base-wecare-digital-SystemConfigTable',
+            'MEDIA_BUCKET': 'auth.wecare.digital',
+            'TTS_ENGINE': 'standard',
         }
     },
     {
@@ -47,6 +50,38 @@ LAMBDAS = [
             'PAYMENTS_TABLE': 'base-wecare-digital-PaymentsTable',
         }
     },
+    {
+        'name': 'wecare-contacts-import-export',
+        'handler': 'handler.handler',
+        'runtime': 'python3.12',
+        'timeout': 900,
+        'memory': 1024,
+        'source': 'amplify/functions/core/contacts-import-export/handler.py',
+        'env': {
+            'LOG_LEVEL': 'INFO',
+            'CONTACTS_TABLE': 'base-wecare-digital-ContactsTable',
+            'SYSTEM_CONFIG_TABLE': 'base-wecare-digital-SystemConfigTable',
+            'PHONE_INDEX': 'phone-index',
+            'MEDIA_BUCKET': 'auth.wecare.digital',
+        }
+    },
+    {
+        'name': 'wecare-stats-reconciler',
+        'handler': 'handler.handler',
+        'runtime': 'python3.12',
+        'timeout': 900,
+        'memory': 512,
+        'source': 'amplify/functions/operations/stats-reconciler/handler.py',
+        'schedule': 'rate(6 hours)',
+        'env': {
+            'LOG_LEVEL': 'INFO',
+            'CONTACTS_TABLE': 'base-wecare-digital-ContactsTable',
+            'INBOUND_TABLE': 'base-wecare-digital-WhatsAppInboundTable',
+            'OUTBOUND_TABLE': 'base-wecare-digital-WhatsAppOutboundTable',
+            'AI_INTERACTIONS_TABLE': 'base-wecare-digital-AIInteractionsTable',
+            'SYSTEM_CONFIG_TABLE': 'base-wecare-digital-SystemConfigTable',
+        }
+    },
 ]
 
 def create_zip(source_file):
@@ -75,6 +110,33 @@ def create_zip(source_file):
     zip_buffer.seek(0)
     return zip_buffer.read()
 
+def add_schedule(lambda_client, name, schedule):
+    """Invoke a function on an EventBridge schedule expression."""
+    events = boto3.client('events', region_name=REGION)
+    rule_name = f'{name}-schedule'
+    rule_arn = events.put_rule(
+        Name=rule_name,
+        ScheduleExpression=schedule,
+        State='ENABLED',
+    )['RuleArn']
+    events.put_targets(
+        Rule=rule_name,
+        Targets=[{
+            'Id': name,
+            'Arn': f'arn:aws:lambda:{REGION}:{ACCOUNT_ID}:function:{name}',
+        }],
+    )
+    try:
+        lambda_client.add_permission(
+            FunctionName=name,
+            StatementId=f'events-invoke-{name}',
+            Action='lambda:InvokeFunction',
+            Principal='events.amazonaws.com',
+            SourceArn=rule_arn,
+        )
+    except lambda_client.exceptions.ResourceConflictException:
+        pass
+
 def main():
     lambda_client = boto3.client('lambda', region_name=REGION)
     
@@ -131,6 +193,15 @@ def main():
                 print(f"   ❌ Error creating function: {e}")
                 continue
         
+        # Scheduled functions are not behind API Gateway
+        if config.get('schedule'):
+            try:
+                add_schedule(lambda_client, name, config['schedule'])
+                print(f"   ✅ Scheduled: {config['schedule']}")
+            except Exception as e:
+                print(f"   ⚠️  Schedule error: {e}")
+            continue
+        
         # Add API Gateway permission
         try:
             lambda_client.add_permission(
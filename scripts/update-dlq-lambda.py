@@ -1,6 +1,7 @@
 import boto3
 import zipfile
 import io
+import os
 
 lambda_client = boto3.client('lambda', region_name='us-east-1')
 
@@ -9,11 +10,40 @@ zip_buffer = io.BytesIO()
 with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
     with open('amplify/functions/operations/dlq-replay/handler.py', 'r') as f:
         zf.writestr('handler.py', f.read())
+    # Handlers import shared utils as the top-level `utils` package
+    shared_utils_dir = 'amplify/functions/shared/utils'
+    for filename in os.listdir(shared_utils_dir):
+        if filename.endswith('.py'):
+            with open(os.path.join(shared_utils_dir, filename), 'r') as f:
+                zf.writestr(f'utils/{filename}', f.read())
 zip_buffer.seek(0)
 
 # Update function
-lambda_client.update_function_code(
+function_arn = lambda_client.update_function_code(
     FunctionName='wecare-dlq-replay',
     ZipFile=zip_buffer.read(),
-)
+)['FunctionArn']
 print('Updated wecare-dlq-replay')
+
+# Replay outbound-dlq (sends parked while a circuit breaker was open) on a schedule
+events = boto3.client('events', region_name='us-east-1')
+rule_arn = events.put_rule(
+    Name='wecare-dlq-replay-schedule',
+    ScheduleExpression='rate(5 minutes)',
+    State='ENABLED',
+)['RuleArn']
+events.put_targets(
+    Rule='wecare-dlq-replay-schedule',
+    Targets=[{'Id': 'wecare-dlq-replay', 'Arn': function_arn}],
+)
+try:
+    lambda_client.add_permission(
+        FunctionName='wecare-dlq-replay',
+        StatementId='events-invoke-wecare-dlq-replay',
+        Action='lambda:InvokeFunction',
+        Principal='events.amazonaws.com',
+        SourceArn=rule_arn,
+    )
+except lambda_client.exceptions.ResourceConflictException:
+    pass
+print('Scheduled wecare-dlq-replay: rate(5 minutes)')
@@ -30,12 +30,28 @@ ROUTES = [
     {'path': '/voice/calls', 'method': 'GET', 'lambda': 'wecare-voice-calls'},
     {'path': '/voice/calls/{callId}', 'method': 'GET', 'lambda': 'wecare-voice-calls'},
     {'path': '/voice/call', 'method': 'POST', 'lambda': 'wecare-voice-calls'},
+    {'path': '/voice/tts/prerender', 'method': 'POST', 'lambda': 'wecare-voice-calls'},
+    {'path': '/voice/campaigns', 'method': 'POST', 'lambda': 'wecare-voice-calls'},
+    {'path': '/voice/campaigns/{campaignId}', 'method': 'GET', 'lambda': 'wecare-voice-calls'},
     
     # Bulk Jobs
     {'path': '/bulk/jobs', 'method': 'GET', 'lambda': 'wecare-bulk-job-create'},
     {'path': '/bulk/jobs', 'method': 'POST', 'lambda': 'wecare-bulk-job-create'},
     {'path': '/bulk/jobs/{jobId}', 'method': 'GET', 'lambda': 'wecare-bulk-job-create'},
     
+    # Phone number registry
+    {'path': '/waba/registry', 'method': 'GET', 'lambda': 'wecare-waba-management'},
+    {'path': '/waba/registry/refresh', 'method': 'POST', 'lambda': 'wecare-waba-management'},
+    
+    # Templates
+    {'path': '/templates/sync', 'method': 'POST', 'lambda': 'wecare-whatsapp-template-management'},
+    
+    # Contact import/export
+    {'path': '/contacts/import/upload-url', 'method': 'POST', 'lambda': 'wecare-contacts-import-export'},
+    {'path': '/contacts/import', 'method': 'POST', 'lambda': 'wecare-contacts-import-export'},
+    {'path': '/contacts/export', 'method': 'POST', 'lambda': 'wecare-contacts-import-export'},
+    {'path': '/contacts/jobs/{jobId}', 'method': 'GET', 'lambda': 'wecare-contacts-import-export'},
+    
     # Payments
     {'path': '/payments', 'method': 'GET', 'lambda': 'wecare-payments-read'},
     {'path': '/payments/{paymentId}', 'method': 'GET', 'lambda': 'wecare-payments-read'},
@@ -2593,6 +2593,76 @@ export async function importContacts(contacts: Partial<Contact>[]): Promise<Impo
   return result;
 }
 
+// ============================================================================
+// SERVER-SIDE CONTACT IMPORT / EXPORT (wecare-contacts-import-export)
+// ============================================================================
+
+export interface ContactJob {
+  jobId: string;
+  type: 'import' | 'export';
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  format: string;
+  rowsRead?: number;
+  created?: number;
+  updated?: number;
+  skipped?: number;
+  failed?: number;
+  errors?: string[];
+  exported?: number;
+  downloadUrl?: string;
+  error?: string;
+}
+
+/**
+ * Upload a CSV/VCF file to S3 and start a server-side import job
+ */
+export async function startContactImport(file: File): Promise<ContactJob | null> {
+  const upload = await apiCall<{ uploadUrl: string; s3Key: string }>(`${API_BASE}/contacts/import/upload-url`, {
+    method: 'POST',
+    body: JSON.stringify({ fileName: file.name }),
+  });
+  if (!upload) return null;
+
+  const put = await fetch(upload.uploadUrl, { method: 'PUT', body: file });
+  if (!put.ok) return null;
+
+  return apiCall<ContactJob>(`${API_BASE}/contacts/import`, {
+    method: 'POST',
+    body: JSON.stringify({ s3Key: upload.s3Key }),
+  });
+}
+
+/**
+ * Start a server-side export job (gzip NDJSON or CSV)
+ */
+export async function startContactExport(format: 'ndjson' | 'csv' = 'csv'): Promise<ContactJob | null> {
+  return apiCall<ContactJob>(`${API_BASE}/contacts/export`, {
+    method: 'POST',
+    body: JSON.stringify({ format }),
+  });
+}
+
+export async function getContactJob(jobId: string): Promise<ContactJob | null> {
+  return apiCall<ContactJob>(`${API_BASE}/contacts/jobs/${jobId}`);
+}
+
+/**
+ * Poll a contact job until it completes or fails
+ */
+export async function waitForContactJob(
+  jobId: string,
+  onProgress?: (job: ContactJob) => void,
+  intervalMs: number = 2000
+): Promise<ContactJob | null> {
+  for (;;) {
+    const job = await getContactJob(jobId);
+    if (!job) return null;
+    onProgress?.(job);
+    if (job.status === 'completed' || job.status === 'failed') return job;
+    await delay(intervalMs);
+  }
+}
+
 // ============================================================================
 // AUTO-REPLY PER CONTACT
 // ============================================================================
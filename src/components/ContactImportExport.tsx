@@ -27,6 +27,9 @@ const ContactImportExport: React.FC<ContactImportExportProps> = ({ contacts, onI
   const [importing, setImporting] = useState(false);
   const [importResult, setImportResult] = useState<api.ImportResult | null>(null);
   const [previewData, setPreviewData] = useState<Partial<api.Contact>[]>([]);
+  const [selectedFile, setSelectedFile] = useState<File | null>(null);
+  const [jobProgress, setJobProgress] = useState<string | null>(null);
+  const [exporting, setExporting] = useState(false);
   const [dragOver, setDragOver] = useState(false);
   const fileInputRef = useRef<HTMLInputElement>(null);
   
@@ -63,6 +66,7 @@ const ContactImportExport: React.FC<ContactImportExportProps> = ({ contacts, onI
       }
       
       setPreviewData(parsed);
+      setSelectedFile(file);
       setImportResult(null);
     };
     reader.readAsText(file);
@@ -110,12 +114,27 @@ const ContactImportExport: React.FC<ContactImportExportProps> = ({ contacts, onI
     if (file) handleFileSelect(file);
   };
 
+  // The file is imported server-side; the parsed rows are only a preview
   const handleImport = async () => {
-    if (previewData.length === 0) return;
+    if (previewData.length === 0 || !selectedFile) return;
     
     setImporting(true);
     try {
-      const result = await api.importContacts(previewData);
+      const started = await api.startContactImport(selectedFile);
+      const job = started && await api.waitForContactJob(started.jobId, (j) => {
+        setJobProgress(`${j.rowsRead || 0} rows processed`);
+      });
+      if (!job) {
+        setImportResult({ total: previewData.length, created: 0, updated: 0, failed: previewData.length, errors: ['Import could not be started'] });
+        return;
+      }
+      const result: api.ImportResult = {
+        total: job.rowsRead || 0,
+        created: job.created || 0,
+        updated: job.updated || 0,
+        failed: job.failed || 0,
+        errors: job.error ? [job.error, ...(job.errors || [])] : job.errors || [],
+      };
       setImportResult(result);
       if (result.created > 0 || result.updated > 0) {
         onImportComplete?.();
@@ -124,16 +143,35 @@ const ContactImportExport: React.FC<ContactImportExportProps> = ({ contacts, onI
       console.error('Import failed:', err);
     } finally {
       setImporting(false);
+      setJobProgress(null);
     }
   };
 
-  const handleExport = () => {
-    const csv = api.exportContactsToCSV(contacts);
-    api.downloadFile(csv, `contacts_${new Date().toISOString().split('T')[0]}.csv`, 'text/csv');
+  const handleExport = async () => {
+    setExporting(true);
+    try {
+      const started = await api.startContactExport('csv');
+      const job = started && await api.waitForContactJob(started.jobId, (j) => {
+        setJobProgress(`${j.exported || 0} contacts exported`);
+      });
+      if (job?.status === 'completed' && job.downloadUrl) {
+        window.location.href = job.downloadUrl;
+        return;
+      }
+      // Fall back to the contacts already loaded in the browser
+      const csv = api.exportContactsToCSV(contacts);
+      api.downloadFile(csv, `contacts_${new Date().toISOString().split('T')[0]}.csv`, 'text/csv');
+    } catch (err) {
+      console.error('Export failed:', err);
+    } finally {
+      setExporting(false);
+      setJobProgress(null);
+    }
   };
 
   const clearPreview = () => {
     setPreviewData([]);
+    setSelectedFile(null);
     setImportResult(null);
     if (fileInputRef.current) {
       fileInputRef.current.value = '';
@@ -310,8 +348,8 @@ Rahul Kumar,+917654321098,rahul@gmail.com`;
     <div className="import-export-section">
       <div className="section-header">
         <h3>⊕ Add Contacts</h3>
-        <button className="export-btn" onClick={handleExport}>
-          ⬇️ Export CSV ({contacts.length})
+        <button className="export-btn" onClick={handleExport} disabled={exporting}>
+          {exporting ? `⏳ Exporting... ${jobProgress || ''}` : `⬇️ Export CSV (${contacts.length})`}
         </button>
       </div>
 
@@ -485,7 +523,7 @@ Rahul Kumar,+917654321098,rahul@gmail.com`;
                 onClick={handleImport}
                 disabled={importing}
               >
-                {importing ? 'Importing...' : `Import ${previewData.length} Contacts`}
+                {importing ? `Importing... ${jobProgress || ''}` : `Import ${previewData.length} Contacts`}
               </button>
             </div>
           )}